@@ -0,0 +1,146 @@
+"""Work with the invoice archive (invoice/archive/, see database/invoice_archive.py).
+
+  import   add the loose PDFs in invoice/ to the archive, looking up their sales
+           for the index; --delete-files removes them once archived
+  find     list archived invoices by number, date range, customer or amount
+  get      write the latest archived PDF of an invoice to a file
+  export   write the archived invoices matching the filters to one zip file
+
+Usage: python archive_invoices.py import [--delete-files]
+       python archive_invoices.py find [--number INV] [--from D] [--to D] [--customer C]
+                                       [--min-amount A] [--max-amount A] [--all-versions]
+       python archive_invoices.py get INV [--out FILE]
+       python archive_invoices.py export ZIP [filters as for find]
+"""
+import argparse
+import datetime
+import glob
+import os
+import re
+import sys
+
+from database.db_manager import DatabaseManager
+from database.invoice_archive import InvoiceArchive
+from screens.invoice_pdf import INVOICE_DIR, invoice_file_name
+from screens.invoice_templates import invoice_totals, sale_invoice
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database', 'inventory.db')
+
+
+def iso_date(value):
+    try:
+        return datetime.date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a YYYY-MM-DD date: {value}")
+
+
+def import_loose_files(db_manager, archive, delete_files):
+    paths = sorted(glob.glob(os.path.join(INVOICE_DIR, '*.pdf')))
+    numbers = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    sales = {sale['invoice_number']: sale['id'] for sale in db_manager.get_sales_for_invoices(invoice_numbers=numbers)} \
+        if numbers else {}
+
+    imported = unmatched = 0
+    for path, invoice_number in zip(paths, numbers):
+        with open(path, 'rb') as f:
+            pdf = f.read()
+        invoice = sale_invoice(db_manager, sales[invoice_number]) if invoice_number in sales else None
+        if invoice:
+            amount = invoice_totals(invoice, invoice['include_gst'])['rounded']
+        else:
+            # No sale with this number (older numbering, or a repair invoice);
+            # index what the file name tells
+            unmatched += 1
+            match = re.search(r'(\d{4})(\d{2})(\d{2})', invoice_number)
+            invoice = {'invoice_number': invoice_number,
+                       'invoice_date': "-".join(match.groups()) if match else None}
+            amount = None
+        archive.store(invoice, {}, pdf, amount)
+        imported += 1
+        if delete_files:
+            os.remove(path)
+
+    print(f"Archived {imported} invoice files, {unmatched} without a matching sale")
+    if imported and not delete_files:
+        print("The loose files were kept; run with --delete-files to remove them")
+
+
+def filters_from(args):
+    return {
+        'invoice_number': args.number,
+        'start_date': args.start,
+        'end_date': args.end,
+        'customer': args.customer,
+        'min_amount': args.min_amount,
+        'max_amount': args.max_amount,
+        'latest_only': not args.all_versions,
+    }
+
+
+def add_filters(parser):
+    parser.add_argument('--number', help="invoice number")
+    parser.add_argument('--from', dest='start', type=iso_date, help="first invoice date, YYYY-MM-DD")
+    parser.add_argument('--to', dest='end', type=iso_date, help="last invoice date, YYYY-MM-DD")
+    parser.add_argument('--customer', help="start of the customer's name or phone number")
+    parser.add_argument('--min-amount', type=float)
+    parser.add_argument('--max-amount', type=float)
+    parser.add_argument('--all-versions', action='store_true', help="include earlier versions of an invoice")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Work with the invoice archive")
+    parser.add_argument('--db', default=DB_PATH, help=argparse.SUPPRESS)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = commands.add_parser('import', help="archive the loose PDFs in invoice/")
+    import_parser.add_argument('--delete-files', action='store_true')
+
+    add_filters(commands.add_parser('find', help="list archived invoices"))
+
+    get_parser = commands.add_parser('get', help="write an archived invoice to a file")
+    get_parser.add_argument('invoice_number')
+    get_parser.add_argument('--out', help="file to write, <invoice number>.pdf by default")
+
+    export_parser = commands.add_parser('export', help="write archived invoices to a zip file")
+    export_parser.add_argument('zip_path')
+    add_filters(export_parser)
+
+    args = parser.parse_args()
+    db_manager = DatabaseManager(args.db)
+    db_manager.setup_database()
+    archive = InvoiceArchive(db_manager)
+
+    if args.command == 'import':
+        import_loose_files(db_manager, archive, args.delete_files)
+
+    elif args.command == 'find':
+        entries = archive.find(**filters_from(args))
+        print(f"{'invoice':<22} {'date':<10} {'customer':<24} {'phone':<14} {'amount':>10}  archived")
+        for entry in entries:
+            amount = f"{entry['amount']:,.2f}" if entry['amount'] is not None else "-"
+            print(f"{entry['invoice_number']:<22} {entry['invoice_date'] or '-':<10} "
+                  f"{(entry['customer_name'] or '-')[:24]:<24} {entry['customer_phone'] or '-':<14} "
+                  f"{amount:>10}  {entry['created_at']}")
+        print(f"{len(entries)} invoices")
+
+    elif args.command == 'get':
+        pdf = archive.get(args.invoice_number)
+        if pdf is None:
+            print(f"Invoice {args.invoice_number} is not in the archive")
+            sys.exit(1)
+        out = args.out or invoice_file_name(args.invoice_number)
+        with open(out, 'wb') as f:
+            f.write(pdf)
+        print(f"Wrote {out}")
+
+    elif args.command == 'export':
+        entries = archive.find(**filters_from(args))
+        if not entries:
+            print("No archived invoices match")
+            sys.exit(1)
+        count = archive.export_zip(args.zip_path, entries)
+        print(f"Wrote {count} invoices to {args.zip_path}")
+
+
+if __name__ == "__main__":
+    main()
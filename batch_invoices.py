@@ -0,0 +1,135 @@
+"""Render sale invoices into the invoice archive without opening the application.
+
+Selects the sales made in a date range and/or the sales with the given
+invoice numbers, renders them with the same templates and page set up as the
+invoice screen and stores the PDFs in the invoice archive (invoice/archive/,
+see database/invoice_archive.py). With --out the PDFs are also written to a
+directory as <invoice number>.pdf. Rendering runs on an offscreen Qt
+platform in worker processes, one per CPU core by default, and the run ends
+with a throughput report. Invoices rendered before, by an earlier run or by
+the invoice screen, are taken from the rendered invoice cache in
+invoice/cache/.
+
+Usage: python batch_invoices.py [--from YYYY-MM-DD] [--to YYYY-MM-DD]
+       [--invoices INV ...] [--out DIR] [--workers N] [--skip-existing]
+"""
+import argparse
+import datetime
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from database.db_manager import DatabaseManager
+from screens.invoice_batch import BATCH_CHUNK_SIZE, init_worker, render_sale_invoices
+from screens.invoice_pdf import invoice_file_name
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database', 'inventory.db')
+
+
+def iso_date(value):
+    try:
+        return datetime.date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a YYYY-MM-DD date: {value}")
+
+
+def select_jobs(args):
+    """(sale_id, path) for the sales to render; path is None without --out"""
+    db_manager = DatabaseManager(args.db)
+    # The database may not have been opened by this version of the app yet
+    db_manager.setup_database()
+    sales = db_manager.get_sales_for_invoices(args.start, args.end, args.invoices)
+    if args.invoices:
+        found = {sale['invoice_number'] for sale in sales}
+        for invoice_number in args.invoices:
+            if invoice_number not in found:
+                print(f"No sale with invoice number {invoice_number}")
+
+    archived = set()
+    if args.skip_existing:
+        archived = {entry['invoice_number'] for entry in
+                    db_manager.find_archived_invoices(start_date=args.start, end_date=args.end)}
+
+    jobs = []
+    skipped = 0
+    for sale in sales:
+        invoice_number = sale['invoice_number'] or f"SALE-{sale['id']}"
+        path = os.path.join(args.out, invoice_file_name(invoice_number)) if args.out else None
+        if args.skip_existing and invoice_number in archived and (path is None or os.path.exists(path)):
+            skipped += 1
+            continue
+        jobs.append((sale['id'], path))
+    if skipped:
+        print(f"Skipping {skipped} invoices already archived")
+    return jobs
+
+
+def run(jobs, args):
+    """Render the jobs and return the results of every job"""
+    chunks = [jobs[i:i + BATCH_CHUNK_SIZE] for i in range(0, len(jobs), BATCH_CHUNK_SIZE)]
+    workers = max(1, min(args.workers, len(chunks)))
+    results = []
+
+    def report(chunk_results):
+        results.extend(chunk_results)
+        for sale_id, _, _, _, error in chunk_results:
+            if error:
+                print(f"Sale {sale_id}: {error}")
+        print(f"{len(results)}/{len(jobs)} invoices", end='\r', flush=True)
+
+    if workers == 1:
+        # Not worth starting a process; render here
+        init_worker(args.db)
+        for chunk in chunks:
+            report(render_sale_invoices(chunk))
+    else:
+        # spawn so every worker starts its own Qt application cleanly
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=init_worker, initargs=(args.db,)) as pool:
+            futures = [pool.submit(render_sale_invoices, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                report(future.result())
+    print()
+    return results, workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render sale invoices into the invoice archive")
+    parser.add_argument('--from', dest='start', type=iso_date, help="first sale date, YYYY-MM-DD")
+    parser.add_argument('--to', dest='end', type=iso_date, help="last sale date, YYYY-MM-DD")
+    parser.add_argument('--invoices', nargs='+', help="invoice numbers to render")
+    parser.add_argument('--out', help="also write the PDFs to this directory")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument('--skip-existing', action='store_true', help="leave invoices already archived alone")
+    parser.add_argument('--db', default=DB_PATH, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if not (args.start or args.end or args.invoices):
+        parser.error("give a date range with --from/--to, invoice numbers with --invoices, or both")
+
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+    jobs = select_jobs(args)
+    if not jobs:
+        print("No invoices to render")
+        return
+
+    started = time.perf_counter()
+    results, workers = run(jobs, args)
+    elapsed = time.perf_counter() - started
+
+    written = [result for result in results if not result[4]]
+    failed = len(results) - len(written)
+    size = sum(result[2] for result in written)
+    render_time = sum(result[3] for result in results)
+    print(f"Archived {len(written)} invoices ({size / 1024 / 1024:.1f} MB of PDF)"
+          + (f", also written to {args.out}" if args.out else "") + f", {failed} failed")
+    print(f"{elapsed:.1f} s with {workers} workers: {len(results) / elapsed:.1f} invoices/s, "
+          f"{render_time / len(results) * 1000:.0f} ms per invoice in a worker")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Measure the QR scanner's decode routine offline, without a webcam.
+
+Label images (by default the item QR images in qr/) are placed in a camera
+sized frame and degraded with blur, motion blur, rotation, noise, glare and
+low light. Recorded video files can be added with --video. Every frame is
+decoded with DecodeWorker.decode_frame, the routine the scanner screen runs
+on its decode thread, under each pipeline configuration.
+
+For each configuration and condition the report shows the share of frames
+decoded to the expected item, false reads (a code was decoded but it is
+not the expected one) and decode time per frame. The expected item of an
+image is its file name, e.g. qr/P1I1-010a389f.png holds P1I1-010a389f.
+Videos are checked against --expect when it is given; otherwise any
+decoded code counts as a read.
+
+Usage: python benchmark_qr_decoding.py [--images DIR ...] [--video FILE ...]
+       [--expect CODE] [--frames N] [--label-px N] [--min-rate R]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import QCoreApplication
+
+from screens.qr_payload import parse_scanned_code
+from screens.qr_pipeline import DecodeWorker, ScanMetrics, zbar_decode, DECODE_MAX_SIDE
+
+FRAME_SIZE = (480, 640)
+# Side of the label as the camera sees it
+DEFAULT_LABEL_PX = 200
+# Frames per label, with the label drifting a little between them as in a
+# hand held scan, so the region-of-interest pass gets exercised
+DEFAULT_FRAMES = 4
+
+CONDITIONS = ['clean', 'blur', 'motion', 'rotate 15', 'rotate 45', 'noise', 'glare', 'dim']
+
+# Pipeline configurations, as DecodeWorker keyword arguments
+CONFIGURATIONS = {
+    'default': {},
+    'no region pass': {'roi_margin': None},
+    'downscale 320': {'max_side': 320},
+    'no downscale': {'max_side': 10000},
+    'full res every frame': {'full_res_every': 1},
+}
+if zbar_decode is not None:
+    CONFIGURATIONS['default, OpenCV'] = {'backend': 'opencv'}
+
+
+def load_labels(directories):
+    """(expected unique ID, grayscale image) for the PNG and JPEG files in the directories"""
+    labels = []
+    for directory in directories:
+        paths = sorted(glob.glob(os.path.join(directory, '*.png')) + glob.glob(os.path.join(directory, '*.jpg')))
+        for path in paths:
+            image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+            if image is None:
+                print(f"Skipping unreadable image {path}")
+                continue
+            labels.append((os.path.splitext(os.path.basename(path))[0], image))
+    return labels
+
+
+def place(label, side, frame_index, condition, rng):
+    """A camera frame holding the label, degraded for the condition"""
+    height, width = FRAME_SIZE
+    frame = np.full(FRAME_SIZE, 170, dtype=np.uint8)
+    label = cv2.resize(label, (side, side), interpolation=cv2.INTER_AREA)
+
+    if condition.startswith('rotate'):
+        angle = float(condition.split()[1])
+        diagonal = int(side * 1.5)
+        canvas = np.full((diagonal, diagonal), 170, dtype=np.uint8)
+        offset = (diagonal - side) // 2
+        canvas[offset:offset + side, offset:offset + side] = label
+        matrix = cv2.getRotationMatrix2D((diagonal / 2, diagonal / 2), angle, 1.0)
+        label = cv2.warpAffine(canvas, matrix, (diagonal, diagonal), borderValue=170)
+
+    # Drift a few pixels per frame
+    size = label.shape[0]
+    x = (width - size) // 2 + int(rng.integers(-8, 9)) + frame_index * 3
+    y = (height - size) // 2 + int(rng.integers(-8, 9)) - frame_index * 2
+    x, y = min(max(x, 0), width - size), min(max(y, 0), height - size)
+    frame[y:y + size, x:x + size] = label
+
+    if condition == 'blur':
+        frame = cv2.GaussianBlur(frame, (0, 0), 1.5)
+    elif condition == 'motion':
+        kernel = np.zeros((9, 9), dtype=np.float32)
+        kernel[4, :] = 1 / 9
+        frame = cv2.filter2D(frame, -1, kernel)
+    elif condition == 'noise':
+        frame = np.clip(frame + rng.normal(0, 25, frame.shape), 0, 255).astype(np.uint8)
+    elif condition == 'glare':
+        # A bright washed out spot over part of the label
+        yy, xx = np.mgrid[0:height, 0:width]
+        cx, cy = x + size * rng.uniform(0.3, 0.7), y + size * rng.uniform(0.3, 0.7)
+        spot = np.exp(-((xx - cx) ** 2 + (yy - cy) ** 2) / (2 * (size / 5) ** 2))
+        frame = np.clip(frame + spot * 220, 0, 255).astype(np.uint8)
+    elif condition == 'dim':
+        frame = np.clip(frame * 0.3 + rng.normal(0, 6, frame.shape), 0, 255).astype(np.uint8)
+    return frame
+
+
+def video_frames(path):
+    """Grayscale frames of a recorded video"""
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        print(f"Could not open video {path}")
+        return
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            yield cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    finally:
+        capture.release()
+
+
+class Tally:
+    """Frame counts and decode times for one configuration and condition"""
+
+    def __init__(self):
+        self.frames = 0
+        self.decoded = 0
+        self.false_reads = 0
+        self.timings = []
+
+    def add(self, worker, detector, gray, expected):
+        started = time.perf_counter()
+        results = worker.decode_frame(gray, detector)
+        self.timings.append((time.perf_counter() - started) * 1000)
+        self.frames += 1
+
+        if expected is None:
+            self.decoded += bool(results)
+            return
+        matched = False
+        for data, _ in results:
+            try:
+                scanned = parse_scanned_code(data)
+            except ValueError:
+                scanned = None
+            if scanned and scanned['unique_id'].upper() == expected.upper():
+                matched = True
+            else:
+                self.false_reads += 1
+        self.decoded += matched
+
+    def row(self, name, condition):
+        rate = self.decoded / self.frames if self.frames else 0
+        median = np.percentile(self.timings, 50) if self.timings else 0
+        p95 = np.percentile(self.timings, 95) if self.timings else 0
+        return (f"{name:<22} {condition:<12} {self.frames:>7} {rate:>8.0%} {self.false_reads:>6} "
+                f"{median:>10.1f} {p95:>7.1f} {max(self.timings, default=0):>7.1f}")
+
+
+def run(args):
+    labels = load_labels(args.images)
+    if not labels and not args.video:
+        print("No label images or videos to decode")
+        return {}
+
+    header = (f"{'configuration':<22} {'condition':<12} {'frames':>7} {'decoded':>8} {'false':>6} "
+              f"{'median ms':>10} {'p95 ms':>7} {'max ms':>7}")
+    print(f"{len(labels)} label images, {len(args.video)} videos, label {args.label_px} px, "
+          f"{args.frames} frames per label, decoder max side {DECODE_MAX_SIDE}")
+    print(header)
+
+    rates = {}
+    for name, options in CONFIGURATIONS.items():
+        worker = DecodeWorker(None, ScanMetrics(), **options)
+        detector = worker.make_detector()
+        total = Tally()
+
+        for condition in CONDITIONS if labels else []:
+            # Same frames for every configuration
+            rng = np.random.default_rng(1)
+            tally = Tally()
+            for expected, image in labels:
+                worker.reset()
+                for index in range(args.frames):
+                    gray = place(image, args.label_px, index, condition, rng)
+                    tally.add(worker, detector, gray, expected)
+            print(tally.row(name, condition))
+            total.frames += tally.frames
+            total.decoded += tally.decoded
+            total.false_reads += tally.false_reads
+            total.timings += tally.timings
+
+        for path in args.video:
+            worker.reset()
+            tally = Tally()
+            for gray in video_frames(path):
+                tally.add(worker, detector, gray, args.expect)
+            print(tally.row(name, os.path.basename(path)[:12]))
+            total.frames += tally.frames
+            total.decoded += tally.decoded
+            total.false_reads += tally.false_reads
+            total.timings += tally.timings
+
+        print(total.row(name, 'all'))
+        rates[name] = total.decoded / total.frames if total.frames else 0
+    return rates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the QR scanner decode routine offline")
+    parser.add_argument('--images', nargs='*', default=['qr'], help="directories of label images")
+    parser.add_argument('--video', nargs='*', default=[], help="recorded video files")
+    parser.add_argument('--expect', help="code the videos should decode to")
+    parser.add_argument('--frames', type=int, default=DEFAULT_FRAMES, help="frames per label image")
+    parser.add_argument('--label-px', type=int, default=DEFAULT_LABEL_PX, help="label side in the frame")
+    parser.add_argument('--min-rate', type=float,
+                        help="exit with an error if the default configuration decodes fewer frames")
+    args = parser.parse_args()
+
+    # DecodeWorker is a QThread, which needs an application object; it is
+    # referenced until the run is over so it is not collected early
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    rates = run(args)
+    del app
+    if args.min_rate is not None and rates.get('default', 0) < args.min_rate:
+        print(f"Default configuration decoded {rates.get('default', 0):.0%}, below {args.min_rate:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
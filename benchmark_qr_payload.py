@@ -0,0 +1,94 @@
+"""Compare decode success and time for the legacy JSON and compact item QR payloads.
+
+Each code is rendered, scaled to a few printed label sizes, placed in a
+camera sized frame and degraded the way worn labels and cheap cameras
+degrade it, then decoded with the scanner's decoder.
+
+Usage: python benchmark_qr_payload.py [items_per_condition]
+"""
+import itertools
+import json
+import sys
+import time
+import uuid
+
+import cv2
+import numpy as np
+
+from screens.qr_payload import encode_item_payload, make_qr, parse_scanned_code
+from screens.qr_pipeline import decode_image
+
+# Side of the label as seen by the camera
+LABEL_SIDES_PX = [120, 200, 320]
+FRAME_SIZE = (480, 640)
+
+
+def legacy_payload(unique_id):
+    return json.dumps({
+        "item_id": unique_id,
+        "product_id": 12,
+        "name": "Shimano 11 speed chain",
+        "price": 1299.0,
+        "category": "Parts"
+    })
+
+
+def render(payload, side):
+    qr = make_qr(payload, box_size=1, border=4)
+    modules = np.array(qr.get_matrix(), dtype=np.uint8)
+    image = np.where(modules, 0, 255).astype(np.uint8)
+    return cv2.resize(image, (side, side), interpolation=cv2.INTER_AREA), qr.version
+
+
+def degrade(label, condition, rng):
+    frame = np.full(FRAME_SIZE, 190, dtype=np.uint8)
+    side = label.shape[0]
+    y, x = 80, 160
+    frame[y:y + side, x:x + side] = label
+
+    if condition == 'blur':
+        frame = cv2.GaussianBlur(frame, (0, 0), 1.2)
+    elif condition == 'noise':
+        frame = np.clip(frame + rng.normal(0, 25, frame.shape), 0, 255).astype(np.uint8)
+    elif condition == 'worn':
+        # White scuffs across the label
+        for _ in range(6):
+            cx, cy = rng.integers(x, x + side), rng.integers(y, y + side)
+            cv2.circle(frame, (int(cx), int(cy)), int(rng.integers(side // 60, side // 30 + 1)), 255, -1)
+    return frame
+
+
+def run(items):
+    rng = np.random.default_rng(0)
+    detector = cv2.QRCodeDetector()
+    unique_ids = [f"P12I{i + 1}-{uuid.uuid4().hex[:8].upper()}" for i in range(items)]
+    formats = {'legacy JSON': legacy_payload, 'compact': encode_item_payload}
+
+    print(f"{'format':<12} {'label px':>8} {'condition':<8} {'version':>7} {'decoded':>8} "
+          f"{'median ms':>10} {'p95 ms':>7}")
+    for name, encode in formats.items():
+        for side, condition in itertools.product(LABEL_SIDES_PX, ('clean', 'blur', 'noise', 'worn')):
+            decoded = 0
+            timings = []
+            versions = set()
+            for unique_id in unique_ids:
+                label, version = render(encode(unique_id), side)
+                versions.add(version)
+                frame = degrade(label, condition, rng)
+
+                started = time.perf_counter()
+                results = decode_image(frame, detector)
+                timings.append((time.perf_counter() - started) * 1000)
+
+                for data, _ in results:
+                    scanned = parse_scanned_code(data)
+                    if scanned and scanned['unique_id'] == unique_id:
+                        decoded += 1
+                        break
+
+            print(f"{name:<12} {side:>8} {condition:<8} {max(versions):>7} {decoded / items:>8.0%} "
+                  f"{np.percentile(timings, 50):>10.1f} {np.percentile(timings, 95):>7.1f}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
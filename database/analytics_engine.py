@@ -0,0 +1,339 @@
+import time
+
+import numpy as np
+
+
+def _group_sum(codes, weights, size):
+    """Sum weights per integer group code"""
+    return np.bincount(codes, weights=weights, minlength=size)
+
+
+def _counted_sales(codes, sale_codes, quantities, amounts, size):
+    """Number of sales per group code, not counting those whose quantities
+    and amounts in the group cancel out (like COUNTED_SALE_SQL)"""
+    base = int(sale_codes.max()) + 1 if len(sale_codes) else 1
+    pairs, inverse = np.unique(codes * base + sale_codes, return_inverse=True)
+    net_quantities = np.bincount(inverse, weights=quantities, minlength=len(pairs))
+    net_amounts = np.bincount(inverse, weights=amounts, minlength=len(pairs))
+    counted = (net_quantities != 0) | (np.abs(net_amounts) >= 0.005)
+    return np.bincount(pairs[counted] // base, minlength=size)
+
+
+class AnalyticsEngine:
+    """Columnar in-memory copy of revenue facts, products and expenses.
+
+    Rows are loaded into NumPy arrays once and then refreshed incrementally:
+    revenue facts are append-only and expenses almost always so, and
+    refresh() only fetches rows newer than the last ones seen, reloading the
+    expenses in full after one was edited or deleted. Queries filter a date range with
+    boolean masks and aggregate with bincount, and return the same shapes as
+    the matching DatabaseManager analytics methods.
+
+    Date ranges have the same meaning as in the SQL methods: revenue facts
+    match occurred_at BETWEEN start_date AND end_date, expenses match date BETWEEN.
+    """
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self.last_refresh_ms = 0
+
+        # Revenue facts; fact_sales holds a code per sale or repair job
+        self.fact_ids = np.empty(0, dtype=np.int64)
+        self.fact_times = np.empty(0, dtype='datetime64[s]')
+        self.fact_sales = np.empty(0, dtype=np.int64)
+        self.fact_repairs = np.empty(0, dtype=bool)
+        self.fact_services = np.empty(0, dtype=bool)
+        self.fact_product_ids = np.empty(0, dtype=np.int64)  # -1 for service lines
+        self.fact_categories = np.empty(0, dtype=np.int64)
+        self.fact_quantities = np.empty(0, dtype=np.float64)
+        self.fact_amounts = np.empty(0, dtype=np.float64)
+        self.fact_charged = np.empty(0, dtype=np.float64)  # after discount, including tax
+        self.fact_taxes = np.empty(0, dtype=np.float64)
+        self.fact_costs = np.empty(0, dtype=np.float64)
+        self.fact_payments = np.empty(0, dtype=np.int64)
+        self.sale_keys = []  # code -> (source, source_id)
+        self.sale_codes = {}
+        self.category_names = []
+        self.category_codes = {}
+        self.payment_methods = []  # code -> method, None for facts without one
+        self.payment_codes = {}
+
+        # Expenses, and the database's count of expense edits they reflect
+        self.expense_changes = None
+        self.expense_ids = np.empty(0, dtype=np.int64)
+        self.expense_dates = np.empty(0, dtype='datetime64[D]')
+        self.expense_categories = np.empty(0, dtype=np.int64)
+        self.expense_amounts = np.empty(0, dtype=np.float64)
+        self.expense_category_names = []
+        self.expense_category_codes = {}
+
+        # Products, reloaded in full on every refresh
+        self.product_ids = np.empty(0, dtype=np.int64)
+        self.product_names = []
+        self.product_categories = []
+        # Position of each fact's product, -1 if it has none or it no longer exists
+        self.fact_products = np.empty(0, dtype=np.int64)
+
+    def refresh(self):
+        """Load rows added since the last refresh and reload products"""
+        started = time.perf_counter()
+        rows = self.db_manager.get_analytics_rows(
+            int(self.fact_ids[-1]) if len(self.fact_ids) else 0,
+            int(self.expense_ids[-1]) if len(self.expense_ids) else 0,
+            self.expense_changes
+        )
+
+        if rows['expense_changes'] != self.expense_changes:
+            # Every expense was returned; drop the copies loaded before
+            self.expense_ids = self.expense_ids[:0]
+            self.expense_dates = self.expense_dates[:0]
+            self.expense_categories = self.expense_categories[:0]
+            self.expense_amounts = self.expense_amounts[:0]
+            self.expense_changes = rows['expense_changes']
+
+        if rows['facts']:
+            (ids, occurred_at, sources, source_ids, line_types, product_ids, categories,
+             quantities, amounts, discounts, taxes, costs, methods) = zip(*rows['facts'])
+            sales = [self._code(key, self.sale_keys, self.sale_codes) for key in zip(sources, source_ids)]
+            category_codes = [self._code(category or 'Uncategorized', self.category_names, self.category_codes)
+                              for category in categories]
+            payment_codes = [self._code(method or None, self.payment_methods, self.payment_codes)
+                             for method in methods]
+            amounts = np.array(amounts, dtype=np.float64)
+            taxes = np.array(taxes, dtype=np.float64)
+            charged = amounts - np.array(discounts, dtype=np.float64) + taxes
+
+            self.fact_ids = np.concatenate([self.fact_ids, np.array(ids, dtype=np.int64)])
+            self.fact_times = np.concatenate([self.fact_times, np.array(occurred_at, dtype='datetime64[s]')])
+            self.fact_sales = np.concatenate([self.fact_sales, np.array(sales, dtype=np.int64)])
+            self.fact_repairs = np.concatenate([self.fact_repairs, np.array(sources) == 'repair'])
+            self.fact_services = np.concatenate([self.fact_services, np.array(line_types) == 'service'])
+            self.fact_product_ids = np.concatenate([
+                self.fact_product_ids,
+                np.array([-1 if product_id is None else product_id for product_id in product_ids], dtype=np.int64)])
+            self.fact_categories = np.concatenate([self.fact_categories, np.array(category_codes, dtype=np.int64)])
+            self.fact_quantities = np.concatenate([self.fact_quantities, np.array(quantities, dtype=np.float64)])
+            self.fact_amounts = np.concatenate([self.fact_amounts, amounts])
+            self.fact_charged = np.concatenate([self.fact_charged, charged])
+            self.fact_taxes = np.concatenate([self.fact_taxes, taxes])
+            self.fact_costs = np.concatenate([self.fact_costs, np.array(costs, dtype=np.float64)])
+            self.fact_payments = np.concatenate([self.fact_payments, np.array(payment_codes, dtype=np.int64)])
+
+        if rows['expenses']:
+            ids, dates, categories, amounts = zip(*rows['expenses'])
+            codes = [self._code(category or 'Uncategorized', self.expense_category_names, self.expense_category_codes)
+                     for category in categories]
+            self.expense_ids = np.concatenate([self.expense_ids, np.array(ids, dtype=np.int64)])
+            self.expense_dates = np.concatenate([self.expense_dates, np.array(dates, dtype='datetime64[D]')])
+            self.expense_categories = np.concatenate([self.expense_categories, np.array(codes, dtype=np.int64)])
+            self.expense_amounts = np.concatenate([self.expense_amounts, np.array(amounts, dtype=np.float64)])
+
+        self._load_products(rows['products'])
+        self.last_refresh_ms = (time.perf_counter() - started) * 1000
+
+    def _num_sales(self, codes, mask, size):
+        """Number of sales per group code among the facts selected by mask"""
+        return _counted_sales(codes, self.fact_sales[mask], self.fact_quantities[mask],
+                              self.fact_amounts[mask], size)
+
+    def _code(self, value, names, codes):
+        """Integer code for a category-like value, adding it if unseen"""
+        if value not in codes:
+            codes[value] = len(names)
+            names.append(value)
+        return codes[value]
+
+    def _load_products(self, products):
+        ids, names, categories = zip(*products) if products else ((), (), ())
+
+        self.product_ids = np.array(ids, dtype=np.int64)
+        self.product_names = list(names)
+        self.product_categories = [category or 'Uncategorized' for category in categories]
+
+        # Facts whose product was deleted have no name to list them under
+        positions = np.searchsorted(self.product_ids, self.fact_product_ids)
+        positions = np.minimum(positions, max(len(self.product_ids) - 1, 0))
+        found = (self.product_ids[positions] == self.fact_product_ids) if len(self.product_ids) else \
+            np.zeros(len(self.fact_product_ids), dtype=bool)
+        self.fact_products = np.where(found, positions, -1)
+
+    def _fact_mask(self, start_date, end_date):
+        if start_date and end_date:
+            return (self.fact_times >= np.datetime64(start_date, 's')) & \
+                   (self.fact_times <= np.datetime64(end_date, 's'))
+        return np.ones(len(self.fact_ids), dtype=bool)
+
+    def _expense_mask(self, start_date, end_date):
+        if start_date and end_date:
+            return (self.expense_dates >= np.datetime64(start_date, 'D')) & \
+                   (self.expense_dates <= np.datetime64(end_date, 'D'))
+        return np.ones(len(self.expense_ids), dtype=bool)
+
+    def sales_by_period(self, period_type, start_date, end_date):
+        """Sales aggregated by day, week or month, like get_sales_by_period"""
+        mask = self._fact_mask(start_date, end_date)
+        times = self.fact_times[mask]
+        if not len(times):
+            return []
+
+        days = times.astype('datetime64[D]')
+        if period_type == 'week':
+            # Same numbering as SQLite's %W: weeks start on Monday, days before
+            # the year's first Monday are week 00
+            years = days.astype('datetime64[Y]')
+            day_of_year = (days - years.astype('datetime64[D]')).astype(np.int64)
+            weekday = (days.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+            keys = (years.astype(np.int64) + 1970) * 100 + (day_of_year + 7 - weekday) // 7
+        elif period_type == 'month':
+            keys = days.astype('datetime64[M]').astype(np.int64)
+        else:
+            keys = days.astype(np.int64)
+
+        periods, codes = np.unique(keys, return_inverse=True)
+        num_sales = self._num_sales(codes, mask, len(periods))
+        total_sales = _group_sum(codes, self.fact_amounts[mask], len(periods))
+        final_sales = _group_sum(codes, self.fact_charged[mask], len(periods))
+
+        results = []
+        for i, key in enumerate(periods.tolist()):
+            if period_type == 'week':
+                label = f"{key // 100}-{key % 100:02d}"
+            elif period_type == 'month':
+                label = str(np.datetime64(key, 'M'))
+            else:
+                label = str(np.datetime64(key, 'D'))
+            results.append({
+                'period': label,
+                'num_sales': int(num_sales[i]),
+                'total_sales': float(total_sales[i]),
+                'final_sales': float(final_sales[i]),
+                'avg_sale_value': float(final_sales[i] / num_sales[i]) if num_sales[i] else 0
+            })
+        return results
+
+    def sales_by_payment_method(self, start_date=None, end_date=None):
+        """Sales grouped by payment method, like get_sales_by_payment_method"""
+        mask = self._fact_mask(start_date, end_date)
+        size = len(self.payment_methods)
+        num_sales = self._num_sales(self.fact_payments[mask], mask, size)
+        num_facts = np.bincount(self.fact_payments[mask], minlength=size)
+        amounts = _group_sum(self.fact_payments[mask], self.fact_charged[mask], size)
+
+        # Percentages are of sales with a known payment method
+        known = np.array([method is not None for method in self.payment_methods], dtype=bool)
+        total_amount = amounts[known].sum() if size else 0
+
+        payment_data = {}
+        for code in np.argsort(-amounts, kind='stable'):
+            if num_facts[code] == 0:
+                continue
+            method = self.payment_methods[code]
+            payment_data[method or 'Other'] = {
+                'payment_method': method,
+                'num_sales': int(num_sales[code]),
+                'total_amount': float(amounts[code]),
+                'percentage': float(amounts[code] / total_amount * 100) if total_amount > 0 else 0
+            }
+        return payment_data
+
+    def sales_by_category(self, start_date=None, end_date=None):
+        """Revenue, cost and margin per product category, like get_sales_by_category"""
+        mask = self._fact_mask(start_date, end_date)
+        categories = self.fact_categories[mask]
+        if not len(categories):
+            return {}
+
+        size = len(self.category_names)
+        revenue = _group_sum(categories, self.fact_amounts[mask], size)
+        cost = _group_sum(categories, self.fact_costs[mask], size)
+        quantity_sold = _group_sum(categories, self.fact_quantities[mask], size)
+        num_sales = self._num_sales(categories, mask, size)
+        num_facts = np.bincount(categories, minlength=size)
+        total_revenue = revenue.sum()
+
+        category_data = {}
+        for code in np.argsort(-revenue, kind='stable'):
+            if num_facts[code] == 0:
+                continue
+            category_data[self.category_names[code]] = {
+                'revenue': float(revenue[code]),
+                'cost': float(cost[code]),
+                'margin': float(revenue[code] - cost[code]),
+                'quantity_sold': int(quantity_sold[code]),
+                'num_sales': int(num_sales[code]),
+                'percentage': float(revenue[code] / total_revenue * 100) if total_revenue > 0 else 0
+            }
+        return category_data
+
+    def top_selling_products(self, start_date=None, end_date=None, limit=10):
+        """Top products by quantity sold, like get_top_selling_products"""
+        mask = self._fact_mask(start_date, end_date) & (self.fact_products >= 0)
+        products = self.fact_products[mask]
+        if not len(products):
+            return []
+
+        size = len(self.product_ids)
+        quantities = _group_sum(products, self.fact_quantities[mask], size)
+        revenue = _group_sum(products, self.fact_amounts[mask], size)
+        num_sales = self._num_sales(products, mask, size)
+
+        sold = np.flatnonzero(np.bincount(products, minlength=size))
+        top = sold[np.argsort(-quantities[sold], kind='stable')][:limit]
+        return [{
+            'id': int(self.product_ids[i]),
+            'name': self.product_names[i],
+            'category': self.product_categories[i],
+            'total_quantity': int(quantities[i]),
+            'total_revenue': float(revenue[i]),
+            'num_sales': int(num_sales[i])
+        } for i in top]
+
+    def total_expenses(self, start_date=None, end_date=None):
+        """Total expenses in a date range"""
+        return float(self.expense_amounts[self._expense_mask(start_date, end_date)].sum())
+
+    def expenses_by_category(self, start_date=None, end_date=None):
+        """Expenses grouped by category, like get_expenses_by_category"""
+        mask = self._expense_mask(start_date, end_date)
+        size = len(self.expense_category_names)
+        num_expenses = np.bincount(self.expense_categories[mask], minlength=size)
+        amounts = _group_sum(self.expense_categories[mask], self.expense_amounts[mask], size)
+        total = amounts.sum() if size else 0
+
+        category_data = {}
+        for code in np.argsort(-amounts, kind='stable'):
+            if num_expenses[code] == 0:
+                continue
+            category_data[self.expense_category_names[code]] = {
+                'num_expenses': int(num_expenses[code]),
+                'total_amount': float(amounts[code]),
+                'percentage': float(amounts[code] / total * 100) if total > 0 else 0
+            }
+        return category_data
+
+    def profit_analysis(self, start_date=None, end_date=None):
+        """Revenue, cost, expenses and margins, like get_profit_analysis"""
+        mask = self._fact_mask(start_date, end_date)
+        charged = self.fact_charged[mask]
+
+        total_revenue = float(charged.sum())
+        total_cost = float(self.fact_costs[mask].sum())
+        expense_mask = self._expense_mask(start_date, end_date)
+        total_expenses = float(self.expense_amounts[expense_mask].sum())
+
+        gross_profit = total_revenue - total_cost
+        net_profit = gross_profit - total_expenses
+        return {
+            'total_revenue': total_revenue,
+            'total_cost': total_cost,
+            'num_sales': int(self._num_sales(np.zeros(int(mask.sum()), dtype=np.int64), mask, 1)[0]),
+            'num_items_sold': int(self.fact_quantities[mask & ~self.fact_services].sum()),
+            'repair_revenue': float(charged[self.fact_repairs[mask]].sum()),
+            'total_tax': float(self.fact_taxes[mask].sum()),
+            'total_expenses': total_expenses,
+            'num_expenses': int(expense_mask.sum()),
+            'gross_profit': gross_profit,
+            'net_profit': net_profit,
+            'gross_margin': (gross_profit / total_revenue * 100) if total_revenue > 0 else 0,
+            'net_margin': (net_profit / total_revenue * 100) if total_revenue > 0 else 0
+        }
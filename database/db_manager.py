@@ -3,6 +3,53 @@ import os
 import datetime
 import uuid
 import hashlib
+import time
+
+# Repair job statuses whose parts are reserved rather than consumed
+OPEN_REPAIR_STATUSES = ('pending', 'in_progress')
+
+# Store stock of product p reserved for open repair jobs
+RESERVED_QUANTITY_SQL = "IFNULL((SELECT SUM(quantity) FROM stock_reservations WHERE product_id = p.id), 0)"
+
+# Category the service charge of closed repair jobs is reported under
+REPAIR_SERVICE_CATEGORY = 'Repair Service'
+
+# Revenue facts of the sale lines matching {condition} (on sales s). The sale's
+# discount is shared out over its lines by line total, and so is its tax, taken
+# as whatever the final amount adds to the discounted total
+SALE_REVENUE_FACTS_SQL = '''
+INSERT INTO revenue_facts (
+    occurred_at, source, source_id, line_type, product_id, category,
+    quantity, amount, discount, tax, cost, payment_method
+)
+SELECT created_at, 'sale', sale_id, 'product', product_id, category,
+       quantity, total_price, discount * share, (final_amount - total_amount + discount) * share,
+       cost, payment_method
+FROM (
+    SELECT s.id as sale_id, s.created_at, s.total_amount, s.final_amount,
+           IFNULL(s.discount_amount, 0) as discount, s.payment_method,
+           si.id, si.product_id, si.quantity, si.total_price, p.category,
+           si.quantity * IFNULL(p.cost_price, 0) as cost,
+           IFNULL(si.total_price / NULLIF(SUM(si.total_price) OVER (PARTITION BY si.sale_id), 0), 0) as share
+    FROM sale_items si
+    JOIN sales s ON si.sale_id = s.id
+    LEFT JOIN products p ON si.product_id = p.id
+    WHERE {condition}
+)
+ORDER BY id
+'''
+
+# Key of the sale or repair job a revenue fact belongs to, for counting them
+TRANSACTION_KEY_SQL = "(source_id * 2 + (source = 'repair'))"
+# Whether a sale or repair job counts towards num_sales, aggregated over its
+# revenue facts in a group: those of a repair job closed and then reopened
+# cancel out, and it is not counted
+COUNTED_SALE_SQL = "(SUM(quantity) != 0 OR ABS(SUM(amount)) >= 0.005)"
+
+
+class InsufficientStock(Exception):
+    """Raised when a repair job needs more of a part than is available to sell"""
+
 
 class DatabaseManager:
     def __init__(self, db_path='database/inventory.db'):
@@ -77,6 +124,8 @@ class DatabaseManager:
             supplier_address TEXT
         )
         ''')
+        # For the inventory report's pages, which are read in name order
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_name ON products (name, id)")
         
         # Create Product Items table (for individual items with QR codes)
         self.cursor.execute('''
@@ -90,6 +139,8 @@ class DatabaseManager:
             FOREIGN KEY (product_id) REFERENCES products (id) ON DELETE CASCADE
         )
         ''')
+        # Scanned IDs are looked up ignoring case, as caps lock inverts it
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_product_items_unique_id_nocase ON product_items (unique_id COLLATE NOCASE)")
         
         # Create Customers table
         self.cursor.execute('''
@@ -184,6 +235,47 @@ class DatabaseManager:
             FOREIGN KEY (product_id) REFERENCES products (id)
         )
         ''')
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_repair_parts_job ON repair_parts (repair_job_id)")
+        
+        # Create Stock Reservations table: store stock held for the parts of
+        # open repair jobs, one row per job and product
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stock_reservations (
+            repair_job_id INTEGER NOT NULL,
+            product_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (repair_job_id, product_id),
+            FOREIGN KEY (repair_job_id) REFERENCES repair_jobs (id) ON DELETE CASCADE,
+            FOREIGN KEY (product_id) REFERENCES products (id)
+        )
+        ''')
+        # Covers the reserved total per product that available stock is computed from
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_stock_reservations_product ON stock_reservations (product_id, quantity)")
+        # Parts of open repair jobs saved before reservations existed
+        self.cursor.execute('''
+        INSERT OR IGNORE INTO stock_reservations (repair_job_id, product_id, quantity)
+        SELECT rp.repair_job_id, rp.product_id, SUM(rp.quantity)
+        FROM repair_parts rp
+        JOIN repair_jobs r ON rp.repair_job_id = r.id
+        WHERE r.status IN ('pending', 'in_progress')
+        GROUP BY rp.repair_job_id, rp.product_id
+        ''')
+        
+        # Create Stock Consumptions table: store stock taken for the parts of
+        # closed repair jobs, one row per job and product. Jobs closed before
+        # parts were taken from stock have none, so reopening them gives back nothing
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stock_consumptions (
+            repair_job_id INTEGER NOT NULL,
+            product_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (repair_job_id, product_id),
+            FOREIGN KEY (repair_job_id) REFERENCES repair_jobs (id) ON DELETE CASCADE,
+            FOREIGN KEY (product_id) REFERENCES products (id)
+        )
+        ''')
         
         # Create Expenses table
         self.cursor.execute('''
@@ -199,6 +291,133 @@ class DatabaseManager:
         )
         ''')
         
+        # Count of in-place edits and deletions per table. Reports and the
+        # analytics engine notice new rows by their ids; an expense edited or
+        # deleted afterwards is only noticed through this counter
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS data_changes (
+            table_name TEXT PRIMARY KEY,
+            changes INTEGER NOT NULL
+        )
+        ''')
+        for event in ('UPDATE', 'DELETE'):
+            self.cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS expenses_after_{event.lower()} AFTER {event} ON expenses
+            BEGIN
+                INSERT INTO data_changes (table_name, changes) VALUES ('expenses', 1)
+                ON CONFLICT (table_name) DO UPDATE SET changes = changes + 1;
+            END
+            ''')
+        
+        # Create Revenue Facts table: every line of income, appended when a sale
+        # is made and when a repair job closes, and read by all sales and profit
+        # reports. Rows are never changed; a later change to a closed repair job,
+        # or reopening it, appends the difference
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS revenue_facts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            occurred_at TIMESTAMP NOT NULL,
+            source TEXT NOT NULL, -- sale, repair
+            source_id INTEGER NOT NULL, -- sales.id or repair_jobs.id
+            line_type TEXT NOT NULL, -- product, part, service
+            product_id INTEGER,
+            category TEXT, -- product category when recorded
+            quantity INTEGER NOT NULL DEFAULT 0,
+            amount REAL NOT NULL, -- line total before the sale's discount, excluding tax
+            discount REAL NOT NULL DEFAULT 0,
+            tax REAL NOT NULL DEFAULT 0,
+            cost REAL NOT NULL DEFAULT 0, -- quantity at the cost price when recorded
+            payment_method TEXT,
+            FOREIGN KEY (product_id) REFERENCES products (id)
+        )
+        ''')
+        # Covers every column the reports read, so a date range is read with one
+        # range scan of this index and no lookups into the table
+        self.cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_revenue_facts_time ON revenue_facts (
+            occurred_at, source, source_id, line_type, product_id, category,
+            quantity, amount, discount, tax, cost, payment_method
+        )
+        ''')
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_revenue_facts_source ON revenue_facts (source, source_id)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_revenue_facts_product ON revenue_facts (product_id, occurred_at)")
+        # Sales and closed repair jobs recorded before revenue facts existed
+        self.cursor.execute(SALE_REVENUE_FACTS_SQL.format(
+            condition="s.id > (SELECT IFNULL(MAX(source_id), 0) FROM revenue_facts WHERE source = 'sale')"))
+        self.cursor.execute(f'''
+        SELECT id, IFNULL(completed_at, created_at) as completed_at FROM repair_jobs r
+        WHERE status NOT IN ({', '.join('?' * len(OPEN_REPAIR_STATUSES))})
+        AND NOT EXISTS (SELECT 1 FROM revenue_facts WHERE source = 'repair' AND source_id = r.id)
+        ''', OPEN_REPAIR_STATUSES)
+        for job in self.cursor.fetchall():
+            self._post_repair_revenue(job['id'], occurred_at=job['completed_at'])
+        
+        # Create Print Jobs table, the persistent queue of the print spooler
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS print_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            description TEXT,
+            params TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER DEFAULT 0,
+            next_attempt_at REAL DEFAULT 0,
+            result TEXT,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_print_jobs_status ON print_jobs (status, next_attempt_at)")
+        
+        # Create Invoice Archive table, the index of the archived invoice PDFs
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS invoice_archive (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            invoice_number TEXT NOT NULL,
+            kind TEXT,
+            invoice_date DATE,
+            customer_name TEXT,
+            customer_phone TEXT,
+            amount REAL,
+            content_hash TEXT NOT NULL,
+            size INTEGER,
+            stored_size INTEGER,
+            archived_seq INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (invoice_number, content_hash)
+        )
+        ''')
+        # archived_seq orders versions by when they were last saved; archives
+        # made before it existed were only ever appended to, so id order holds
+        self.cursor.execute("PRAGMA table_info(invoice_archive)")
+        if 'archived_seq' not in [row['name'] for row in self.cursor.fetchall()]:
+            self.cursor.execute("ALTER TABLE invoice_archive ADD COLUMN archived_seq INTEGER NOT NULL DEFAULT 0")
+            self.cursor.execute("UPDATE invoice_archive SET archived_seq = id")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_invoice_archive_date ON invoice_archive (invoice_date)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_invoice_archive_customer ON invoice_archive (customer_name COLLATE NOCASE)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_invoice_archive_phone ON invoice_archive (customer_phone)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_invoice_archive_amount ON invoice_archive (amount)")
+        
+        # Create Report Snapshots table, precomputed reports (see database/precomputed_reports.py)
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS report_snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            report TEXT NOT NULL,
+            range_name TEXT,
+            start_date DATE NOT NULL,
+            end_date DATE NOT NULL,
+            period_type TEXT NOT NULL DEFAULT '',
+            version INTEGER NOT NULL,
+            report_format TEXT NOT NULL,
+            data_version TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            compute_ms REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (report, start_date, end_date, period_type, version)
+        )
+        ''')
+        
         # Insert default admin user if not exists
         self.cursor.execute("SELECT * FROM users WHERE username = 'admin'")
         if not self.cursor.fetchone():
@@ -416,7 +635,11 @@ class DatabaseManager:
         """Get a product by ID"""
         self.connect()
         
-        self.cursor.execute("SELECT * FROM products WHERE id = ?", (product_id,))
+        self.cursor.execute(f'''
+        SELECT p.*, {RESERVED_QUANTITY_SQL} as reserved_quantity,
+               p.store_quantity - {RESERVED_QUANTITY_SQL} as available_quantity
+        FROM products p WHERE id = ?
+        ''', (product_id,))
         product = self.cursor.fetchone()
         
         self.close()
@@ -476,18 +699,24 @@ class DatabaseManager:
         return products
     
     # Product Items (with QR codes) methods
-    def add_product_items(self, product_id, quantity, qr_code_paths):
-        """Add individual product items with QR codes"""
+    def add_product_items(self, product_id, quantity, qr_code_paths=None, unique_ids=None):
+        """Add individual product items.
+        
+        unique_ids should be the IDs shown in the item QR codes; they are
+        generated here when not given. QR images are rendered from the unique
+        ID, so qr_code_paths is only kept for older callers.
+        """
         self.connect()
         
-        for i in range(quantity):
-            # Generate a unique 12-character ID for the item
-            unique_id = f"P{product_id}I{i+1}-{uuid.uuid4().hex[:8]}"
-            
-            self.cursor.execute('''
-            INSERT INTO product_items (product_id, unique_id, qr_code_path, status)
-            VALUES (?, ?, ?, ?)
-            ''', (product_id, unique_id, qr_code_paths[i], 'in_store'))
+        if unique_ids is None:
+            # Generate a unique 12-character ID for each item
+            unique_ids = [f"P{product_id}I{i+1}-{uuid.uuid4().hex[:8].upper()}" for i in range(quantity)]
+        
+        self.cursor.executemany('''
+        INSERT INTO product_items (product_id, unique_id, qr_code_path, status)
+        VALUES (?, ?, ?, ?)
+        ''', [(product_id, unique_ids[i], qr_code_paths[i] if qr_code_paths else None, 'in_store')
+              for i in range(quantity)])
         
         self.commit()
         self.close()
@@ -508,20 +737,41 @@ class DatabaseManager:
         return items
     
     def get_product_item_by_unique_id(self, unique_id):
-        """Get a product item by its unique ID (from QR code)"""
+        """Get a product item by its unique ID (from QR code), with the product
+        fields needed to add it to a cart"""
         self.connect()
         
+        # A single lookup in the case-insensitive index on unique_id, since
+        # scanners typing with caps lock on invert the case
         self.cursor.execute('''
-        SELECT pi.*, p.name as product_name, p.selling_price 
+        SELECT pi.*, p.name as product_name, p.selling_price, p.store_quantity
         FROM product_items pi
         JOIN products p ON pi.product_id = p.id
-        WHERE pi.unique_id = ?
+        WHERE pi.unique_id = ? COLLATE NOCASE
         ''', (unique_id,))
         item = self.cursor.fetchone()
         
         self.close()
         return dict(item) if item else None
     
+    def get_in_store_items_for_scanning(self):
+        """All in-store product items in the same shape as get_product_item_by_unique_id.
+        
+        Uses its own connection so it can run on a worker thread.
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.execute('''
+            SELECT pi.*, p.name as product_name, p.selling_price, p.store_quantity
+            FROM product_items pi
+            JOIN products p ON pi.product_id = p.id
+            WHERE pi.status = 'in_store'
+            ''')
+            return [dict(row) for row in cursor.fetchall()]
+        finally:
+            conn.close()
+    
     def update_product_item_status(self, item_id, new_status):
         """Update the status of a product item"""
         self.connect()
@@ -658,6 +908,9 @@ class DatabaseManager:
                 WHERE id = ?
                 ''', (item['quantity'], item['product_id']))
             
+            # Record the sale's income for reporting
+            self.cursor.execute(SALE_REVENUE_FACTS_SQL.format(condition="s.id = ?"), (sale_id,))
+            
             self.commit()
             return sale_id, invoice_number
             
@@ -689,9 +942,10 @@ class DatabaseManager:
         
         # Get sale items
         self.cursor.execute('''
-        SELECT si.*, p.name as product_name 
+        SELECT si.*, p.name as product_name, pi.unique_id
         FROM sale_items si
         JOIN products p ON si.product_id = p.id
+        LEFT JOIN product_items pi ON si.product_item_id = pi.id
         WHERE si.sale_id = ?
         ''', (sale_id,))
         sale_dict['items'] = [dict(row) for row in self.cursor.fetchall()]
@@ -732,97 +986,130 @@ class DatabaseManager:
         
         self.close()
         return items
-    
+
+    def get_sales_for_invoices(self, start_date=None, end_date=None, invoice_numbers=None):
+        """Id and invoice number of the sales made between two dates (inclusive,
+        YYYY-MM-DD) and/or carrying one of the given invoice numbers"""
+        conditions = []
+        params = []
+        if start_date:
+            conditions.append("date(created_at) >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("date(created_at) <= ?")
+            params.append(end_date)
+        if invoice_numbers:
+            conditions.append(f"invoice_number IN ({','.join('?' * len(invoice_numbers))})")
+            params.extend(invoice_numbers)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        self.connect()
+        self.cursor.execute(f'''
+        SELECT id, invoice_number, created_at
+        FROM sales
+        {where}
+        ORDER BY created_at, id
+        ''', params)
+        sales = [dict(row) for row in self.cursor.fetchall()]
+
+        self.close()
+        return sales
+
     # Repair related methods
     def create_repair_job(self, repair_data):
-        """Create a new repair job"""
+        """Create a new repair job, reserving the stock of its parts"""
         self.connect()
         
-        # Check if this is a bicycle repair
-        is_bicycle = repair_data.get('is_bicycle', 0)
-        
-        if is_bicycle:
-            self.cursor.execute('''
-            INSERT INTO repair_jobs (
-                customer_id, product_description, issue_description, 
-                status, estimated_cost, assigned_to, serial_number,
-                received_date, estimated_completion_date, notes,
-                is_bicycle, bicycle_brand, bicycle_model, bicycle_type,
-                bicycle_wheel_size, bicycle_frame_number
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                repair_data['customer_id'],
-                repair_data['product_description'],
-                repair_data['issue_description'],
-                repair_data.get('status', 'pending'),
-                repair_data.get('estimated_cost', 0),
-                repair_data.get('assigned_to'),
-                repair_data.get('serial_number', ''),
-                repair_data.get('received_date', datetime.datetime.now().strftime('%Y-%m-%d')),
-                repair_data.get('estimated_completion_date'),
-                repair_data.get('notes', ''),
-                1,  # is_bicycle = True
-                repair_data.get('bicycle_brand', ''),
-                repair_data.get('bicycle_model', ''),
-                repair_data.get('bicycle_type', ''),
-                repair_data.get('bicycle_wheel_size', ''),
-                repair_data.get('bicycle_frame_number', '')
-            ))
-        else:
-            self.cursor.execute('''
-            INSERT INTO repair_jobs (
-                customer_id, product_description, issue_description, 
-                status, estimated_cost, assigned_to, serial_number,
-                received_date, estimated_completion_date, notes
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                repair_data['customer_id'],
-                repair_data['product_description'],
-                repair_data['issue_description'],
-                repair_data.get('status', 'pending'),
-                repair_data.get('estimated_cost', 0),
-                repair_data.get('assigned_to'),
-                repair_data.get('serial_number', ''),
-                repair_data.get('received_date', datetime.datetime.now().strftime('%Y-%m-%d')),
-                repair_data.get('estimated_completion_date'),
-                repair_data.get('notes', '')
-            ))
-        
-        repair_id = self.cursor.lastrowid
-        
-        # Add required parts if provided
-        if 'parts' in repair_data and repair_data['parts']:
-            for part in repair_data['parts']:
+        try:
+            # Check if this is a bicycle repair
+            is_bicycle = repair_data.get('is_bicycle', 0)
+            
+            if is_bicycle:
                 self.cursor.execute('''
-                INSERT INTO repair_parts (
-                    repair_job_id, product_id, quantity, unit_price, total_price
-                ) VALUES (?, ?, ?, ?, ?)
+                INSERT INTO repair_jobs (
+                    customer_id, product_description, issue_description, 
+                    status, estimated_cost, assigned_to, serial_number,
+                    received_date, estimated_completion_date, notes,
+                    is_bicycle, bicycle_brand, bicycle_model, bicycle_type,
+                    bicycle_wheel_size, bicycle_frame_number
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 ''', (
-                    repair_id,
-                    part['product_id'],
-                    part['quantity'],
-                    part['unit_price'],
-                    part['quantity'] * part['unit_price']
+                    repair_data['customer_id'],
+                    repair_data['product_description'],
+                    repair_data['issue_description'],
+                    repair_data.get('status', 'pending'),
+                    repair_data.get('estimated_cost', 0),
+                    repair_data.get('assigned_to'),
+                    repair_data.get('serial_number', ''),
+                    repair_data.get('received_date', datetime.datetime.now().strftime('%Y-%m-%d')),
+                    repair_data.get('estimated_completion_date'),
+                    repair_data.get('notes', ''),
+                    1,  # is_bicycle = True
+                    repair_data.get('bicycle_brand', ''),
+                    repair_data.get('bicycle_model', ''),
+                    repair_data.get('bicycle_type', ''),
+                    repair_data.get('bicycle_wheel_size', ''),
+                    repair_data.get('bicycle_frame_number', '')
                 ))
-        
-        self.commit()
-        self.close()
-        return repair_id
+            else:
+                self.cursor.execute('''
+                INSERT INTO repair_jobs (
+                    customer_id, product_description, issue_description, 
+                    status, estimated_cost, assigned_to, serial_number,
+                    received_date, estimated_completion_date, notes
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    repair_data['customer_id'],
+                    repair_data['product_description'],
+                    repair_data['issue_description'],
+                    repair_data.get('status', 'pending'),
+                    repair_data.get('estimated_cost', 0),
+                    repair_data.get('assigned_to'),
+                    repair_data.get('serial_number', ''),
+                    repair_data.get('received_date', datetime.datetime.now().strftime('%Y-%m-%d')),
+                    repair_data.get('estimated_completion_date'),
+                    repair_data.get('notes', '')
+                ))
+            
+            repair_id = self.cursor.lastrowid
+            
+            # Add required parts if provided, and reserve their stock
+            parts = repair_data.get('parts') or []
+            self._sync_repair_parts(repair_id, parts)
+            self._apply_repair_stock(repair_id, 'pending', repair_data.get('status', 'pending'),
+                                     {}, self._part_totals(parts))
+            self._post_repair_revenue(repair_id)
+            
+            self.commit()
+            return repair_id
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            self.close()
     
     def add_repair(self, repair_data):
         """Add a new repair job - wrapper for create_repair_job"""
         try:
             repair_id = self.create_repair_job(repair_data)
             return repair_id is not None
+        except InsufficientStock:
+            raise
         except Exception as e:
             print(f"Error adding repair: {e}")
             return False
     
     def update_repair(self, repair_id, repair_data):
-        """Update an existing repair job"""
+        """Update an existing repair job. Only parts that changed are written,
+        and the difference in their stock is reserved or released. Changes to
+        a closed job's income are recorded as revenue facts."""
         self.connect()
         
         try:
+            self.cursor.execute("SELECT status FROM repair_jobs WHERE id = ?", (repair_id,))
+            job = self.cursor.fetchone()
+            old_status = job['status'] if job else 'pending'
+            
             # Check if this is a bicycle repair
             is_bicycle = repair_data.get('is_bicycle', 0)
             
@@ -892,26 +1179,18 @@ class DatabaseManager:
                     repair_id
                 ))
             
-            # Delete existing parts for this repair
-            self.cursor.execute('DELETE FROM repair_parts WHERE repair_job_id = ?', (repair_id,))
-            
-            # Add updated parts
-            if 'parts' in repair_data and repair_data['parts']:
-                for part in repair_data['parts']:
-                    self.cursor.execute('''
-                    INSERT INTO repair_parts (
-                        repair_job_id, product_id, quantity, unit_price, total_price
-                    ) VALUES (?, ?, ?, ?, ?)
-                    ''', (
-                        repair_id,
-                        part['product_id'],
-                        part['quantity'],
-                        part['unit_price'],
-                        part['quantity'] * part['unit_price']
-                    ))
+            # Write the parts that changed, and move their stock
+            parts = repair_data.get('parts') or []
+            old_totals = self._sync_repair_parts(repair_id, parts)
+            self._apply_repair_stock(repair_id, old_status, repair_data.get('status', 'pending'),
+                                     old_totals, self._part_totals(parts))
+            self._post_repair_revenue(repair_id)
             
             self.commit()
             return True
+        except InsufficientStock:
+            self.conn.rollback()
+            raise
         except Exception as e:
             self.conn.rollback()
             print(f"Error updating repair: {e}")
@@ -919,19 +1198,212 @@ class DatabaseManager:
         finally:
             self.close()
     
+    def _part_totals(self, parts):
+        """Quantity per product of a list of repair parts"""
+        totals = {}
+        for part in parts:
+            totals[part['product_id']] = totals.get(part['product_id'], 0) + part['quantity']
+        return totals
+    
+    def _sync_repair_parts(self, repair_id, parts):
+        """Bring the repair_parts rows of a job in line with parts, in the open
+        transaction. Parts loaded from the database keep their 'id'; only rows
+        that changed are written. Returns the quantity per product before the change."""
+        self.cursor.execute('''
+        SELECT id, product_id, quantity, unit_price FROM repair_parts WHERE repair_job_id = ?
+        ''', (repair_id,))
+        existing = {row['id']: dict(row) for row in self.cursor.fetchall()}
+        old_totals = self._part_totals(existing.values())
+        
+        inserts, updates, kept = [], [], set()
+        for part in parts:
+            row = (part['product_id'], part['quantity'], part['unit_price'], part['quantity'] * part['unit_price'])
+            current = existing.get(part.get('id'))
+            if current is None:
+                inserts.append((repair_id,) + row)
+                continue
+            kept.add(current['id'])
+            if (current['product_id'], current['quantity'], current['unit_price']) != row[:3]:
+                updates.append(row + (current['id'],))
+        deletes = [(part_id,) for part_id in existing if part_id not in kept]
+        
+        if deletes:
+            self.cursor.executemany('DELETE FROM repair_parts WHERE id = ?', deletes)
+        if updates:
+            self.cursor.executemany('''
+            UPDATE repair_parts SET product_id = ?, quantity = ?, unit_price = ?, total_price = ?
+            WHERE id = ?
+            ''', updates)
+        if inserts:
+            self.cursor.executemany('''
+            INSERT INTO repair_parts (
+                repair_job_id, product_id, quantity, unit_price, total_price
+            ) VALUES (?, ?, ?, ?, ?)
+            ''', inserts)
+        return old_totals
+    
+    def _apply_repair_stock(self, repair_id, old_status, new_status, old_totals, new_totals):
+        """Reserve or consume store stock for a job's parts, in the open transaction.
+        
+        The parts of an open job (pending or in progress) are reserved in
+        stock_reservations; those of a closed job are taken from store_quantity
+        and recorded in stock_consumptions. Moving a job between the two, or
+        changing its parts, moves the difference, and only stock recorded as
+        taken is ever given back. Raises InsufficientStock if more is needed
+        than is available to sell.
+        """
+        old_open = old_status in OPEN_REPAIR_STATUSES
+        new_open = new_status in OPEN_REPAIR_STATUSES
+        held = self._job_stock_rows('stock_reservations', repair_id)
+        taken = self._job_stock_rows('stock_consumptions', repair_id)
+        
+        wanted = {product_id: quantity for product_id, quantity in new_totals.items() if quantity > 0} \
+            if new_open else {}
+        if new_open:
+            used = {}
+        elif old_open:
+            used = {product_id: quantity for product_id, quantity in new_totals.items() if quantity > 0}
+        else:
+            # A closed job's parts changed: take or give back the difference
+            # from what it has taken so far
+            used = {product_id: taken.get(product_id, 0) + new_totals.get(product_id, 0) - old_totals.get(product_id, 0)
+                    for product_id in set(taken) | set(old_totals) | set(new_totals)}
+            used = {product_id: quantity for product_id, quantity in used.items() if quantity > 0}
+        
+        # Stock newly claimed by the job, reserved or consumed, must be available
+        for product_id in set(wanted) | set(used):
+            needed = (wanted.get(product_id, 0) + used.get(product_id, 0)
+                      - held.get(product_id, 0) - taken.get(product_id, 0))
+            if needed <= 0:
+                continue
+            self.cursor.execute(f'''
+            SELECT name, store_quantity - {RESERVED_QUANTITY_SQL} as available
+            FROM products p WHERE id = ?
+            ''', (product_id,))
+            product = self.cursor.fetchone()
+            if product is None or product['available'] < needed:
+                raise InsufficientStock(
+                    f"Not enough stock of {product['name'] if product else f'product {product_id}'}: "
+                    f"{needed} more needed, {max(product['available'], 0) if product else 0} available.")
+        
+        # Consumption, as a batched change of store_quantity per product
+        changes = [(used.get(product_id, 0) - taken.get(product_id, 0), product_id)
+                   for product_id in set(taken) | set(used)]
+        changes = [change for change in changes if change[0]]
+        if changes:
+            self.cursor.executemany('''
+            UPDATE products SET 
+                store_quantity = store_quantity - ?,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+            ''', changes)
+        
+        self._sync_job_stock_rows('stock_consumptions', repair_id, taken, used)
+        self._sync_job_stock_rows('stock_reservations', repair_id, held, wanted)
+    
+    def _job_stock_rows(self, table, repair_id):
+        """Quantity per product a job holds in stock_reservations or stock_consumptions"""
+        self.cursor.execute(f'''
+        SELECT product_id, quantity FROM {table} WHERE repair_job_id = ?
+        ''', (repair_id,))
+        return {row['product_id']: row['quantity'] for row in self.cursor.fetchall()}
+    
+    def _sync_job_stock_rows(self, table, repair_id, current, wanted):
+        """Upsert or delete a job's rows in stock_reservations or
+        stock_consumptions; only changed rows are written"""
+        upserts = [(repair_id, product_id, quantity) for product_id, quantity in wanted.items()
+                   if current.get(product_id) != quantity]
+        deletes = [(repair_id, product_id) for product_id in current if product_id not in wanted]
+        if deletes:
+            self.cursor.executemany(f'''
+            DELETE FROM {table} WHERE repair_job_id = ? AND product_id = ?
+            ''', deletes)
+        if upserts:
+            self.cursor.executemany(f'''
+            INSERT INTO {table} (repair_job_id, product_id, quantity) VALUES (?, ?, ?)
+            ON CONFLICT (repair_job_id, product_id) DO UPDATE SET
+                quantity = excluded.quantity,
+                updated_at = CURRENT_TIMESTAMP
+            ''', upserts)
+    
+    def _post_repair_revenue(self, repair_id, payment_method=None, occurred_at=None):
+        """Append the revenue facts that bring a repair job's recorded income in
+        line with the job, in the open transaction.
+        
+        A closed job has earned its parts, at their cost price when recorded,
+        and its service charge; an open one has earned nothing. Only the
+        difference from what is already recorded is appended, so closing a job
+        records its income and reopening it reverses that.
+        """
+        self.cursor.execute("SELECT status, service_charge FROM repair_jobs WHERE id = ?", (repair_id,))
+        job = self.cursor.fetchone()
+        if job is None:
+            return
+        
+        # (line_type, product_id) -> (quantity, amount, category, cost price)
+        earned = {}
+        if job['status'] not in OPEN_REPAIR_STATUSES:
+            self.cursor.execute('''
+            SELECT rp.product_id, SUM(rp.quantity) as quantity, SUM(rp.total_price) as amount,
+                   p.category, IFNULL(p.cost_price, 0) as cost_price
+            FROM repair_parts rp
+            LEFT JOIN products p ON rp.product_id = p.id
+            WHERE rp.repair_job_id = ?
+            GROUP BY rp.product_id
+            ''', (repair_id,))
+            for row in self.cursor.fetchall():
+                earned[('part', row['product_id'])] = (row['quantity'], row['amount'], row['category'], row['cost_price'])
+            if job['service_charge']:
+                earned[('service', None)] = (1, job['service_charge'], REPAIR_SERVICE_CATEGORY, 0)
+        
+        self.cursor.execute('''
+        SELECT line_type, product_id, MAX(category) as category, MAX(payment_method) as payment_method,
+               SUM(quantity) as quantity, SUM(amount) as amount, SUM(cost) as cost
+        FROM revenue_facts
+        WHERE source = 'repair' AND source_id = ?
+        GROUP BY line_type, product_id
+        ''', (repair_id,))
+        recorded = {(row['line_type'], row['product_id']): dict(row) for row in self.cursor.fetchall()}
+        if payment_method is None:
+            payment_method = next((row['payment_method'] for row in recorded.values() if row['payment_method']), None)
+        
+        facts = []
+        for key in list(earned) + [key for key in recorded if key not in earned]:
+            line_type, product_id = key
+            quantity, amount, category, cost_price = earned.get(key, (0, 0, None, 0))
+            old = recorded.get(key, {'quantity': 0, 'amount': 0, 'cost': 0, 'category': None})
+            if quantity == old['quantity'] and abs(amount - old['amount']) < 0.005:
+                continue
+            # A line no longer earned is reversed at the cost it was recorded with
+            cost = (quantity - old['quantity']) * cost_price if quantity else -old['cost']
+            facts.append((occurred_at, repair_id, line_type, product_id, category or old['category'],
+                          quantity - old['quantity'], amount - old['amount'], cost, payment_method))
+        if facts:
+            self.cursor.executemany('''
+            INSERT INTO revenue_facts (
+                occurred_at, source, source_id, line_type, product_id, category,
+                quantity, amount, cost, payment_method
+            ) VALUES (IFNULL(?, CURRENT_TIMESTAMP), 'repair', ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', facts)
+    
     def update_repair_status(self, repair_id, status, service_charge=None):
-        """Update the status of a repair job"""
+        """Update the status of a repair job, consuming or reserving its parts'
+        stock and recording or reversing its income when the job closes or reopens"""
         self.connect()
         
         try:
+            self.cursor.execute("SELECT status FROM repair_jobs WHERE id = ?", (repair_id,))
+            job = self.cursor.fetchone()
+            self.cursor.execute('''
+            SELECT product_id, quantity, total_price FROM repair_parts
+            WHERE repair_job_id = ?
+            ''', (repair_id,))
+            parts = [dict(row) for row in self.cursor.fetchall()]
+            
             if status == 'completed':
                 # Calculate total parts cost
-                self.cursor.execute('''
-                SELECT SUM(total_price) as total_parts_cost FROM repair_parts
-                WHERE repair_job_id = ?
-                ''', (repair_id,))
-                result = self.cursor.fetchone()
-                total_parts_cost = result['total_parts_cost'] if result['total_parts_cost'] else 0
+                total_parts_cost = sum(part['total_price'] for part in parts)
+                service_charge = service_charge or 0
                 
                 # Update with completion details
                 self.cursor.execute('''
@@ -955,8 +1427,16 @@ class DatabaseManager:
                 UPDATE repair_jobs SET status = ? WHERE id = ?
                 ''', (status, repair_id))
             
+            if job:
+                totals = self._part_totals(parts)
+                self._apply_repair_stock(repair_id, job['status'], status, totals, totals)
+                self._post_repair_revenue(repair_id)
+            
             self.commit()
             return True
+        except InsufficientStock:
+            self.conn.rollback()
+            raise
         except Exception as e:
             self.conn.rollback()
             print(f"Error updating repair status: {e}")
@@ -965,37 +1445,64 @@ class DatabaseManager:
             self.close()
     
     def complete_repair(self, repair_id, completion_data):
-        """Complete a repair job with additional completion data"""
+        """Complete a repair job with additional completion data.
+        
+        The status, charges and notes are written, the reserved parts are
+        taken from store stock and the job's income is recorded in one
+        transaction, so a failure leaves the job and the stock as they were.
+        """
+        status = completion_data.get('status', 'completed')
+        service_charge = completion_data.get('service_charge', 0) or 0
+        completion_notes = completion_data.get('completion_notes', '')
+        
+        self.connect()
         try:
-            # Extract data from the completion_data dictionary
-            status = completion_data.get('status', 'completed')
-            service_charge = completion_data.get('service_charge', 0)
+            self.cursor.execute("BEGIN IMMEDIATE")
+            self.cursor.execute("SELECT status FROM repair_jobs WHERE id = ?", (repair_id,))
+            job = self.cursor.fetchone()
+            if not job:
+                raise ValueError(f"Repair job {repair_id} not found")
             
-            # Update the repair status first
-            success = self.update_repair_status(repair_id, status, service_charge)
-            if not success:
-                return False
-                
-            # Update notes if provided
-            completion_notes = completion_data.get('completion_notes', '')
-            if completion_notes:
-                self.connect()
-                try:
-                    self.cursor.execute('''
-                    UPDATE repair_jobs SET notes = ? WHERE id = ?
-                    ''', (completion_notes, repair_id))
-                    self.commit()
-                except Exception as e:
-                    self.conn.rollback()
-                    print(f"Error updating repair notes: {e}")
-                    return False
-                finally:
-                    self.close()
+            self.cursor.execute('''
+            SELECT product_id, quantity, total_price FROM repair_parts
+            WHERE repair_job_id = ?
+            ''', (repair_id,))
+            parts = [dict(row) for row in self.cursor.fetchall()]
+            total_parts_cost = sum(part['total_price'] for part in parts)
             
+            self.cursor.execute('''
+            UPDATE repair_jobs SET 
+                status = ?,
+                service_charge = ?,
+                total_parts_cost = ?,
+                final_cost = ?,
+                completed_at = CURRENT_TIMESTAMP,
+                notes = CASE WHEN ? != '' THEN ? ELSE notes END
+            WHERE id = ?
+            ''', (
+                status,
+                service_charge,
+                total_parts_cost,
+                service_charge + total_parts_cost,
+                completion_notes, completion_notes,
+                repair_id
+            ))
+            
+            totals = self._part_totals(parts)
+            self._apply_repair_stock(repair_id, job['status'], status, totals, totals)
+            self._post_repair_revenue(repair_id, completion_data.get('payment_method'))
+            
+            self.commit()
             return True
+        except InsufficientStock:
+            self.conn.rollback()
+            raise
         except Exception as e:
+            self.conn.rollback()
             print(f"Error in complete_repair: {e}")
             return False
+        finally:
+            self.close()
     
     def get_repair(self, repair_id):
         """Get a repair job by ID with customer details"""
@@ -1125,7 +1632,8 @@ class DatabaseManager:
         
         # Get repair details
         self.cursor.execute('''
-        SELECT r.*, c.name as customer_name, c.phone as customer_phone 
+        SELECT r.*, c.name as customer_name, c.phone as customer_phone,
+               c.address as customer_address, c.gst_number as customer_gst
         FROM repair_jobs r
         JOIN customers c ON r.customer_id = c.id
         WHERE r.id = ?
@@ -1233,6 +1741,16 @@ class DatabaseManager:
         return expenses
     
     # Analytics methods
+    #
+    # Sales and repair income are read from revenue_facts. A sale or a repair
+    # job counts as one sale, revenue is what was charged (after discount,
+    # including tax) and cost is the cost recorded with each line.
+    def _revenue_facts_condition(self, start_date=None, end_date=None, prefix="WHERE"):
+        """Condition on the occurred_at range of revenue_facts, and its parameters"""
+        if start_date and end_date:
+            return f"{prefix} occurred_at BETWEEN ? AND ?", [start_date, end_date]
+        return "", []
+    
     def get_sales_by_period(self, period_type, start_date, end_date):
         """Get sales aggregated by day, week, or month"""
         self.connect()
@@ -1248,13 +1766,20 @@ class DatabaseManager:
         
         self.cursor.execute(f'''
         SELECT 
-            strftime('{date_format}', created_at) as period,
-            COUNT(*) as num_sales,
-            SUM(total_amount) as total_sales,
-            SUM(final_amount) as final_sales,
-            AVG(final_amount) as avg_sale_value
-        FROM sales
-        WHERE created_at BETWEEN ? AND ?
+            period,
+            SUM(counted) as num_sales,
+            SUM(total_sales) as total_sales,
+            SUM(final_sales) as final_sales,
+            IFNULL(SUM(final_sales) / NULLIF(SUM(counted), 0), 0) as avg_sale_value
+        FROM (
+            SELECT strftime('{date_format}', occurred_at) as period,
+                   SUM(amount) as total_sales,
+                   SUM(amount - discount + tax) as final_sales,
+                   {COUNTED_SALE_SQL} as counted
+            FROM revenue_facts
+            WHERE occurred_at BETWEEN ? AND ?
+            GROUP BY period, {TRANSACTION_KEY_SQL}
+        )
         GROUP BY period
         ORDER BY period
         ''', (start_date, end_date))
@@ -1264,65 +1789,60 @@ class DatabaseManager:
         return results
     
     def get_top_selling_products(self, start_date=None, end_date=None, limit=10):
-        """Get top selling products by quantity"""
+        """Get top selling products by quantity, parts used in repairs included"""
         self.connect()
         
-        query = '''
+        condition, params = self._revenue_facts_condition(start_date, end_date, "AND")
+        self.cursor.execute(f'''
         SELECT 
             p.id, p.name, p.category,
-            SUM(si.quantity) as total_quantity,
-            SUM(si.total_price) as total_revenue,
-            COUNT(DISTINCT s.id) as num_sales
-        FROM sale_items si
-        JOIN products p ON si.product_id = p.id
-        JOIN sales s ON si.sale_id = s.id
-        '''
-        
-        params = []
-        if start_date and end_date:
-            query += "WHERE s.created_at BETWEEN ? AND ?"
-            params.extend([start_date, end_date])
-        
-        query += '''
-        GROUP BY p.id
+            f.total_quantity, f.total_revenue, f.num_sales
+        FROM (
+            SELECT product_id,
+                   SUM(quantity) as total_quantity,
+                   SUM(amount) as total_revenue,
+                   SUM(counted) as num_sales
+            FROM (
+                SELECT product_id, SUM(quantity) as quantity, SUM(amount) as amount,
+                       {COUNTED_SALE_SQL} as counted
+                FROM revenue_facts
+                WHERE product_id IS NOT NULL {condition}
+                GROUP BY product_id, {TRANSACTION_KEY_SQL}
+            )
+            GROUP BY product_id
+        ) f
+        JOIN products p ON f.product_id = p.id
         ORDER BY total_quantity DESC
         LIMIT ?
-        '''
-        params.append(limit)
-        
-        self.cursor.execute(query, params)
+        ''', params + [limit])
         products = [dict(row) for row in self.cursor.fetchall()]
         
         self.close()
         return products
     
     def get_sales_by_category(self, start_date=None, end_date=None):
-        """Get sales data grouped by product category"""
+        """Get sales data grouped by product category. Repair service charges
+        are reported under REPAIR_SERVICE_CATEGORY."""
         self.connect()
         
-        query = '''
+        condition, params = self._revenue_facts_condition(start_date, end_date)
+        self.cursor.execute(f'''
         SELECT 
-            p.category,
-            SUM(si.total_price) as revenue,
-            SUM(si.quantity * p.cost_price) as cost,
-            SUM(si.quantity) as quantity_sold,
-            COUNT(DISTINCT s.id) as num_sales
-        FROM sale_items si
-        JOIN products p ON si.product_id = p.id
-        JOIN sales s ON si.sale_id = s.id
-        '''
-        
-        params = []
-        if start_date and end_date:
-            query += "WHERE s.created_at BETWEEN ? AND ?"
-            params.extend([start_date, end_date])
-        
-        query += '''
-        GROUP BY p.category
+            category,
+            SUM(amount) as revenue,
+            SUM(cost) as cost,
+            SUM(quantity) as quantity_sold,
+            SUM(counted) as num_sales
+        FROM (
+            SELECT category, SUM(amount) as amount, SUM(cost) as cost, SUM(quantity) as quantity,
+                   {COUNTED_SALE_SQL} as counted
+            FROM revenue_facts
+            {condition}
+            GROUP BY category, {TRANSACTION_KEY_SQL}
+        )
+        GROUP BY category
         ORDER BY revenue DESC
-        '''
-        
-        self.cursor.execute(query, params)
+        ''', params)
         results = self.cursor.fetchall()
         
         # Convert to dictionary with category as key
@@ -1377,9 +1897,8 @@ class DatabaseManager:
         self.cursor.execute('''
         SELECT p.* FROM products p
         WHERE p.id NOT IN (
-            SELECT DISTINCT product_id FROM sale_items si
-            JOIN sales s ON si.sale_id = s.id
-            WHERE s.created_at >= ?
+            SELECT product_id FROM revenue_facts
+            WHERE product_id IS NOT NULL AND occurred_at >= ?
         )
         AND p.store_quantity > 0
         ORDER BY p.updated_at ASC
@@ -1394,25 +1913,30 @@ class DatabaseManager:
         """Calculate profit metrics for a given period"""
         self.connect()
         
-        query_params = []
-        date_condition = ""
+        condition, params = self._revenue_facts_condition(start_date, end_date)
         
-        if start_date and end_date:
-            date_condition = "WHERE s.created_at BETWEEN ? AND ?"
-            query_params.extend([start_date, end_date])
-        
-        # Get sales revenue and cost
+        # Revenue and cost of sales and repairs in one pass
         self.cursor.execute(f'''
         SELECT 
-            SUM(s.final_amount) as total_revenue,
-            SUM(si.quantity * p.cost_price) as total_cost,
-            COUNT(DISTINCT s.id) as num_sales,
-            COUNT(si.id) as num_items_sold
-        FROM sales s
-        JOIN sale_items si ON s.id = si.sale_id
-        JOIN products p ON si.product_id = p.id
-        {date_condition}
-        ''', query_params)
+            SUM(total_revenue) as total_revenue,
+            SUM(total_cost) as total_cost,
+            IFNULL(SUM(counted), 0) as num_sales,
+            SUM(num_items_sold) as num_items_sold,
+            SUM(repair_revenue) as repair_revenue,
+            SUM(total_tax) as total_tax
+        FROM (
+            SELECT 
+                SUM(amount - discount + tax) as total_revenue,
+                SUM(cost) as total_cost,
+                {COUNTED_SALE_SQL} as counted,
+                SUM(CASE WHEN line_type != 'service' THEN quantity ELSE 0 END) as num_items_sold,
+                SUM(CASE WHEN source = 'repair' THEN amount - discount + tax ELSE 0 END) as repair_revenue,
+                SUM(tax) as total_tax
+            FROM revenue_facts
+            {condition}
+            GROUP BY {TRANSACTION_KEY_SQL}
+        )
+        ''', params)
         
         sales_data = dict(self.cursor.fetchone())
         
@@ -1459,20 +1983,19 @@ class DatabaseManager:
         """Get sales data grouped by payment method"""
         self.connect()
         
-        query = '''
+        condition, params = self._revenue_facts_condition(start_date, end_date)
+        query = f'''
         SELECT 
             payment_method,
-            COUNT(*) as num_sales,
-            SUM(final_amount) as total_amount
-        FROM sales
-        '''
-        
-        params = []
-        if start_date and end_date:
-            query += "WHERE created_at BETWEEN ? AND ?"
-            params.extend([start_date, end_date])
-        
-        query += '''
+            SUM(counted) as num_sales,
+            SUM(total_amount) as total_amount
+        FROM (
+            SELECT payment_method, SUM(amount - discount + tax) as total_amount,
+                   {COUNTED_SALE_SQL} as counted
+            FROM revenue_facts
+            {condition}
+            GROUP BY payment_method, {TRANSACTION_KEY_SQL}
+        )
         GROUP BY payment_method
         ORDER BY total_amount DESC
         '''
@@ -1611,6 +2134,319 @@ class DatabaseManager:
         self.close()
         return category_data
         
+    def get_analytics_rows(self, after_fact_id=0, after_expense_id=0, expense_changes=None):
+        """Get raw rows for the in-memory analytics engine.
+
+        Revenue facts are only ever appended, so only rows with an id above
+        after_fact_id are returned. Expenses are returned from after_expense_id
+        unless one was edited or deleted since the caller's expense_changes
+        count, in which case all of them are returned; 'expense_changes' holds
+        the current count. Products change in place and are always returned in
+        full. Rows are plain tuples in the column order of the queries below.
+        """
+        self.connect()
+        
+        try:
+            # One read transaction so every table is read at the same point
+            self.cursor.execute("BEGIN")
+            
+            self.cursor.execute('''
+            SELECT id, occurred_at, source, source_id, line_type, product_id, category,
+                   quantity, amount, discount, tax, cost, payment_method
+            FROM revenue_facts WHERE id > ? ORDER BY id
+            ''', (after_fact_id,))
+            facts = [tuple(row) for row in self.cursor.fetchall()]
+            
+            self.cursor.execute("SELECT changes FROM data_changes WHERE table_name = 'expenses'")
+            row = self.cursor.fetchone()
+            changes = row['changes'] if row else 0
+            if changes != expense_changes:
+                after_expense_id = 0
+            
+            self.cursor.execute('''
+            SELECT id, date, category, amount
+            FROM expenses WHERE id > ? ORDER BY id
+            ''', (after_expense_id,))
+            expenses = [tuple(row) for row in self.cursor.fetchall()]
+            
+            self.cursor.execute('''
+            SELECT id, name, category
+            FROM products ORDER BY id
+            ''')
+            products = [tuple(row) for row in self.cursor.fetchall()]
+            
+            self.conn.commit()
+        except Exception as e:
+            print(f"Error loading analytics rows: {e}")
+            self.conn.rollback()
+            raise
+        finally:
+            self.close()
+        
+        return {'facts': facts, 'expenses': expenses, 'expense_changes': changes, 'products': products}
+    
+    def get_dashboard_snapshot(self, start_date, end_date, period_type='day',
+                               top_limit=5, non_selling_days=30, non_selling_limit=10):
+        """Get every admin dashboard metric from one consistent read of the database.
+
+        All queries run in a single transaction. Sales and repair income are read
+        once from revenue_facts through a shared CTE and products in a single scan,
+        instead of once per metric as the separate get_* methods do. The per-metric results have the
+        same shape as those methods return; 'timings' holds the time per phase in ms.
+        """
+        date_formats = {'day': '%Y-%m-%d', 'week': '%Y-%W', 'month': '%Y-%m'}
+        date_format = date_formats.get(period_type, '%Y-%m-%d')
+        
+        started = time.perf_counter()
+        timings = {}
+        self.connect()
+        
+        try:
+            # Deferred transaction so every query sees the same data
+            self.cursor.execute("BEGIN")
+            
+            # All sales and repair income metrics in one statement: the range's
+            # revenue facts are read once, through the occurred_at index, into a
+            # shared CTE that every section aggregates from
+            phase_started = time.perf_counter()
+            self.cursor.execute(f'''
+            WITH facts AS (
+                SELECT strftime('{date_format}', occurred_at) as period,
+                       {TRANSACTION_KEY_SQL} as sale_key, source, line_type, product_id, category,
+                       quantity, amount, amount - discount + tax as charged, tax, cost
+                FROM revenue_facts
+                WHERE occurred_at BETWEEN ? AND ?
+            ),
+            -- Each section first totals every sale or repair job per group, so
+            -- that jobs whose facts cancel out there are not counted
+            period_sales AS (
+                SELECT period, SUM(charged) as revenue, SUM(amount) as gross, {COUNTED_SALE_SQL} as counted
+                FROM facts
+                GROUP BY period, sale_key
+            ),
+            product_sales AS (
+                SELECT product_id, SUM(quantity) as quantity, SUM(amount) as revenue, SUM(cost) as cost,
+                       {COUNTED_SALE_SQL} as counted
+                FROM facts
+                WHERE product_id IS NOT NULL
+                GROUP BY product_id, sale_key
+            ),
+            category_sales AS (
+                SELECT category, SUM(quantity) as quantity, SUM(amount) as revenue, SUM(cost) as cost,
+                       {COUNTED_SALE_SQL} as counted
+                FROM facts
+                GROUP BY category, sale_key
+            ),
+            sales AS (
+                SELECT SUM(CASE WHEN line_type != 'service' THEN quantity ELSE 0 END) as quantity,
+                       SUM(charged) as revenue, SUM(cost) as cost, SUM(tax) as tax,
+                       SUM(CASE WHEN source = 'repair' THEN charged ELSE 0 END) as repair_revenue,
+                       {COUNTED_SALE_SQL} as counted
+                FROM facts
+                GROUP BY sale_key
+            ),
+            product_totals AS (
+                SELECT product_id, SUM(counted) as num_sales, SUM(quantity) as quantity,
+                       SUM(revenue) as revenue, SUM(cost) as cost
+                FROM product_sales
+                GROUP BY product_id
+            )
+            SELECT 'period' as section, period as key, NULL as name, NULL as category,
+                   SUM(counted) as num_sales, NULL as quantity,
+                   SUM(revenue) as revenue, SUM(gross) as gross, NULL as cost,
+                   NULL as tax, NULL as repair_revenue
+            FROM period_sales
+            GROUP BY period
+            UNION ALL
+            SELECT 'product', pt.product_id, p.name, p.category,
+                   pt.num_sales, pt.quantity, pt.revenue, NULL, pt.cost, NULL, NULL
+            FROM product_totals pt
+            JOIN products p ON pt.product_id = p.id
+            UNION ALL
+            SELECT 'category', category, NULL, category,
+                   SUM(counted), SUM(quantity), SUM(revenue), NULL, SUM(cost), NULL, NULL
+            FROM category_sales
+            GROUP BY category
+            UNION ALL
+            SELECT 'profit', NULL, NULL, NULL,
+                   IFNULL(SUM(counted), 0), SUM(quantity),
+                   SUM(revenue), NULL, SUM(cost), SUM(tax), SUM(repair_revenue)
+            FROM sales
+            ''', (start_date, end_date))
+            
+            sections = {'period': [], 'product': [], 'category': [], 'profit': []}
+            for row in self.cursor.fetchall():
+                sections[row['section']].append(dict(row))
+            
+            sales_by_period = []
+            for row in sorted(sections['period'], key=lambda r: r['key'] or ''):
+                sales_by_period.append({
+                    'period': row['key'],
+                    'num_sales': row['num_sales'],
+                    'total_sales': row['gross'],
+                    'final_sales': row['revenue'],
+                    'avg_sale_value': (row['revenue'] or 0) / row['num_sales'] if row['num_sales'] else 0
+                })
+            
+            top_products = []
+            for row in sorted(sections['product'], key=lambda r: r['quantity'], reverse=True)[:top_limit]:
+                top_products.append({
+                    'id': row['key'],
+                    'name': row['name'],
+                    'category': row['category'],
+                    'total_quantity': row['quantity'],
+                    'total_revenue': row['revenue'],
+                    'num_sales': row['num_sales']
+                })
+            
+            total_category_revenue = sum(row['revenue'] or 0 for row in sections['category'])
+            sales_by_category = {}
+            for row in sorted(sections['category'], key=lambda r: r['revenue'] or 0, reverse=True):
+                revenue = row['revenue'] or 0
+                cost = row['cost'] or 0
+                sales_by_category[row['category'] or 'Uncategorized'] = {
+                    'revenue': revenue,
+                    'cost': cost,
+                    'margin': revenue - cost,
+                    'quantity_sold': row['quantity'],
+                    'num_sales': row['num_sales'],
+                    'percentage': (revenue / total_category_revenue * 100) if total_category_revenue > 0 else 0
+                }
+            
+            profit_row = sections['profit'][0]
+            timings['sales_ms'] = (time.perf_counter() - phase_started) * 1000
+            
+            # Expenses
+            phase_started = time.perf_counter()
+            self.cursor.execute('''
+            SELECT 
+                category,
+                COUNT(*) as num_expenses,
+                SUM(amount) as total_amount
+            FROM expenses
+            WHERE date BETWEEN ? AND ?
+            GROUP BY category
+            ORDER BY total_amount DESC
+            ''', (start_date, end_date))
+            
+            expense_rows = [dict(row) for row in self.cursor.fetchall()]
+            total_expenses = sum(row['total_amount'] or 0 for row in expense_rows)
+            expenses_by_category = {}
+            for row in expense_rows:
+                expenses_by_category[row['category'] or 'Uncategorized'] = {
+                    'num_expenses': row['num_expenses'],
+                    'total_amount': row['total_amount'],
+                    'percentage': (row['total_amount'] / total_expenses * 100) if total_expenses > 0 else 0
+                }
+            timings['expenses_ms'] = (time.perf_counter() - phase_started) * 1000
+            
+            # Products with the date they last sold, for stock and inventory metrics
+            phase_started = time.perf_counter()
+            self.cursor.execute('''
+            WITH last_sales AS (
+                SELECT product_id, MAX(occurred_at) as last_sold_at
+                FROM revenue_facts
+                WHERE product_id IS NOT NULL
+                GROUP BY product_id
+            )
+            SELECT p.*, ls.last_sold_at
+            FROM products p
+            LEFT JOIN last_sales ls ON ls.product_id = p.id
+            ''')
+            
+            date_threshold = datetime.datetime.now() - datetime.timedelta(days=non_selling_days)
+            threshold_str = date_threshold.strftime('%Y-%m-%d %H:%M:%S')
+            
+            low_stock_products = []
+            critical_stock_products = []
+            non_selling_products = []
+            inventory = {}
+            
+            for row in self.cursor:
+                product = dict(row)
+                store_qty = product['store_quantity'] or 0
+                warehouse_qty = product['warehouse_quantity'] or 0
+                cost_price = product['cost_price'] or 0
+                
+                if store_qty < product['min_stock_level'] or warehouse_qty < product['min_stock_level']:
+                    low_stock_products.append(product)
+                if store_qty <= 2 and warehouse_qty <= 3:
+                    critical_stock_products.append(product)
+                if store_qty > 0 and (product['last_sold_at'] is None or product['last_sold_at'] < threshold_str):
+                    non_selling_products.append(product)
+                
+                category = inventory.setdefault(product['category'] or 'Uncategorized', {
+                    'store_quantity': 0, 'warehouse_quantity': 0,
+                    'store_value': 0, 'warehouse_value': 0, 'total_value': 0, 'num_products': 0
+                })
+                category['store_quantity'] += store_qty
+                category['warehouse_quantity'] += warehouse_qty
+                category['store_value'] += store_qty * cost_price
+                category['warehouse_value'] += warehouse_qty * cost_price
+                category['total_value'] += (store_qty + warehouse_qty) * cost_price
+                category['num_products'] += 1
+            
+            stock_level = lambda p: (p['store_quantity'] or 0) + (p['warehouse_quantity'] or 0)
+            low_stock_products.sort(key=stock_level)
+            critical_stock_products.sort(key=stock_level)
+            non_selling_products.sort(key=lambda p: p['updated_at'] or '')
+            del non_selling_products[non_selling_limit:]
+            
+            total_inventory_value = sum(c['total_value'] for c in inventory.values())
+            inventory_by_category = {}
+            for name, category in sorted(inventory.items(), key=lambda c: c[1]['total_value'], reverse=True):
+                category['percentage'] = (category['total_value'] / total_inventory_value * 100) if total_inventory_value > 0 else 0
+                inventory_by_category[name] = category
+            timings['products_ms'] = (time.perf_counter() - phase_started) * 1000
+            
+            self.conn.commit()
+        except Exception as e:
+            print(f"Error building dashboard snapshot: {e}")
+            self.conn.rollback()
+            raise
+        finally:
+            self.close()
+        
+        # Same definitions as get_profit_analysis
+        total_revenue = profit_row['revenue'] or 0
+        total_cost = profit_row['cost'] or 0
+        gross_profit = total_revenue - total_cost
+        net_profit = gross_profit - total_expenses
+        profit = {
+            'total_revenue': total_revenue,
+            'total_cost': total_cost,
+            'num_sales': profit_row['num_sales'],
+            'num_items_sold': profit_row['quantity'],
+            'repair_revenue': profit_row['repair_revenue'],
+            'total_tax': profit_row['tax'],
+            'total_expenses': total_expenses,
+            'num_expenses': sum(row['num_expenses'] for row in expense_rows),
+            'gross_profit': gross_profit,
+            'net_profit': net_profit,
+            'gross_margin': (gross_profit / total_revenue * 100) if total_revenue > 0 else 0,
+            'net_margin': (net_profit / total_revenue * 100) if total_revenue > 0 else 0
+        }
+        
+        timings['total_ms'] = (time.perf_counter() - started) * 1000
+        
+        return {
+            'start_date': start_date,
+            'end_date': end_date,
+            'period_type': period_type,
+            'generated_at': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'sales_by_period': sales_by_period,
+            'top_products': top_products,
+            'sales_by_category': sales_by_category,
+            'profit': profit,
+            'total_expenses': total_expenses,
+            'expenses_by_category': expenses_by_category,
+            'inventory_by_category': inventory_by_category,
+            'low_stock_products': low_stock_products,
+            'critical_stock_products': critical_stock_products,
+            'non_selling_products': non_selling_products,
+            'timings': timings
+        }
+    
     # Customer related methods
     def get_all_customers(self):
         """Get all customers from the database"""
@@ -1711,8 +2547,10 @@ class DatabaseManager:
         self.connect()
         
         search_pattern = f"%{search_text}%"
-        self.cursor.execute('''
-        SELECT * FROM products 
+        self.cursor.execute(f'''
+        SELECT p.*, {RESERVED_QUANTITY_SQL} as reserved_quantity,
+               p.store_quantity - {RESERVED_QUANTITY_SQL} as available_quantity
+        FROM products p
         WHERE name LIKE ? OR description LIKE ? OR category LIKE ?
         ORDER BY name
         ''', (search_pattern, search_pattern, search_pattern))
@@ -1770,4 +2608,567 @@ class DatabaseManager:
         count = result['count'] if result else 0
         
         self.close()
-        return count
\ No newline at end of file
+        return count
+    
+    # Precomputed report methods
+    def get_report_data_version(self):
+        """Get a fingerprint of the data reports are computed from.
+        
+        Revenue facts and expenses are counted and their newest ids taken;
+        products contribute their count, last update and total stock, and
+        data_changes the number of expenses edited or deleted. Any sale, repair
+        income, expense or stock change gives a different fingerprint.
+        """
+        self.connect()
+        
+        self.cursor.execute('''
+        SELECT 
+            (SELECT COUNT(*) || ':' || IFNULL(MAX(id), 0) FROM revenue_facts),
+            (SELECT COUNT(*) || ':' || IFNULL(MAX(id), 0) || ':' || IFNULL(SUM(amount), 0) FROM expenses),
+            (SELECT COUNT(*) || ':' || IFNULL(MAX(updated_at), '') || ':' ||
+                    IFNULL(SUM(store_quantity), 0) || ':' || IFNULL(SUM(warehouse_quantity), 0) FROM products),
+            (SELECT IFNULL(SUM(changes), 0) FROM data_changes)
+        ''')
+        version = "|".join(str(value) for value in self.cursor.fetchone())
+        
+        self.close()
+        return version
+    
+    def get_report_snapshot(self, report, start_date, end_date, period_type, report_format):
+        """Get the latest stored version of a precomputed report, or None"""
+        self.connect()
+        
+        self.cursor.execute('''
+        SELECT * FROM report_snapshots
+        WHERE report = ? AND start_date = ? AND end_date = ? AND period_type = ? AND report_format = ?
+        ORDER BY version DESC
+        LIMIT 1
+        ''', (report, start_date, end_date, period_type or '', report_format))
+        row = self.cursor.fetchone()
+        
+        self.close()
+        return dict(row) if row else None
+    
+    def add_report_snapshot(self, snapshot, keep_versions=5, keep_days=30):
+        """Store a new version of a precomputed report. Older versions beyond
+        keep_versions, and snapshots older than keep_days, are removed.
+        Returns the version number."""
+        self.connect()
+        
+        try:
+            key = (snapshot['report'], snapshot['start_date'], snapshot['end_date'], snapshot['period_type'] or '')
+            self.cursor.execute("BEGIN IMMEDIATE")
+            self.cursor.execute('''
+            SELECT IFNULL(MAX(version), 0) + 1 FROM report_snapshots
+            WHERE report = ? AND start_date = ? AND end_date = ? AND period_type = ?
+            ''', key)
+            version = self.cursor.fetchone()[0]
+            
+            self.cursor.execute('''
+            INSERT INTO report_snapshots (
+                report, range_name, start_date, end_date, period_type, version,
+                report_format, data_version, payload, compute_ms
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (snapshot['report'], snapshot.get('range_name'), snapshot['start_date'], snapshot['end_date'],
+                  key[3], version, snapshot['report_format'], snapshot['data_version'], snapshot['payload'],
+                  snapshot.get('compute_ms')))
+            
+            self.cursor.execute('''
+            DELETE FROM report_snapshots
+            WHERE report = ? AND start_date = ? AND end_date = ? AND period_type = ? AND version <= ?
+            ''', key + (version - keep_versions,))
+            self.cursor.execute("DELETE FROM report_snapshots WHERE created_at < datetime('now', ?)",
+                                (f"-{keep_days} days",))
+            
+            self.conn.commit()
+            return version
+        except Exception as e:
+            print(f"Error storing report snapshot: {e}")
+            self.conn.rollback()
+            raise
+        finally:
+            self.close()
+    
+    def get_report_snapshots(self):
+        """List the stored precomputed reports, newest first, without their payloads"""
+        self.connect()
+        
+        self.cursor.execute('''
+        SELECT id, report, range_name, start_date, end_date, period_type, version,
+               report_format, data_version, LENGTH(payload) as size, compute_ms, created_at
+        FROM report_snapshots
+        ORDER BY created_at DESC, id DESC
+        ''')
+        snapshots = [dict(row) for row in self.cursor.fetchall()]
+        
+        self.close()
+        return snapshots
+    
+    # Inventory report methods
+    def get_product_categories(self):
+        """Get the distinct non-empty product categories, sorted"""
+        self.connect()
+        
+        self.cursor.execute('''
+        SELECT DISTINCT category FROM products
+        WHERE category IS NOT NULL AND TRIM(category) != ''
+        ORDER BY category
+        ''')
+        categories = [row['category'] for row in self.cursor.fetchall()]
+        
+        self.close()
+        return categories
+    
+    def get_inventory_page(self, filters=None, after=None, limit=100):
+        """Get one page of the inventory report, ordered by name.
+        
+        Pages are read by key rather than by offset: after is the (name, id)
+        of the last row of the previous page, so every page is an index range
+        scan however far into the catalogue it is.
+        """
+        filters = filters or {}
+        where, params = self._product_filter_clause(
+            filters.get('category'), filters.get('stock_level'), filters.get('search'))
+        if after:
+            where += (" AND " if where else "WHERE ") + "(name, id) > (?, ?)"
+            params.extend(after)
+        
+        self.connect()
+        self.cursor.execute(f'''
+        SELECT 
+            id, name, category, cost_price, selling_price,
+            store_quantity, warehouse_quantity, min_stock_level,
+            (store_quantity + warehouse_quantity) * cost_price as total_value
+        FROM products
+        {where}
+        ORDER BY name, id
+        LIMIT ?
+        ''', params + [limit])
+        products = [dict(row) for row in self.cursor.fetchall()]
+        
+        self.close()
+        return products
+    
+    def get_inventory_category_totals(self, filters=None):
+        """Get product count, quantity, value and low stock count per category
+        for the inventory report filters"""
+        filters = filters or {}
+        where, params = self._product_filter_clause(
+            filters.get('category'), filters.get('stock_level'), filters.get('search'))
+        
+        self.connect()
+        self.cursor.execute(f'''
+        SELECT 
+            COALESCE(NULLIF(TRIM(category), ''), 'Uncategorized') as category,
+            COUNT(*) as products,
+            SUM(store_quantity + warehouse_quantity) as quantity,
+            SUM((store_quantity + warehouse_quantity) * cost_price) as value,
+            SUM((store_quantity + warehouse_quantity) < min_stock_level) as low_stock
+        FROM products
+        {where}
+        GROUP BY 1
+        ORDER BY quantity DESC
+        ''', params)
+        totals = [dict(row) for row in self.cursor.fetchall()]
+        
+        self.close()
+        return totals
+    
+    # Export methods
+    def _product_filter_clause(self, category=None, stock_level=None, search=None):
+        """Build the WHERE clause for the inventory report's product filters"""
+        conditions = []
+        params = []
+        
+        if category and category != "All Categories":
+            conditions.append("category = ?")
+            params.append(category)
+        
+        if stock_level == "Low Stock":
+            conditions.append("(store_quantity + warehouse_quantity) < min_stock_level")
+        elif stock_level == "Out of Stock":
+            conditions.append("(store_quantity + warehouse_quantity) = 0")
+        elif stock_level == "In Stock":
+            conditions.append("(store_quantity + warehouse_quantity) > 0")
+        
+        if search:
+            # Substring match on the ID or name, with LIKE wildcards escaped
+            pattern = '%' + search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            conditions.append("(CAST(id AS TEXT) LIKE ? ESCAPE '\\' OR name LIKE ? ESCAPE '\\')")
+            params.extend([pattern, pattern])
+        
+        where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+        return where, params
+    
+    def _export_query(self, dataset, filters=None):
+        """Get the SQL and parameters for one export dataset"""
+        filters = filters or {}
+        start_date = filters.get('start_date')
+        end_date = filters.get('end_date')
+        
+        if dataset == 'sales_lines':
+            query = '''
+            SELECT 
+                si.id as line_id, s.id as sale_id, s.invoice_number, s.created_at,
+                s.payment_method, c.name as customer_name,
+                p.id as product_id, p.name as product_name, p.category,
+                si.quantity, si.unit_price, si.discount_percentage, si.total_price,
+                p.cost_price, si.quantity * p.cost_price as total_cost
+            FROM sale_items si
+            JOIN sales s ON si.sale_id = s.id
+            LEFT JOIN products p ON si.product_id = p.id
+            LEFT JOIN customers c ON s.customer_id = c.id
+            '''
+            date_column = 's.created_at'
+            order = 'si.id'
+        elif dataset == 'products':
+            query = '''
+            SELECT 
+                id, name, description, category, cost_price, selling_price, max_discount,
+                store_quantity, warehouse_quantity, min_stock_level,
+                (store_quantity + warehouse_quantity) * cost_price as total_value,
+                supplier_name, supplier_contact, created_at, updated_at
+            FROM products
+            '''
+            date_column = None
+            order = 'id'
+        elif dataset == 'inventory':
+            where, params = self._product_filter_clause(
+                filters.get('category'), filters.get('stock_level'), filters.get('search'))
+            query = f'''
+            SELECT 
+                id, name, category, cost_price, selling_price,
+                store_quantity, warehouse_quantity, min_stock_level,
+                (store_quantity + warehouse_quantity) * cost_price as total_value
+            FROM products
+            {where}
+            ORDER BY name, id
+            '''
+            return query, params
+        elif dataset == 'customers':
+            query = '''
+            SELECT id, name, phone, email, address, gst_number, created_at
+            FROM customers
+            '''
+            date_column = None
+            order = 'id'
+        elif dataset == 'repairs':
+            query = '''
+            SELECT 
+                r.id, c.name as customer_name, c.phone as customer_phone,
+                r.product_description, r.issue_description, r.serial_number, r.status,
+                r.estimated_cost, r.service_charge, r.total_parts_cost, r.final_cost,
+                r.received_date, r.estimated_completion_date, r.completed_at, r.notes
+            FROM repair_jobs r
+            LEFT JOIN customers c ON r.customer_id = c.id
+            '''
+            date_column = 'r.created_at'
+            order = 'r.id'
+        elif dataset == 'expenses':
+            query = '''
+            SELECT id, date, category, description, amount, created_at
+            FROM expenses
+            '''
+            date_column = 'date'
+            order = 'id'
+        else:
+            raise ValueError(f"Unknown export dataset: {dataset}")
+        
+        params = []
+        if date_column and start_date and end_date:
+            query += f"WHERE {date_column} BETWEEN ? AND ?\n"
+            params.extend([start_date, end_date])
+        query += f"ORDER BY {order}"
+        return query, params
+    
+    def count_export_rows(self, dataset, filters=None):
+        """Count the rows an export will write, for progress reporting"""
+        query, params = self._export_query(dataset, filters)
+        
+        self.connect()
+        self.cursor.execute(f"SELECT COUNT(*) FROM ({query})", params)
+        count = self.cursor.fetchone()[0]
+        
+        self.close()
+        return count
+    
+    def iter_export_rows(self, dataset, filters=None, chunk_size=1000):
+        """Yield (column_names, rows) chunks of an export dataset.
+        
+        Rows are fetched from the cursor chunk_size at a time, so memory use does
+        not grow with the size of the table. A separate connection is used so an
+        export can run on a worker thread while the GUI keeps using this manager.
+        """
+        query, params = self._export_query(dataset, filters)
+        
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.execute(query, params)
+            columns = [description[0] for description in cursor.description]
+            
+            # The first chunk is always yielded, even when empty, so writers get the columns
+            rows = cursor.fetchmany(chunk_size)
+            yield columns, rows
+            while rows:
+                rows = cursor.fetchmany(chunk_size)
+                if rows:
+                    yield columns, rows
+        finally:
+            conn.close()
+    
+    # Label sheet methods
+    def _label_items_query(self, filters):
+        """Build the product item query for a label sheet from filters"""
+        conditions = []
+        params = []
+        
+        if filters.get('product_id'):
+            conditions.append("pi.product_id = ?")
+            params.append(filters['product_id'])
+        if filters.get('status'):
+            conditions.append("pi.status = ?")
+            params.append(filters['status'])
+        if filters.get('start_date'):
+            conditions.append("date(pi.created_at) >= ?")
+            params.append(filters['start_date'])
+        if filters.get('end_date'):
+            conditions.append("date(pi.created_at) <= ?")
+            params.append(filters['end_date'])
+        
+        query = '''
+        SELECT pi.id, pi.unique_id, pi.product_id, p.name as product_name, p.selling_price
+        FROM product_items pi
+        JOIN products p ON pi.product_id = p.id
+        '''
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        return query, params
+    
+    def count_label_items(self, filters=None):
+        """Number of product items a label sheet with these filters would print"""
+        filters = filters or {}
+        if filters.get('unique_ids') is not None:
+            return len(filters['unique_ids'])
+        
+        query, params = self._label_items_query(filters)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(f"SELECT COUNT(*) FROM ({query})", params).fetchone()[0]
+        finally:
+            conn.close()
+    
+    def iter_label_items(self, filters=None, chunk_size=500):
+        """Yield chunks of product items (with product name and price) to print labels for.
+        
+        filters may hold product_id, status, start_date and end_date, or
+        unique_ids for an explicit batch such as one transfer to the store.
+        Uses its own connection so it can run on a worker thread.
+        """
+        filters = filters or {}
+        query, params = self._label_items_query(filters)
+        
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            unique_ids = filters.get('unique_ids')
+            if unique_ids is not None:
+                # Explicit batches are looked up a chunk of IDs at a time
+                query += (" AND" if " WHERE " in query else " WHERE") + " pi.unique_id IN ({})"
+                for start in range(0, len(unique_ids), chunk_size):
+                    chunk = unique_ids[start:start + chunk_size]
+                    cursor = conn.execute(query.format(",".join("?" * len(chunk))) + " ORDER BY pi.id",
+                                          params + list(chunk))
+                    yield [dict(row) for row in cursor.fetchall()]
+                return
+            
+            cursor = conn.execute(query + " ORDER BY pi.id", params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    # Print job queue methods. They use their own connections so the print
+    # spooler's worker threads can call them.
+    def add_print_job(self, kind, description, params):
+        """Queue a print job; params is a JSON string. Returns the job id"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.execute(
+                "INSERT INTO print_jobs (kind, description, params) VALUES (?, ?, ?)",
+                (kind, description, params))
+            conn.commit()
+            return cursor.lastrowid
+        finally:
+            conn.close()
+
+    def claim_print_job(self, now):
+        """Mark the oldest queued job that is due as running and return it, or None"""
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            # Take the write lock first so two workers never claim the same job
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute('''
+            SELECT * FROM print_jobs
+            WHERE status = 'queued' AND next_attempt_at <= ?
+            ORDER BY next_attempt_at, id
+            LIMIT 1
+            ''', (now,)).fetchone()
+            if row:
+                conn.execute('''
+                UPDATE print_jobs SET status = 'running', attempts = attempts + 1,
+                       updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+                ''', (row['id'],))
+            conn.execute("COMMIT")
+            if not row:
+                return None
+            job = dict(row)
+            job['status'] = 'running'
+            job['attempts'] += 1
+            return job
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def update_print_job(self, job_id, status, result=None, error=None, next_attempt_at=0):
+        """Record the outcome of a job, or put it back in the queue with status 'queued'"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute('''
+            UPDATE print_jobs SET status = ?, result = ?, error = ?, next_attempt_at = ?,
+                   updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+            ''', (status, result, error, next_attempt_at, job_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def retry_print_job(self, job_id):
+        """Queue a failed or cancelled job again. Returns True if it was queued"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.execute('''
+            UPDATE print_jobs SET status = 'queued', attempts = 0, next_attempt_at = 0,
+                   error = NULL, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND status IN ('failed', 'cancelled')
+            ''', (job_id,))
+            conn.commit()
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
+
+    def cancel_print_job(self, job_id):
+        """Cancel a job that has not started. Returns True if it was cancelled"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.execute('''
+            UPDATE print_jobs SET status = 'cancelled', updated_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND status = 'queued'
+            ''', (job_id,))
+            conn.commit()
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
+
+    def reset_running_print_jobs(self):
+        """Queue again the jobs left running when the application last stopped"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.execute(
+                "UPDATE print_jobs SET status = 'queued', next_attempt_at = 0 WHERE status = 'running'")
+            conn.commit()
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+    def get_print_jobs(self, limit=100):
+        """Most recent print jobs, without their parameters"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.execute('''
+            SELECT id, kind, description, status, attempts, result, error, created_at, updated_at
+            FROM print_jobs
+            ORDER BY id DESC
+            LIMIT ?
+            ''', (limit,))
+            return [dict(row) for row in cursor.fetchall()]
+        finally:
+            conn.close()
+
+    # Invoice archive methods. They use their own connections so archiving can
+    # run on the print spooler's threads and in batch worker processes.
+    def add_archived_invoice(self, entry):
+        """Index an archived invoice. An invoice number already archived with
+        the same content keeps its entry, which becomes its latest version
+        again. Returns the entry id"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute('''
+            INSERT INTO invoice_archive (invoice_number, kind, invoice_date, customer_name,
+                                         customer_phone, amount, content_hash, size, stored_size,
+                                         archived_seq)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, (SELECT IFNULL(MAX(archived_seq), 0) + 1 FROM invoice_archive))
+            ON CONFLICT (invoice_number, content_hash) DO UPDATE SET archived_seq = excluded.archived_seq
+            ''', (entry['invoice_number'], entry.get('kind'), entry.get('invoice_date'),
+                  entry.get('customer_name'), entry.get('customer_phone'), entry.get('amount'),
+                  entry['content_hash'], entry.get('size'), entry.get('stored_size')))
+            conn.commit()
+            row = conn.execute(
+                "SELECT id FROM invoice_archive WHERE invoice_number = ? AND content_hash = ?",
+                (entry['invoice_number'], entry['content_hash'])).fetchone()
+            return row[0]
+        finally:
+            conn.close()
+
+    def find_archived_invoices(self, invoice_number=None, start_date=None, end_date=None,
+                               customer=None, min_amount=None, max_amount=None, latest_only=True):
+        """Archived invoices matching all the given filters, oldest first.
+
+        customer matches the start of the customer's name (ignoring case) or
+        phone number. With latest_only, only the most recently archived
+        version of each invoice number is returned.
+        """
+        conditions = []
+        params = []
+        if invoice_number:
+            conditions.append("invoice_number = ?")
+            params.append(invoice_number)
+        if start_date:
+            conditions.append("invoice_date >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("invoice_date <= ?")
+            params.append(end_date)
+        if customer:
+            conditions.append("(customer_name LIKE ? COLLATE NOCASE OR customer_phone LIKE ?)")
+            params.extend([customer + '%', customer + '%'])
+        if min_amount is not None:
+            conditions.append("amount >= ?")
+            params.append(min_amount)
+        if max_amount is not None:
+            conditions.append("amount <= ?")
+            params.append(max_amount)
+        if latest_only:
+            conditions.append("NOT EXISTS (SELECT 1 FROM invoice_archive newer "
+                              "WHERE newer.invoice_number = a.invoice_number AND newer.archived_seq > a.archived_seq)")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.execute(f'''
+            SELECT a.* FROM invoice_archive a
+            {where}
+            ORDER BY a.invoice_date, a.invoice_number, a.archived_seq
+            ''', params)
+            return [dict(row) for row in cursor.fetchall()]
+        finally:
+            conn.close()
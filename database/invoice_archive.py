@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import zipfile
+import zlib
+
+ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'invoice', 'archive')
+COMPRESS_LEVEL = 6
+
+
+class InvoiceArchive:
+    """Rendered invoice PDFs, stored once per distinct content.
+
+    Each PDF is saved zlib compressed under objects/ by the SHA-256 of the
+    invoice view-model and render options it was made from (see
+    content_hash), so saving the same invoice again stores nothing new. The
+    invoice_archive table indexes the objects by invoice number, date,
+    customer and amount; a changed invoice (say, re-saved without GST) is
+    kept as a new version of its number. Safe to use from any thread or
+    process.
+    """
+
+    def __init__(self, db_manager, directory=ARCHIVE_DIR):
+        self.db_manager = db_manager
+        self.directory = directory
+        self.objects_dir = os.path.join(directory, 'objects')
+
+    def content_hash(self, invoice, options):
+        """Hash of what an archived PDF shows. The PDF bytes themselves are not
+        hashed: QPdfWriter stamps every render with its creation time, and the
+        same invoice rendered with newer templates is still the same invoice."""
+        payload = json.dumps([invoice, options], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def object_path(self, content_hash):
+        return os.path.join(self.objects_dir, content_hash[:2], f"{content_hash}.pdf.z")
+
+    def store(self, invoice, options, pdf, amount):
+        """Archive the PDF of an invoice view-model (see screens.invoice_templates)
+        rendered with the given options, whose total is amount. Returns the
+        index entry."""
+        content_hash = self.content_hash(invoice, options)
+        path = self.object_path(content_hash)
+        if os.path.exists(path):
+            stored_size = os.path.getsize(path)
+        else:
+            data = zlib.compress(pdf, COMPRESS_LEVEL)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+            stored_size = len(data)
+
+        customer = invoice.get('customer') or {}
+        entry = {
+            'invoice_number': options.get('invoice_number') or invoice['invoice_number'],
+            'kind': invoice.get('kind'),
+            'invoice_date': options.get('invoice_date') or invoice.get('invoice_date'),
+            'customer_name': customer.get('name'),
+            'customer_phone': customer.get('phone'),
+            'amount': amount,
+            'content_hash': content_hash,
+            'size': len(pdf),
+            'stored_size': stored_size,
+        }
+        entry['id'] = self.db_manager.add_archived_invoice(entry)
+        return entry
+
+    def read(self, entry):
+        """PDF bytes of an index entry"""
+        with open(self.object_path(entry['content_hash']), 'rb') as f:
+            return zlib.decompress(f.read())
+
+    def get(self, invoice_number):
+        """PDF bytes of the latest archived version of an invoice, or None"""
+        entries = self.db_manager.find_archived_invoices(invoice_number=invoice_number)
+        return self.read(entries[-1]) if entries else None
+
+    def find(self, **filters):
+        """Index entries, see DatabaseManager.find_archived_invoices for the filters"""
+        return self.db_manager.find_archived_invoices(**filters)
+
+    def export_zip(self, zip_path, entries):
+        """Write the PDFs of index entries to one zip file, as <invoice number>.pdf.
+        Returns the number of invoices written."""
+        names = set()
+        temp_path = zip_path + '.part'
+        try:
+            # PDFs hardly compress further, so they are stored as they are
+            with zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_STORED) as archive:
+                for entry in entries:
+                    name = re.sub(r'[^A-Za-z0-9._-]', '_', entry['invoice_number'])
+                    if name in names:
+                        name = f"{name}-{entry['id']}"
+                    names.add(name)
+                    archive.writestr(f"{name}.pdf", self.read(entry))
+            os.replace(temp_path, zip_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return len(names)
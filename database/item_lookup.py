@@ -0,0 +1,100 @@
+import sqlite3
+import threading
+import time
+
+
+class ItemLookupCache:
+    """In-memory index of product items by unique ID for the scan path.
+
+    warm() loads every in-store item (with its product's name, price and
+    store quantity) in one query, normally on a worker thread when the sales
+    screen opens. get() then answers from memory; items it does not hold are
+    read with get_product_item_by_unique_id and kept.
+
+    SQLite's data_version changes whenever another connection commits, so
+    the cache drops everything it holds as soon as anything is written and
+    warms itself again in the background; scans in between fall back to
+    single indexed lookups. Items are matched ignoring case, in memory and
+    in the database, as scanners typing with caps lock on invert it. Safe to
+    use from any thread.
+    """
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self.items = {}
+        self.lock = threading.Lock()
+        self.version_conn = None
+        self.data_version = None
+        self.warm_thread = None
+        self.last_warm_ms = 0
+        self.hits = {'memory': 0, 'database': 0}
+
+    def current_version(self):
+        # Called with the lock held
+        if self.version_conn is None:
+            self.version_conn = sqlite3.connect(self.db_manager.db_path, check_same_thread=False)
+        return self.version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def check_version(self):
+        # Called with the lock held
+        version = self.current_version()
+        if version != self.data_version:
+            # Only reloaded if it had been warmed, so a cache nobody warmed stays lazy
+            rewarm = bool(self.items) or self.warm_thread is not None
+            self.items.clear()
+            self.data_version = version
+            if rewarm:
+                self.warm_in_background()
+
+    def warm(self):
+        """Load every in-store item into memory"""
+        started = time.perf_counter()
+        with self.lock:
+            version = self.current_version()
+        items = self.db_manager.get_in_store_items_for_scanning()
+
+        with self.lock:
+            # Anything committed while loading moves the version on again,
+            # so the next get() throws this copy away rather than trusting it
+            self.items = {item['unique_id'].upper(): item for item in items}
+            self.data_version = version
+        self.last_warm_ms = (time.perf_counter() - started) * 1000
+
+    def warm_in_background(self):
+        """Start warming on a worker thread unless that is already happening"""
+        if self.warm_thread is not None and self.warm_thread.is_alive():
+            return
+        self.warm_thread = threading.Thread(target=self.run_warm, name='item-lookup-warm', daemon=True)
+        self.warm_thread.start()
+
+    def run_warm(self):
+        try:
+            self.warm()
+        except Exception as e:
+            # The cache is only an optimisation
+            print(f"Error loading product items for scanning: {e}")
+
+    def get(self, unique_id):
+        """The product item with this unique ID as a dict, or None"""
+        with self.lock:
+            self.check_version()
+            version = self.data_version
+            item = self.items.get(unique_id.upper())
+            if item is not None:
+                self.hits['memory'] += 1
+                return dict(item)
+
+        item = self.db_manager.get_product_item_by_unique_id(unique_id)
+        self.hits['database'] += 1
+        if item is not None:
+            with self.lock:
+                # Only keep it if nothing was committed in the meantime
+                if self.data_version == version:
+                    self.items[unique_id.upper()] = item
+            item = dict(item)
+        return item
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+            self.data_version = None
@@ -0,0 +1,192 @@
+import datetime
+import json
+import time
+
+from database.analytics_engine import AnalyticsEngine
+from screens.time_series import possible_granularities
+
+# Bump when the shape of a stored report changes, so older snapshots are ignored
+REPORT_FORMAT = '2'
+
+# The preset date ranges of the dashboard and analytics screens
+PRESET_RANGES = ['today', 'last_7_days', 'last_30_days', 'this_month', 'this_year']
+
+# Reports precomputed by the scheduler. The dashboard snapshot holds the sales
+# trend, category margins, low stock and non-selling (dead stock) products
+SCHEDULED_REPORTS = ['dashboard', 'analytics']
+
+# Versions kept per report and range, and days a snapshot is kept at all
+KEEP_VERSIONS = 5
+KEEP_DAYS = 30
+
+TOP_PRODUCTS_LIMIT = 10
+
+
+def preset_range(range_name, today=None):
+    """(start_date, end_date) of a preset range, as 'yyyy-MM-dd' strings"""
+    today = today or datetime.date.today()
+    if range_name == 'today':
+        start = today
+    elif range_name == 'last_7_days':
+        start = today - datetime.timedelta(days=6)
+    elif range_name == 'last_30_days':
+        start = today - datetime.timedelta(days=29)
+    elif range_name == 'this_month':
+        start = today.replace(day=1)
+    elif range_name == 'this_year':
+        start = today.replace(month=1, day=1)
+    else:
+        raise ValueError(f"Unknown report range: {range_name}")
+    return start.isoformat(), today.isoformat()
+
+
+def range_name_for(start_date, end_date, today=None):
+    """Name of the preset range with these dates, or None for a custom range"""
+    for range_name in PRESET_RANGES:
+        if preset_range(range_name, today) == (start_date, end_date):
+            return range_name
+    return None
+
+
+def analytics_report(engine, start_date, end_date):
+    """Everything the analytics screen shows for a date range, from a refreshed engine"""
+    return {
+        'profit': engine.profit_analysis(start_date, end_date),
+        'sales_by_period': {period_type: engine.sales_by_period(period_type, start_date, end_date)
+                            for period_type in ('day', 'week', 'month')},
+        'sales_by_payment_method': engine.sales_by_payment_method(start_date, end_date),
+        'sales_by_category': engine.sales_by_category(start_date, end_date),
+        'top_selling_products': engine.top_selling_products(start_date, end_date, TOP_PRODUCTS_LIMIT),
+        'expenses_by_category': engine.expenses_by_category(start_date, end_date),
+    }
+
+
+class PrecomputedAnalytics:
+    """A stored analytics report, answering the AnalyticsEngine queries the
+    analytics screen makes for the report's date range"""
+
+    def __init__(self, report):
+        self.report = report
+
+    def profit_analysis(self, start_date=None, end_date=None):
+        return self.report['profit']
+
+    def sales_by_period(self, period_type, start_date, end_date):
+        return self.report['sales_by_period'][period_type]
+
+    def sales_by_payment_method(self, start_date=None, end_date=None):
+        return self.report['sales_by_payment_method']
+
+    def sales_by_category(self, start_date=None, end_date=None):
+        return self.report['sales_by_category']
+
+    def top_selling_products(self, start_date=None, end_date=None, limit=10):
+        return self.report['top_selling_products'][:limit]
+
+    def expenses_by_category(self, start_date=None, end_date=None):
+        return self.report['expenses_by_category']
+
+
+class ReportStore:
+    """Precomputed reports, stored as versioned snapshots in report_snapshots.
+
+    A snapshot records the data fingerprint (see
+    DatabaseManager.get_report_data_version) it was computed from and is only
+    served while the data is unchanged, so a precomputed report always matches
+    what a live computation would show. Every recomputation adds a new
+    version; the last KEEP_VERSIONS are kept.
+    """
+
+    def __init__(self, db_manager, engine=None):
+        self.db_manager = db_manager
+        # Only created when an analytics report has to be computed
+        self.engine = engine
+
+    def current_snapshot(self, report, start_date, end_date, period_type, data_version):
+        """The latest snapshot of a report if it was computed from data_version, else None"""
+        snapshot = self.db_manager.get_report_snapshot(report, start_date, end_date, period_type, REPORT_FORMAT)
+        if snapshot is None or snapshot['data_version'] != data_version:
+            return None
+        return snapshot
+
+    def lookup(self, report, start_date, end_date, period_type=''):
+        """Payload of the current snapshot of a report, or None if there is
+        none or the data changed since it was computed"""
+        snapshot = self.current_snapshot(report, start_date, end_date, period_type,
+                                         self.db_manager.get_report_data_version())
+        return json.loads(snapshot['payload']) if snapshot else None
+
+    def save(self, report, range_name, start_date, end_date, period_type, payload, data_version, compute_ms=None):
+        return self.db_manager.add_report_snapshot({
+            'report': report,
+            'range_name': range_name,
+            'start_date': start_date,
+            'end_date': end_date,
+            'period_type': period_type,
+            'report_format': REPORT_FORMAT,
+            'data_version': data_version,
+            'payload': json.dumps(payload, default=str),
+            'compute_ms': compute_ms,
+        }, KEEP_VERSIONS, KEEP_DAYS)
+
+    def cached(self, report, range_name, start_date, end_date, period_type, compute):
+        """Payload of a report, from its current snapshot or else computed with
+        compute() and stored as a new version"""
+        data_version = self.db_manager.get_report_data_version()
+        snapshot = self.current_snapshot(report, start_date, end_date, period_type, data_version)
+        if snapshot is not None:
+            return json.loads(snapshot['payload'])
+        started = time.perf_counter()
+        payload = compute()
+        # Stored as it will be read back, so live and stored reports look the same
+        payload = json.loads(json.dumps(payload, default=str))
+        self.save(report, range_name, start_date, end_date, period_type, payload, data_version,
+                  (time.perf_counter() - started) * 1000)
+        return payload
+
+    # Computing reports
+
+    def compute(self, report, start_date, end_date, period_type=''):
+        if report == 'dashboard':
+            return self.db_manager.get_dashboard_snapshot(start_date, end_date, period_type)
+        if report == 'analytics':
+            if self.engine is None:
+                self.engine = AnalyticsEngine(self.db_manager)
+            self.engine.refresh()
+            return analytics_report(self.engine, start_date, end_date)
+        raise ValueError(f"Unknown report: {report}")
+
+    def scheduled(self, reports=SCHEDULED_REPORTS, ranges=PRESET_RANGES, today=None):
+        """(report, range_name, start_date, end_date, period_type) of every
+        scheduled report for today's preset ranges.
+
+        The dashboard picks its granularity from the width its sales chart
+        happens to have, so its snapshot is precomputed at every granularity
+        the range can be shown at.
+        """
+        jobs = []
+        for range_name in ranges:
+            start_date, end_date = preset_range(range_name, today)
+            for report in reports:
+                period_types = possible_granularities(start_date, end_date) if report == 'dashboard' else ['']
+                for period_type in period_types:
+                    jobs.append((report, range_name, start_date, end_date, period_type))
+        return jobs
+
+    def run(self, jobs, force=False):
+        """Compute and store the reports of jobs, skipping those already current
+        unless force is set. Returns (job, version or None, milliseconds) per job."""
+        results = []
+        for job in jobs:
+            report, range_name, start_date, end_date, period_type = job
+            data_version = self.db_manager.get_report_data_version()
+            if not force and self.current_snapshot(report, start_date, end_date, period_type, data_version):
+                results.append((job, None, 0))
+                continue
+            started = time.perf_counter()
+            payload = self.compute(report, start_date, end_date, period_type)
+            compute_ms = (time.perf_counter() - started) * 1000
+            version = self.save(report, range_name, start_date, end_date, period_type, payload,
+                                data_version, compute_ms)
+            results.append((job, version, compute_ms))
+        return results
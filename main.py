@@ -60,16 +60,30 @@ class QRScannerScreen(QWidget):
         # Dummy method to match the interface of the real QRScannerScreen
         pass
 
-# Print a message about QR scanner functionality
-print("QR Scanner functionality is not available due to missing dependencies.")
-print("Please install Visual C++ Redistributable Packages for Visual Studio 2013:")
-print("Download from: https://aka.ms/highdpimfc2013x64enu (64-bit) or https://aka.ms/highdpimfc2013x86enu (32-bit)")
-print("The application will continue without QR scanning functionality.\n")
+# Use the real scanner when OpenCV can be imported
+try:
+    from screens.qr_scanner import QRScannerScreen
+    QR_SCANNER_AVAILABLE = True
+except ImportError:
+    # Print a message about QR scanner functionality
+    print("QR Scanner functionality is not available due to missing dependencies.")
+    print("Please install Visual C++ Redistributable Packages for Visual Studio 2013:")
+    print("Download from: https://aka.ms/highdpimfc2013x64enu (64-bit) or https://aka.ms/highdpimfc2013x86enu (32-bit)")
+    print("The application will continue without QR scanning functionality.\n")
 
 from screens.customer import CustomerScreen
 
 # Import database manager
 from database.db_manager import DatabaseManager
+from database.analytics_engine import AnalyticsEngine
+from database.item_lookup import ItemLookupCache
+from database.invoice_archive import InvoiceArchive
+from database.precomputed_reports import ReportStore
+from screens.chart_renderer import ChartRenderService
+from screens.qr_images import QRImageCache, default_cache_dir
+from screens.invoice_cache import InvoiceCache, default_cache_dir as default_invoice_cache_dir
+from screens.print_spooler import PrintSpooler, PrintJobsPanel
+from screens.report_scheduler import ReportScheduler
 
 class InventoryManagementSystem(QMainWindow):
     def __init__(self):
@@ -82,6 +96,41 @@ class InventoryManagementSystem(QMainWindow):
         self.db_manager = DatabaseManager()
         self.db_manager.setup_database()
         
+        # Shared off-thread chart renderer used by the dashboard screens
+        self.chart_renderer = ChartRenderService()
+        
+        # In-memory columnar copy of sales data for the analytics screen,
+        # loaded on first use and refreshed incrementally
+        self.analytics_engine = AnalyticsEngine(self.db_manager)
+        
+        # Dashboard and analytics reports for the preset date ranges are
+        # precomputed while the application is idle (or by precompute_reports.py)
+        self.report_store = ReportStore(self.db_manager, self.analytics_engine)
+        self.report_scheduler = ReportScheduler(self.db_manager.db_path, parent=self)
+        self.report_scheduler.start()
+        
+        # Item QR images, rendered from their unique IDs when needed
+        self.qr_images = QRImageCache(disk_dir=default_cache_dir())
+        
+        # Product items by unique ID, so scanned labels are looked up in memory
+        self.item_lookup = ItemLookupCache(self.db_manager)
+        
+        # Rendered invoices (HTML and PDF), so previews and reprints are lookups
+        self.invoice_cache = InvoiceCache(disk_dir=default_invoice_cache_dir())
+        
+        # Saved invoice PDFs, deduplicated and indexed for lookups
+        self.invoice_archive = InvoiceArchive(self.db_manager)
+        
+        # Prints and exports run in the background; progress shows in the status bar
+        self.print_spooler = PrintSpooler(self.db_manager, self.invoice_cache, self.invoice_archive, parent=self)
+        self.print_spooler.job_changed.connect(self.on_print_job_changed)
+        self.print_jobs_panel = None
+        self.print_jobs_btn = QPushButton("Print Jobs")
+        self.print_jobs_btn.setFlat(True)
+        self.print_jobs_btn.clicked.connect(self.show_print_jobs)
+        self.statusBar().addPermanentWidget(self.print_jobs_btn)
+        self.print_spooler.start()
+        
         # Set up the stacked widget to manage different screens
         self.stacked_widget = QStackedWidget()
         self.setCentralWidget(self.stacked_widget)
@@ -241,11 +290,12 @@ class InventoryManagementSystem(QMainWindow):
         self.stacked_widget.setCurrentWidget(self.repair_invoice_screen)
         print(f"RepairInvoiceScreen created and shown for repair_id: {repair_id}")
     
-    def show_qr_scanner(self, callback=None):
+    def show_qr_scanner(self, callback=None, batch_callback=None):
         if QR_SCANNER_AVAILABLE:
             # If a callback is provided, set it in the QR scanner
             if callback:
-                self.qr_scanner.set_callback(callback)
+                self.qr_scanner.set_callback(callback, batch_callback,
+                                             return_to=self.stacked_widget.currentWidget())
             self.stacked_widget.setCurrentWidget(self.qr_scanner)
         else:
             QMessageBox.warning(self, "Feature Unavailable", 
@@ -285,6 +335,38 @@ class InventoryManagementSystem(QMainWindow):
         self.stacked_widget.setCurrentWidget(self.customer_screen)
         self.customer_screen.load_customers()
     
+    def show_print_jobs(self):
+        if self.print_jobs_panel is None:
+            self.print_jobs_panel = PrintJobsPanel(self.print_spooler, self)
+        self.print_jobs_panel.refresh()
+        self.print_jobs_panel.show()
+        self.print_jobs_btn.setText("Print Jobs")
+        self.print_jobs_btn.setStyleSheet("")
+        self.print_jobs_panel.raise_()
+    
+    def on_print_job_changed(self, job):
+        # Report in the status bar instead of a dialog, so work is never interrupted
+        description = job.get('description') or "Print job"
+        if job['status'] == 'queued' and job.get('error'):
+            self.statusBar().showMessage(f"{description} failed, retrying: {job['error']}", 10000)
+        elif job['status'] == 'queued':
+            self.statusBar().showMessage(f"{description} queued", 3000)
+        elif job['status'] == 'running' and 'progress' in job:
+            self.statusBar().showMessage(f"{description}: {job['progress']:,} of {job['total']:,} rows", 3000)
+        elif job['status'] == 'done':
+            self.statusBar().showMessage(f"{description} done: {job.get('result')}", 5000)
+        elif job['status'] == 'failed':
+            self.statusBar().showMessage(f"{description} failed: {job.get('error')}")
+            self.print_jobs_btn.setText("Print Jobs (failed)")
+            self.print_jobs_btn.setStyleSheet("color: #e74c3c; font-weight: bold;")
+    
+    def closeEvent(self, event):
+        # Unfinished jobs stay queued and run on the next start
+        self.print_spooler.stop()
+        self.report_scheduler.stop()
+        self.chart_renderer.shutdown()
+        super().closeEvent(event)
+    
     def logout(self):
         reply = QMessageBox.question(self, 'Logout', 'Are you sure you want to logout?',
                                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
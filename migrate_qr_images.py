@@ -0,0 +1,45 @@
+import sqlite3
+import os
+import sys
+
+# Item QR codes are now rendered on demand from product_items.unique_id, so the
+# stored image paths (and the images themselves) are no longer used.
+# Run with --delete-files to also remove the old per-item PNG files. Only
+# images the product items pointed to, inside assets/qr_codes, are removed;
+# qr/ holds the sample images benchmark_qr_decoding.py reads and is left alone.
+
+db_path = 'database/inventory.db'
+old_qr_dir = os.path.abspath(os.path.join('assets', 'qr_codes'))
+
+conn = sqlite3.connect(db_path)
+cursor = conn.cursor()
+
+try:
+    cursor.execute("SELECT qr_code_path FROM product_items WHERE qr_code_path IS NOT NULL")
+    old_paths = [row[0] for row in cursor.fetchall()]
+    count = len(old_paths)
+
+    cursor.execute("UPDATE product_items SET qr_code_path = NULL WHERE qr_code_path IS NOT NULL")
+    conn.commit()
+    print(f"Cleared the stored QR image path of {count} product items")
+
+    if '--delete-files' in sys.argv:
+        removed = 0
+        freed = 0
+        for path in set(os.path.abspath(path) for path in old_paths):
+            if os.path.commonpath([path, old_qr_dir]) != old_qr_dir:
+                continue
+            if os.path.isfile(path) and path.lower().endswith('.png'):
+                freed += os.path.getsize(path)
+                os.remove(path)
+                removed += 1
+        print(f"Removed {removed} old QR image files ({freed / 1024:.0f} KB)")
+    else:
+        print("Old QR image files were kept; run with --delete-files to remove them")
+
+except Exception as e:
+    print(f"Error: {e}")
+    conn.rollback()
+
+# Close the connection
+conn.close()
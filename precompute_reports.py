@@ -0,0 +1,71 @@
+"""Precompute the dashboard and analytics reports for today's preset date ranges.
+
+The reports are stored as versioned snapshots (see
+database/precomputed_reports.py), so the admin dashboard and the analytics
+screen open from them instantly. Reports that are still current are skipped.
+Meant to run nightly, for example from cron:
+
+  15 0 * * *  cd /path/to/app && python precompute_reports.py
+
+The application also runs the same precomputation itself when it is idle.
+
+Usage: python precompute_reports.py [--reports dashboard,analytics]
+                                    [--ranges last_30_days,this_month] [--force] [--list]
+"""
+import argparse
+import os
+
+from database.db_manager import DatabaseManager
+from database.precomputed_reports import PRESET_RANGES, SCHEDULED_REPORTS, ReportStore
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database', 'inventory.db')
+
+
+def names(choices):
+    def parse(value):
+        values = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in values if name not in choices]
+        if unknown:
+            raise argparse.ArgumentTypeError(f"unknown: {', '.join(unknown)} (choose from {', '.join(choices)})")
+        return values
+    return parse
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the dashboard and analytics reports")
+    parser.add_argument('--reports', type=names(SCHEDULED_REPORTS), default=SCHEDULED_REPORTS,
+                        help="comma separated, all by default")
+    parser.add_argument('--ranges', type=names(PRESET_RANGES), default=PRESET_RANGES,
+                        help="comma separated, all by default")
+    parser.add_argument('--force', action='store_true', help="recompute reports that are still current")
+    parser.add_argument('--list', action='store_true', help="list the stored reports and exit")
+    parser.add_argument('--db', default=DB_PATH, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    db_manager = DatabaseManager(args.db)
+    db_manager.setup_database()
+
+    if args.list:
+        print(f"{'report':<10} {'range':<13} {'from':<10} {'to':<10} {'period':<6} {'version':>7} "
+              f"{'size':>9} {'ms':>8}  created")
+        for snapshot in db_manager.get_report_snapshots():
+            print(f"{snapshot['report']:<10} {snapshot['range_name'] or '-':<13} {snapshot['start_date']:<10} "
+                  f"{snapshot['end_date']:<10} {snapshot['period_type'] or '-':<6} {snapshot['version']:>7} "
+                  f"{snapshot['size']:>9,} {snapshot['compute_ms'] or 0:>8.1f}  {snapshot['created_at']}")
+        return
+
+    store = ReportStore(db_manager)
+    computed = 0
+    for job, version, compute_ms in store.run(store.scheduled(args.reports, args.ranges), args.force):
+        report, range_name, start_date, end_date, period_type = job
+        label = f"{report} {range_name} ({start_date} to {end_date}{', by ' + period_type if period_type else ''})"
+        if version is None:
+            print(f"{label}: up to date")
+        else:
+            computed += 1
+            print(f"{label}: version {version}, {compute_ms:.1f} ms")
+    print(f"{computed} reports computed")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,11 +7,15 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
 from PyQt5.QtCore import Qt, QSize, QTimer, QDate
 from PyQt5.QtGui import QIcon, QPixmap, QFont, QColor
 import datetime
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
+from matplotlib import colormaps
+from matplotlib.artist import setp
+from matplotlib.ticker import FuncFormatter
 import numpy as np
 from screens.inventory_report import InventoryReportScreen
+from screens.chart_renderer import ChartView
+from database.precomputed_reports import range_name_for
+from screens.time_series import (choose_granularity, downsample_line, figure_width_px,
+                                 max_bars, tick_indices)
 
 class AdminDashboard(QWidget):
     def __init__(self, main_window):
@@ -222,8 +226,7 @@ class AdminDashboard(QWidget):
         analytics_layout.setVerticalSpacing(40)  # Extra vertical spacing
         
         # Sales chart
-        self.sales_figure = Figure(figsize=(5, 4), dpi=100)
-        self.sales_canvas = FigureCanvas(self.sales_figure)
+        self.sales_canvas = ChartView(self.main_window.chart_renderer)
         self.sales_canvas.setMinimumHeight(280)  # Increased height
         self.sales_canvas.setMinimumWidth(320)  # Increased width
         sales_frame = QFrame()  # Create a container frame
@@ -247,8 +250,7 @@ class AdminDashboard(QWidget):
         analytics_layout.addWidget(sales_frame, 0, 0)
         
         # Product performance chart
-        self.product_figure = Figure(figsize=(5, 4), dpi=100)
-        self.product_canvas = FigureCanvas(self.product_figure)
+        self.product_canvas = ChartView(self.main_window.chart_renderer)
         self.product_canvas.setMinimumHeight(280)  # Increased height
         self.product_canvas.setMinimumWidth(320)  # Increased width
         product_frame = QFrame()  # Create a container frame
@@ -272,8 +274,7 @@ class AdminDashboard(QWidget):
         analytics_layout.addWidget(product_frame, 0, 1)
         
         # Profit analysis chart
-        self.profit_figure = Figure(figsize=(5, 4), dpi=100)
-        self.profit_canvas = FigureCanvas(self.profit_figure)
+        self.profit_canvas = ChartView(self.main_window.chart_renderer)
         self.profit_canvas.setMinimumHeight(280)  # Increased height
         self.profit_canvas.setMinimumWidth(320)  # Increased width
         profit_frame = QFrame()  # Create a container frame
@@ -297,8 +298,7 @@ class AdminDashboard(QWidget):
         analytics_layout.addWidget(profit_frame, 1, 0)
         
         # Inventory status chart
-        self.inventory_figure = Figure(figsize=(5, 4), dpi=100)
-        self.inventory_canvas = FigureCanvas(self.inventory_figure)
+        self.inventory_canvas = ChartView(self.main_window.chart_renderer)
         self.inventory_canvas.setMinimumHeight(280)  # Increased height
         self.inventory_canvas.setMinimumWidth(320)  # Increased width
         inventory_frame = QFrame()  # Create a container frame
@@ -322,8 +322,7 @@ class AdminDashboard(QWidget):
         analytics_layout.addWidget(inventory_frame, 1, 1)
         
         # Cost Analysis chart
-        self.cost_figure = Figure(figsize=(5, 4), dpi=100)
-        self.cost_canvas = FigureCanvas(self.cost_figure)
+        self.cost_canvas = ChartView(self.main_window.chart_renderer)
         self.cost_canvas.setMinimumHeight(280)  # Increased height
         self.cost_canvas.setMinimumWidth(320)  # Increased width
         cost_frame = QFrame()  # Create a container frame
@@ -347,8 +346,7 @@ class AdminDashboard(QWidget):
         analytics_layout.addWidget(cost_frame, 2, 0)
         
         # Profit Margin by Category chart
-        self.margin_figure = Figure(figsize=(5, 4), dpi=100)
-        self.margin_canvas = FigureCanvas(self.margin_figure)
+        self.margin_canvas = ChartView(self.main_window.chart_renderer)
         self.margin_canvas.setMinimumHeight(280)  # Increased height
         self.margin_canvas.setMinimumWidth(320)  # Increased width
         margin_frame = QFrame()  # Create a container frame
@@ -568,19 +566,35 @@ class AdminDashboard(QWidget):
         self.refresh_data()
     
     def refresh_data(self):
-        self.load_low_stock_products()
-        self.load_non_selling_products()
-        self.update_analytics_charts()
+        # Get date range
+        start_date = self.start_date.date().toString("yyyy-MM-dd")
+        end_date = self.end_date.date().toString("yyyy-MM-dd")
+        
+        # Aggregate sales by day, week or month depending on how many bars fit the chart
+        width = max(self.sales_canvas.width(), self.sales_canvas.minimumWidth())
+        granularity = choose_granularity(start_date, end_date, width)
+        
+        # Every table and chart on the dashboard is filled from one snapshot;
+        # for the preset ranges it is usually precomputed already
+        range_name = range_name_for(start_date, end_date)
+        if range_name:
+            snapshot = self.main_window.report_store.cached(
+                'dashboard', range_name, start_date, end_date, granularity,
+                lambda: self.main_window.db_manager.get_dashboard_snapshot(start_date, end_date, granularity))
+        else:
+            snapshot = self.main_window.db_manager.get_dashboard_snapshot(start_date, end_date, granularity)
+        
+        self.load_low_stock_products(snapshot)
+        self.load_non_selling_products(snapshot)
+        self.update_analytics_charts(snapshot)
     
-    def load_low_stock_products(self):
+    def load_low_stock_products(self, snapshot):
         # Clear existing data
         self.low_stock_table.setRowCount(0)
         
-        # Get low stock products from database
-        low_stock_products = self.main_window.db_manager.get_low_stock_products()
-        
-        # Get critical stock products
-        critical_products = self.main_window.db_manager.get_critical_stock_products()
+        # Low stock and critical stock products
+        low_stock_products = snapshot['low_stock_products']
+        critical_products = snapshot['critical_stock_products']
         critical_product_ids = {p['id'] for p in critical_products}
         
         # Populate table
@@ -672,12 +686,12 @@ class AdminDashboard(QWidget):
             
             self.low_stock_table.setCellWidget(row, 5, restock_btn)
     
-    def load_non_selling_products(self):
+    def load_non_selling_products(self, snapshot):
         # Clear existing data
         self.non_selling_table.setRowCount(0)
         
-        # Get non-selling products from database
-        non_selling_products = self.main_window.db_manager.get_non_selling_products(30, 10)  # Last 30 days, top 10
+        # Products not sold in the last 30 days, top 10
+        non_selling_products = snapshot['non_selling_products']
         
         # Populate table
         for row, product in enumerate(non_selling_products):
@@ -716,71 +730,158 @@ class AdminDashboard(QWidget):
             
             self.non_selling_table.setCellWidget(row, 4, discount_btn)
     
-    def update_analytics_charts(self):
-        # Get date range
-        start_date = self.start_date.date().toString("yyyy-MM-dd")
-        end_date = self.end_date.date().toString("yyyy-MM-dd")
-        
+    def update_analytics_charts(self, snapshot):
         # Update sales chart
-        self.update_sales_chart(start_date, end_date)
+        self.update_sales_chart(snapshot)
         
         # Update product performance chart
-        self.update_product_performance_chart(start_date, end_date)
+        self.update_product_performance_chart(snapshot)
         
         # Update profit analysis chart
-        self.update_profit_chart(start_date, end_date)
+        self.update_profit_chart(snapshot)
         
         # Update inventory status chart
-        self.update_inventory_chart()
+        self.update_inventory_chart(snapshot)
         
         # Update cost analysis chart
-        self.update_cost_analysis_chart(start_date, end_date)
+        self.update_cost_analysis_chart(snapshot)
         
         # Update profit margin by category chart
-        self.update_margin_by_category_chart(start_date, end_date)
+        self.update_margin_by_category_chart(snapshot)
     
-    def update_sales_chart(self, start_date, end_date):
-        # Get sales data by day
-        sales_data = self.main_window.db_manager.get_sales_by_period('day', start_date, end_date)
+    def update_sales_chart(self, snapshot):
+        sales_data = {'granularity': snapshot['period_type'], 'sales_data': snapshot['sales_by_period']}
         
-        # Clear the figure
-        self.sales_figure.clear()
+        # Layout and rasterization happen on the chart renderer's worker pool
+        self.sales_canvas.set_chart(draw_sales_chart, sales_data)
+    
+    def update_product_performance_chart(self, snapshot):
+        self.product_canvas.set_chart(draw_product_performance_chart, snapshot['top_products'])
+    
+    def update_profit_chart(self, snapshot):
+        self.profit_canvas.set_chart(draw_profit_chart, snapshot['profit'])
+    
+    def update_inventory_chart(self, snapshot):
+        # Store and warehouse quantities per category
+        inventory = snapshot['inventory_by_category']
+        categories = {}
+        for category, data in inventory.items():
+            categories[category] = {'store': data['store_quantity'], 'warehouse': data['warehouse_quantity']}
+        
+        inventory_data = {
+            'categories': categories,
+            'total_store': sum(data['store_quantity'] for data in inventory.values()),
+            'total_warehouse': sum(data['warehouse_quantity'] for data in inventory.values())
+        }
+        
+        self.inventory_canvas.set_chart(draw_inventory_chart, inventory_data)
+    
+    def restock_product(self, product_id):
+        # This would open a dialog to restock the product
+        # For now, we'll just navigate to the product management screen
+        self.main_window.show_product_management(product_id)
+    
+    def set_product_discount(self, product_id):
+        # This would open a dialog to set a discount for the product
+        # For now, we'll just navigate to the product management screen
+        self.main_window.show_product_management(product_id)
+    
+    def show_add_expense_dialog(self):
+        # Show the expense screen which has the add expense functionality
+        self.main_window.show_expense_screen()
+    
+    def update_cost_analysis_chart(self, snapshot):
+        # Total cost of stock per category, sorted descending
+        category_costs = [(category, data['total_value'])
+                          for category, data in snapshot['inventory_by_category'].items()]
+        sorted_categories = sorted(category_costs, key=lambda x: x[1], reverse=True)
         
-        # Set figure size and adjust margins for better spacing
-        self.sales_figure.subplots_adjust(bottom=0.28, left=0.15, right=0.95, top=0.88)
+        self.cost_canvas.set_chart(draw_cost_analysis_chart, sorted_categories)
+    
+    def update_margin_by_category_chart(self, snapshot):
+        # Sales grouped by category and total expenses within date range
+        margin_data = {
+            'sales_by_category': snapshot['sales_by_category'],
+            'total_expenses': snapshot['total_expenses']
+        }
+        
+        self.margin_canvas.set_chart(draw_margin_by_category_chart, margin_data)
+    
+    def generate_inventory_report(self):
+        # Import InventoryReportScreen from inventory_report.py
+        from screens.inventory_report import InventoryReportScreen
         
-        # Create subplot with adjusted bottom margin for x-axis labels
-        ax = self.sales_figure.add_subplot(111)
+        # Create and show the inventory report screen
+        inventory_report = InventoryReportScreen(self.main_window)
         
-        # Set background color for better visibility
-        ax.set_facecolor('#f8f9fa')
+        # Add the inventory report screen to the stacked widget if it's not already there
+        if not hasattr(self.main_window, 'inventory_report_screen'):
+            self.main_window.inventory_report_screen = inventory_report
+            self.main_window.stacked_widget.addWidget(inventory_report)
         
-        if not sales_data:
-            ax.text(0.5, 0.5, "No sales data for selected period", 
-                   horizontalalignment='center', verticalalignment='center',
-                   transform=ax.transAxes, fontsize=12, fontweight='bold',
-                   bbox=dict(facecolor='white', alpha=0.8, pad=10, boxstyle="round,pad=0.5", edgecolor='#e0e0e0'))
-        else:
-            # Extract dates and sales amounts
-            dates = [data['period'] for data in sales_data]
-            amounts = [data['final_sales'] for data in sales_data]
-            
-            # Calculate total sales for display
-            total_sales = sum(amounts)
-            
-            # Format dates for better display
-            formatted_dates = []
-            for date_str in dates:
-                try:
-                    # Try to parse and reformat the date
-                    date_parts = date_str.split('-')
-                    if len(date_parts) == 3:
-                        formatted_dates.append(f"{date_parts[2]}/{date_parts[1]}")
-                    else:
-                        formatted_dates.append(date_str)
-                except:
+        # Show the inventory report screen
+        self.main_window.stacked_widget.setCurrentWidget(self.main_window.inventory_report_screen)
+
+
+# Chart drawing functions. They only use the figure passed in and plain data,
+# so the chart renderer can run them off the GUI thread.
+
+def get_color_gradient(count):
+    """Generate a gradient of colors for charts"""
+    if count <= 0:
+        return []
+    
+    # Use a colorful gradient
+    return colormaps['viridis'](np.linspace(0, 0.8, count))
+
+
+def draw_sales_chart(figure, trend_data):
+    granularity = trend_data['granularity']
+    sales_data = trend_data['sales_data']
+    width_px = figure_width_px(figure)
+    
+    # Set figure size and adjust margins for better spacing
+    figure.subplots_adjust(bottom=0.28, left=0.15, right=0.95, top=0.88)
+    
+    # Create subplot with adjusted bottom margin for x-axis labels
+    ax = figure.add_subplot(111)
+    
+    # Set background color for better visibility
+    ax.set_facecolor('#f8f9fa')
+    
+    if not sales_data:
+        ax.text(0.5, 0.5, "No sales data for selected period", 
+               horizontalalignment='center', verticalalignment='center',
+               transform=ax.transAxes, fontsize=12, fontweight='bold',
+               bbox=dict(facecolor='white', alpha=0.8, pad=10, boxstyle="round,pad=0.5", edgecolor='#e0e0e0'))
+    else:
+        # Extract dates and sales amounts
+        dates = [data['period'] for data in sales_data]
+        amounts = [data['final_sales'] for data in sales_data]
+        
+        # Calculate total sales for display
+        total_sales = sum(amounts)
+        
+        # Format dates for better display
+        formatted_dates = []
+        for date_str in dates:
+            try:
+                # Try to parse and reformat the date
+                date_parts = date_str.split('-')
+                if len(date_parts) == 3:
+                    formatted_dates.append(f"{date_parts[2]}/{date_parts[1]}")
+                else:
                     formatted_dates.append(date_str)
-            
+            except:
+                formatted_dates.append(date_str)
+        
+        if len(amounts) > max_bars(width_px):
+            # Even monthly buckets are too narrow to draw as bars: plot a downsampled line
+            x, y = downsample_line(amounts, width_px)
+            ax.plot(x, y, color='#3498db', linewidth=1.5)
+            ax.fill_between(x, y, color='#3498db', alpha=0.2)
+            bars = []
+        else:
             # Create gradient colors for bars
             colors = []
             base_color = '#3498db'  # Base blue color
@@ -795,8 +896,9 @@ class AdminDashboard(QWidget):
             # Plot the data with increased width and spacing
             bars = ax.bar(range(len(formatted_dates)), amounts, color=colors, width=0.75, 
                          edgecolor='#2980b9', linewidth=1, alpha=0.9)
-            
-            # Add value labels on top of bars with improved formatting
+        
+        # Add value labels on top of bars while every bar can carry one without overlapping
+        if bars and len(tick_indices(len(amounts), width_px)) == len(amounts):
             for i, bar in enumerate(bars):
                 height = bar.get_height()
                 if height > 0:  # Only show label if value is greater than 0
@@ -805,548 +907,441 @@ class AdminDashboard(QWidget):
                         value_text = f'₹{int(height):,}'
                     else:
                         value_text = f'₹{int(height)}'
-                    
+                
                     # Position label with better spacing
                     label_y_pos = height + (max(amounts) * 0.03)
-                    
+                
                     ax.text(bar.get_x() + bar.get_width()/2., label_y_pos,
                            value_text, ha='center', va='bottom', fontsize=9, fontweight='bold',
                            bbox=dict(facecolor='white', alpha=0.8, pad=2, boxstyle="round,pad=0.3", 
                                     edgecolor='#e0e0e0'))
-            
-            # Add total sales text at the top
-            ax.text(0.5, 0.98, f'Total: ₹{total_sales:,}', 
-                   horizontalalignment='center', verticalalignment='top',
-                   transform=ax.transAxes, fontsize=12, fontweight='bold',
-                   bbox=dict(facecolor='#e8f4fc', alpha=0.9, pad=4, boxstyle="round,pad=0.4", 
-                            edgecolor='#3498db'))
-            
-            # Set title and labels with improved styling
-            ax.set_title('Daily Sales', fontsize=14, pad=15, fontweight='bold', color='#2c3e50')
-            ax.set_ylabel('Amount (₹)', fontsize=12, labelpad=10, fontweight='bold', color='#2c3e50')
-            
-            # Add grid for better readability
-            ax.grid(axis='y', linestyle='--', alpha=0.7, color='#cccccc')
-            
-            # Remove top and right spines for cleaner look
-            ax.spines['top'].set_visible(False)
-            ax.spines['right'].set_visible(False)
-            ax.spines['left'].set_color('#cccccc')
-            ax.spines['bottom'].set_color('#cccccc')
-            
-            # Format x-axis labels with better visibility
-            if len(formatted_dates) > 8:
-                step = max(1, len(formatted_dates) // 8)  # Ensure at least 1 step
-                ticks = [i for i in range(0, len(formatted_dates), step)]
-                ax.set_xticks(ticks)
-                ax.set_xticklabels([formatted_dates[i] for i in ticks], rotation=45, ha='right', 
-                                  fontsize=10, fontweight='bold')
-            else:
-                ax.set_xticks(range(len(formatted_dates)))
-                ax.set_xticklabels(formatted_dates, rotation=45, ha='right', 
-                                  fontsize=10, fontweight='bold')
-            
-            # Add padding to x-axis labels
-            plt.setp(ax.get_xticklabels(), y=0.05)
-            
-            # Format y-axis with commas for thousands
-            ax.get_yaxis().set_major_formatter(plt.FuncFormatter(lambda x, loc: f"₹{int(x):,}"))
-            
-            # Set y-axis limit with some padding
-            if max(amounts) > 0:
-                ax.set_ylim(0, max(amounts) * 1.2)
-            
-            # Add some padding to prevent label cutoff
-            ax.margins(x=0.05)
         
-        # Use tight_layout with adjusted padding
-        self.sales_figure.tight_layout(pad=2.5)
-        self.sales_canvas.draw()
-    
-    def update_product_performance_chart(self, start_date, end_date):
-        # Get top selling products
-        top_products = self.main_window.db_manager.get_top_selling_products(start_date, end_date, 5)
-        
-        # Clear the figure
-        self.product_figure.clear()
-        
-        # Set figure size and adjust margins for better spacing
-        self.product_figure.subplots_adjust(bottom=0.28, left=0.15, right=0.85, top=0.88)
-        
-        # Create subplot with adjusted bottom margin for x-axis labels
-        ax = self.product_figure.add_subplot(111)
+        # Add total sales text at the top
+        ax.text(0.5, 0.98, f'Total: ₹{total_sales:,}', 
+               horizontalalignment='center', verticalalignment='top',
+               transform=ax.transAxes, fontsize=12, fontweight='bold',
+               bbox=dict(facecolor='#e8f4fc', alpha=0.9, pad=4, boxstyle="round,pad=0.4", 
+                        edgecolor='#3498db'))
         
-        # Set background color for better visibility
-        ax.set_facecolor('#f8f9fa')
+        # Set title and labels with improved styling
+        title = {'day': 'Daily Sales', 'week': 'Weekly Sales', 'month': 'Monthly Sales'}[granularity]
+        ax.set_title(title, fontsize=14, pad=15, fontweight='bold', color='#2c3e50')
+        ax.set_ylabel('Amount (₹)', fontsize=12, labelpad=10, fontweight='bold', color='#2c3e50')
         
-        if not top_products:
-            ax.text(0.5, 0.5, "No product data for selected period", 
-                   horizontalalignment='center', verticalalignment='center',
-                   transform=ax.transAxes, fontsize=12, fontweight='bold',
-                   bbox=dict(facecolor='white', alpha=0.8, pad=10, boxstyle="round,pad=0.5", edgecolor='#e0e0e0'))
-        else:
-            # Extract product names and quantities
-            names = [product['name'] if len(product['name']) <= 15 else product['name'][:12] + '...' 
-                    for product in top_products]
-            quantities = [product['total_quantity'] for product in top_products]
-            revenues = [product['total_revenue'] for product in top_products]
-            
-            # Create x positions with more spacing
-            x = np.arange(len(names))
-            width = 0.35  # Adjusted width for better visibility
-            
-            # Create gradient colors for bars
-            quantity_colors = ['#3498db', '#2980b9', '#1f618d', '#154360', '#0b2d3d'][:len(names)]
-            revenue_colors = ['#e74c3c', '#c0392b', '#922b21', '#641e16', '#3d1210'][:len(names)]
-            
-            # Plot the data with improved styling
-            quantity_bars = ax.bar(x - width/2, quantities, width, label='Quantity', 
-                                  color=quantity_colors, edgecolor='#2980b9', linewidth=1, alpha=0.9)
-            ax2 = ax.twinx()
-            revenue_bars = ax2.bar(x + width/2, revenues, width, label='Revenue', 
-                                 color=revenue_colors, edgecolor='#c0392b', linewidth=1, alpha=0.9)
-            
-            # Add value labels on top of bars with improved styling
-            for bar in quantity_bars:
-                height = bar.get_height()
-                if height > 0:  # Only show label if value is greater than 0
-                    ax.text(bar.get_x() + bar.get_width()/2., height + 0.5,
-                           f'{int(height):,}', ha='center', va='bottom', fontsize=9, fontweight='bold',
-                           bbox=dict(facecolor='white', alpha=0.8, boxstyle="round,pad=0.2", edgecolor='#d4d4d4'))
-            
-            for bar in revenue_bars:
-                height = bar.get_height()
-                if height > 0:  # Only show label if value is greater than 0
-                    ax2.text(bar.get_x() + bar.get_width()/2., height + (max(revenues) * 0.02 if revenues else 0),
-                            f'₹{int(height):,}', ha='center', va='bottom', fontsize=9, fontweight='bold',
-                            bbox=dict(facecolor='white', alpha=0.8, boxstyle="round,pad=0.2", edgecolor='#d4d4d4'))
-            
-            # Set labels and title with improved styling
-            ax.set_title('Top Selling Products', fontsize=14, fontweight='bold', pad=15)
-            ax.set_xticks(x)
-            ax.set_xticklabels(names, rotation=45, ha='right', fontsize=10)  # Set the tick labels
-            ax.set_ylabel('Quantity Sold', fontsize=12, fontweight='bold', labelpad=10)
-            ax2.set_ylabel('Revenue (₹)', fontsize=12, fontweight='bold', labelpad=10)
-            
-            # Add grid for better readability
-            ax.grid(True, axis='y', linestyle='--', alpha=0.3)
-            
-            # Remove top and right spines for cleaner look
-            ax.spines['top'].set_visible(False)
-            ax.spines['right'].set_visible(False)
-            ax2.spines['top'].set_visible(False)
-            
-            # Add legend with better positioning and styling
-            lines1, labels1 = ax.get_legend_handles_labels()
-            lines2, labels2 = ax2.get_legend_handles_labels()
-            legend = ax.legend(lines1 + lines2, labels1 + labels2, loc='upper right',
-                      frameon=True, framealpha=0.9, facecolor='white', edgecolor='#d4d4d4')
-            
-            # Add more bottom padding for x-axis labels and prevent label cutoff
-            plt.subplots_adjust(bottom=0.25)
-            ax.margins(x=0.05)
-        
-        # Use tight_layout with adjusted padding
-        self.product_figure.tight_layout(pad=2.0)
-        self.product_canvas.draw()
-    
-    def update_profit_chart(self, start_date, end_date):
-        # Get profit analysis data
-        profit_data = self.main_window.db_manager.get_profit_analysis(start_date, end_date)
+        # Add grid for better readability
+        ax.grid(axis='y', linestyle='--', alpha=0.7, color='#cccccc')
         
-        # Clear the figure
-        self.profit_figure.clear()
+        # Remove top and right spines for cleaner look
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+        ax.spines['left'].set_color('#cccccc')
+        ax.spines['bottom'].set_color('#cccccc')
         
-        # Set figure size and adjust margins for better spacing
-        self.profit_figure.subplots_adjust(bottom=0.25, left=0.15, right=0.95, top=0.88)
+        # Format x-axis labels with better visibility, thinned to the chart width
+        ticks = tick_indices(len(formatted_dates), width_px)
+        ax.set_xticks(ticks)
+        ax.set_xticklabels([formatted_dates[i] for i in ticks], rotation=45, ha='right', 
+                          fontsize=10, fontweight='bold')
         
-        # Create subplot with adjusted bottom margin for x-axis labels
-        ax = self.profit_figure.add_subplot(111)
+        # Add padding to x-axis labels
+        setp(ax.get_xticklabels(), y=0.05)
         
-        # Set background color for better visibility
-        ax.set_facecolor('#f8f9fa')
+        # Format y-axis with commas for thousands
+        ax.get_yaxis().set_major_formatter(FuncFormatter(lambda x, loc: f"₹{int(x):,}"))
         
-        if not profit_data or profit_data['total_revenue'] == 0:
-            ax.text(0.5, 0.5, "No profit data for selected period", 
-                   horizontalalignment='center', verticalalignment='center',
-                   transform=ax.transAxes, fontsize=12, fontweight='bold',
-                   bbox=dict(facecolor='white', alpha=0.8, pad=10, boxstyle="round,pad=0.5", edgecolor='#e0e0e0'))
-        else:
-            # Extract data
-            labels = ['Revenue', 'Cost', 'Expenses', 'Gross Profit', 'Net Profit']
-            values = [
-                profit_data['total_revenue'] or 0,
-                profit_data['total_cost'] or 0,
-                profit_data['total_expenses'] or 0,
-                profit_data['gross_profit'] or 0,
-                profit_data['net_profit'] or 0
-            ]
-            
-            # Enhanced colors with better contrast
-            colors = ['#3498db', '#e74c3c', '#f39c12', '#2ecc71', '#9b59b6']
-            edge_colors = ['#2980b9', '#c0392b', '#d35400', '#27ae60', '#8e44ad']
-            
-            # Plot the data with improved styling
-            bars = ax.bar(labels, values, color=colors, width=0.6, 
-                         edgecolor=edge_colors, linewidth=1.5, alpha=0.9)
-            
-            # Set labels and title with improved styling
-            ax.set_title('Profit Analysis', fontsize=14, fontweight='bold', pad=15)
-            ax.set_ylabel('Amount (₹)', fontsize=12, fontweight='bold', labelpad=10)
-            ax.tick_params(axis='x', labelsize=10, labelrotation=0, pad=8)
-            
-            # Format y-axis with commas for thousands
-            ax.get_yaxis().set_major_formatter(plt.FuncFormatter(lambda x, loc: f"₹{int(x):,}"))
-            
-            # Add value labels on top of bars with improved styling
-            for bar in bars:
-                height = bar.get_height()
-                # Format large numbers with commas for better readability
-                if height >= 1000:
-                    value_text = f'₹{int(height):,}'
-                else:
-                    value_text = f'₹{height:.2f}'
-                
-                # Add background to value labels for better visibility
-                ax.text(bar.get_x() + bar.get_width()/2., height + (max(values) * 0.02),
-                       value_text, ha='center', va='bottom', fontsize=9, fontweight='bold',
-                       bbox=dict(facecolor='white', alpha=0.8, boxstyle="round,pad=0.2", edgecolor='#d4d4d4'))
-            
-            # Add margins and profit percentage with improved styling
-            margin_box = dict(facecolor='white', alpha=0.9, boxstyle="round,pad=0.5", 
-                             edgecolor='#ddd', linewidth=1.5)
-            
-            # Add a title for the margin box
-            ax.text(0.02, 0.98, "Profit Margins:", transform=ax.transAxes,
-                   fontsize=11, fontweight='bold')
-            
-            # Add margin percentages with color indicators
-            gross_color = '#2ecc71' if profit_data['gross_margin'] > 0 else '#e74c3c'
-            net_color = '#2ecc71' if profit_data['net_margin'] > 0 else '#e74c3c'
-            
-            ax.text(0.02, 0.92, f"Gross Margin: {profit_data['gross_margin']:.1f}%", transform=ax.transAxes,
-                   fontsize=10, fontweight='bold', color=gross_color,
-                   bbox=margin_box)
-            ax.text(0.02, 0.85, f"Net Margin: {profit_data['net_margin']:.1f}%", transform=ax.transAxes,
-                   fontsize=10, fontweight='bold', color=net_color,
-                   bbox=margin_box)
-            
-            # Remove top and right spines for cleaner look
-            ax.spines['top'].set_visible(False)
-            ax.spines['right'].set_visible(False)
-            
-            # Add grid for better readability
-            ax.grid(axis='y', linestyle='--', alpha=0.3)
-            
-            # Add some padding to prevent label cutoff
-            ax.margins(x=0.05, y=0.1)
+        # Set y-axis limit with some padding
+        if max(amounts) > 0:
+            ax.set_ylim(0, max(amounts) * 1.2)
         
-        # Use tight_layout with adjusted padding
-        self.profit_figure.tight_layout(pad=2.0)
-        self.profit_canvas.draw()
+        # Add some padding to prevent label cutoff
+        ax.margins(x=0.05)
+    
+    # Use tight_layout with adjusted padding
+    figure.tight_layout(pad=2.5)
+
+
+def draw_product_performance_chart(figure, top_products):
+    # Set figure size and adjust margins for better spacing
+    figure.subplots_adjust(bottom=0.28, left=0.15, right=0.85, top=0.88)
+    
+    # Create subplot with adjusted bottom margin for x-axis labels
+    ax = figure.add_subplot(111)
     
-    def update_inventory_chart(self):
-        # Get all products
-        products = self.main_window.db_manager.get_all_products()
+    # Set background color for better visibility
+    ax.set_facecolor('#f8f9fa')
+    
+    if not top_products:
+        ax.text(0.5, 0.5, "No product data for selected period", 
+               horizontalalignment='center', verticalalignment='center',
+               transform=ax.transAxes, fontsize=12, fontweight='bold',
+               bbox=dict(facecolor='white', alpha=0.8, pad=10, boxstyle="round,pad=0.5", edgecolor='#e0e0e0'))
+    else:
+        # Extract product names and quantities
+        names = [product['name'] if len(product['name']) <= 15 else product['name'][:12] + '...' 
+                for product in top_products]
+        quantities = [product['total_quantity'] for product in top_products]
+        revenues = [product['total_revenue'] for product in top_products]
+        
+        # Create x positions with more spacing
+        x = np.arange(len(names))
+        width = 0.35  # Adjusted width for better visibility
+        
+        # Create gradient colors for bars
+        quantity_colors = ['#3498db', '#2980b9', '#1f618d', '#154360', '#0b2d3d'][:len(names)]
+        revenue_colors = ['#e74c3c', '#c0392b', '#922b21', '#641e16', '#3d1210'][:len(names)]
+        
+        # Plot the data with improved styling
+        quantity_bars = ax.bar(x - width/2, quantities, width, label='Quantity', 
+                              color=quantity_colors, edgecolor='#2980b9', linewidth=1, alpha=0.9)
+        ax2 = ax.twinx()
+        revenue_bars = ax2.bar(x + width/2, revenues, width, label='Revenue', 
+                             color=revenue_colors, edgecolor='#c0392b', linewidth=1, alpha=0.9)
+        
+        # Add value labels on top of bars with improved styling
+        for bar in quantity_bars:
+            height = bar.get_height()
+            if height > 0:  # Only show label if value is greater than 0
+                ax.text(bar.get_x() + bar.get_width()/2., height + 0.5,
+                       f'{int(height):,}', ha='center', va='bottom', fontsize=9, fontweight='bold',
+                       bbox=dict(facecolor='white', alpha=0.8, boxstyle="round,pad=0.2", edgecolor='#d4d4d4'))
         
-        # Clear the figure
-        self.inventory_figure.clear()
+        for bar in revenue_bars:
+            height = bar.get_height()
+            if height > 0:  # Only show label if value is greater than 0
+                ax2.text(bar.get_x() + bar.get_width()/2., height + (max(revenues) * 0.02 if revenues else 0),
+                        f'₹{int(height):,}', ha='center', va='bottom', fontsize=9, fontweight='bold',
+                        bbox=dict(facecolor='white', alpha=0.8, boxstyle="round,pad=0.2", edgecolor='#d4d4d4'))
         
-        # Set figure size and adjust margins for better spacing
-        self.inventory_figure.subplots_adjust(bottom=0.28, left=0.15, right=0.95, top=0.88)
+        # Set labels and title with improved styling
+        ax.set_title('Top Selling Products', fontsize=14, fontweight='bold', pad=15)
+        ax.set_xticks(x)
+        ax.set_xticklabels(names, rotation=45, ha='right', fontsize=10)  # Set the tick labels
+        ax.set_ylabel('Quantity Sold', fontsize=12, fontweight='bold', labelpad=10)
+        ax2.set_ylabel('Revenue (₹)', fontsize=12, fontweight='bold', labelpad=10)
         
-        # Create subplot with adjusted margins
-        ax = self.inventory_figure.add_subplot(111)
+        # Add grid for better readability
+        ax.grid(True, axis='y', linestyle='--', alpha=0.3)
         
-        # Set background color for better visibility
-        ax.set_facecolor('#f8f9fa')
+        # Remove top and right spines for cleaner look
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+        ax2.spines['top'].set_visible(False)
         
-        if not products:
-            ax.text(0.5, 0.5, "No inventory data available", 
-                   horizontalalignment='center', verticalalignment='center',
-                   transform=ax.transAxes, fontsize=12, fontweight='bold',
-                   bbox=dict(facecolor='white', alpha=0.8, pad=10, boxstyle="round,pad=0.5", edgecolor='#e0e0e0'))
-        else:
-            # Calculate total store and warehouse quantities
-            total_store = sum(product['store_quantity'] for product in products)
-            total_warehouse = sum(product['warehouse_quantity'] for product in products)
-            
-            # Group products by category
-            categories = {}
-            for product in products:
-                category = product['category'] or 'Uncategorized'
-                if category not in categories:
-                    categories[category] = {'store': 0, 'warehouse': 0}
-                categories[category]['store'] += product['store_quantity']
-                categories[category]['warehouse'] += product['warehouse_quantity']
-            
-            # Extract category names and quantities
-            cat_names = list(categories.keys())
-            store_quantities = [categories[cat]['store'] for cat in cat_names]
-            warehouse_quantities = [categories[cat]['warehouse'] for cat in cat_names]
-            
-            # Create x positions with improved spacing
-            x = np.arange(len(cat_names))
-            width = 0.35  # Adjusted width for better visibility
-            
-            # Create gradient colors for bars
-            store_colors = ['#3498db', '#2980b9', '#1f618d', '#154360', '#0b2d3d'][:len(cat_names)]
-            warehouse_colors = ['#2ecc71', '#27ae60', '#229954', '#1e8449', '#196f3d'][:len(cat_names)]
-            
-            # Plot the data with improved styling
-            store_bars = ax.bar(x - width/2, store_quantities, width, label='Store', 
-                               color='#3498db', edgecolor='#2980b9', linewidth=1, alpha=0.9)
-            warehouse_bars = ax.bar(x + width/2, warehouse_quantities, width, label='Warehouse', 
-                                  color='#2ecc71', edgecolor='#27ae60', linewidth=1, alpha=0.9)
-            
-            # Set labels and title with improved styling
-            ax.set_title('Inventory by Category', fontsize=14, fontweight='bold', pad=15)
-            ax.set_xticks(x)
-            ax.set_xticklabels(cat_names, rotation=45, ha='right', fontsize=10)  # Set the tick labels
-            ax.set_ylabel('Quantity', fontsize=12, fontweight='bold', labelpad=10)
-            
-            # Add value labels on top of bars with improved styling
-            max_height = max(max(store_quantities or [0]), max(warehouse_quantities or [0]))
-            label_offset = max_height * 0.03 if max_height > 0 else 0.5
-            
-            for bar in store_bars:
-                height = bar.get_height()
-                if height > 0:  # Only show labels for non-zero values
-                    ax.text(bar.get_x() + bar.get_width()/2., height + label_offset,
-                           f'{int(height):,}', ha='center', va='bottom', fontsize=9, fontweight='bold',
-                           bbox=dict(facecolor='white', alpha=0.8, boxstyle="round,pad=0.2", edgecolor='#d4d4d4'))
-                    
-            for bar in warehouse_bars:
-                height = bar.get_height()
-                if height > 0:  # Only show labels for non-zero values
-                    ax.text(bar.get_x() + bar.get_width()/2., height + label_offset,
-                           f'{int(height):,}', ha='center', va='bottom', fontsize=9, fontweight='bold',
-                           bbox=dict(facecolor='white', alpha=0.8, boxstyle="round,pad=0.2", edgecolor='#d4d4d4'))
-            
-            # Add grid for better readability
-            ax.grid(True, axis='y', linestyle='--', alpha=0.3)
-            
-            # Remove top and right spines for cleaner look
-            ax.spines['top'].set_visible(False)
-            ax.spines['right'].set_visible(False)
-            
-            # Add legend with better positioning and styling
-            legend = ax.legend(loc='upper right', frameon=True, framealpha=0.9, 
-                             facecolor='white', edgecolor='#d4d4d4')
-            
-            # Add total inventory text with improved styling
-            total_box = dict(facecolor='white', alpha=0.9, boxstyle="round,pad=0.5", 
-                           edgecolor='#ddd', linewidth=1.5)
-            
-            # Add a title for the totals box
-            ax.text(0.02, 0.98, "Inventory Totals:", transform=ax.transAxes,
-                   fontsize=11, fontweight='bold')
-            
-            ax.text(0.02, 0.92, f"Total Store: {total_store:,}", transform=ax.transAxes,
-                   fontsize=10, fontweight='bold', color='#3498db',
-                   bbox=total_box)
-            ax.text(0.02, 0.85, f"Total Warehouse: {total_warehouse:,}", transform=ax.transAxes,
-                   fontsize=10, fontweight='bold', color='#2ecc71',
-                   bbox=total_box)
-            
-            # Add some padding to prevent label cutoff
-            ax.margins(x=0.05, y=0.1)
+        # Add legend with better positioning and styling
+        lines1, labels1 = ax.get_legend_handles_labels()
+        lines2, labels2 = ax2.get_legend_handles_labels()
+        legend = ax.legend(lines1 + lines2, labels1 + labels2, loc='upper right',
+                  frameon=True, framealpha=0.9, facecolor='white', edgecolor='#d4d4d4')
         
-        # Use tight_layout with adjusted padding
-        self.inventory_figure.tight_layout(pad=2.0)
-        self.inventory_canvas.draw()
+        # Prevent label cutoff
+        ax.margins(x=0.05)
     
-    def restock_product(self, product_id):
-        # This would open a dialog to restock the product
-        # For now, we'll just navigate to the product management screen
-        self.main_window.show_product_management(product_id)
+    # Use tight_layout with adjusted padding
+    figure.tight_layout(pad=2.0)
+
+
+def draw_profit_chart(figure, profit_data):
+    # Set figure size and adjust margins for better spacing
+    figure.subplots_adjust(bottom=0.25, left=0.15, right=0.95, top=0.88)
     
-    def set_product_discount(self, product_id):
-        # This would open a dialog to set a discount for the product
-        # For now, we'll just navigate to the product management screen
-        self.main_window.show_product_management(product_id)
+    # Create subplot with adjusted bottom margin for x-axis labels
+    ax = figure.add_subplot(111)
     
-    def show_add_expense_dialog(self):
-        # Show the expense screen which has the add expense functionality
-        self.main_window.show_expense_screen()
+    # Set background color for better visibility
+    ax.set_facecolor('#f8f9fa')
     
-    def update_cost_analysis_chart(self, start_date, end_date):
-        # Get product categories and their cost data
-        categories = []
-        total_costs = []
-        
-        # Get all products
-        products = self.main_window.db_manager.get_all_products()
-        
-        # Group products by category and calculate total cost
-        category_costs = {}
-        for product in products:
-            category = product['category'] or 'Uncategorized'
-            cost_price = float(product['cost_price'] or 0)
-            store_qty = int(product['store_quantity'] or 0)
-            warehouse_qty = int(product['warehouse_quantity'] or 0)
-            total_qty = store_qty + warehouse_qty
-            total_cost = cost_price * total_qty
-            
-            if category not in category_costs:
-                category_costs[category] = 0
-            category_costs[category] += total_cost
-        
-        # Sort categories by total cost (descending)
-        sorted_categories = sorted(category_costs.items(), key=lambda x: x[1], reverse=True)
+    if not profit_data or profit_data['total_revenue'] == 0:
+        ax.text(0.5, 0.5, "No profit data for selected period", 
+               horizontalalignment='center', verticalalignment='center',
+               transform=ax.transAxes, fontsize=12, fontweight='bold',
+               bbox=dict(facecolor='white', alpha=0.8, pad=10, boxstyle="round,pad=0.5", edgecolor='#e0e0e0'))
+    else:
+        # Extract data
+        labels = ['Revenue', 'Cost', 'Expenses', 'Gross Profit', 'Net Profit']
+        values = [
+            profit_data['total_revenue'] or 0,
+            profit_data['total_cost'] or 0,
+            profit_data['total_expenses'] or 0,
+            profit_data['gross_profit'] or 0,
+            profit_data['net_profit'] or 0
+        ]
+        
+        # Enhanced colors with better contrast
+        colors = ['#3498db', '#e74c3c', '#f39c12', '#2ecc71', '#9b59b6']
+        edge_colors = ['#2980b9', '#c0392b', '#d35400', '#27ae60', '#8e44ad']
+        
+        # Plot the data with improved styling
+        bars = ax.bar(labels, values, color=colors, width=0.6, 
+                     edgecolor=edge_colors, linewidth=1.5, alpha=0.9)
         
-        # Extract data for plotting
-        for category, cost in sorted_categories:
-            categories.append(category)
-            total_costs.append(cost)
+        # Set labels and title with improved styling
+        ax.set_title('Profit Analysis', fontsize=14, fontweight='bold', pad=15)
+        ax.set_ylabel('Amount (₹)', fontsize=12, fontweight='bold', labelpad=10)
+        ax.tick_params(axis='x', labelsize=10, labelrotation=0, pad=8)
         
-        # Create the plot
-        self.cost_figure.clear()
+        # Format y-axis with commas for thousands
+        ax.get_yaxis().set_major_formatter(FuncFormatter(lambda x, loc: f"₹{int(x):,}"))
         
-        # Set figure size and adjust margins for better spacing
-        self.cost_figure.subplots_adjust(left=0.25, right=0.95, top=0.88, bottom=0.15)
+        # Add value labels on top of bars with improved styling
+        for bar in bars:
+            height = bar.get_height()
+            # Format large numbers with commas for better readability
+            if height >= 1000:
+                value_text = f'₹{int(height):,}'
+            else:
+                value_text = f'₹{height:.2f}'
+            
+            # Add background to value labels for better visibility
+            ax.text(bar.get_x() + bar.get_width()/2., height + (max(values) * 0.02),
+                   value_text, ha='center', va='bottom', fontsize=9, fontweight='bold',
+                   bbox=dict(facecolor='white', alpha=0.8, boxstyle="round,pad=0.2", edgecolor='#d4d4d4'))
         
-        ax = self.cost_figure.add_subplot(111)
+        # Add margins and profit percentage with improved styling
+        margin_box = dict(facecolor='white', alpha=0.9, boxstyle="round,pad=0.5", 
+                         edgecolor='#ddd', linewidth=1.5)
         
-        # Set background color for better visibility
-        ax.set_facecolor('#f8f9fa')
+        # Add a title for the margin box
+        ax.text(0.02, 0.98, "Profit Margins:", transform=ax.transAxes,
+               fontsize=11, fontweight='bold')
         
-        # If no data, display a message
-        if not categories:
-            ax.text(0.5, 0.5, 'No cost data available', 
-                    horizontalalignment='center', verticalalignment='center',
-                    transform=ax.transAxes, fontsize=12, fontweight='bold',
-                    bbox=dict(facecolor='white', alpha=0.8, pad=10, boxstyle="round,pad=0.5", edgecolor='#e0e0e0'))
-            self.cost_canvas.draw()
-            return
+        # Add margin percentages with color indicators
+        gross_color = '#2ecc71' if profit_data['gross_margin'] > 0 else '#e74c3c'
+        net_color = '#2ecc71' if profit_data['net_margin'] > 0 else '#e74c3c'
         
-        # Create horizontal bar chart with improved styling
-        colors = self.get_color_gradient(len(categories))
-        bars = ax.barh(categories, total_costs, color=colors, 
-                      edgecolor='#555555', linewidth=0.8, alpha=0.9, height=0.6)
+        ax.text(0.02, 0.92, f"Gross Margin: {profit_data['gross_margin']:.1f}%", transform=ax.transAxes,
+               fontsize=10, fontweight='bold', color=gross_color,
+               bbox=margin_box)
+        ax.text(0.02, 0.85, f"Net Margin: {profit_data['net_margin']:.1f}%", transform=ax.transAxes,
+               fontsize=10, fontweight='bold', color=net_color,
+               bbox=margin_box)
         
-        # Add data labels with improved styling
-        for bar in bars:
-            width = bar.get_width()
-            label_x_pos = width * 1.01
-            ax.text(label_x_pos, bar.get_y() + bar.get_height()/2, f'₹{width:,.2f}',
-                    va='center', fontsize=9, fontweight='bold',
-                    bbox=dict(facecolor='white', alpha=0.8, boxstyle="round,pad=0.2", edgecolor='#d4d4d4'))
+        # Remove top and right spines for cleaner look
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
         
-        # Set labels and title with improved styling
-        ax.set_xlabel('Total Cost (₹)', fontsize=12, fontweight='bold', labelpad=10)
-        ax.set_title('Inventory Cost by Category', fontsize=14, fontweight='bold', pad=15)
+        # Add grid for better readability
+        ax.grid(axis='y', linestyle='--', alpha=0.3)
         
-        # Format y-axis to show full category names with improved styling
-        ax.tick_params(axis='y', labelsize=10, pad=5)
-        ax.tick_params(axis='x', labelsize=9, pad=5)
+        # Add some padding to prevent label cutoff
+        ax.margins(x=0.05, y=0.1)
+    
+    # Use tight_layout with adjusted padding
+    figure.tight_layout(pad=2.0)
+
+
+def draw_inventory_chart(figure, inventory_data):
+    # Set figure size and adjust margins for better spacing
+    figure.subplots_adjust(bottom=0.28, left=0.15, right=0.95, top=0.88)
+    
+    # Create subplot with adjusted margins
+    ax = figure.add_subplot(111)
+    
+    # Set background color for better visibility
+    ax.set_facecolor('#f8f9fa')
+    
+    if not inventory_data['categories']:
+        ax.text(0.5, 0.5, "No inventory data available", 
+               horizontalalignment='center', verticalalignment='center',
+               transform=ax.transAxes, fontsize=12, fontweight='bold',
+               bbox=dict(facecolor='white', alpha=0.8, pad=10, boxstyle="round,pad=0.5", edgecolor='#e0e0e0'))
+    else:
+        total_store = inventory_data['total_store']
+        total_warehouse = inventory_data['total_warehouse']
+        categories = inventory_data['categories']
+        
+        # Extract category names and quantities
+        cat_names = list(categories.keys())
+        store_quantities = [categories[cat]['store'] for cat in cat_names]
+        warehouse_quantities = [categories[cat]['warehouse'] for cat in cat_names]
+        
+        # Create x positions with improved spacing
+        x = np.arange(len(cat_names))
+        width = 0.35  # Adjusted width for better visibility
+        
+        # Create gradient colors for bars
+        store_colors = ['#3498db', '#2980b9', '#1f618d', '#154360', '#0b2d3d'][:len(cat_names)]
+        warehouse_colors = ['#2ecc71', '#27ae60', '#229954', '#1e8449', '#196f3d'][:len(cat_names)]
+        
+        # Plot the data with improved styling
+        store_bars = ax.bar(x - width/2, store_quantities, width, label='Store', 
+                           color='#3498db', edgecolor='#2980b9', linewidth=1, alpha=0.9)
+        warehouse_bars = ax.bar(x + width/2, warehouse_quantities, width, label='Warehouse', 
+                              color='#2ecc71', edgecolor='#27ae60', linewidth=1, alpha=0.9)
         
-        # Format x-axis with commas for thousands
-        ax.get_xaxis().set_major_formatter(plt.FuncFormatter(lambda x, loc: f"₹{int(x):,}"))
+        # Set labels and title with improved styling
+        ax.set_title('Inventory by Category', fontsize=14, fontweight='bold', pad=15)
+        ax.set_xticks(x)
+        ax.set_xticklabels(cat_names, rotation=45, ha='right', fontsize=10)  # Set the tick labels
+        ax.set_ylabel('Quantity', fontsize=12, fontweight='bold', labelpad=10)
+        
+        # Add value labels on top of bars with improved styling
+        max_height = max(max(store_quantities or [0]), max(warehouse_quantities or [0]))
+        label_offset = max_height * 0.03 if max_height > 0 else 0.5
+        
+        for bar in store_bars:
+            height = bar.get_height()
+            if height > 0:  # Only show labels for non-zero values
+                ax.text(bar.get_x() + bar.get_width()/2., height + label_offset,
+                       f'{int(height):,}', ha='center', va='bottom', fontsize=9, fontweight='bold',
+                       bbox=dict(facecolor='white', alpha=0.8, boxstyle="round,pad=0.2", edgecolor='#d4d4d4'))
+                
+        for bar in warehouse_bars:
+            height = bar.get_height()
+            if height > 0:  # Only show labels for non-zero values
+                ax.text(bar.get_x() + bar.get_width()/2., height + label_offset,
+                       f'{int(height):,}', ha='center', va='bottom', fontsize=9, fontweight='bold',
+                       bbox=dict(facecolor='white', alpha=0.8, boxstyle="round,pad=0.2", edgecolor='#d4d4d4'))
         
         # Add grid for better readability
-        ax.grid(True, axis='x', linestyle='--', alpha=0.3)
+        ax.grid(True, axis='y', linestyle='--', alpha=0.3)
         
         # Remove top and right spines for cleaner look
         ax.spines['top'].set_visible(False)
         ax.spines['right'].set_visible(False)
         
-        # Add some padding to prevent label cutoff
-        ax.margins(x=0.2, y=0.05)
+        # Add legend with better positioning and styling
+        legend = ax.legend(loc='upper right', frameon=True, framealpha=0.9, 
+                         facecolor='white', edgecolor='#d4d4d4')
         
-        # Adjust layout and draw
-        self.cost_figure.tight_layout(pad=2.0)
-        self.cost_canvas.draw()
-    
-    def update_margin_by_category_chart(self, start_date, end_date):
-        # Clear the figure
-        self.margin_figure.clear()
-        
-        # Get sales data grouped by category within date range
-        sales_by_category = self.main_window.db_manager.get_sales_by_category(start_date, end_date)
-        
-        # If no sales data, display a message
-        if not sales_by_category:
-            ax = self.margin_figure.add_subplot(111)
-            ax.text(0.5, 0.5, 'No sales data available for this period', 
-                    horizontalalignment='center', verticalalignment='center',
-                    transform=ax.transAxes)
-            self.margin_canvas.draw()
-            return
-        
-        # Prepare data for plotting
-        categories = []
-        gross_margins = []
-        net_margins = []
-        
-        # Get total expenses for the period
-        total_expenses = self.main_window.db_manager.get_total_expenses(start_date, end_date) or 0
-        
-        for category, data in sales_by_category.items():
-            categories.append(category)
-            
-            # Calculate gross margin percentage
-            revenue = data['revenue']
-            cost = data['cost']
-            gross_profit = revenue - cost
-            gross_margin_pct = (gross_profit / revenue * 100) if revenue > 0 else 0
-            gross_margins.append(gross_margin_pct)
-            
-            # Calculate net margin percentage (considering allocated expenses)
-            # For simplicity, we'll allocate expenses proportionally to revenue
-            total_revenue = sum(d['revenue'] for d in sales_by_category.values())
-            expense_allocation = (revenue / total_revenue) * total_expenses if total_revenue > 0 else 0
-            net_profit = gross_profit - expense_allocation
-            net_margin_pct = (net_profit / revenue * 100) if revenue > 0 else 0
-            net_margins.append(net_margin_pct)
-        
-        # Create the plot
-        ax = self.margin_figure.add_subplot(111)
-        
-        # Set width of bars
-        bar_width = 0.35
-        index = range(len(categories))
-        
-        # Create grouped bar chart
-        ax.bar([i - bar_width/2 for i in index], gross_margins, bar_width, label='Gross Margin %', color='#3498db')
-        ax.bar([i + bar_width/2 for i in index], net_margins, bar_width, label='Net Margin %', color='#2ecc71')
-        
-        # Set labels and title
-        ax.set_xlabel('Category')
-        ax.set_ylabel('Margin (%)')
-        ax.set_title('Profit Margins by Category')
-        ax.set_xticks(index)
-        ax.set_xticklabels(categories, rotation=45, ha='right')
-        
-        # Add a horizontal line at 0%
-        ax.axhline(y=0, color='r', linestyle='-', alpha=0.3)
-        
-        # Add legend
-        ax.legend()
-        
-        # Adjust layout and draw
-        self.margin_figure.tight_layout()
-        self.margin_canvas.draw()
-    
-    def get_color_gradient(self, count):
-        """Generate a gradient of colors for charts"""
-        if count <= 0:
-            return []
+        # Add total inventory text with improved styling
+        total_box = dict(facecolor='white', alpha=0.9, boxstyle="round,pad=0.5", 
+                       edgecolor='#ddd', linewidth=1.5)
         
-        # Use a colorful gradient
-        return plt.cm.viridis(np.linspace(0, 0.8, count))
-    
-    def generate_inventory_report(self):
-        # Import InventoryReportScreen from inventory_report.py
-        from screens.inventory_report import InventoryReportScreen
-        
-        # Create and show the inventory report screen
-        inventory_report = InventoryReportScreen(self.main_window)
+        # Add a title for the totals box
+        ax.text(0.02, 0.98, "Inventory Totals:", transform=ax.transAxes,
+               fontsize=11, fontweight='bold')
         
-        # Add the inventory report screen to the stacked widget if it's not already there
-        if not hasattr(self.main_window, 'inventory_report_screen'):
-            self.main_window.inventory_report_screen = inventory_report
-            self.main_window.stacked_widget.addWidget(inventory_report)
+        ax.text(0.02, 0.92, f"Total Store: {total_store:,}", transform=ax.transAxes,
+               fontsize=10, fontweight='bold', color='#3498db',
+               bbox=total_box)
+        ax.text(0.02, 0.85, f"Total Warehouse: {total_warehouse:,}", transform=ax.transAxes,
+               fontsize=10, fontweight='bold', color='#2ecc71',
+               bbox=total_box)
         
-        # Show the inventory report screen
-        self.main_window.stacked_widget.setCurrentWidget(self.main_window.inventory_report_screen)
\ No newline at end of file
+        # Add some padding to prevent label cutoff
+        ax.margins(x=0.05, y=0.1)
+    
+    # Use tight_layout with adjusted padding
+    figure.tight_layout(pad=2.0)
+
+
+def draw_cost_analysis_chart(figure, sorted_categories):
+    # Extract data for plotting
+    categories = [category for category, cost in sorted_categories]
+    total_costs = [cost for category, cost in sorted_categories]
+    
+    # Set figure size and adjust margins for better spacing
+    figure.subplots_adjust(left=0.25, right=0.95, top=0.88, bottom=0.15)
+    
+    ax = figure.add_subplot(111)
+    
+    # Set background color for better visibility
+    ax.set_facecolor('#f8f9fa')
+    
+    # If no data, display a message
+    if not categories:
+        ax.text(0.5, 0.5, 'No cost data available', 
+                horizontalalignment='center', verticalalignment='center',
+                transform=ax.transAxes, fontsize=12, fontweight='bold',
+                bbox=dict(facecolor='white', alpha=0.8, pad=10, boxstyle="round,pad=0.5", edgecolor='#e0e0e0'))
+        return
+    
+    # Create horizontal bar chart with improved styling
+    colors = get_color_gradient(len(categories))
+    bars = ax.barh(categories, total_costs, color=colors, 
+                  edgecolor='#555555', linewidth=0.8, alpha=0.9, height=0.6)
+    
+    # Add data labels with improved styling
+    for bar in bars:
+        width = bar.get_width()
+        label_x_pos = width * 1.01
+        ax.text(label_x_pos, bar.get_y() + bar.get_height()/2, f'₹{width:,.2f}',
+                va='center', fontsize=9, fontweight='bold',
+                bbox=dict(facecolor='white', alpha=0.8, boxstyle="round,pad=0.2", edgecolor='#d4d4d4'))
+    
+    # Set labels and title with improved styling
+    ax.set_xlabel('Total Cost (₹)', fontsize=12, fontweight='bold', labelpad=10)
+    ax.set_title('Inventory Cost by Category', fontsize=14, fontweight='bold', pad=15)
+    
+    # Format y-axis to show full category names with improved styling
+    ax.tick_params(axis='y', labelsize=10, pad=5)
+    ax.tick_params(axis='x', labelsize=9, pad=5)
+    
+    # Format x-axis with commas for thousands
+    ax.get_xaxis().set_major_formatter(FuncFormatter(lambda x, loc: f"₹{int(x):,}"))
+    
+    # Add grid for better readability
+    ax.grid(True, axis='x', linestyle='--', alpha=0.3)
+    
+    # Remove top and right spines for cleaner look
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    
+    # Add some padding to prevent label cutoff
+    ax.margins(x=0.2, y=0.05)
+    
+    # Adjust layout
+    figure.tight_layout(pad=2.0)
+
+
+def draw_margin_by_category_chart(figure, margin_data):
+    sales_by_category = margin_data['sales_by_category']
+    total_expenses = margin_data['total_expenses']
+    
+    # If no sales data, display a message
+    if not sales_by_category:
+        ax = figure.add_subplot(111)
+        ax.text(0.5, 0.5, 'No sales data available for this period', 
+                horizontalalignment='center', verticalalignment='center',
+                transform=ax.transAxes)
+        return
+    
+    # Prepare data for plotting
+    categories = []
+    gross_margins = []
+    net_margins = []
+    
+    for category, data in sales_by_category.items():
+        categories.append(category)
+        
+        # Calculate gross margin percentage
+        revenue = data['revenue']
+        cost = data['cost']
+        gross_profit = revenue - cost
+        gross_margin_pct = (gross_profit / revenue * 100) if revenue > 0 else 0
+        gross_margins.append(gross_margin_pct)
+        
+        # Calculate net margin percentage (considering allocated expenses)
+        # For simplicity, we'll allocate expenses proportionally to revenue
+        total_revenue = sum(d['revenue'] for d in sales_by_category.values())
+        expense_allocation = (revenue / total_revenue) * total_expenses if total_revenue > 0 else 0
+        net_profit = gross_profit - expense_allocation
+        net_margin_pct = (net_profit / revenue * 100) if revenue > 0 else 0
+        net_margins.append(net_margin_pct)
+    
+    # Create the plot
+    ax = figure.add_subplot(111)
+    
+    # Set width of bars
+    bar_width = 0.35
+    index = range(len(categories))
+    
+    # Create grouped bar chart
+    ax.bar([i - bar_width/2 for i in index], gross_margins, bar_width, label='Gross Margin %', color='#3498db')
+    ax.bar([i + bar_width/2 for i in index], net_margins, bar_width, label='Net Margin %', color='#2ecc71')
+    
+    # Set labels and title
+    ax.set_xlabel('Category')
+    ax.set_ylabel('Margin (%)')
+    ax.set_title('Profit Margins by Category')
+    ax.set_xticks(index)
+    ax.set_xticklabels(categories, rotation=45, ha='right')
+    
+    # Add a horizontal line at 0%
+    ax.axhline(y=0, color='r', linestyle='-', alpha=0.3)
+    
+    # Add legend
+    ax.legend()
+    
+    # Adjust layout
+    figure.tight_layout()
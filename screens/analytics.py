@@ -3,18 +3,18 @@ import datetime
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                              QPushButton, QFrame, QGridLayout, QSpacerItem,
                              QSizePolicy, QTableWidget, QTableWidgetItem,
-                             QHeaderView, QMessageBox, QComboBox, QDateEdit,
+                             QHeaderView, QComboBox, QDateEdit,
                              QTabWidget, QFormLayout, QGroupBox, QRadioButton,
                              QButtonGroup, QFileDialog, QDialog, QLineEdit,
-                             QDoubleSpinBox, QSpinBox, QCheckBox)
+                             QDoubleSpinBox, QSpinBox, QCheckBox, QInputDialog)
 from PyQt5.QtCore import Qt, QSize, QTimer, QDate
 from PyQt5.QtGui import QIcon, QPixmap, QFont, QColor
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
 import numpy as np
-import pandas as pd
-from matplotlib.dates import DateFormatter
+from screens.chart_renderer import ChartView
+from database.precomputed_reports import PrecomputedAnalytics, analytics_report, range_name_for
+from screens.data_export import EXPORT_DATASETS, EXPORT_FORMATS, format_for_path
+from screens.time_series import (choose_granularity, downsample_line, figure_width_px,
+                                 max_bars, tick_indices)
 
 class AnalyticsScreen(QWidget):
     def __init__(self, main_window):
@@ -204,8 +204,7 @@ class AnalyticsScreen(QWidget):
         sales_layout = QVBoxLayout(sales_tab)
         
         # Sales trend chart
-        self.sales_figure = Figure(figsize=(10, 6), dpi=100)
-        self.sales_canvas = FigureCanvas(self.sales_figure)
+        self.sales_canvas = ChartView(self.main_window.chart_renderer)
         self.sales_canvas.setMinimumHeight(300)
         sales_layout.addWidget(self.sales_canvas)
         
@@ -232,13 +231,11 @@ class AnalyticsScreen(QWidget):
         payment_layout = QHBoxLayout(payment_frame)
         
         # Payment method chart
-        self.payment_figure = Figure(figsize=(5, 4), dpi=100)
-        self.payment_canvas = FigureCanvas(self.payment_figure)
+        self.payment_canvas = ChartView(self.main_window.chart_renderer)
         payment_layout.addWidget(self.payment_canvas)
         
         # Sales by category chart
-        self.category_figure = Figure(figsize=(5, 4), dpi=100)
-        self.category_canvas = FigureCanvas(self.category_figure)
+        self.category_canvas = ChartView(self.main_window.chart_renderer)
         payment_layout.addWidget(self.category_canvas)
         
         sales_layout.addWidget(payment_frame)
@@ -248,8 +245,7 @@ class AnalyticsScreen(QWidget):
         product_layout = QVBoxLayout(product_tab)
         
         # Top products chart
-        self.product_figure = Figure(figsize=(10, 6), dpi=100)
-        self.product_canvas = FigureCanvas(self.product_figure)
+        self.product_canvas = ChartView(self.main_window.chart_renderer)
         self.product_canvas.setMinimumHeight(300)
         product_layout.addWidget(self.product_canvas)
         
@@ -314,13 +310,11 @@ class AnalyticsScreen(QWidget):
         profit_charts_layout = QHBoxLayout(profit_charts_frame)
         
         # Revenue vs Cost chart
-        self.profit_figure = Figure(figsize=(5, 4), dpi=100)
-        self.profit_canvas = FigureCanvas(self.profit_figure)
+        self.profit_canvas = ChartView(self.main_window.chart_renderer)
         profit_charts_layout.addWidget(self.profit_canvas)
         
         # Expense breakdown chart
-        self.expense_figure = Figure(figsize=(5, 4), dpi=100)
-        self.expense_canvas = FigureCanvas(self.expense_figure)
+        self.expense_canvas = ChartView(self.main_window.chart_renderer)
         profit_charts_layout.addWidget(self.expense_canvas)
         
         profit_layout.addWidget(profit_charts_frame)
@@ -366,13 +360,11 @@ class AnalyticsScreen(QWidget):
         inventory_charts_layout = QHBoxLayout(inventory_charts_frame)
         
         # Inventory by category chart
-        self.inventory_figure = Figure(figsize=(5, 4), dpi=100)
-        self.inventory_canvas = FigureCanvas(self.inventory_figure)
+        self.inventory_canvas = ChartView(self.main_window.chart_renderer)
         inventory_charts_layout.addWidget(self.inventory_canvas)
         
         # Inventory value chart
-        self.inventory_value_figure = Figure(figsize=(5, 4), dpi=100)
-        self.inventory_value_canvas = FigureCanvas(self.inventory_value_figure)
+        self.inventory_value_canvas = ChartView(self.main_window.chart_renderer)
         inventory_charts_layout.addWidget(self.inventory_value_canvas)
         
         inventory_layout.addWidget(inventory_charts_frame)
@@ -465,6 +457,22 @@ class AnalyticsScreen(QWidget):
         period_index = self.period_combo.currentIndex()
         period_type = 'day' if period_index == 0 else 'week' if period_index == 1 else 'month'
         
+        # The preset ranges are answered from a precomputed report when the
+        # data has not changed since; otherwise the engine picks up sales and
+        # expenses added since the last refresh and answers every date-range
+        # query below from its arrays
+        engine = self.main_window.analytics_engine
+        range_name = range_name_for(start_date, end_date)
+        if range_name:
+            def compute():
+                engine.refresh()
+                return analytics_report(engine, start_date, end_date)
+            self.analytics = PrecomputedAnalytics(self.main_window.report_store.cached(
+                'analytics', range_name, start_date, end_date, '', compute))
+        else:
+            engine.refresh()
+            self.analytics = engine
+        
         # Update all charts and tables based on the current tab
         current_tab = self.tabs.currentIndex()
         
@@ -492,7 +500,7 @@ class AnalyticsScreen(QWidget):
     
     def update_sales_metrics(self, start_date, end_date):
         # Get profit analysis data which includes sales metrics
-        profit_data = self.main_window.db_manager.get_profit_analysis(start_date, end_date)
+        profit_data = self.analytics.profit_analysis(start_date, end_date)
         
         # Update sales metrics
         self.findChild(QLabel, "total_sales_value").setText(f"₹{profit_data['total_revenue'] or 0:.2f}")
@@ -508,7 +516,7 @@ class AnalyticsScreen(QWidget):
     
     def update_profit_metrics(self, start_date, end_date):
         # Get profit analysis data
-        profit_data = self.main_window.db_manager.get_profit_analysis(start_date, end_date)
+        profit_data = self.analytics.profit_analysis(start_date, end_date)
         
         # Update profit metrics
         self.findChild(QLabel, "gross_profit_value").setText(f"₹{profit_data['gross_profit'] or 0:.2f}")
@@ -533,213 +541,38 @@ class AnalyticsScreen(QWidget):
         self.findChild(QLabel, "low_stock_value").setText(str(low_stock_items))
     
     def update_sales_trend_chart(self, period_type, start_date, end_date):
-        # Get sales data by period
-        sales_data = self.main_window.db_manager.get_sales_by_period(period_type, start_date, end_date)
+        # The selected period is the finest granularity shown; coarsen it when
+        # the range has more buckets than the chart has room for
+        width = max(self.sales_canvas.width(), self.sales_canvas.minimumWidth())
+        period_type = choose_granularity(start_date, end_date, width, minimum=period_type)
         
-        # Clear the figure
-        self.sales_figure.clear()
-        
-        # Create subplot
-        ax = self.sales_figure.add_subplot(111)
+        # Get sales data by period
+        sales_data = self.analytics.sales_by_period(period_type, start_date, end_date)
         
-        if not sales_data:
-            ax.text(0.5, 0.5, "No sales data for selected period", 
-                   horizontalalignment='center', verticalalignment='center',
-                   transform=ax.transAxes, fontsize=12)
-        else:
-            # Extract dates and sales amounts
-            periods = [data['period'] for data in sales_data]
-            amounts = [data['final_sales'] for data in sales_data]
-            num_sales = [data['num_sales'] for data in sales_data]
-            
-            # Create x positions
-            x = np.arange(len(periods))
-            
-            # Plot the data
-            ax.bar(x, amounts, color='#3498db', alpha=0.7, label='Sales Amount')
-            
-            # Create second y-axis for number of sales
-            ax2 = ax.twinx()
-            ax2.plot(x, num_sales, 'o-', color='#e74c3c', linewidth=2, label='Number of Sales')
-            
-            # Set labels and title
-            period_label = 'Day' if period_type == 'day' else 'Week' if period_type == 'week' else 'Month'
-            ax.set_title(f'Sales Trend by {period_label}', fontsize=12, fontweight='bold')
-            ax.set_xlabel(period_label, fontsize=10)
-            ax.set_ylabel('Amount (₹)', fontsize=10)
-            ax2.set_ylabel('Number of Sales', fontsize=10)
-            
-            # Set x-axis ticks
-            if len(periods) > 10:
-                step = len(periods) // 10
-                # Set ticks before labels
-                ticks = [i for i in range(0, len(periods), step)]
-                ax.set_xticks(ticks)
-                ax.set_xticklabels([periods[i] for i in ticks], rotation=45, ha='right', fontsize=10)
-            else:
-                ax.set_xticks(range(len(periods)))
-                ax.set_xticklabels(periods, rotation=45, ha='right', fontsize=10)
-            
-            # Add grid
-            ax.grid(True, linestyle='--', alpha=0.7)
-            
-            # Add legend
-            lines1, labels1 = ax.get_legend_handles_labels()
-            lines2, labels2 = ax2.get_legend_handles_labels()
-            ax.legend(lines1 + lines2, labels1 + labels2, loc='upper left')
-            
-            # Add total sales text
-            total_sales = sum(amounts)
-            total_transactions = sum(num_sales)
-            ax.text(0.02, 0.95, f"Total: ₹{total_sales:.2f}", transform=ax.transAxes,
-                   fontsize=10, fontweight='bold', bbox=dict(facecolor='white', alpha=0.8))
-            ax.text(0.02, 0.88, f"Transactions: {total_transactions}", transform=ax.transAxes,
-                   fontsize=10, fontweight='bold', bbox=dict(facecolor='white', alpha=0.8))
-        
-        self.sales_figure.tight_layout(pad=2.0)  # Increase padding for better visibility
-        self.sales_canvas.draw()
+        # Layout and rasterization happen on the chart renderer's worker pool
+        self.sales_canvas.set_chart(draw_sales_trend_chart, {'period_type': period_type, 'sales_data': sales_data})
     
     def update_payment_method_chart(self, start_date, end_date):
         # Get payment method data from database
-        payment_data = self.main_window.db_manager.get_sales_by_payment_method(start_date, end_date)
+        payment_data = self.analytics.sales_by_payment_method(start_date, end_date)
         
-        # Clear the figure
-        self.payment_figure.clear()
-        
-        # Create subplot
-        ax = self.payment_figure.add_subplot(111)
-        
-        if not payment_data:
-            ax.text(0.5, 0.5, "No sales data for selected period", 
-                   horizontalalignment='center', verticalalignment='center',
-                   transform=ax.transAxes, fontsize=12)
-        else:
-            # Extract data for plotting
-            methods = list(payment_data.keys())
-            values = [data['percentage'] for data in payment_data.values()]
-            
-            # Define colors based on number of payment methods
-            colors = ['#3498db', '#2ecc71', '#e74c3c', '#f39c12', '#9b59b6', '#34495e', '#1abc9c']
-            colors = colors[:len(methods)]  # Limit colors to number of methods
-            
-            # Plot the data
-            wedges, texts, autotexts = ax.pie(values, labels=methods, autopct='%1.1f%%', 
-                                             startangle=90, colors=colors)
-            
-            # Equal aspect ratio ensures that pie is drawn as a circle
-            ax.axis('equal')
-            ax.set_title('Sales by Payment Method')
-            
-            # Make text more readable
-            for text in texts + autotexts:
-                text.set_fontsize(9)
-            
-            # Add total sales amount
-            total_amount = sum(data['total_amount'] for data in payment_data.values())
-            ax.text(0.5, -0.1, f"Total Sales: ₹{total_amount:.2f}", 
-                   horizontalalignment='center', transform=ax.transAxes, fontsize=10)
-        
-        self.payment_figure.tight_layout()
-        self.payment_canvas.draw()
+        self.payment_canvas.set_chart(draw_payment_method_chart, payment_data)
     
     def update_sales_by_category_chart(self, start_date, end_date):
         # Get sales by category data from database
-        category_data = self.main_window.db_manager.get_sales_by_category(start_date, end_date)
-        
-        # Clear the figure
-        self.category_figure.clear()
-        
-        # Create subplot
-        ax = self.category_figure.add_subplot(111)
-        
-        if not category_data:
-            ax.text(0.5, 0.5, "No sales data for selected period", 
-                   horizontalalignment='center', verticalalignment='center',
-                   transform=ax.transAxes, fontsize=12)
-        else:
-            # Extract data for plotting
-            categories = list(category_data.keys())
-            
-            # Calculate total revenue for percentage calculation
-            total_revenue = sum(data['revenue'] for data in category_data.values())
-            
-            # Calculate percentages
-            values = []
-            for category in categories:
-                if total_revenue > 0:
-                    percentage = (category_data[category]['revenue'] / total_revenue) * 100
-                else:
-                    percentage = 0
-                values.append(percentage)
-            
-            # Define colors based on number of categories
-            colors = ['#3498db', '#2ecc71', '#e74c3c', '#f39c12', '#9b59b6', '#34495e', '#1abc9c']
-            colors = colors[:len(categories)]  # Limit colors to number of categories
-            
-            # Plot the data
-            ax.bar(categories, values, color=colors)
-            ax.set_title('Sales by Category (%)')
-            ax.set_ylabel('Percentage of Sales')
-            ax.set_ylim(0, max(values) * 1.2 if values else 100)  # Set y-limit with some padding
-            
-            # Set ticks and rotate x-axis labels
-            ax.set_xticks(range(len(categories)))  # Set the tick positions
-            ax.set_xticklabels(categories, rotation=45, ha='right', fontsize=10)  # Set the tick labels with increased font size
+        category_data = self.analytics.sales_by_category(start_date, end_date)
         
-        # Add grid
-        ax.grid(True, linestyle='--', alpha=0.7, axis='y')
-        
-        self.category_figure.tight_layout(pad=2.0)  # Increase padding for better visibility
-        self.category_canvas.draw()
+        self.category_canvas.set_chart(draw_sales_by_category_chart, category_data)
     
     def update_product_performance_chart(self, start_date, end_date):
         # Get top selling products
-        top_products = self.main_window.db_manager.get_top_selling_products(start_date, end_date, 10)
-        
-        # Clear the figure
-        self.product_figure.clear()
-        
-        # Create subplot
-        ax = self.product_figure.add_subplot(111)
-        
-        if not top_products:
-            ax.text(0.5, 0.5, "No product data for selected period", 
-                   horizontalalignment='center', verticalalignment='center',
-                   transform=ax.transAxes, fontsize=12)
-        else:
-            # Extract product names and quantities
-            names = [product['name'] if len(product['name']) <= 15 else product['name'][:12] + '...' 
-                    for product in top_products]
-            quantities = [product['total_quantity'] for product in top_products]
-            revenues = [product['total_revenue'] for product in top_products]
-            
-            # Create x positions
-            x = np.arange(len(names))
-            width = 0.35
-            
-            # Plot the data
-            ax.bar(x - width/2, quantities, width, label='Quantity', color='#3498db')
-            ax2 = ax.twinx()
-            ax2.bar(x + width/2, revenues, width, label='Revenue', color='#e74c3c')
-            
-            ax.set_title('Top Selling Products', fontsize=12, fontweight='bold')
-            ax.set_xticks(x)
-            # Set ticks and rotate x-axis labels
-            ax.set_xticklabels(names, rotation=45, ha='right', fontsize=10)  # Set the tick labels
-            ax.set_ylabel('Quantity Sold', fontsize=10)
-            ax2.set_ylabel('Revenue (₹)', fontsize=10)
-            
-            # Add legend
-            lines1, labels1 = ax.get_legend_handles_labels()
-            lines2, labels2 = ax2.get_legend_handles_labels()
-            ax.legend(lines1 + lines2, labels1 + labels2, loc='upper right')
+        top_products = self.analytics.top_selling_products(start_date, end_date, 10)
         
-        self.product_figure.tight_layout(pad=2.0)  # Increase padding for better visibility
-        self.product_canvas.draw()
+        self.product_canvas.set_chart(draw_product_performance_chart, top_products)
     
     def update_top_products_table(self, start_date, end_date):
         # Get top selling products
-        top_products = self.main_window.db_manager.get_top_selling_products(start_date, end_date, 10)
+        top_products = self.analytics.top_selling_products(start_date, end_date, 10)
         
         # Clear existing data
         self.top_products_table.setRowCount(0)
@@ -805,95 +638,15 @@ class AnalyticsScreen(QWidget):
     
     def update_profit_chart(self, start_date, end_date):
         # Get profit analysis data
-        profit_data = self.main_window.db_manager.get_profit_analysis(start_date, end_date)
-        
-        # Clear the figure
-        self.profit_figure.clear()
-        
-        # Create subplot
-        ax = self.profit_figure.add_subplot(111)
+        profit_data = self.analytics.profit_analysis(start_date, end_date)
         
-        if not profit_data or profit_data['total_revenue'] == 0:
-            ax.text(0.5, 0.5, "No profit data for selected period", 
-                   horizontalalignment='center', verticalalignment='center',
-                   transform=ax.transAxes, fontsize=12)
-        else:
-            # Extract data
-            labels = ['Revenue', 'Cost', 'Expenses', 'Gross Profit', 'Net Profit']
-            values = [
-                profit_data['total_revenue'] or 0,
-                profit_data['total_cost'] or 0,
-                profit_data['total_expenses'] or 0,
-                profit_data['gross_profit'] or 0,
-                profit_data['net_profit'] or 0
-            ]
-            colors = ['#3498db', '#e74c3c', '#f39c12', '#2ecc71', '#9b59b6']
-            
-            # Plot the data
-            bars = ax.bar(labels, values, color=colors)
-            ax.set_title('Profit Analysis', fontsize=12, fontweight='bold')
-            ax.set_ylabel('Amount (₹)', fontsize=10)
-            
-            # Add value labels on top of bars
-            for bar in bars:
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                       f'₹{height:.2f}', ha='center', va='bottom', rotation=45, fontsize=9)
-            
-            # Add margins and profit percentage
-            ax.text(0.02, 0.95, f"Gross Margin: {profit_data['gross_margin']:.1f}%", transform=ax.transAxes,
-                   fontsize=10, fontweight='bold', bbox=dict(facecolor='white', alpha=0.8))
-            ax.text(0.02, 0.88, f"Net Margin: {profit_data['net_margin']:.1f}%", transform=ax.transAxes,
-                   fontsize=10, fontweight='bold', bbox=dict(facecolor='white', alpha=0.8))
-        
-        self.profit_figure.tight_layout(pad=2.0)  # Increase padding for better visibility
-        self.profit_canvas.draw()
+        self.profit_canvas.set_chart(draw_profit_chart, profit_data)
     
     def update_expense_chart(self, start_date, end_date):
         # Get expenses by category data from database
-        expense_data = self.main_window.db_manager.get_expenses_by_category(start_date, end_date)
+        expense_data = self.analytics.expenses_by_category(start_date, end_date)
         
-        # Clear the figure
-        self.expense_figure.clear()
-        
-        # Create subplot
-        ax = self.expense_figure.add_subplot(111)
-        
-        if not expense_data:
-            ax.text(0.5, 0.5, "No expense data for selected period", 
-                   horizontalalignment='center', verticalalignment='center',
-                   transform=ax.transAxes, fontsize=12)
-        else:
-            # Extract data for plotting
-            categories = list(expense_data.keys())
-            values = [data['percentage'] for data in expense_data.values()]
-            
-            # Define colors based on number of categories
-            colors = ['#3498db', '#2ecc71', '#e74c3c', '#f39c12', '#9b59b6', '#34495e', '#1abc9c']
-            colors = colors[:len(categories)]  # Limit colors to number of categories
-            
-            # Plot the data
-            wedges, texts, autotexts = ax.pie(values, labels=categories, autopct='%1.1f%%', 
-                                             startangle=90, colors=colors)
-        
-        # Always set the title
-        ax.set_title('Expenses by Category', fontsize=12, fontweight='bold')
-        
-        if expense_data:
-            # Equal aspect ratio ensures that pie is drawn as a circle
-            ax.axis('equal')
-            
-            # Make text more readable
-            for text in texts + autotexts:
-                text.set_fontsize(10)
-                
-            # Add total expenses amount
-            total_amount = sum(data['total_amount'] for data in expense_data.values())
-            ax.text(0.5, -0.1, f"Total Expenses: ₹{total_amount:.2f}", 
-                   horizontalalignment='center', transform=ax.transAxes, fontsize=11, fontweight='bold')
-        
-        self.expense_figure.tight_layout(pad=2.0)  # Increase padding for better visibility
-        self.expense_canvas.draw()
+        self.expense_canvas.set_chart(draw_expense_chart, expense_data)
     
     def update_expenses_table(self, start_date, end_date):
         # Get expenses
@@ -928,96 +681,22 @@ class AnalyticsScreen(QWidget):
         # Get all products
         products = self.main_window.db_manager.get_all_products()
         
-        # Clear the figure
-        self.inventory_figure.clear()
-        
-        # Create subplot
-        ax = self.inventory_figure.add_subplot(111)
-        
-        if not products:
-            ax.text(0.5, 0.5, "No inventory data available", 
-                   horizontalalignment='center', verticalalignment='center',
-                   transform=ax.transAxes, fontsize=12)
-        else:
-            # Group products by category
-            categories = {}
-            for product in products:
-                category = product['category'] or 'Uncategorized'
-                if category not in categories:
-                    categories[category] = {'store': 0, 'warehouse': 0}
-                categories[category]['store'] += product['store_quantity']
-                categories[category]['warehouse'] += product['warehouse_quantity']
-            
-            # Extract category names and quantities
-            cat_names = list(categories.keys())
-            store_quantities = [categories[cat]['store'] for cat in cat_names]
-            warehouse_quantities = [categories[cat]['warehouse'] for cat in cat_names]
-            
-            # Create x positions
-            x = np.arange(len(cat_names))
-            width = 0.35
-            
-            # Plot the data
-            # Plot the data
-            ax.bar(x - width/2, store_quantities, width, label='Store', color='#3498db')
-            ax.bar(x + width/2, warehouse_quantities, width, label='Warehouse', color='#2ecc71')
-            
-            ax.set_title('Inventory by Category', fontsize=12, fontweight='bold')
-            ax.set_xticks(x)
-            # Set ticks and rotate x-axis labels
-            ax.set_xticklabels(cat_names, rotation=45, ha='right', fontsize=10)  # Set the tick labels
-            ax.set_ylabel('Quantity', fontsize=10)
-            
-            # Add legend
-            ax.legend()
+        # Group products by category
+        categories = {}
+        for product in products:
+            category = product['category'] or 'Uncategorized'
+            if category not in categories:
+                categories[category] = {'store': 0, 'warehouse': 0}
+            categories[category]['store'] += product['store_quantity']
+            categories[category]['warehouse'] += product['warehouse_quantity']
         
-        self.inventory_figure.tight_layout(pad=2.0)  # Increase padding for better visibility
-        self.inventory_canvas.draw()
+        self.inventory_canvas.set_chart(draw_inventory_chart, categories)
     
     def update_inventory_value_chart(self):
         # Get inventory value by category data from database
         inventory_data = self.main_window.db_manager.get_inventory_value_by_category()
         
-        # Clear the figure
-        self.inventory_value_figure.clear()
-        
-        # Create subplot
-        ax = self.inventory_value_figure.add_subplot(111)
-        
-        if not inventory_data:
-            ax.text(0.5, 0.5, "No inventory data available", 
-                   horizontalalignment='center', verticalalignment='center',
-                   transform=ax.transAxes, fontsize=12)
-        else:
-            # Extract data for plotting
-            categories = list(inventory_data.keys())
-            values = [data['total_value'] for data in inventory_data.values()]
-            total_value = sum(values)
-            
-            # Define colors based on number of categories
-            colors = ['#3498db', '#2ecc71', '#e74c3c', '#f39c12', '#9b59b6', '#34495e', '#1abc9c']
-            colors = colors[:len(categories)]  # Limit colors to number of categories
-            
-            # Plot the data
-            # Plot the data
-            wedges, texts, autotexts = ax.pie(values, labels=categories, 
-                                             autopct=lambda p: f'₹{p * total_value / 100:.0f}', 
-                                             startangle=90, colors=colors)
-            
-            # Equal aspect ratio ensures that pie is drawn as a circle
-            ax.axis('equal')
-            ax.set_title('Inventory Value by Category', fontsize=12, fontweight='bold')
-            
-            # Make text more readable
-            for text in texts + autotexts:
-                text.set_fontsize(10)  # Increased font size for better readability
-                
-            # Add total inventory value
-            ax.text(0.5, -0.1, f"Total Inventory Value: ₹{total_value:.2f}", 
-                   horizontalalignment='center', transform=ax.transAxes, fontsize=11, fontweight='bold')
-        
-        self.inventory_value_figure.tight_layout(pad=2.0)  # Increase padding for better visibility
-        self.inventory_value_canvas.draw()
+        self.inventory_value_canvas.set_chart(draw_inventory_value_chart, inventory_data)
     
     def update_low_stock_table(self):
         # Get low stock products
@@ -1049,102 +728,388 @@ class AnalyticsScreen(QWidget):
             self.low_stock_table.setItem(row, 4, QTableWidgetItem(str(product['min_stock_level'])))
     
     def export_data(self):
-        # Get current tab
+        # Default dataset for the current tab
         current_tab = self.tabs.currentIndex()
-        tab_name = self.tabs.tabText(current_tab)
+        default_dataset = ['sales_lines', 'products', 'expenses', 'products'][current_tab]
         
-        # Get date range for filename
+        # Let the user pick what to export
+        names = list(EXPORT_DATASETS.values())
+        name, ok = QInputDialog.getItem(self, "Export Data", "Data to export:", names,
+                                        list(EXPORT_DATASETS).index(default_dataset), False)
+        if not ok:
+            return
+        dataset = list(EXPORT_DATASETS)[names.index(name)]
+        
+        # Get date range for filename and filters
         start_date = self.start_date.date().toString("yyyy-MM-dd")
         end_date = self.end_date.date().toString("yyyy-MM-dd")
         
         # Create filename
-        filename = f"{tab_name.replace(' ', '_')}_{start_date}_to_{end_date}.csv"
+        filename = f"{dataset}_{start_date}_to_{end_date}.csv"
         
         # Get file save location
-        file_path, _ = QFileDialog.getSaveFileName(
-            self, "Export Data", filename, "CSV Files (*.csv);;All Files (*)"
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Export Data", filename, ";;".join(EXPORT_FORMATS.values()) + ";;All Files (*)"
         )
         
         if not file_path:
             return
         
-        try:
-            # Export data based on current tab
-            if current_tab == 0:  # Sales Analysis
-                self.export_sales_data(file_path, start_date, end_date)
-            elif current_tab == 1:  # Product Analysis
-                self.export_product_data(file_path, start_date, end_date)
-            elif current_tab == 2:  # Profit Analysis
-                self.export_profit_data(file_path, start_date, end_date)
-            elif current_tab == 3:  # Inventory Analysis
-                self.export_inventory_data(file_path)
-            
-            QMessageBox.information(self, "Export Successful", f"Data exported to {file_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Export Failed", f"Failed to export data: {str(e)}")
+        # Rows are streamed from the database by the print spooler
+        fmt = format_for_path(file_path, selected_filter)
+        self.main_window.print_spooler.submit('export', f"Export {EXPORT_DATASETS[dataset].lower()}", {
+            'dataset': dataset, 'path': file_path, 'fmt': fmt,
+            'filters': {'start_date': start_date, 'end_date': end_date},
+        })
     
-    def export_sales_data(self, file_path, start_date, end_date):
-        # Get period type
-        period_index = self.period_combo.currentIndex()
-        period_type = 'day' if period_index == 0 else 'week' if period_index == 1 else 'month'
+    def go_back(self):
+        # Check if user is admin or employee
+        if hasattr(self.main_window, 'admin_dashboard'):
+            self.main_window.show_admin_dashboard()
+        else:
+            self.main_window.show_employee_dashboard()
+
+
+# Chart drawing functions. They only use the figure passed in and plain data,
+# so the chart renderer can run them off the GUI thread.
+
+def draw_sales_trend_chart(figure, trend_data):
+    period_type = trend_data['period_type']
+    sales_data = trend_data['sales_data']
+    
+    # Create subplot
+    ax = figure.add_subplot(111)
+    
+    if not sales_data:
+        ax.text(0.5, 0.5, "No sales data for selected period", 
+               horizontalalignment='center', verticalalignment='center',
+               transform=ax.transAxes, fontsize=12)
+    else:
+        # Extract dates and sales amounts
+        periods = [data['period'] for data in sales_data]
+        amounts = [data['final_sales'] for data in sales_data]
+        num_sales = [data['num_sales'] for data in sales_data]
+        
+        width_px = figure_width_px(figure)
+        ax2 = ax.twinx()
+        
+        if len(periods) > max_bars(width_px):
+            # Too many periods for bars: plot both series as downsampled lines
+            x, y = downsample_line(amounts, width_px)
+            ax.plot(x, y, color='#3498db', linewidth=1.5, label='Sales Amount')
+            ax.fill_between(x, y, color='#3498db', alpha=0.2)
+            x, y = downsample_line(num_sales, width_px)
+            ax2.plot(x, y, color='#e74c3c', linewidth=1, label='Number of Sales')
+        else:
+            # Create x positions
+            x = np.arange(len(periods))
+            
+            # Plot the data
+            ax.bar(x, amounts, color='#3498db', alpha=0.7, label='Sales Amount')
+            
+            # Second y-axis for number of sales
+            ax2.plot(x, num_sales, 'o-', color='#e74c3c', linewidth=2, label='Number of Sales')
         
-        # Get sales data
-        sales_data = self.main_window.db_manager.get_sales_by_period(period_type, start_date, end_date)
+        # Set labels and title
+        period_label = 'Day' if period_type == 'day' else 'Week' if period_type == 'week' else 'Month'
+        ax.set_title(f'Sales Trend by {period_label}', fontsize=12, fontweight='bold')
+        ax.set_xlabel(period_label, fontsize=10)
+        ax.set_ylabel('Amount (₹)', fontsize=10)
+        ax2.set_ylabel('Number of Sales', fontsize=10)
         
-        # Convert to DataFrame
-        df = pd.DataFrame(sales_data)
+        # Set x-axis ticks, thinned so labels never overlap
+        ticks = tick_indices(len(periods), width_px)
+        ax.set_xticks(ticks)
+        ax.set_xticklabels([periods[i] for i in ticks], rotation=45, ha='right', fontsize=10)
         
-        # Save to CSV
-        df.to_csv(file_path, index=False)
+        # Add grid
+        ax.grid(True, linestyle='--', alpha=0.7)
+        
+        # Add legend
+        lines1, labels1 = ax.get_legend_handles_labels()
+        lines2, labels2 = ax2.get_legend_handles_labels()
+        ax.legend(lines1 + lines2, labels1 + labels2, loc='upper left')
+        
+        # Add total sales text
+        total_sales = sum(amounts)
+        total_transactions = sum(num_sales)
+        ax.text(0.02, 0.95, f"Total: ₹{total_sales:.2f}", transform=ax.transAxes,
+               fontsize=10, fontweight='bold', bbox=dict(facecolor='white', alpha=0.8))
+        ax.text(0.02, 0.88, f"Transactions: {total_transactions}", transform=ax.transAxes,
+               fontsize=10, fontweight='bold', bbox=dict(facecolor='white', alpha=0.8))
     
-    def export_product_data(self, file_path, start_date, end_date):
-        # Get top selling products
-        top_products = self.main_window.db_manager.get_top_selling_products(start_date, end_date, 50)
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(top_products)
-        
-        # Save to CSV
-        df.to_csv(file_path, index=False)
+    figure.tight_layout(pad=2.0)  # Increase padding for better visibility
+
+
+def draw_payment_method_chart(figure, payment_data):
+    # Create subplot
+    ax = figure.add_subplot(111)
     
-    def export_profit_data(self, file_path, start_date, end_date):
-        # Get profit analysis data
-        profit_data = self.main_window.db_manager.get_profit_analysis(start_date, end_date)
-        
-        # Convert to DataFrame (need to reshape the data)
-        data = {
-            'Metric': ['Total Revenue', 'Total Cost', 'Total Expenses', 'Gross Profit', 'Net Profit',
-                      'Gross Margin (%)', 'Net Margin (%)', 'Number of Sales', 'Number of Items Sold'],
-            'Value': [
-                profit_data['total_revenue'] or 0,
-                profit_data['total_cost'] or 0,
-                profit_data['total_expenses'] or 0,
-                profit_data['gross_profit'] or 0,
-                profit_data['net_profit'] or 0,
-                profit_data['gross_margin'] or 0,
-                profit_data['net_margin'] or 0,
-                profit_data['num_sales'] or 0,
-                profit_data['num_items_sold'] or 0
-            ]
-        }
-        df = pd.DataFrame(data)
-        
-        # Save to CSV
-        df.to_csv(file_path, index=False)
+    if not payment_data:
+        ax.text(0.5, 0.5, "No sales data for selected period", 
+               horizontalalignment='center', verticalalignment='center',
+               transform=ax.transAxes, fontsize=12)
+    else:
+        # Extract data for plotting
+        methods = list(payment_data.keys())
+        values = [data['percentage'] for data in payment_data.values()]
+        
+        # Define colors based on number of payment methods
+        colors = ['#3498db', '#2ecc71', '#e74c3c', '#f39c12', '#9b59b6', '#34495e', '#1abc9c']
+        colors = colors[:len(methods)]  # Limit colors to number of methods
+        
+        # Plot the data
+        wedges, texts, autotexts = ax.pie(values, labels=methods, autopct='%1.1f%%', 
+                                         startangle=90, colors=colors)
+        
+        # Equal aspect ratio ensures that pie is drawn as a circle
+        ax.axis('equal')
+        ax.set_title('Sales by Payment Method')
+        
+        # Make text more readable
+        for text in texts + autotexts:
+            text.set_fontsize(9)
+        
+        # Add total sales amount
+        total_amount = sum(data['total_amount'] for data in payment_data.values())
+        ax.text(0.5, -0.1, f"Total Sales: ₹{total_amount:.2f}", 
+               horizontalalignment='center', transform=ax.transAxes, fontsize=10)
     
-    def export_inventory_data(self, file_path):
-        # Get all products
-        products = self.main_window.db_manager.get_all_products()
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(products)
+    figure.tight_layout()
+
+
+def draw_sales_by_category_chart(figure, category_data):
+    # Create subplot
+    ax = figure.add_subplot(111)
+    
+    if not category_data:
+        ax.text(0.5, 0.5, "No sales data for selected period", 
+               horizontalalignment='center', verticalalignment='center',
+               transform=ax.transAxes, fontsize=12)
+    else:
+        # Extract data for plotting
+        categories = list(category_data.keys())
+        
+        # Calculate total revenue for percentage calculation
+        total_revenue = sum(data['revenue'] for data in category_data.values())
+        
+        # Calculate percentages
+        values = []
+        for category in categories:
+            if total_revenue > 0:
+                percentage = (category_data[category]['revenue'] / total_revenue) * 100
+            else:
+                percentage = 0
+            values.append(percentage)
+        
+        # Define colors based on number of categories
+        colors = ['#3498db', '#2ecc71', '#e74c3c', '#f39c12', '#9b59b6', '#34495e', '#1abc9c']
+        colors = colors[:len(categories)]  # Limit colors to number of categories
+        
+        # Plot the data
+        ax.bar(categories, values, color=colors)
+        ax.set_title('Sales by Category (%)')
+        ax.set_ylabel('Percentage of Sales')
+        ax.set_ylim(0, max(values) * 1.2 if values else 100)  # Set y-limit with some padding
+        
+        # Set ticks and rotate x-axis labels
+        ax.set_xticks(range(len(categories)))  # Set the tick positions
+        ax.set_xticklabels(categories, rotation=45, ha='right', fontsize=10)  # Set the tick labels with increased font size
+    
+    # Add grid
+    ax.grid(True, linestyle='--', alpha=0.7, axis='y')
+    
+    figure.tight_layout(pad=2.0)  # Increase padding for better visibility
+
+
+def draw_product_performance_chart(figure, top_products):
+    # Create subplot
+    ax = figure.add_subplot(111)
+    
+    if not top_products:
+        ax.text(0.5, 0.5, "No product data for selected period", 
+               horizontalalignment='center', verticalalignment='center',
+               transform=ax.transAxes, fontsize=12)
+    else:
+        # Extract product names and quantities
+        names = [product['name'] if len(product['name']) <= 15 else product['name'][:12] + '...' 
+                for product in top_products]
+        quantities = [product['total_quantity'] for product in top_products]
+        revenues = [product['total_revenue'] for product in top_products]
+        
+        # Create x positions
+        x = np.arange(len(names))
+        width = 0.35
+        
+        # Plot the data
+        ax.bar(x - width/2, quantities, width, label='Quantity', color='#3498db')
+        ax2 = ax.twinx()
+        ax2.bar(x + width/2, revenues, width, label='Revenue', color='#e74c3c')
+        
+        ax.set_title('Top Selling Products', fontsize=12, fontweight='bold')
+        ax.set_xticks(x)
+        # Set ticks and rotate x-axis labels
+        ax.set_xticklabels(names, rotation=45, ha='right', fontsize=10)  # Set the tick labels
+        ax.set_ylabel('Quantity Sold', fontsize=10)
+        ax2.set_ylabel('Revenue (₹)', fontsize=10)
+        
+        # Add legend
+        lines1, labels1 = ax.get_legend_handles_labels()
+        lines2, labels2 = ax2.get_legend_handles_labels()
+        ax.legend(lines1 + lines2, labels1 + labels2, loc='upper right')
+    
+    figure.tight_layout(pad=2.0)  # Increase padding for better visibility
+
+
+def draw_profit_chart(figure, profit_data):
+    # Create subplot
+    ax = figure.add_subplot(111)
+    
+    if not profit_data or profit_data['total_revenue'] == 0:
+        ax.text(0.5, 0.5, "No profit data for selected period", 
+               horizontalalignment='center', verticalalignment='center',
+               transform=ax.transAxes, fontsize=12)
+    else:
+        # Extract data
+        labels = ['Revenue', 'Cost', 'Expenses', 'Gross Profit', 'Net Profit']
+        values = [
+            profit_data['total_revenue'] or 0,
+            profit_data['total_cost'] or 0,
+            profit_data['total_expenses'] or 0,
+            profit_data['gross_profit'] or 0,
+            profit_data['net_profit'] or 0
+        ]
+        colors = ['#3498db', '#e74c3c', '#f39c12', '#2ecc71', '#9b59b6']
+        
+        # Plot the data
+        bars = ax.bar(labels, values, color=colors)
+        ax.set_title('Profit Analysis', fontsize=12, fontweight='bold')
+        ax.set_ylabel('Amount (₹)', fontsize=10)
+        
+        # Add value labels on top of bars
+        for bar in bars:
+            height = bar.get_height()
+            ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
+                   f'₹{height:.2f}', ha='center', va='bottom', rotation=45, fontsize=9)
+        
+        # Add margins and profit percentage
+        ax.text(0.02, 0.95, f"Gross Margin: {profit_data['gross_margin']:.1f}%", transform=ax.transAxes,
+               fontsize=10, fontweight='bold', bbox=dict(facecolor='white', alpha=0.8))
+        ax.text(0.02, 0.88, f"Net Margin: {profit_data['net_margin']:.1f}%", transform=ax.transAxes,
+               fontsize=10, fontweight='bold', bbox=dict(facecolor='white', alpha=0.8))
+    
+    figure.tight_layout(pad=2.0)  # Increase padding for better visibility
+
+
+def draw_expense_chart(figure, expense_data):
+    # Create subplot
+    ax = figure.add_subplot(111)
+    
+    if not expense_data:
+        ax.text(0.5, 0.5, "No expense data for selected period", 
+               horizontalalignment='center', verticalalignment='center',
+               transform=ax.transAxes, fontsize=12)
+    else:
+        # Extract data for plotting
+        categories = list(expense_data.keys())
+        values = [data['percentage'] for data in expense_data.values()]
+        
+        # Define colors based on number of categories
+        colors = ['#3498db', '#2ecc71', '#e74c3c', '#f39c12', '#9b59b6', '#34495e', '#1abc9c']
+        colors = colors[:len(categories)]  # Limit colors to number of categories
+        
+        # Plot the data
+        wedges, texts, autotexts = ax.pie(values, labels=categories, autopct='%1.1f%%', 
+                                         startangle=90, colors=colors)
+    
+    # Always set the title
+    ax.set_title('Expenses by Category', fontsize=12, fontweight='bold')
+    
+    if expense_data:
+        # Equal aspect ratio ensures that pie is drawn as a circle
+        ax.axis('equal')
         
-        # Save to CSV
-        df.to_csv(file_path, index=False)
+        # Make text more readable
+        for text in texts + autotexts:
+            text.set_fontsize(10)
+            
+        # Add total expenses amount
+        total_amount = sum(data['total_amount'] for data in expense_data.values())
+        ax.text(0.5, -0.1, f"Total Expenses: ₹{total_amount:.2f}", 
+               horizontalalignment='center', transform=ax.transAxes, fontsize=11, fontweight='bold')
     
-    def go_back(self):
-        # Check if user is admin or employee
-        if hasattr(self.main_window, 'admin_dashboard'):
-            self.main_window.show_admin_dashboard()
-        else:
-            self.main_window.show_employee_dashboard()
\ No newline at end of file
+    figure.tight_layout(pad=2.0)  # Increase padding for better visibility
+
+
+def draw_inventory_chart(figure, categories):
+    # Create subplot
+    ax = figure.add_subplot(111)
+    
+    if not categories:
+        ax.text(0.5, 0.5, "No inventory data available", 
+               horizontalalignment='center', verticalalignment='center',
+               transform=ax.transAxes, fontsize=12)
+    else:
+        # Extract category names and quantities
+        cat_names = list(categories.keys())
+        store_quantities = [categories[cat]['store'] for cat in cat_names]
+        warehouse_quantities = [categories[cat]['warehouse'] for cat in cat_names]
+        
+        # Create x positions
+        x = np.arange(len(cat_names))
+        width = 0.35
+        
+        # Plot the data
+        # Plot the data
+        ax.bar(x - width/2, store_quantities, width, label='Store', color='#3498db')
+        ax.bar(x + width/2, warehouse_quantities, width, label='Warehouse', color='#2ecc71')
+        
+        ax.set_title('Inventory by Category', fontsize=12, fontweight='bold')
+        ax.set_xticks(x)
+        # Set ticks and rotate x-axis labels
+        ax.set_xticklabels(cat_names, rotation=45, ha='right', fontsize=10)  # Set the tick labels
+        ax.set_ylabel('Quantity', fontsize=10)
+        
+        # Add legend
+        ax.legend()
+    
+    figure.tight_layout(pad=2.0)  # Increase padding for better visibility
+
+
+def draw_inventory_value_chart(figure, inventory_data):
+    # Create subplot
+    ax = figure.add_subplot(111)
+    
+    if not inventory_data:
+        ax.text(0.5, 0.5, "No inventory data available", 
+               horizontalalignment='center', verticalalignment='center',
+               transform=ax.transAxes, fontsize=12)
+    else:
+        # Extract data for plotting
+        categories = list(inventory_data.keys())
+        values = [data['total_value'] for data in inventory_data.values()]
+        total_value = sum(values)
+        
+        # Define colors based on number of categories
+        colors = ['#3498db', '#2ecc71', '#e74c3c', '#f39c12', '#9b59b6', '#34495e', '#1abc9c']
+        colors = colors[:len(categories)]  # Limit colors to number of categories
+        
+        # Plot the data
+        # Plot the data
+        wedges, texts, autotexts = ax.pie(values, labels=categories, 
+                                         autopct=lambda p: f'₹{p * total_value / 100:.0f}', 
+                                         startangle=90, colors=colors)
+        
+        # Equal aspect ratio ensures that pie is drawn as a circle
+        ax.axis('equal')
+        ax.set_title('Inventory Value by Category', fontsize=12, fontweight='bold')
+        
+        # Make text more readable
+        for text in texts + autotexts:
+            text.set_fontsize(10)  # Increased font size for better readability
+            
+        # Add total inventory value
+        ax.text(0.5, -0.1, f"Total Inventory Value: ₹{total_value:.2f}", 
+               horizontalalignment='center', transform=ax.transAxes, fontsize=11, fontweight='bold')
+    
+    figure.tight_layout(pad=2.0)  # Increase padding for better visibility
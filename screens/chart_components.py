@@ -0,0 +1,192 @@
+import math
+
+from matplotlib import colormaps
+
+
+class ChartComponent:
+    """Base class for charts that keep their axes and artists alive between updates.
+
+    Data-only changes update the existing artists and are blitted onto a cached
+    background; a full relayout (clear, add_subplot, tight_layout) only happens
+    when the set of categories shown changes.
+    """
+
+    def __init__(self, figure, canvas):
+        self.figure = figure
+        self.canvas = canvas
+        self.ax = None
+        self.categories = None
+        self.background = None
+        self.animated_artists = []
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def update(self, categories, values):
+        """Show values for categories, relaying out only when the category set changes"""
+        if self.categories is None or set(categories) != set(self.categories):
+            self.categories = list(categories)
+            self.build(self.categories, values)
+            self.relayout()
+            return
+
+        # Same categories: keep the current artist order and move the data into it
+        value_map = dict(zip(categories, values))
+        ordered_values = [value_map[category] for category in self.categories]
+        if self.update_artists(ordered_values):
+            self.blit()
+        else:
+            # Axis limits changed, redraw without recomputing the layout
+            self.canvas.draw_idle()
+
+    def build(self, categories, values):
+        raise NotImplementedError
+
+    def update_artists(self, values):
+        """Update artists in place; return False if a full draw is needed"""
+        raise NotImplementedError
+
+    def relayout(self):
+        self.figure.tight_layout()
+        self.canvas.draw()
+
+    def on_draw(self, event):
+        # A full draw skips animated artists: grab the clean background, then paint them on top
+        if self.ax is None:
+            return
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.draw_animated()
+
+    def draw_animated(self):
+        for artist in self.animated_artists:
+            self.ax.draw_artist(artist)
+
+    def blit(self):
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        self.draw_animated()
+        self.canvas.blit(self.ax.bbox)
+
+    def show_message(self, message):
+        """Replace the chart with a centred message"""
+        self.figure.clear()
+        self.ax = self.figure.add_subplot(111)
+        self.ax.text(0.5, 0.5, message, horizontalalignment='center',
+                     verticalalignment='center', transform=self.ax.transAxes)
+        self.ax.set_axis_off()
+        self.categories = None
+        self.animated_artists = []
+        self.relayout()
+
+
+class BarChartComponent(ChartComponent):
+    """Bar chart with value labels whose bar heights are updated in place"""
+
+    def __init__(self, figure, canvas, title, xlabel, ylabel, color='#3498db'):
+        super().__init__(figure, canvas)
+        self.title = title
+        self.xlabel = xlabel
+        self.ylabel = ylabel
+        self.color = color
+        self.bars = []
+        self.value_labels = []
+
+    def build(self, categories, values):
+        self.figure.clear()
+        self.ax = self.figure.add_subplot(111)
+
+        self.bars = list(self.ax.bar(categories, values, color=self.color, animated=True))
+        self.ax.set_xlabel(self.xlabel)
+        self.ax.set_ylabel(self.ylabel)
+        self.ax.set_title(self.title)
+
+        # Rotate x-axis labels if there are many categories
+        if len(categories) > 5:
+            for label in self.ax.get_xticklabels():
+                label.set_rotation(45)
+                label.set_horizontalalignment('right')
+
+        self.value_labels = []
+        for bar in self.bars:
+            height = bar.get_height()
+            self.value_labels.append(self.ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
+                                                  f'{int(height)}', ha='center', va='bottom',
+                                                  animated=True))
+        self.set_value_limits(values)
+        self.animated_artists = self.bars + self.value_labels
+
+    def set_value_limits(self, values):
+        top = max(values) if values else 0
+        self.ax.set_ylim(0, top * 1.15 if top > 0 else 1)
+
+    def update_artists(self, values):
+        for bar, label, value in zip(self.bars, self.value_labels, values):
+            bar.set_height(value)
+            label.set_position((bar.get_x() + bar.get_width()/2., value + 0.1))
+            label.set_text(f'{int(value)}')
+
+        # Keep the axis when the new data still fits comfortably inside it
+        bottom, top = self.ax.get_ylim()
+        highest = max(values) if values else 0
+        if highest <= top and highest >= top * 0.5:
+            return True
+        self.set_value_limits(values)
+        return False
+
+
+class PieChartComponent(ChartComponent):
+    """Pie chart whose wedges, labels and percentages are updated in place"""
+
+    def __init__(self, figure, canvas, title, start_angle=90, colormap='Paired'):
+        super().__init__(figure, canvas)
+        self.title = title
+        self.start_angle = start_angle
+        self.colormap = colormap
+        self.wedges = []
+        self.labels = []
+        self.autotexts = []
+
+    def build(self, categories, values):
+        self.figure.clear()
+        self.ax = self.figure.add_subplot(111)
+
+        wedges, texts, autotexts = self.ax.pie(
+            values,
+            labels=categories,
+            autopct='%1.1f%%',
+            startangle=self.start_angle,
+            colors=colormaps[self.colormap](range(len(categories)))
+        )
+        self.wedges, self.labels, self.autotexts = list(wedges), list(texts), list(autotexts)
+
+        # Equal aspect ratio ensures that pie is drawn as a circle
+        self.ax.axis('equal')
+        self.ax.set_title(self.title)
+
+        # Make text more readable
+        for text in self.labels + self.autotexts:
+            text.set_fontsize(9)
+
+        self.animated_artists = self.wedges + self.labels + self.autotexts
+        for artist in self.animated_artists:
+            artist.set_animated(True)
+
+    def update_artists(self, values):
+        total = sum(values)
+        theta1 = self.start_angle
+        for wedge, label, autotext, value in zip(self.wedges, self.labels, self.autotexts, values):
+            fraction = value / total if total > 0 else 0
+            theta2 = theta1 + 360 * fraction
+            wedge.set_theta1(theta1)
+            wedge.set_theta2(theta2)
+
+            # Same placement rules ax.pie uses for labels and percentages
+            middle = math.radians((theta1 + theta2) / 2)
+            x, y = math.cos(middle), math.sin(middle)
+            label.set_position((1.1 * x, 1.1 * y))
+            label.set_horizontalalignment('left' if x > 0 else 'right')
+            autotext.set_position((0.6 * x, 0.6 * y))
+            autotext.set_text(f'{fraction * 100:.1f}%')
+
+            theta1 = theta2
+        return True
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from PyQt5.QtWidgets import QLabel, QSizePolicy
+from PyQt5.QtCore import Qt, QObject, QSize, QTimer, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+
+def chart_data_hash(data):
+    """Return a stable hash for the plain data a chart is drawn from"""
+    payload = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def render_chart(draw_func, data, width, height, dpi=100):
+    """Build a figure from plain data and rasterize it with Agg.
+
+    Only the object-oriented matplotlib API is used here (no pyplot), so this
+    is safe to run in a worker thread or a worker process.
+    Returns (rgba_bytes, width, height).
+    """
+    figure = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    canvas = FigureCanvasAgg(figure)
+    draw_func(figure, data)
+    canvas.draw()
+    pixel_width, pixel_height = canvas.get_width_height()
+    return bytes(canvas.buffer_rgba()), pixel_width, pixel_height
+
+
+class ChartRenderService(QObject):
+    """Renders charts on a worker pool and delivers finished images to ChartViews.
+
+    Renders are cached by (draw function, data hash, size) so refreshing a
+    dashboard whose data has not changed is only a cache lookup.
+    """
+
+    # Emitted from worker threads; Qt queues it onto the GUI thread
+    _render_finished = pyqtSignal(object, object)
+
+    def __init__(self, max_workers=2, use_processes=False, cache_size=64):
+        super().__init__()
+        if use_processes:
+            # draw functions must then be module-level so they can be pickled
+            self.executor = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                               thread_name_prefix='chart-render')
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.pending = {}  # cache key -> list of views waiting for it
+        self.last_render_ms = {}
+        self._render_finished.connect(self._deliver)
+
+    def make_key(self, draw_func, data, width, height, dpi=100):
+        """Cache key identifying one render of a chart"""
+        return (draw_func.__module__, draw_func.__qualname__,
+                chart_data_hash(data), int(width), int(height), dpi)
+
+    def request(self, view, key, draw_func, data, width, height, dpi=100):
+        """Ask for the chart image identified by key to be shown in view"""
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            view.show_image(key, self.cache[key])
+            return
+
+        if key in self.pending:
+            # Same chart already being rendered, just wait for it
+            if view not in self.pending[key]:
+                self.pending[key].append(view)
+            return
+
+        self.pending[key] = [view]
+        started = time.perf_counter()
+        future = self.executor.submit(render_chart, draw_func, data, width, height, dpi)
+        future.add_done_callback(lambda f: self._render_finished.emit(key, (f, started)))
+
+    def _deliver(self, key, result):
+        future, started = result
+        views = self.pending.pop(key, [])
+
+        try:
+            rgba, width, height = future.result()
+        except Exception as e:
+            print(f"Error rendering chart {key[1]}: {e}")
+            return
+
+        self.last_render_ms[key[1]] = (time.perf_counter() - started) * 1000
+
+        # QImage does not own the buffer, so take a deep copy before caching
+        image = QImage(rgba, width, height, width * 4, QImage.Format_RGBA8888).copy()
+
+        self.cache[key] = image
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+        for view in views:
+            view.show_image(key, image)
+
+    def clear_cache(self):
+        """Drop all cached renders"""
+        self.cache.clear()
+
+    def shutdown(self):
+        """Stop accepting renders and release the worker pool. Queued renders
+        are dropped; one already drawing is waited for, so no worker is left
+        touching matplotlib while the application exits."""
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.pending.clear()
+
+
+class ChartView(QLabel):
+    """Widget that displays a chart rendered by a ChartRenderService.
+
+    Drop-in replacement for a FigureCanvas: call set_chart() with a module-level
+    draw function taking (figure, data) and the plain data to draw.
+    """
+
+    def __init__(self, renderer, parent=None):
+        super().__init__(parent)
+        self.renderer = renderer
+        self.draw_func = None
+        self.data = None
+        self.current_key = None
+        self.setAlignment(Qt.AlignCenter)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setMinimumSize(100, 100)
+
+        # Re-render once resizing settles instead of on every resize event
+        self.resize_timer = QTimer(self)
+        self.resize_timer.setSingleShot(True)
+        self.resize_timer.setInterval(150)
+        self.resize_timer.timeout.connect(self.request_render)
+
+    def sizeHint(self):
+        # Same default footprint as a 5x4 inch FigureCanvas at 100 dpi
+        return QSize(500, 400)
+
+    def minimumSizeHint(self):
+        # Never let the current pixmap force the layout to grow
+        return self.minimumSize()
+
+    def set_chart(self, draw_func, data):
+        """Set the chart to display and request a render at the current size"""
+        self.draw_func = draw_func
+        self.data = data
+        self.request_render()
+
+    def request_render(self):
+        if self.draw_func is None:
+            return
+        ratio = self.devicePixelRatioF()
+        width = int(max(self.width(), self.minimumWidth()) * ratio)
+        height = int(max(self.height(), self.minimumHeight()) * ratio)
+        dpi = int(100 * ratio)
+        self.current_key = self.renderer.make_key(self.draw_func, self.data, width, height, dpi)
+        self.renderer.request(self, self.current_key, self.draw_func, self.data, width, height, dpi)
+
+    def show_image(self, key, image):
+        # Ignore results for data or sizes that have since been superseded
+        if key != self.current_key:
+            return
+        pixmap = QPixmap.fromImage(image)
+        pixmap.setDevicePixelRatio(self.devicePixelRatioF())
+        self.setPixmap(pixmap)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.resize_timer.start()
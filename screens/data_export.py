@@ -0,0 +1,75 @@
+import csv
+import json
+import os
+
+# Datasets that can be exported, with the names shown to the user
+EXPORT_DATASETS = {
+    'sales_lines': "Sales (line items)",
+    'products': "Products",
+    'inventory': "Inventory",
+    'customers': "Customers",
+    'repairs': "Repairs",
+    'expenses': "Expenses",
+}
+
+# File dialog filter for each export format
+EXPORT_FORMATS = {
+    'csv': "CSV Files (*.csv)",
+    'jsonl': "JSON Lines (*.jsonl)",
+}
+
+
+class ExportCancelled(Exception):
+    """Raised inside an export when it has been cancelled"""
+
+
+def format_for_path(file_path, selected_filter=None):
+    """Work out the export format from the dialog filter or the file extension"""
+    for fmt, file_filter in EXPORT_FORMATS.items():
+        if selected_filter == file_filter:
+            return fmt
+    return 'jsonl' if file_path.lower().endswith('.jsonl') else 'csv'
+
+
+def export_dataset(db_manager, dataset, file_path, fmt='csv', filters=None,
+                   chunk_size=1000, progress=None, cancel_event=None):
+    """Stream an export dataset from the database into a CSV or JSON Lines file.
+
+    Rows go straight from the cursor to the file one chunk at a time, with
+    numbers written at full precision. The file is written under a temporary
+    name and only renamed into place once complete, so a failed or cancelled
+    export never leaves a truncated file behind.
+    progress(rows_written) is called after each chunk. Returns the row count.
+    """
+    temp_path = file_path + '.part'
+    rows_written = 0
+    header_written = False
+
+    try:
+        with open(temp_path, 'w', newline='', encoding='utf-8') as out:
+            writer = csv.writer(out) if fmt == 'csv' else None
+            for columns, rows in db_manager.iter_export_rows(dataset, filters, chunk_size):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ExportCancelled()
+
+                if fmt == 'csv':
+                    if not header_written:
+                        writer.writerow(columns)
+                        header_written = True
+                    writer.writerows(rows)
+                else:
+                    for row in rows:
+                        out.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+                        out.write('\n')
+
+                rows_written += len(rows)
+                if progress:
+                    progress(rows_written)
+
+        os.replace(temp_path, file_path)
+        return rows_written
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
@@ -1,19 +1,17 @@
-import datetime
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, 
                              QComboBox, QDateEdit, QPushButton, QTableWidget, 
-                             QTableWidgetItem, QHeaderView, QMessageBox, QDialog, 
+                             QTableWidgetItem, QHeaderView, QDialog, 
                              QFormLayout, QGroupBox, QTextEdit, QFrame, QSplitter,
                              QTabWidget, QCalendarWidget, QCheckBox, QSpinBox, 
                              QFileDialog, QProgressBar)
 from PyQt5.QtCore import Qt, QDate
-from PyQt5.QtGui import QIcon, QPainter, QTextDocument
-from PyQt5.QtPrintSupport import QPrintPreviewDialog, QPrinter
-import os
-import csv
-import pandas as pd
-import matplotlib.pyplot as plt
+from PyQt5.QtGui import QIcon
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
+from screens.chart_components import BarChartComponent, PieChartComponent
+
+# Products shown per page of the table
+INVENTORY_PAGE_SIZE = 100
 
 class InventoryReportScreen(QWidget):
     def __init__(self, main_window):
@@ -126,6 +124,7 @@ class InventoryReportScreen(QWidget):
         
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search by product name or ID")
+        self.search_input.returnPressed.connect(self.apply_filters)
         search_layout.addWidget(self.search_input)
         
         filter_layout.addLayout(search_layout)
@@ -188,6 +187,23 @@ class InventoryReportScreen(QWidget):
         
         table_layout.addWidget(self.inventory_table)
         
+        # Page navigation
+        page_layout = QHBoxLayout()
+        self.prev_page_btn = QPushButton("◀ Previous")
+        self.prev_page_btn.clicked.connect(lambda: self.show_page(self.page_index - 1))
+        page_layout.addWidget(self.prev_page_btn)
+        
+        page_layout.addStretch()
+        self.page_label = QLabel()
+        page_layout.addWidget(self.page_label)
+        page_layout.addStretch()
+        
+        self.next_page_btn = QPushButton("Next ▶")
+        self.next_page_btn.clicked.connect(lambda: self.show_page(self.page_index + 1))
+        page_layout.addWidget(self.next_page_btn)
+        
+        table_layout.addLayout(page_layout)
+        
         # Chart view tab
         chart_tab = QWidget()
         chart_layout = QVBoxLayout(chart_tab)
@@ -200,6 +216,8 @@ class InventoryReportScreen(QWidget):
         
         self.category_figure = Figure(figsize=(8, 4), dpi=100)
         self.category_canvas = FigureCanvas(self.category_figure)
+        self.category_chart = BarChartComponent(self.category_figure, self.category_canvas,
+                                                'Inventory Quantity by Category', 'Category', 'Quantity')
         category_layout.addWidget(self.category_canvas)
         
         chart_splitter.addWidget(category_group)
@@ -210,6 +228,8 @@ class InventoryReportScreen(QWidget):
         
         self.value_figure = Figure(figsize=(8, 4), dpi=100)
         self.value_canvas = FigureCanvas(self.value_figure)
+        self.value_chart = PieChartComponent(self.value_figure, self.value_canvas,
+                                             'Inventory Value Distribution by Category')
         value_layout.addWidget(self.value_canvas)
         
         chart_splitter.addWidget(value_group)
@@ -254,28 +274,19 @@ class InventoryReportScreen(QWidget):
         main_layout.addWidget(summary_frame)
     
     def load_inventory_data(self):
-        # Get all products from database
-        products = self.main_window.db_manager.get_all_products()
-        
         # Populate category filter
-        self.populate_category_filter(products)
+        self.populate_category_filter(self.main_window.db_manager.get_product_categories())
         
         # Apply any filters
         self.apply_filters()
     
-    def populate_category_filter(self, products):
-        # Get unique categories
-        categories = set()
-        for product in products:
-            if product['category'] and product['category'].strip():
-                categories.add(product['category'])
-        
+    def populate_category_filter(self, categories):
         # Clear and repopulate category filter
         current_category = self.category_filter.currentText()
         self.category_filter.clear()
         self.category_filter.addItem("All Categories")
         
-        for category in sorted(categories):
+        for category in categories:
             self.category_filter.addItem(category)
         
         # Restore previous selection if possible
@@ -283,39 +294,48 @@ class InventoryReportScreen(QWidget):
         if index >= 0:
             self.category_filter.setCurrentIndex(index)
     
+    def current_filters(self):
+        return {
+            'category': self.category_filter.currentText(),
+            'stock_level': self.stock_level_filter.currentText(),
+            'search': self.search_input.text().strip()
+        }
+    
     def apply_filters(self):
-        # Get all products
-        products = self.main_window.db_manager.get_all_products()
-        
-        # Apply category filter
-        category = self.category_filter.currentText()
-        if category != "All Categories":
-            products = [p for p in products if p['category'] == category]
-        
-        # Apply stock level filter
-        stock_level = self.stock_level_filter.currentText()
-        if stock_level == "Low Stock":
-            products = [p for p in products if (p['store_quantity'] + p['warehouse_quantity']) < p['min_stock_level']]
-        elif stock_level == "Out of Stock":
-            products = [p for p in products if (p['store_quantity'] + p['warehouse_quantity']) == 0]
-        elif stock_level == "In Stock":
-            products = [p for p in products if (p['store_quantity'] + p['warehouse_quantity']) > 0]
-        
-        # Apply search filter
-        search_text = self.search_input.text().strip().lower()
-        if search_text:
-            products = [p for p in products if 
-                       search_text in str(p['id']).lower() or 
-                       search_text in p['name'].lower()]
-        
-        # Update table
-        self.update_inventory_table(products)
+        # Filtering and the totals are done by the database; only the
+        # current page of products is loaded
+        self.filters = self.current_filters()
+        category_totals = self.main_window.db_manager.get_inventory_category_totals(self.filters)
+        self.total_rows = sum(totals['products'] for totals in category_totals)
+        
+        # Key of the row before each page visited so far, see get_inventory_page
+        self.page_starts = [None]
+        self.show_page(0)
         
         # Update charts
-        self.update_charts(products)
+        self.update_charts(category_totals)
         
         # Update summary
-        self.update_summary(products)
+        self.update_summary(category_totals)
+    
+    def show_page(self, index):
+        products = self.main_window.db_manager.get_inventory_page(
+            self.filters, self.page_starts[index], INVENTORY_PAGE_SIZE)
+        if index + 1 == len(self.page_starts) and len(products) == INVENTORY_PAGE_SIZE:
+            self.page_starts.append((products[-1]['name'], products[-1]['id']))
+        self.page_index = index
+        
+        self.update_inventory_table(products)
+        
+        page_count = max(1, -(-self.total_rows // INVENTORY_PAGE_SIZE))
+        first = index * INVENTORY_PAGE_SIZE
+        if products:
+            self.page_label.setText(f"Page {index + 1} of {page_count}  "
+                                    f"({first + 1}-{first + len(products)} of {self.total_rows} products)")
+        else:
+            self.page_label.setText("No products match the current filter")
+        self.prev_page_btn.setEnabled(index > 0)
+        self.next_page_btn.setEnabled(first + len(products) < self.total_rows)
     
     def update_inventory_table(self, products):
         self.inventory_table.setRowCount(0)
@@ -354,8 +374,7 @@ class InventoryReportScreen(QWidget):
             
             # Total Value
             total_qty = product['store_quantity'] + product['warehouse_quantity']
-            total_value = total_qty * product['cost_price']
-            total_value_item = QTableWidgetItem(f"₹{total_value:.2f}")
+            total_value_item = QTableWidgetItem(f"₹{product['total_value']:.2f}")
             total_value_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
             self.inventory_table.setItem(row, 7, total_value_item)
             
@@ -365,90 +384,32 @@ class InventoryReportScreen(QWidget):
                     self.inventory_table.item(row, col).setBackground(Qt.red)
                     self.inventory_table.item(row, col).setForeground(Qt.white)
     
-    def update_charts(self, products):
-        # Category distribution chart
-        self.category_figure.clear()
-        ax1 = self.category_figure.add_subplot(111)
-        
-        # Group by category
-        category_data = {}
-        for product in products:
-            category = product['category'] or "Uncategorized"
-            if category not in category_data:
-                category_data[category] = 0
-            category_data[category] += product['store_quantity'] + product['warehouse_quantity']
-        
-        # Sort by quantity
-        sorted_categories = sorted(category_data.items(), key=lambda x: x[1], reverse=True)
-        categories = [item[0] for item in sorted_categories]
-        quantities = [item[1] for item in sorted_categories]
-        
-        # Create bar chart
-        bars = ax1.bar(categories, quantities, color='#3498db')
-        ax1.set_xlabel('Category')
-        ax1.set_ylabel('Quantity')
-        ax1.set_title('Inventory Quantity by Category')
-        
-        # Rotate x-axis labels if there are many categories
-        if len(categories) > 5:
-            plt.setp(ax1.get_xticklabels(), rotation=45, ha='right')
-        
-        # Add quantity labels on top of bars
-        for bar in bars:
-            height = bar.get_height()
-            ax1.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                    f'{int(height)}', ha='center', va='bottom')
-        
-        self.category_figure.tight_layout()
-        self.category_canvas.draw()
-        
-        # Value distribution chart
-        self.value_figure.clear()
-        ax2 = self.value_figure.add_subplot(111)
-        
-        # Group by category for value
-        value_data = {}
-        for product in products:
-            category = product['category'] or "Uncategorized"
-            if category not in value_data:
-                value_data[category] = 0
-            value_data[category] += (product['store_quantity'] + product['warehouse_quantity']) * product['cost_price']
-        
-        # Sort by value
-        sorted_value_categories = sorted(value_data.items(), key=lambda x: x[1], reverse=True)
-        value_categories = [item[0] for item in sorted_value_categories]
-        values = [item[1] for item in sorted_value_categories]
-        
-        # Create pie chart
-        wedges, texts, autotexts = ax2.pie(
-            values, 
-            labels=value_categories,
-            autopct='%1.1f%%',
-            startangle=90,
-            colors=plt.cm.Paired(range(len(value_categories)))
-        )
-        
-        # Equal aspect ratio ensures that pie is drawn as a circle
-        ax2.axis('equal')  
-        ax2.set_title('Inventory Value Distribution by Category')
-        
-        # Make text more readable
-        for text in texts + autotexts:
-            text.set_fontsize(9)
-        
-        self.value_figure.tight_layout()
-        self.value_canvas.draw()
+    def update_charts(self, category_totals):
+        # Category distribution chart, sorted by quantity (as the database returns it)
+        if category_totals:
+            self.category_chart.update([totals['category'] for totals in category_totals],
+                                       [totals['quantity'] for totals in category_totals])
+        else:
+            self.category_chart.show_message("No products match the current filter")
+        
+        # Value distribution chart, sorted by value
+        sorted_value_categories = sorted(category_totals, key=lambda totals: totals['value'], reverse=True)
+        if sum(totals['value'] for totals in category_totals) > 0:
+            self.value_chart.update([totals['category'] for totals in sorted_value_categories],
+                                    [totals['value'] for totals in sorted_value_categories])
+        else:
+            self.value_chart.show_message("No inventory value for the current filter")
     
-    def update_summary(self, products):
+    def update_summary(self, category_totals):
         # Total products
-        self.total_products_label.setText(f"Total Products: {len(products)}")
+        self.total_products_label.setText(f"Total Products: {self.total_rows}")
         
         # Total value
-        total_value = sum((p['store_quantity'] + p['warehouse_quantity']) * p['cost_price'] for p in products)
+        total_value = sum(totals['value'] for totals in category_totals)
         self.total_value_label.setText(f"Total Inventory Value: ₹{total_value:.2f}")
         
         # Low stock items
-        low_stock_count = sum(1 for p in products if (p['store_quantity'] + p['warehouse_quantity']) < p['min_stock_level'])
+        low_stock_count = sum(totals['low_stock'] for totals in category_totals)
         self.low_stock_label.setText(f"Low Stock Items: {low_stock_count}")
     
     def export_pdf(self):
@@ -463,26 +424,11 @@ class InventoryReportScreen(QWidget):
         if not file_path.endswith('.pdf'):
             file_path += '.pdf'
         
-        try:
-            # Create printer
-            printer = QPrinter(QPrinter.HighResolution)
-            printer.setOutputFormat(QPrinter.PdfFormat)
-            printer.setOutputFileName(file_path)
-            printer.setPageSize(QPrinter.A4)
-            
-            # Create HTML document
-            doc = QTextDocument()
-            html = self.generate_report_html()
-            doc.setHtml(html)
-            
-            # Print to PDF
-            doc.print_(printer)
-            
-            QMessageBox.information(self, "Export Successful", 
-                                   f"Inventory report exported to {file_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Export Failed", 
-                               f"Failed to export report: {str(e)}")
+        # Drawn in the background straight from the database, with the current filters
+        filters = self.current_filters()
+        self.main_window.print_spooler.submit('inventory_report', "Inventory report PDF", {
+            'path': file_path, 'filters': filters,
+        })
     
     def export_csv(self):
         # Ask for file location
@@ -496,137 +442,11 @@ class InventoryReportScreen(QWidget):
         if not file_path.endswith('.csv'):
             file_path += '.csv'
         
-        try:
-            # Get filtered products
-            products = []
-            for row in range(self.inventory_table.rowCount()):
-                product = {
-                    'id': self.inventory_table.item(row, 0).text(),
-                    'name': self.inventory_table.item(row, 1).text(),
-                    'category': self.inventory_table.item(row, 2).text(),
-                    'cost_price': self.inventory_table.item(row, 3).text().replace('₹', ''),
-                    'selling_price': self.inventory_table.item(row, 4).text().replace('₹', ''),
-                    'store_quantity': self.inventory_table.item(row, 5).text(),
-                    'warehouse_quantity': self.inventory_table.item(row, 6).text(),
-                    'total_value': self.inventory_table.item(row, 7).text().replace('₹', '')
-                }
-                products.append(product)
-            
-            # Write to CSV
-            with open(file_path, 'w', newline='') as csvfile:
-                fieldnames = ['id', 'name', 'category', 'cost_price', 'selling_price', 
-                             'store_quantity', 'warehouse_quantity', 'total_value']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                
-                writer.writeheader()
-                for product in products:
-                    writer.writerow(product)
-            
-            QMessageBox.information(self, "Export Successful", 
-                                   f"Inventory report exported to {file_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Export Failed", 
-                               f"Failed to export report: {str(e)}")
-    
-    def generate_report_html(self):
-        # Get current date
-        current_date = datetime.datetime.now().strftime("%Y-%m-%d")
-        
-        # Get summary data
-        total_products = self.inventory_table.rowCount()
-        total_value = self.total_value_label.text().replace("Total Inventory Value: ", "")
-        low_stock = self.low_stock_label.text().replace("Low Stock Items: ", "")
-        
-        # Start HTML
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 20px; }}
-                h1 {{ color: #2c3e50; text-align: center; }}
-                .header {{ display: flex; justify-content: space-between; margin-bottom: 20px; }}
-                .summary {{ background-color: #f5f5f5; padding: 10px; border-radius: 5px; margin-bottom: 20px; }}
-                .summary-item {{ margin: 5px 0; }}
-                table {{ width: 100%; border-collapse: collapse; }}
-                th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-                th {{ background-color: #f2f2f2; }}
-                tr:nth-child(even) {{ background-color: #f9f9f9; }}
-                .low-stock {{ background-color: #ffcccc; }}
-                .text-right {{ text-align: right; }}
-            </style>
-        </head>
-        <body>
-            <h1>Inventory Report</h1>
-            
-            <div class="header">
-                <div>Generated on: {current_date}</div>
-            </div>
-            
-            <div class="summary">
-                <div class="summary-item"><strong>Total Products:</strong> {total_products}</div>
-                <div class="summary-item"><strong>Total Inventory Value:</strong> {total_value}</div>
-                <div class="summary-item"><strong>Low Stock Items:</strong> {low_stock}</div>
-            </div>
-            
-            <table>
-                <thead>
-                    <tr>
-                        <th>ID</th>
-                        <th>Product Name</th>
-                        <th>Category</th>
-                        <th class="text-right">Cost Price</th>
-                        <th class="text-right">Selling Price</th>
-                        <th class="text-right">Store Qty</th>
-                        <th class="text-right">Warehouse Qty</th>
-                        <th class="text-right">Total Value</th>
-                    </tr>
-                </thead>
-                <tbody>
-        """
-        
-        # Add table rows
-        for row in range(self.inventory_table.rowCount()):
-            product_id = self.inventory_table.item(row, 0).text()
-            name = self.inventory_table.item(row, 1).text()
-            category = self.inventory_table.item(row, 2).text()
-            cost_price = self.inventory_table.item(row, 3).text()
-            selling_price = self.inventory_table.item(row, 4).text()
-            store_qty = self.inventory_table.item(row, 5).text()
-            warehouse_qty = self.inventory_table.item(row, 6).text()
-            total_value = self.inventory_table.item(row, 7).text()
-            
-            # Check if this is a low stock item
-            is_low_stock = False
-            for col in range(self.inventory_table.columnCount()):
-                if self.inventory_table.item(row, col).background() == Qt.red:
-                    is_low_stock = True
-                    break
-            
-            row_class = "low-stock" if is_low_stock else ""
-            
-            html += f"""
-                <tr class="{row_class}">
-                    <td>{product_id}</td>
-                    <td>{name}</td>
-                    <td>{category}</td>
-                    <td class="text-right">{cost_price}</td>
-                    <td class="text-right">{selling_price}</td>
-                    <td class="text-right">{store_qty}</td>
-                    <td class="text-right">{warehouse_qty}</td>
-                    <td class="text-right">{total_value}</td>
-                </tr>
-            """
-        
-        # Close HTML
-        html += """
-                </tbody>
-            </table>
-        </body>
-        </html>
-        """
-        
-        return html
+        # Export the filtered products straight from the database, at full precision
+        filters = self.current_filters()
+        self.main_window.print_spooler.submit('export', "Inventory CSV export", {
+            'dataset': 'inventory', 'path': file_path, 'fmt': 'csv', 'filters': filters,
+        })
     
     def go_back(self):
         """Return to the previous screen"""
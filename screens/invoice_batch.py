@@ -0,0 +1,57 @@
+import os
+import time
+
+from PyQt5.QtGui import QGuiApplication
+from database.db_manager import DatabaseManager
+from database.invoice_archive import InvoiceArchive
+from screens.invoice_cache import InvoiceCache, default_cache_dir
+from screens.invoice_pdf import write_pdf_file
+from screens.invoice_templates import InvoiceRenderer, invoice_totals, sale_invoice
+
+# Sales handed to a worker process at a time, and reported as one progress step
+BATCH_CHUNK_SIZE = 8
+
+# Set in each worker process by init_worker
+_app = None
+_db_manager = None
+_invoice_cache = None
+_invoice_archive = None
+
+
+def init_worker(db_path):
+    """Set up a worker process: an offscreen Qt application for text layout,
+    its own database manager, the shared on-disk invoice cache and the
+    invoice archive"""
+    global _app, _db_manager, _invoice_cache, _invoice_archive
+    os.environ['QT_QPA_PLATFORM'] = 'offscreen'
+    _app = QGuiApplication.instance() or QGuiApplication(['invoice-batch'])
+    _db_manager = DatabaseManager(db_path)
+    # Each invoice is rendered once per run, so keep little in memory
+    _invoice_cache = InvoiceCache(memory_size=1, disk_dir=default_cache_dir())
+    _invoice_archive = InvoiceArchive(_db_manager)
+
+
+def render_sale_invoices(jobs):
+    """Render a chunk of sale invoices to PDF and archive them. jobs are
+    (sale_id, path); with a path the PDF is also written there. Runs inside
+    the worker processes, so it must stay a module level function.
+    Returns (sale_id, invoice_number, size, seconds, error) per job."""
+    results = []
+    for sale_id, path in jobs:
+        started = time.perf_counter()
+        invoice_number = None
+        try:
+            invoice = sale_invoice(_db_manager, sale_id)
+            if invoice is None:
+                raise ValueError(f"Sale {sale_id} not found")
+            invoice_number = invoice['invoice_number']
+            renderer = InvoiceRenderer(invoice)
+            options = renderer.options()
+            pdf = _invoice_cache.pdf(renderer, **options)
+            _invoice_archive.store(invoice, options, pdf, invoice_totals(invoice, options['include_gst'])['rounded'])
+            if path:
+                write_pdf_file(pdf, path)
+            results.append((sale_id, invoice_number, len(pdf), time.perf_counter() - started, None))
+        except Exception as e:
+            results.append((sale_id, invoice_number, 0, time.perf_counter() - started, str(e)))
+    return results
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from screens.invoice_templates import SHOP, STYLE, TEMPLATES
+from screens.invoice_pdf import INVOICE_DIR, PDF_MARGIN_MM, PDF_RESOLUTION, render_html_pdf
+
+# Changes whenever the templates, the shop details or the PDF page set up
+# change, so invoices rendered by an older version are not served
+RENDER_VERSION = hashlib.sha256(json.dumps(
+    [STYLE, TEMPLATES, SHOP, PDF_RESOLUTION, PDF_MARGIN_MM], sort_keys=True).encode()).hexdigest()[:16]
+
+
+def default_cache_dir():
+    """Directory used for the on-disk rendered invoice cache"""
+    return os.path.join(INVOICE_DIR, 'cache')
+
+
+def invoice_key(invoice, options):
+    """Hash of an invoice view-model and the options it is rendered with"""
+    payload = json.dumps([RENDER_VERSION, invoice, options], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class InvoiceCache:
+    """Rendered invoices, as HTML and as PDF bytes.
+
+    Entries are keyed by a hash of the invoice view-model and the render
+    options, so an invoice whose sale, customer or items changed simply gets
+    a new key. Recently used entries are kept in a bounded in-memory LRU.
+    With a disk_dir, rendered invoices are also written there and the least
+    recently used files are deleted once the directory grows past disk_limit
+    bytes. Safe to use from any thread.
+    """
+
+    def __init__(self, memory_size=64, disk_dir=None, disk_limit=100 * 1024 * 1024):
+        self.memory_size = memory_size
+        self.memory = OrderedDict()  # file name -> bytes
+        self.disk_dir = disk_dir
+        self.disk_limit = disk_limit
+        self.disk_files = None  # file name -> size, oldest use first; loaded on first use
+        self.disk_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = {'memory': 0, 'disk': 0, 'rendered': 0}
+
+    def html(self, renderer, include_gst=None, invoice_number=None, invoice_date=None):
+        """HTML of the renderer's invoice with the given options"""
+        options = renderer.options(include_gst, invoice_number, invoice_date)
+        name = f"{invoice_key(renderer.invoice, options)}.html"
+        data = self.get(name)
+        if data is None:
+            data = renderer.render(**options).encode()
+            self.hits['rendered'] += 1
+            self.put(name, data)
+        return data.decode()
+
+    def pdf(self, renderer, include_gst=None, invoice_number=None, invoice_date=None):
+        """PDF bytes of the renderer's invoice with the given options"""
+        options = renderer.options(include_gst, invoice_number, invoice_date)
+        name = f"{invoice_key(renderer.invoice, options)}.pdf"
+        data = self.get(name)
+        if data is None:
+            data = render_html_pdf(self.html(renderer, **options))
+            self.hits['rendered'] += 1
+            self.put(name, data)
+        return data
+
+    def get(self, name):
+        with self.lock:
+            data = self.memory.get(name)
+            if data is not None:
+                self.memory.move_to_end(name)
+                self.hits['memory'] += 1
+                return data
+
+        data = self.read_disk(name)
+        if data is not None:
+            self.hits['disk'] += 1
+            self.remember(name, data)
+        return data
+
+    def put(self, name, data):
+        self.remember(name, data)
+        self.write_disk(name, data)
+
+    def remember(self, name, data):
+        with self.lock:
+            self.memory[name] = data
+            self.memory.move_to_end(name)
+            if len(self.memory) > self.memory_size:
+                self.memory.popitem(last=False)
+
+    def load_disk_index(self):
+        # Called with the lock held
+        if self.disk_files is not None:
+            return
+        self.disk_files = OrderedDict()
+        self.disk_bytes = 0
+        os.makedirs(self.disk_dir, exist_ok=True)
+        entries = [entry for entry in os.scandir(self.disk_dir)
+                   if entry.is_file() and entry.name.endswith(('.html', '.pdf'))]
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+            size = entry.stat().st_size
+            self.disk_files[entry.name] = size
+            self.disk_bytes += size
+
+    def read_disk(self, name):
+        if not self.disk_dir:
+            return None
+        path = os.path.join(self.disk_dir, name)
+        with self.lock:
+            self.load_disk_index()
+            if name not in self.disk_files:
+                # Another process (such as a batch run) may have written it
+                if not os.path.exists(path):
+                    return None
+                self.disk_files[name] = 0
+            self.disk_files.move_to_end(name)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self.lock:
+                self.disk_bytes -= self.disk_files.pop(name, 0)
+            return None
+        with self.lock:
+            self.disk_bytes += len(data) - self.disk_files.get(name, 0)
+            self.disk_files[name] = len(data)
+        return data
+
+    def write_disk(self, name, data):
+        if not self.disk_dir:
+            return
+        path = os.path.join(self.disk_dir, name)
+        try:
+            with self.lock:
+                self.load_disk_index()
+                # Several processes may share the directory
+                temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+                with open(temp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+                self.disk_bytes += len(data) - self.disk_files.pop(name, 0)
+                self.disk_files[name] = len(data)
+
+                # Evict least recently used files past the size limit
+                while self.disk_bytes > self.disk_limit and len(self.disk_files) > 1:
+                    old_name, size = self.disk_files.popitem(last=False)
+                    self.disk_bytes -= size
+                    try:
+                        os.remove(os.path.join(self.disk_dir, old_name))
+                    except OSError:
+                        pass
+        except OSError as e:
+            # The disk cache is only an optimisation
+            print(f"Error writing invoice cache file {path}: {e}")
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
@@ -0,0 +1,47 @@
+import os
+import re
+
+from PyQt5.QtCore import QBuffer, QByteArray, QIODevice, QMarginsF
+from PyQt5.QtGui import QPageLayout, QPageSize, QPdfWriter, QTextDocument
+
+# A4 at the resolution QPrinter.HighResolution gives PDF output, with the
+# margins the invoice screen prints with
+PDF_RESOLUTION = 1200
+PDF_MARGIN_MM = 15
+
+INVOICE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "invoice")
+
+
+def render_html_pdf(html):
+    """Lay out an HTML document (a rendered invoice or report) on A4 pages and
+    return the PDF bytes"""
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    writer = QPdfWriter(buffer)
+    writer.setResolution(PDF_RESOLUTION)
+    writer.setPageLayout(QPageLayout(QPageSize(QPageSize.A4), QPageLayout.Portrait,
+                                     QMarginsF(PDF_MARGIN_MM, PDF_MARGIN_MM, PDF_MARGIN_MM, PDF_MARGIN_MM),
+                                     QPageLayout.Millimeter))
+    document = QTextDocument()
+    document.setHtml(html)
+    document.print_(writer)
+    # The PDF is only complete once the writer is gone
+    del writer
+    buffer.close()
+    return bytes(data)
+
+
+def write_pdf_file(data, file_path):
+    """Write PDF bytes to a file. Written to a temporary file first so an
+    interrupted run leaves no broken PDF. Returns the size of the file."""
+    part_path = file_path + ".part"
+    with open(part_path, 'wb') as f:
+        f.write(data)
+    os.replace(part_path, file_path)
+    return len(data)
+
+
+def invoice_file_name(invoice_number):
+    """PDF file name for an invoice number, safe on every file system"""
+    return re.sub(r'[^A-Za-z0-9._-]', '_', invoice_number) + ".pdf"
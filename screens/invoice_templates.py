@@ -0,0 +1,432 @@
+import datetime
+import html
+import re
+
+# Shop details printed on every invoice
+SHOP = {
+    'name': "K BICYCLE",
+    'address': "SHOP NO 1/2, TRUST MARBLE COMPLEX, MADHAPAR (370020)",
+    'location': "BHUJ, KUTCH",
+    'gstn': "24ABTPK4541R1ZB",
+    'bank_name': "HDFC BANK",
+    'bank_account': "50200012345678",
+    'bank_ifsc': "HDFC0001234",
+}
+
+# GST charged on sales and repairs, split equally into CGST and SGST
+GST_RATE = 18.0
+
+SALE_TERMS = [
+    "Goods once sold will not be taken back.",
+    "Our responsibility ceases as soon as the goods leave our premises.",
+    "Subject to BHUJ Jurisdiction.",
+]
+REPAIR_TERMS = [
+    "All repair work carries a 30-day warranty.",
+    "Parts replaced are not returnable.",
+    "Payment is due upon completion of repair.",
+    "Subject to BHUJ Jurisdiction.",
+]
+
+PLACEHOLDER = re.compile(r'\{\{\s*(\w+)(\|raw)?\s*\}\}')
+
+
+class Template:
+    """A text template compiled once into literal text and placeholders.
+
+    {{name}} is replaced by the HTML escaped value of name, {{name|raw}} by
+    the value as it is (for fragments that are already HTML).
+    """
+
+    def __init__(self, text):
+        self.parts = []  # (literal text, placeholder name or None, raw)
+        position = 0
+        for match in PLACEHOLDER.finditer(text):
+            self.parts.append((text[position:match.start()], match.group(1), bool(match.group(2))))
+            position = match.end()
+        self.parts.append((text[position:], None, False))
+
+    def render(self, context):
+        out = []
+        for literal, name, raw in self.parts:
+            out.append(literal)
+            if name is not None:
+                value = context[name]
+                out.append(value if raw else html.escape(str(value)))
+        return "".join(out)
+
+
+# QTextDocument understands tables and a subset of CSS, but not flexbox, so
+# the layout is built from tables
+STYLE = """
+body { font-family: Arial, sans-serif; font-size: 10pt; color: #333333; }
+.shop-name { font-size: 26pt; font-weight: bold; color: #2c3e50; }
+.shop-line { font-size: 10pt; color: #555555; }
+.title { font-size: 16pt; font-weight: bold; color: #2c3e50; }
+.label { font-weight: bold; color: #2c3e50; }
+.section-title { font-size: 11pt; font-weight: bold; color: #2c3e50; }
+table.items { border-collapse: collapse; }
+table.items th { background-color: #2c3e50; color: #ffffff; font-weight: bold; }
+.text-center { text-align: center; }
+.text-right { text-align: right; }
+.total-row td { font-weight: bold; background-color: #f0f0f0; }
+.grand-total { font-size: 13pt; font-weight: bold; color: #2c3e50; }
+.gst-note { font-weight: bold; color: #2c3e50; }
+.small { font-size: 9pt; color: #555555; }
+"""
+
+TEMPLATES = {
+    'document': """<html><head><meta charset="UTF-8"><title>Invoice {{invoice_number}}</title>
+<style>{{style|raw}}</style></head><body>
+{{header|raw}}
+<hr>
+{{parties|raw}}
+{{items|raw}}
+{{totals|raw}}
+{{footer|raw}}
+</body></html>""",
+
+    'header': """<table width="100%" cellpadding="2"><tr>
+<td width="60%"><div class="shop-name">{{shop_name}}</div>
+<div class="shop-line">{{shop_address}}</div>
+<div class="shop-line">{{shop_location}} | GSTN: {{shop_gstn}}</div></td>
+<td width="40%" align="right"><div class="title">{{title}}</div>
+<div>Original</div>
+<div><span class="label">Invoice No.</span> {{invoice_number}}</div>
+<div><span class="label">Date:</span> {{invoice_date}}</div></td>
+</tr></table>""",
+
+    'parties': """<table width="100%" cellpadding="2"><tr>
+<td width="55%" valign="top"><div class="section-title">Bill To:</div>
+<div><span class="label">Name:</span> {{customer_name}}</div>
+<div><span class="label">Mobile:</span> {{customer_phone}}</div>
+<div><span class="label">GSTN:</span> {{customer_gstn}}</div>
+<div><span class="label">Address:</span> {{customer_address}}</div></td>
+<td width="45%" valign="top">{{device|raw}}</td>
+</tr></table>""",
+
+    'device': """<div class="section-title">Device:</div>
+<div><span class="label">Repair ID:</span> {{repair_id}}</div>
+<div><span class="label">Device:</span> {{device}}</div>
+<div><span class="label">Serial:</span> {{serial_number}}</div>
+<div><span class="label">Issue:</span> {{issue}}</div>""",
+
+    'items': """<table class="items" width="100%" border="1" cellspacing="0" cellpadding="5">
+<thead><tr><th width="5%">Sr.</th><th width="33%">Item</th><th width="6%">Qty</th>
+<th width="11%">Rate</th><th width="13%">Taxable Amount</th><th width="7%">GST %</th>
+<th width="12%">Tax Amount</th><th width="13%">Net Amount</th></tr></thead>
+<tbody>{{rows|raw}}</tbody>
+<tr class="total-row"><td></td><td class="text-right">TOTAL</td><td class="text-center">{{total_quantity}}</td>
+<td></td><td class="text-right">{{subtotal}}</td><td></td><td class="text-right">{{gst_amount}}</td>
+<td class="text-right">{{net_total}}</td></tr>
+</table>""",
+
+    'row': """<tr><td class="text-center">{{index}}</td><td>{{name}}</td><td class="text-center">{{quantity}}</td>
+<td class="text-right">{{price}}</td><td class="text-right">{{taxable}}</td><td class="text-center">{{gst_percent}}</td>
+<td class="text-right">{{tax}}</td><td class="text-right">{{net}}</td></tr>""",
+
+    'totals': """<table width="100%" cellpadding="3"><tr>
+<td width="55%" valign="top">
+<div>Amt (Rupees {{amount_words}} Only)</div>
+<div>{{gst_summary}}</div>
+<div class="gst-note">{{gst_note}}</div></td>
+<td width="45%" valign="top"><table width="100%" cellpadding="2">
+{{discount|raw}}
+<tr><td class="text-right">Taxable Value</td><td class="text-right">{{taxable_total}}</td></tr>
+{{gst_rows|raw}}
+<tr><td class="text-right">Round Off</td><td class="text-right">{{round_off}}</td></tr>
+<tr><td class="text-right grand-total">Grand Total</td><td class="text-right grand-total">&#8377;{{grand_total}}</td></tr>
+</table></td></tr></table>""",
+
+    'discount': """<tr><td class="text-right">Subtotal</td><td class="text-right">{{subtotal}}</td></tr>
+<tr><td class="text-right">Discount</td><td class="text-right">-{{discount}}</td></tr>""",
+
+    'gst_rows': """<tr><td class="text-right">CGST ({{half_rate}}%)</td><td class="text-right">{{cgst}}</td></tr>
+<tr><td class="text-right">SGST ({{half_rate}}%)</td><td class="text-right">{{sgst}}</td></tr>""",
+
+    'footer': """<p><span class="label">Payment Method:</span> {{payment_method}}</p>
+<table width="100%" cellpadding="3"><tr>
+<td width="50%" valign="top" class="small"><div class="section-title">Bank Details</div>
+<div>Bank: {{bank_name}}</div><div>A/C No.: {{bank_account}}</div><div>IFSC Code: {{bank_ifsc}}</div></td>
+<td width="50%" valign="top" class="small"><div class="section-title">Terms &amp; Conditions</div>
+{{terms|raw}}</td></tr></table>
+<br><br>
+<table width="100%"><tr>
+<td width="50%">{{customer_signature|raw}}</td>
+<td width="50%" align="right">For, {{shop_name}}<br>Authorized Signatory</td>
+</tr></table>""",
+
+    'term': """<div>&#8226; {{text}}</div>""",
+}
+
+# Compiled once, when the module is first imported
+COMPILED = {name: Template(text) for name, text in TEMPLATES.items()}
+
+# The render options each fragment depends on; a fragment is only rendered
+# again when one of them changes
+FRAGMENT_OPTIONS = {
+    'header': ('invoice_number', 'invoice_date'),
+    'parties': (),
+    'items': ('include_gst',),
+    'totals': ('include_gst',),
+    'footer': (),
+}
+
+
+def amount_in_words(number):
+    """Whole rupees in words using the Indian numbering system (lakh, crore)"""
+    units = ["", "One", "Two", "Three", "Four", "Five", "Six", "Seven", "Eight", "Nine", "Ten",
+             "Eleven", "Twelve", "Thirteen", "Fourteen", "Fifteen", "Sixteen", "Seventeen",
+             "Eighteen", "Nineteen"]
+    tens = ["", "", "Twenty", "Thirty", "Forty", "Fifty", "Sixty", "Seventy", "Eighty", "Ninety"]
+
+    def below_thousand(num):
+        if num < 20:
+            return units[num]
+        if num < 100:
+            return tens[num // 10] + (" " + units[num % 10] if num % 10 else "")
+        return units[num // 100] + " Hundred" + (" " + below_thousand(num % 100) if num % 100 else "")
+
+    number = int(number)
+    if number == 0:
+        return "Zero"
+
+    words = []
+    for size, name in ((10000000, "Crore"), (100000, "Lakh"), (1000, "Thousand")):
+        if number >= size:
+            words.append(below_thousand(number // size) + " " + name)
+            number %= size
+    if number:
+        words.append(below_thousand(number))
+    return " ".join(words)
+
+
+def money(value):
+    return f"{value:,.2f}"
+
+
+def invoice_totals(invoice, include_gst):
+    """Per line and overall amounts of an invoice view-model"""
+    rate = invoice['gst_rate'] if include_gst else 0.0
+    lines = []
+    for item in invoice['items']:
+        tax = item['total'] * rate / 100
+        lines.append({'taxable': item['total'], 'tax': tax, 'net': item['total'] + tax})
+
+    subtotal = sum(item['total'] for item in invoice['items'])
+    taxable = subtotal - invoice['discount']
+    gst_amount = taxable * rate / 100
+    total = taxable + gst_amount
+    rounded = round(total)
+    return {
+        'rate': rate,
+        'lines': lines,
+        'subtotal': subtotal,
+        'taxable': taxable,
+        'gst_amount': gst_amount,
+        'total': total,
+        'rounded': rounded,
+        'round_off': rounded - total,
+    }
+
+
+def customer_view(name, phone, gst_number, address):
+    return {
+        'name': name or "Walk-in Customer",
+        'phone': phone or "-",
+        'gst_number': gst_number or "-",
+        'address': address or "-",
+    }
+
+
+def sale_invoice(db_manager, sale_id):
+    """Invoice view-model for a sale, or None if the sale does not exist"""
+    sale = db_manager.get_sale(sale_id)
+    if not sale:
+        return None
+
+    created = str(sale.get('created_at') or "")[:10] or datetime.date.today().isoformat()
+    return {
+        'kind': 'sale',
+        'title': "TAX INVOICE",
+        'invoice_number': sale.get('invoice_number') or f"SALE-{sale_id}",
+        'invoice_date': created,
+        'include_gst': bool(sale.get('include_gst', True)),
+        'gst_rate': GST_RATE,
+        'customer': customer_view(sale.get('customer_name'), sale.get('customer_phone'),
+                                  sale.get('customer_gst'), sale.get('customer_address')),
+        'device': None,
+        'items': [{
+            'name': item['product_name'],
+            'quantity': item['quantity'],
+            'price': item['unit_price'],
+            'total': item['total_price'],
+            'unique_id': item.get('unique_id'),
+        } for item in sale['items']],
+        'discount': sale.get('discount_amount') or 0.0,
+        'payment_method': sale.get('payment_method') or "Cash",
+        'terms': SALE_TERMS,
+        'customer_signature': False,
+    }
+
+
+def repair_invoice(db_manager, repair_id, invoice_number=None):
+    """Invoice view-model for a repair job, or None if the job does not exist"""
+    repair = db_manager.get_repair_job(repair_id)
+    if not repair:
+        return None
+
+    items = []
+    service_charge = float(repair.get('service_charge') or 0)
+    if service_charge > 0:
+        items.append({'name': "Repair Service", 'quantity': 1, 'price': service_charge, 'total': service_charge})
+    for part in repair['parts']:
+        items.append({
+            'name': part['name'],
+            'quantity': part['quantity'],
+            'price': part['unit_price'],
+            'total': part['total_price'],
+        })
+
+    return {
+        'kind': 'repair',
+        'title': "REPAIR INVOICE",
+        'invoice_number': invoice_number or f"REP-{repair_id}",
+        'invoice_date': datetime.date.today().isoformat(),
+        'include_gst': True,
+        'gst_rate': GST_RATE,
+        'customer': customer_view(repair.get('customer_name'), repair.get('customer_phone'),
+                                  repair.get('customer_gst'), repair.get('customer_address')),
+        'device': {
+            'repair_id': repair_id,
+            'device': repair.get('device') or "-",
+            'serial_number': repair.get('serial_number') or "N/A",
+            'issue': repair.get('issue') or "-",
+        },
+        'items': items,
+        'discount': 0.0,
+        'payment_method': repair.get('payment_method') or "Cash",
+        'terms': REPAIR_TERMS,
+        'customer_signature': True,
+    }
+
+
+class InvoiceRenderer:
+    """Renders one invoice view-model to HTML with the compiled templates.
+
+    Each fragment is kept together with the options it was rendered with,
+    so changing an option (such as the GST checkbox) only renders the
+    fragments that depend on it again.
+    """
+
+    def __init__(self, invoice):
+        self.invoice = invoice
+        self.fragments = {}  # name -> (options it was rendered with, html)
+        self.rendered = []  # fragments rendered by the last call, for diagnostics
+
+    def options(self, include_gst=None, invoice_number=None, invoice_date=None):
+        """Render options, with the invoice's own values for those not given"""
+        invoice = self.invoice
+        return {
+            'include_gst': invoice['include_gst'] if include_gst is None else include_gst,
+            'invoice_number': invoice_number or invoice['invoice_number'],
+            'invoice_date': invoice_date or invoice['invoice_date'],
+        }
+
+    def render(self, include_gst=None, invoice_number=None, invoice_date=None):
+        invoice = self.invoice
+        options = self.options(include_gst, invoice_number, invoice_date)
+        self.rendered = []
+        context = {'style': STYLE, 'invoice_number': options['invoice_number']}
+        totals = None
+        for name, depends_on in FRAGMENT_OPTIONS.items():
+            key = tuple(options[option] for option in depends_on)
+            cached = self.fragments.get(name)
+            if cached is None or cached[0] != key:
+                if totals is None and name in ('items', 'totals'):
+                    totals = invoice_totals(invoice, options['include_gst'])
+                cached = (key, getattr(self, f"render_{name}")(options, totals))
+                self.fragments[name] = cached
+                self.rendered.append(name)
+            context[name] = cached[1]
+        return COMPILED['document'].render(context)
+
+    def render_header(self, options, totals):
+        return COMPILED['header'].render({
+            'shop_name': SHOP['name'],
+            'shop_address': SHOP['address'],
+            'shop_location': SHOP['location'],
+            'shop_gstn': SHOP['gstn'],
+            'title': self.invoice['title'],
+            'invoice_number': options['invoice_number'],
+            'invoice_date': options['invoice_date'],
+        })
+
+    def render_parties(self, options, totals):
+        customer = self.invoice['customer']
+        device = self.invoice['device']
+        return COMPILED['parties'].render({
+            'customer_name': customer['name'],
+            'customer_phone': customer['phone'],
+            'customer_gstn': customer['gst_number'],
+            'customer_address': customer['address'],
+            'device': COMPILED['device'].render(device) if device else "",
+        })
+
+    def render_items(self, options, totals):
+        row = COMPILED['row']
+        include_gst = options['include_gst']
+        rows = [row.render({
+            'index': index,
+            'name': item['name'],
+            'quantity': item['quantity'],
+            'price': money(item['price']),
+            'taxable': money(line['taxable']),
+            'gst_percent': f"{totals['rate']:.1f}" if include_gst else "-",
+            'tax': money(line['tax']) if include_gst else "-",
+            'net': money(line['net']),
+        }) for index, (item, line) in enumerate(zip(self.invoice['items'], totals['lines']), 1)]
+
+        return COMPILED['items'].render({
+            'rows': "".join(rows),
+            'total_quantity': sum(item['quantity'] for item in self.invoice['items']),
+            'subtotal': money(totals['subtotal']),
+            'gst_amount': money(sum(line['tax'] for line in totals['lines'])) if include_gst else "-",
+            'net_total': money(sum(line['net'] for line in totals['lines'])),
+        })
+
+    def render_totals(self, options, totals):
+        include_gst = options['include_gst']
+        half_rate = f"{totals['rate'] / 2:g}"
+        discount = self.invoice['discount']
+        return COMPILED['totals'].render({
+            'amount_words': amount_in_words(totals['rounded']),
+            'gst_summary': (f"GST Summary: CGST ({half_rate}%) + SGST ({half_rate}%) = {totals['rate']:g}%"
+                            if include_gst else "GST Summary: Not Applicable"),
+            'gst_note': ("GST is included in the invoice amount." if include_gst
+                         else "GST is not applicable for this invoice."),
+            'discount': COMPILED['discount'].render({
+                'subtotal': money(totals['subtotal']),
+                'discount': money(discount),
+            }) if discount else "",
+            'taxable_total': money(totals['taxable']),
+            'gst_rows': COMPILED['gst_rows'].render({
+                'half_rate': half_rate,
+                'cgst': money(totals['gst_amount'] / 2),
+                'sgst': money(totals['gst_amount'] / 2),
+            }) if include_gst else "",
+            'round_off': money(totals['round_off']),
+            'grand_total': money(totals['rounded']),
+        })
+
+    def render_footer(self, options, totals):
+        term = COMPILED['term']
+        return COMPILED['footer'].render({
+            'payment_method': self.invoice['payment_method'],
+            'bank_name': SHOP['bank_name'],
+            'bank_account': SHOP['bank_account'],
+            'bank_ifsc': SHOP['bank_ifsc'],
+            'terms': "".join(term.render({'text': text}) for text in self.invoice['terms']),
+            'customer_signature': "Customer Signature" if self.invoice['customer_signature'] else "",
+            'shop_name': SHOP['name'],
+        })
@@ -0,0 +1,282 @@
+import os
+import threading
+from collections import deque
+
+from PyQt5.QtWidgets import QProgressDialog, QMessageBox
+from PyQt5.QtCore import Qt, QObject, QRectF, QSizeF, QMarginsF, pyqtSignal
+from PyQt5.QtGui import QPdfWriter, QPainter, QPainterPath, QPageSize, QPageLayout, QFont, QColor
+from screens.qr_payload import encode_item_payload, make_qr
+from screens.qr_batch import get_pool, POOL_MIN_BATCH
+
+# Label layouts, all sizes in millimetres. Each template fills pages of
+# columns x rows labels starting at the top left margin.
+LABEL_TEMPLATES = {
+    'a4_3x8': {
+        'name': "A4 sheet, 3 x 8 labels (70 x 37 mm)",
+        'page': (210, 297), 'margin': (0, 0.5), 'columns': 3, 'rows': 8,
+        'label': (70, 37), 'gap': (0, 0),
+    },
+    'a4_2x7': {
+        'name': "A4 sheet, 2 x 7 labels (99 x 38 mm)",
+        'page': (210, 297), 'margin': (4.5, 15.5), 'columns': 2, 'rows': 7,
+        'label': (99, 38), 'gap': (3, 0),
+    },
+    'thermal_50x25': {
+        'name': "Thermal roll, 50 x 25 mm",
+        'page': (50, 25), 'margin': (0, 0), 'columns': 1, 'rows': 1,
+        'label': (50, 25), 'gap': (0, 0),
+    },
+    'thermal_40x30': {
+        'name': "Thermal roll, 40 x 30 mm",
+        'page': (40, 30), 'margin': (0, 0), 'columns': 1, 'rows': 1,
+        'label': (40, 30), 'gap': (0, 0),
+    },
+}
+
+LABEL_DPI = 300
+LABEL_PADDING_MM = 2
+# Items read from the database, and QR codes built by a worker process, at a time
+LABEL_CHUNK_SIZE = 64
+# Chunks of QR codes being built ahead of the page being drawn
+CHUNKS_IN_FLIGHT = 8
+
+
+class LabelSheetCancelled(Exception):
+    """Raised inside a label sheet job when it has been cancelled"""
+
+
+def qr_matrices(unique_ids):
+    """QR module matrices for item labels. Runs inside the worker processes,
+    so it must stay a module level function."""
+    return [make_qr(encode_item_payload(unique_id), border=0).get_matrix() for unique_id in unique_ids]
+
+
+def iter_label_codes(chunks):
+    """Yield (item, qr_matrix) for chunks of items.
+
+    Building a QR code is most of the cost of a label, so for large batches
+    the matrices are built on the shared process pool a few chunks ahead of
+    the page being drawn, which also bounds how many are held at once.
+    """
+    pool = None
+    in_flight = deque()
+    try:
+        for items in chunks:
+            unique_ids = [item['unique_id'] for item in items]
+            if pool is None and len(items) < POOL_MIN_BATCH and not in_flight:
+                # Too few to be worth a worker process
+                yield from zip(items, qr_matrices(unique_ids))
+                continue
+
+            pool = pool or get_pool()
+            in_flight.append((items, pool.submit(qr_matrices, unique_ids)))
+            if len(in_flight) >= CHUNKS_IN_FLIGHT:
+                items, future = in_flight.popleft()
+                yield from zip(items, future.result())
+
+        while in_flight:
+            items, future = in_flight.popleft()
+            yield from zip(items, future.result())
+    finally:
+        for _, future in in_flight:
+            future.cancel()
+
+
+def qr_path(matrix, x, y, side):
+    """Vector path of a QR code matrix filling a side x side square at (x, y).
+
+    Each row's runs of dark modules become one rectangle, so the PDF stays
+    small and prints sharp at any size.
+    """
+    module = side / len(matrix)
+    path = QPainterPath()
+    for row, modules in enumerate(matrix):
+        start = None
+        for col, dark in enumerate(modules + [False]):
+            if dark and start is None:
+                start = col
+            elif not dark and start is not None:
+                path.addRect(QRectF(x + start * module, y + row * module,
+                                    (col - start) * module, module))
+                start = None
+    return path
+
+
+def draw_label(painter, item, matrix, rect, mm):
+    """Draw one label: QR code on the left, product name, price and item ID on the right"""
+    padding = LABEL_PADDING_MM * mm
+    side = min(rect.height() - 2 * padding, rect.width() * 0.5)
+    qr_x = rect.left() + padding
+    qr_y = rect.top() + (rect.height() - side) / 2
+
+    painter.setPen(Qt.NoPen)
+    painter.setBrush(QColor('black'))
+    painter.drawPath(qr_path(matrix, qr_x, qr_y, side))
+
+    text_left = qr_x + side + padding
+    text_width = rect.right() - padding - text_left
+    text_top = rect.top() + padding
+    text_height = rect.height() - 2 * padding
+    # Scale the text with the label height so it fits both A4 and roll labels
+    base = text_height / 7
+
+    painter.setPen(QColor('black'))
+    name_font = QFont("Arial")
+    name_font.setPixelSize(max(1, int(base * 1.05)))
+    name_font.setBold(True)
+    painter.setFont(name_font)
+    painter.drawText(QRectF(text_left, text_top, text_width, base * 3.4),
+                     Qt.AlignLeft | Qt.AlignTop | Qt.TextWordWrap, item['product_name'])
+
+    price_font = QFont("Arial")
+    price_font.setPixelSize(max(1, int(base * 1.5)))
+    price_font.setBold(True)
+    painter.setFont(price_font)
+    painter.drawText(QRectF(text_left, text_top + base * 3.6, text_width, base * 1.9),
+                     Qt.AlignLeft | Qt.AlignVCenter, f"₹{item['selling_price']:.2f}")
+
+    id_font = QFont("Courier New")
+    id_font.setPixelSize(max(1, int(base * 0.8)))
+    painter.setFont(id_font)
+    painter.drawText(QRectF(text_left, text_top + base * 5.7, text_width, base * 1.3),
+                     Qt.AlignLeft | Qt.AlignBottom, item['unique_id'])
+
+
+def write_label_sheet(db_manager, file_path, template='a4_3x8', filters=None,
+                      progress=None, cancel_event=None):
+    """Lay out labels for the matching product items into one PDF.
+
+    Items are read from the database a chunk at a time and every page is
+    finished before the next is started, so memory use does not grow with
+    the number of labels. The PDF is written under a temporary name and
+    renamed into place once complete.
+    progress(labels_written) is called after each page. Returns the label count.
+    """
+    layout = LABEL_TEMPLATES[template]
+    page_width, page_height = layout['page']
+    mm = LABEL_DPI / 25.4
+    per_page = layout['columns'] * layout['rows']
+    temp_path = file_path + '.part'
+
+    writer = QPdfWriter(temp_path)
+    writer.setResolution(LABEL_DPI)
+    writer.setPageLayout(QPageLayout(QPageSize(QSizeF(page_width, page_height), QPageSize.Millimeter),
+                                     QPageLayout.Portrait, QMarginsF(0, 0, 0, 0)))
+    writer.setTitle("Product labels")
+
+    painter = None
+    written = 0
+    try:
+        chunks = db_manager.iter_label_items(filters, LABEL_CHUNK_SIZE)
+        for item, matrix in iter_label_codes(chunks):
+            if cancel_event is not None and cancel_event.is_set():
+                raise LabelSheetCancelled()
+
+            slot = written % per_page
+            if painter is None:
+                painter = QPainter(writer)
+                painter.setRenderHint(QPainter.Antialiasing, False)
+            elif slot == 0:
+                writer.newPage()
+                if progress:
+                    progress(written)
+
+            column, row = slot % layout['columns'], slot // layout['columns']
+            left = (layout['margin'][0] + column * (layout['label'][0] + layout['gap'][0])) * mm
+            top = (layout['margin'][1] + row * (layout['label'][1] + layout['gap'][1])) * mm
+            draw_label(painter, item, matrix, QRectF(left, top, layout['label'][0] * mm,
+                                                     layout['label'][1] * mm), mm)
+            written += 1
+
+        if painter is None:
+            # No items: still produce a valid (blank) document
+            painter = QPainter(writer)
+        painter.end()
+        painter = None
+        writer = None  # closes the file
+        os.replace(temp_path, file_path)
+        if progress:
+            progress(written)
+        return written
+    except BaseException:
+        if painter is not None:
+            painter.end()
+        writer = None
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class LabelSheetJob(QObject):
+    """Runs write_label_sheet on a worker thread and reports back through signals"""
+
+    progress = pyqtSignal(int, int)  # labels written, total labels
+    finished = pyqtSignal(str, int)  # file path, labels written
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, db_manager, file_path, template='a4_3x8', filters=None, parent=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.file_path = file_path
+        self.template = template
+        self.filters = filters
+        self.total = 0
+        self.cancel_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name='label-sheet', daemon=True)
+        self.thread.start()
+
+    def cancel(self):
+        """Ask the job to stop before the next label"""
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            self.total = self.db_manager.count_label_items(self.filters)
+            self.progress.emit(0, self.total)
+            labels = write_label_sheet(self.db_manager, self.file_path, self.template, self.filters,
+                                       progress=lambda n: self.progress.emit(n, self.total),
+                                       cancel_event=self.cancel_event)
+            self.finished.emit(self.file_path, labels)
+        except LabelSheetCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            print(f"Error creating label sheet: {e}")
+            self.failed.emit(str(e))
+
+
+def start_label_sheet(parent, db_manager, file_path, template='a4_3x8', filters=None):
+    """Create a label sheet PDF in the background behind a cancellable progress dialog"""
+    job = LabelSheetJob(db_manager, file_path, template, filters)
+
+    dialog = QProgressDialog("Creating labels...", "Cancel", 0, 0, parent)
+    dialog.setWindowTitle("Print Labels")
+    dialog.setWindowModality(Qt.WindowModal)
+    dialog.setMinimumDuration(300)
+    dialog.canceled.connect(job.cancel)
+
+    def on_progress(labels, total):
+        dialog.setMaximum(max(total, 1))
+        dialog.setValue(min(labels, total))
+        dialog.setLabelText(f"Laid out {labels:,} of {total:,} labels")
+
+    def on_finished(path, labels):
+        dialog.reset()
+        QMessageBox.information(parent, "Labels Ready", f"{labels:,} labels saved to {path}")
+
+    def on_failed(message):
+        dialog.reset()
+        QMessageBox.critical(parent, "Labels Failed", f"Failed to create labels: {message}")
+
+    job.progress.connect(on_progress)
+    job.finished.connect(on_finished)
+    job.failed.connect(on_failed)
+    job.cancelled.connect(dialog.reset)
+    for signal in (job.finished, job.failed, job.cancelled):
+        signal.connect(dialog.deleteLater)
+
+    job.start()
+    return job
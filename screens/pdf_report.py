@@ -0,0 +1,162 @@
+import datetime
+import os
+
+from PyQt5.QtCore import Qt, QMarginsF, QRectF
+from PyQt5.QtGui import QColor, QFont, QFontMetricsF, QPageLayout, QPageSize, QPainter, QPdfWriter
+from screens.invoice_pdf import PDF_MARGIN_MM, PDF_RESOLUTION
+
+HEADER_FILL = QColor("#f2f2f2")
+STRIPE_FILL = QColor("#f9f9f9")
+HIGHLIGHT_FILL = QColor("#ffcccc")
+RULE_COLOR = QColor("#dddddd")
+TITLE_COLOR = QColor("#2c3e50")
+
+
+class PdfTableReport:
+    """Writes a table report straight to QPdfWriter pages.
+
+    Rows are drawn as they are added, one line each with text that does not
+    fit its column elided, so pagination is a running total of row heights:
+    when the next row would cross the bottom margin a new page is started
+    and the column headings are repeated. Nothing is kept per row, so memory
+    use does not grow with the length of the report. The PDF is written to a
+    temporary file and renamed into place by finish().
+
+    columns are (heading, relative width, 'left' or 'right').
+    """
+
+    def __init__(self, file_path, title, columns, subtitle="", landscape=False, font_size=8):
+        self.file_path = file_path
+        self.part_path = file_path + ".part"
+        self.title = title
+        self.subtitle = subtitle
+        self.columns = columns
+        self.landscape = landscape
+        self.font_size = font_size
+        self.writer = None
+        self.painter = None
+        self.page = 0
+        self.rows = 0
+
+    def start(self):
+        self.writer = QPdfWriter(self.part_path)
+        self.writer.setResolution(PDF_RESOLUTION)
+        self.writer.setTitle(self.title)
+        self.writer.setPageLayout(QPageLayout(
+            QPageSize(QPageSize.A4), QPageLayout.Landscape if self.landscape else QPageLayout.Portrait,
+            QMarginsF(PDF_MARGIN_MM, PDF_MARGIN_MM, PDF_MARGIN_MM, PDF_MARGIN_MM), QPageLayout.Millimeter))
+        self.painter = QPainter(self.writer)
+
+        self.font = QFont("Arial", self.font_size)
+        self.bold_font = QFont(self.font)
+        self.bold_font.setBold(True)
+        self.title_font = QFont("Arial", 16, QFont.Bold)
+        metrics = QFontMetricsF(self.font, self.writer)
+        self.metrics = metrics
+        self.row_height = metrics.height() * 1.6
+        self.padding = metrics.averageCharWidth()
+
+        area = self.painter.viewport()
+        self.width = area.width()
+        self.height = area.height()
+        total = sum(width for _, width, _ in self.columns)
+        self.column_x = []
+        x = 0.0
+        for _, width, _ in self.columns:
+            self.column_x.append((x, self.width * width / total))
+            x += self.width * width / total
+
+        self.generated = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+        self.begin_page()
+        return self
+
+    def begin_page(self):
+        if self.page:
+            self.writer.newPage()
+        self.page += 1
+        self.y = 0.0
+
+        painter = self.painter
+        if self.page == 1:
+            painter.setFont(self.title_font)
+            painter.setPen(TITLE_COLOR)
+            title_height = QFontMetricsF(self.title_font, self.writer).height()
+            painter.drawText(QRectF(0, 0, self.width, title_height), Qt.AlignHCenter | Qt.AlignVCenter, self.title)
+            self.y = title_height * 1.3
+            painter.setPen(Qt.black)
+            painter.setFont(self.font)
+            painter.drawText(QRectF(0, self.y, self.width, self.row_height), Qt.AlignLeft | Qt.AlignVCenter,
+                             f"Generated on: {self.generated}")
+            if self.subtitle:
+                painter.drawText(QRectF(0, self.y, self.width, self.row_height), Qt.AlignRight | Qt.AlignVCenter,
+                                 self.subtitle)
+            self.y += self.row_height * 1.5
+        else:
+            painter.setFont(self.font)
+            painter.setPen(Qt.darkGray)
+            painter.drawText(QRectF(0, 0, self.width, self.row_height), Qt.AlignLeft | Qt.AlignVCenter,
+                             f"{self.title} (continued)")
+            self.y = self.row_height * 1.3
+
+        # Page number in the bottom margin line
+        painter.setPen(Qt.darkGray)
+        painter.setFont(self.font)
+        painter.drawText(QRectF(0, self.height - self.row_height, self.width, self.row_height),
+                         Qt.AlignRight | Qt.AlignVCenter, f"Page {self.page}")
+        self.bottom = self.height - self.row_height * 1.5
+
+        self.draw_row([heading for heading, _, _ in self.columns], HEADER_FILL, self.bold_font)
+
+    def draw_row(self, values, fill=None, font=None):
+        painter = self.painter
+        if fill is not None:
+            painter.fillRect(QRectF(0, self.y, self.width, self.row_height), fill)
+        painter.setFont(font or self.font)
+        painter.setPen(Qt.black)
+        metrics = self.metrics
+        for (x, width), (_, _, align), value in zip(self.column_x, self.columns, values):
+            text = metrics.elidedText(str(value), Qt.ElideRight, width - 2 * self.padding)
+            painter.drawText(QRectF(x + self.padding, self.y, width - 2 * self.padding, self.row_height),
+                             (Qt.AlignRight if align == 'right' else Qt.AlignLeft) | Qt.AlignVCenter, text)
+        painter.setPen(RULE_COLOR)
+        painter.drawLine(0, int(self.y + self.row_height), int(self.width), int(self.y + self.row_height))
+        self.y += self.row_height
+
+    def add_row(self, values, highlight=False):
+        if self.y + self.row_height > self.bottom:
+            self.begin_page()
+        fill = HIGHLIGHT_FILL if highlight else (STRIPE_FILL if self.rows % 2 else None)
+        self.draw_row(values, fill)
+        self.rows += 1
+
+    def add_totals(self, lines):
+        """Label and value lines below the table, kept together on one page"""
+        needed = self.row_height * (len(lines) + 1)
+        if self.y + needed > self.bottom:
+            self.begin_page()
+        self.y += self.row_height * 0.5
+        painter = self.painter
+        label_width = self.width * 0.75
+        for label, value in lines:
+            painter.setFont(self.bold_font)
+            painter.setPen(Qt.black)
+            painter.drawText(QRectF(0, self.y, label_width, self.row_height),
+                             Qt.AlignRight | Qt.AlignVCenter, f"{label}:")
+            painter.setFont(self.font)
+            painter.drawText(QRectF(label_width, self.y, self.width - label_width, self.row_height),
+                             Qt.AlignRight | Qt.AlignVCenter, str(value))
+            self.y += self.row_height
+
+    def finish(self):
+        """End the document and move it into place. Returns the page count"""
+        self.painter.end()
+        self.writer = None
+        os.replace(self.part_path, self.file_path)
+        return self.page
+
+    def abort(self):
+        if self.painter is not None and self.painter.isActive():
+            self.painter.end()
+        self.writer = None
+        if os.path.exists(self.part_path):
+            os.remove(self.part_path)
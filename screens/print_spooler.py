@@ -0,0 +1,327 @@
+import json
+import os
+import threading
+import time
+
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget,
+                             QTableWidgetItem, QHeaderView, QAbstractItemView)
+from PyQt5.QtCore import Qt, QObject, QUrl, pyqtSignal
+from PyQt5.QtGui import QDesktopServices, QTextDocument
+from PyQt5.QtPrintSupport import QPrinter, QPrinterInfo
+
+from screens.data_export import ExportCancelled, export_dataset
+from screens.invoice_pdf import PDF_MARGIN_MM, write_pdf_file
+from screens.invoice_templates import InvoiceRenderer, invoice_totals
+from screens.pdf_report import PdfTableReport
+from screens.receipt_escpos import receipt_bytes, send_receipt
+
+SPOOLER_WORKERS = 2
+# Attempts per job, and the wait in seconds before each retry
+MAX_ATTEMPTS = 3
+RETRY_DELAYS = [5, 30]
+# Longest a worker sleeps before looking for jobs whose retry is due
+IDLE_WAIT = 5
+
+STATUS_NAMES = {
+    'queued': "Queued",
+    'running': "Running",
+    'done': "Done",
+    'failed': "Failed",
+    'cancelled': "Cancelled",
+}
+
+
+class PrintSpooler(QObject):
+    """Prints and exports documents in the background.
+
+    Jobs are kept in the print_jobs table, so queued jobs (and jobs that were
+    running when the application stopped) are picked up again on the next
+    start. Worker threads take jobs in order and run them with the
+    run_<kind>(params, cancel_event, progress) methods; a job that fails is
+    retried after RETRY_DELAYS until MAX_ATTEMPTS is reached. Every change of
+    a job's status is announced through job_changed, and so is the progress
+    of exports and reports as rows are written.
+    """
+
+    # id, kind, description, status, attempts, result, error; progress and
+    # total (rows) while an export or report runs
+    job_changed = pyqtSignal(dict)
+
+    def __init__(self, db_manager, invoice_cache, invoice_archive, workers=SPOOLER_WORKERS, parent=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.invoice_cache = invoice_cache
+        self.invoice_archive = invoice_archive
+        self.workers = workers
+        self.wakeup = threading.Condition()
+        self.stopping = False
+        self.threads = []
+        self.running = {}  # job id -> cancel event
+        self.progress = {}  # job id -> (rows written, total rows) of running jobs
+
+    def start(self):
+        requeued = self.db_manager.reset_running_print_jobs()
+        if requeued:
+            print(f"Print spooler: {requeued} interrupted jobs queued again")
+        self.stopping = False
+        for index in range(self.workers):
+            thread = threading.Thread(target=self.work, name=f'print-spooler-{index + 1}', daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        """Let the workers finish their current job and exit"""
+        self.stopping = True
+        with self.wakeup:
+            self.wakeup.notify_all()
+
+    def submit(self, kind, description, params):
+        """Queue a job and return its id"""
+        job_id = self.db_manager.add_print_job(kind, description, json.dumps(params))
+        self.announce({'id': job_id, 'kind': kind, 'description': description, 'status': 'queued',
+                       'attempts': 0, 'result': None, 'error': None})
+        with self.wakeup:
+            self.wakeup.notify()
+        return job_id
+
+    def cancel(self, job_id):
+        """Cancel a queued job, or ask a running export to stop"""
+        if self.db_manager.cancel_print_job(job_id):
+            self.announce({'id': job_id, 'status': 'cancelled'})
+            return True
+        cancel_event = self.running.get(job_id)
+        if cancel_event is not None:
+            cancel_event.set()
+            return True
+        return False
+
+    def retry(self, job_id):
+        """Queue a failed or cancelled job again"""
+        if not self.db_manager.retry_print_job(job_id):
+            return False
+        self.announce({'id': job_id, 'status': 'queued', 'attempts': 0})
+        with self.wakeup:
+            self.wakeup.notify()
+        return True
+
+    def announce(self, job):
+        job = dict(job)
+        job.pop('params', None)
+        self.job_changed.emit(job)
+
+    def work(self):
+        while not self.stopping:
+            try:
+                job = self.db_manager.claim_print_job(time.time())
+            except Exception as e:
+                print(f"Print spooler: error reading the job queue: {e}")
+                job = None
+            if job is None:
+                with self.wakeup:
+                    if not self.stopping:
+                        self.wakeup.wait(IDLE_WAIT)
+                continue
+            self.run_job(job)
+
+    def run_job(self, job):
+        self.announce(job)
+        cancel_event = threading.Event()
+        self.running[job['id']] = cancel_event
+        progress = lambda done, total: self.report_progress(job, done, total)
+        try:
+            job['result'] = getattr(self, f"run_{job['kind']}")(json.loads(job['params']), cancel_event, progress)
+            job['status'] = 'done'
+            self.db_manager.update_print_job(job['id'], 'done', result=job['result'])
+        except ExportCancelled:
+            job['status'] = 'cancelled'
+            self.db_manager.update_print_job(job['id'], 'cancelled')
+        except Exception as e:
+            print(f"Print job {job['id']} ({job['description']}) failed: {e}")
+            job['error'] = str(e)
+            if job['attempts'] < MAX_ATTEMPTS:
+                delay = RETRY_DELAYS[min(job['attempts'], len(RETRY_DELAYS)) - 1]
+                job['status'] = 'queued'
+                self.db_manager.update_print_job(job['id'], 'queued', error=job['error'],
+                                                 next_attempt_at=time.time() + delay)
+            else:
+                job['status'] = 'failed'
+                self.db_manager.update_print_job(job['id'], 'failed', error=job['error'])
+        finally:
+            self.running.pop(job['id'], None)
+            self.progress.pop(job['id'], None)
+        self.announce(job)
+
+    def report_progress(self, job, done, total):
+        self.progress[job['id']] = (done, total)
+        self.announce({'id': job['id'], 'kind': job['kind'], 'description': job['description'],
+                       'status': 'running', 'progress': done, 'total': total})
+
+    # Job kinds. Each returns the file or printer the output went to;
+    # progress(done, total) may be called as rows are written.
+
+    def run_invoice_pdf(self, params, cancel_event, progress):
+        invoice = params['invoice']
+        renderer = InvoiceRenderer(invoice)
+        pdf = self.invoice_cache.pdf(renderer, **params['options'])
+        write_pdf_file(pdf, params['path'])
+        # Every saved invoice is also kept in the archive
+        options = renderer.options(**params['options'])
+        self.invoice_archive.store(invoice, options, pdf,
+                                   invoice_totals(invoice, options['include_gst'])['rounded'])
+        return params['path']
+
+    def run_invoice_print(self, params, cancel_event, progress):
+        html = self.invoice_cache.html(InvoiceRenderer(params['invoice']), **params['options'])
+        if QPrinterInfo.printerInfo(params['printer']).isNull():
+            raise RuntimeError(f"Printer {params['printer']} is not available")
+        printer = QPrinter(QPrinter.HighResolution)
+        printer.setPrinterName(params['printer'])
+        printer.setPageSize(QPrinter.A4)
+        printer.setPageMargins(PDF_MARGIN_MM, PDF_MARGIN_MM, PDF_MARGIN_MM, PDF_MARGIN_MM, QPrinter.Millimeter)
+        printer.setCopyCount(params.get('copies', 1))
+        document = QTextDocument()
+        document.setHtml(html)
+        document.print_(printer)
+        return params['printer']
+
+    def run_receipt(self, params, cancel_event, progress):
+        send_receipt(receipt_bytes(params['invoice'], **params['options']), params['target'])
+        return params['target']
+
+    def run_inventory_report(self, params, cancel_event, progress):
+        filters = params.get('filters') or {}
+        subtitle = ", ".join(value for value in (filters.get('category'), filters.get('stock_level'))
+                             if value and not value.startswith("All"))
+        if filters.get('search'):
+            subtitle = ", ".join(filter(None, [subtitle, f'matching "{filters["search"]}"']))
+        report = PdfTableReport(params['path'], "Inventory Report", [
+            ("ID", 5, 'left'), ("Product Name", 24, 'left'), ("Category", 13, 'left'),
+            ("Cost Price", 10, 'right'), ("Selling Price", 10, 'right'), ("Store Qty", 8, 'right'),
+            ("Warehouse Qty", 9, 'right'), ("Total Value", 12, 'right'),
+        ], subtitle=subtitle)
+        products = total_value = low_stock = 0
+        total = self.db_manager.count_export_rows('inventory', filters)
+        try:
+            report.start()
+            # Rows are drawn as they are read, a chunk at a time
+            for columns, rows in self.db_manager.iter_export_rows('inventory', filters):
+                if cancel_event.is_set():
+                    raise ExportCancelled()
+                for row in rows:
+                    product = dict(zip(columns, row))
+                    quantity = product['store_quantity'] + product['warehouse_quantity']
+                    is_low_stock = quantity < product['min_stock_level']
+                    report.add_row([
+                        product['id'], product['name'], product['category'] or "",
+                        f"₹{product['cost_price']:.2f}", f"₹{product['selling_price']:.2f}",
+                        product['store_quantity'], product['warehouse_quantity'],
+                        f"₹{product['total_value']:.2f}",
+                    ], highlight=is_low_stock)
+                    products += 1
+                    total_value += product['total_value']
+                    low_stock += is_low_stock
+                progress(products, total)
+            report.add_totals([
+                ("Total Products", products),
+                ("Total Inventory Value", f"₹{total_value:.2f}"),
+                ("Low Stock Items", low_stock),
+            ])
+            report.finish()
+        except BaseException:
+            report.abort()
+            raise
+        return params['path']
+
+    def run_export(self, params, cancel_event, progress):
+        total = self.db_manager.count_export_rows(params['dataset'], params.get('filters'))
+        export_dataset(self.db_manager, params['dataset'], params['path'], params['fmt'],
+                       params.get('filters'), progress=lambda done: progress(done, total),
+                       cancel_event=cancel_event)
+        return params['path']
+
+
+class PrintJobsPanel(QDialog):
+    """Recent print and export jobs, with retry, cancel and open actions"""
+
+    def __init__(self, spooler, parent=None):
+        super().__init__(parent)
+        self.spooler = spooler
+        self.setWindowTitle("Print Jobs")
+        self.setMinimumSize(720, 360)
+
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(["Job", "Status", "Attempts", "Output", "Error"])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.itemSelectionChanged.connect(self.update_buttons)
+        self.table.cellDoubleClicked.connect(lambda row, column: self.open_output())
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        self.retry_btn = QPushButton("Retry")
+        self.retry_btn.clicked.connect(lambda: self.spooler.retry(self.selected_job()['id']))
+        self.cancel_btn = QPushButton("Cancel Job")
+        self.cancel_btn.clicked.connect(lambda: self.spooler.cancel(self.selected_job()['id']))
+        self.open_btn = QPushButton("Open")
+        self.open_btn.clicked.connect(self.open_output)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        for button in (self.retry_btn, self.cancel_btn, self.open_btn):
+            buttons.addWidget(button)
+        buttons.addStretch()
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+
+        self.jobs = []
+        spooler.job_changed.connect(self.refresh)
+        self.refresh()
+
+    def refresh(self, changed=None):
+        if changed and 'progress' in changed:
+            # Progress only changes the job's status cell
+            for row, job in enumerate(self.jobs):
+                if job['id'] == changed['id'] and self.table.item(row, 1) is not None:
+                    self.table.item(row, 1).setText(self.status_text(job))
+            return
+        selected = self.selected_job()
+        self.jobs = self.spooler.db_manager.get_print_jobs()
+        self.table.setRowCount(len(self.jobs))
+        for row, job in enumerate(self.jobs):
+            cells = [job['description'] or job['kind'], self.status_text(job),
+                     str(job['attempts']), job['result'] or "", job['error'] or ""]
+            for column, text in enumerate(cells):
+                item = QTableWidgetItem(text)
+                item.setToolTip(text)
+                if job['status'] == 'failed':
+                    item.setForeground(Qt.red)
+                self.table.setItem(row, column, item)
+            if selected and job['id'] == selected['id']:
+                self.table.selectRow(row)
+        self.update_buttons()
+
+    def status_text(self, job):
+        text = STATUS_NAMES.get(job['status'], job['status'])
+        done, total = self.spooler.progress.get(job['id'], (None, None))
+        if job['status'] == 'running' and done is not None:
+            text += f" ({done * 100 // total}%)" if total else f" ({done:,} rows)"
+        return text
+
+    def selected_job(self):
+        rows = self.table.selectionModel().selectedRows() if self.table.selectionModel() else []
+        return self.jobs[rows[0].row()] if rows and rows[0].row() < len(self.jobs) else None
+
+    def update_buttons(self):
+        job = self.selected_job()
+        status = job['status'] if job else None
+        self.retry_btn.setEnabled(status in ('failed', 'cancelled'))
+        self.cancel_btn.setEnabled(status == 'queued' or (status == 'running' and job['kind'] in ('export', 'inventory_report')))
+        self.open_btn.setEnabled(status == 'done' and os.path.isfile(job['result'] or ""))
+
+    def open_output(self):
+        job = self.selected_job()
+        if job and job['status'] == 'done' and os.path.isfile(job['result'] or ""):
+            QDesktopServices.openUrl(QUrl.fromLocalFile(job['result']))
@@ -1,17 +1,16 @@
-import os
-import qrcode
-import json
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                             QPushButton, QFrame, QGridLayout, QSpacerItem,
+                             QPushButton, QFrame, QSpacerItem,
                              QSizePolicy, QTableWidget, QTableWidgetItem,
                              QHeaderView, QMessageBox, QDialog, QLineEdit,
                              QComboBox, QDoubleSpinBox, QSpinBox, QTabWidget,
                              QFormLayout, QDialogButtonBox, QFileDialog,
-                             QScrollArea, QGroupBox, QCheckBox)
-from PyQt5.QtCore import Qt, QSize, pyqtSignal, QBuffer, QByteArray, QIODevice
-from PyQt5.QtGui import QIcon, QPixmap, QFont, QColor, QImage
+                             QCheckBox, QListView,
+                             QProgressBar, QInputDialog)
+from PyQt5.QtCore import Qt, QSize, pyqtSignal
+from PyQt5.QtGui import QIcon, QFont, QColor, QImage
 import datetime
-import uuid
+from screens.qr_batch import QRBatchJob, QRPreviewModel, new_unique_ids, PREVIEW_SIZE
+from screens.label_sheets import LABEL_TEMPLATES, start_label_sheet
 
 class ProductManagement(QWidget):
     def __init__(self, main_window):
@@ -964,19 +963,23 @@ class QuantityDialog(QDialog):
         qr_preview_label.setStyleSheet("font-size: 16px; font-weight: bold; color: #2c3e50;")
         qr_preview_layout.addWidget(qr_preview_label)
         
-        # Scroll area for QR codes
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setStyleSheet("background-color: white;")
-        
-        self.qr_container = QWidget()
-        self.qr_layout = QGridLayout(self.qr_container)
-        
-        scroll_area.setWidget(self.qr_container)
-        qr_preview_layout.addWidget(scroll_area)
+        # Grid of QR codes; only the visible previews are ever rendered
+        self.qr_model = QRPreviewModel(self.main_window.qr_images, self)
+        self.qr_view = QListView()
+        self.qr_view.setViewMode(QListView.IconMode)
+        self.qr_view.setResizeMode(QListView.Adjust)
+        self.qr_view.setMovement(QListView.Static)
+        self.qr_view.setUniformItemSizes(True)
+        self.qr_view.setIconSize(QSize(PREVIEW_SIZE, PREVIEW_SIZE))
+        self.qr_view.setGridSize(QSize(PREVIEW_SIZE + 30, PREVIEW_SIZE + 40))
+        self.qr_view.setWordWrap(True)
+        self.qr_view.setMinimumHeight(PREVIEW_SIZE + 60)
+        self.qr_view.setStyleSheet("background-color: white; font-size: 10px; font-family: monospace;")
+        self.qr_view.setModel(self.qr_model)
+        qr_preview_layout.addWidget(self.qr_view)
         
         # Save QR codes button
-        save_qr_btn = QPushButton("Save All QR Codes")
+        self.save_qr_btn = save_qr_btn = QPushButton("Save All QR Codes")
         save_qr_btn.setStyleSheet("""
             QPushButton {
                 background-color: #9b59b6;
@@ -990,7 +993,32 @@ class QuantityDialog(QDialog):
             }
         """)
         save_qr_btn.clicked.connect(self.save_qr_codes)
-        qr_preview_layout.addWidget(save_qr_btn)
+        
+        # Print labels button
+        print_labels_btn = QPushButton("Print Label Sheet")
+        print_labels_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #34495e;
+                color: white;
+                border-radius: 4px;
+                padding: 10px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #2c3e50;
+            }
+        """)
+        print_labels_btn.clicked.connect(self.print_labels)
+        
+        qr_buttons_layout = QHBoxLayout()
+        qr_buttons_layout.addWidget(save_qr_btn)
+        qr_buttons_layout.addWidget(print_labels_btn)
+        qr_preview_layout.addLayout(qr_buttons_layout)
+        
+        self.qr_progress = QProgressBar()
+        self.qr_progress.setFormat("Saved %v of %m QR codes")
+        self.qr_progress.setVisible(False)
+        qr_preview_layout.addWidget(self.qr_progress)
         
         main_layout.addWidget(self.qr_preview_frame)
         
@@ -1000,6 +1028,9 @@ class QuantityDialog(QDialog):
         
         main_layout.addSpacing(20)
         main_layout.addWidget(button_box)
+        
+        self.qr_job = None
+        self.label_job = None
     
     def move_to_store(self):
         qty_to_move = self.move_qty_input.value()
@@ -1013,7 +1044,7 @@ class QuantityDialog(QDialog):
             return
         
         # Generate QR codes
-        qr_code_paths = self.generate_qr_codes(qty_to_move)
+        unique_ids = self.generate_qr_codes(qty_to_move)
         
         # Update database
         new_store_qty = self.product['store_quantity'] + qty_to_move
@@ -1023,9 +1054,9 @@ class QuantityDialog(QDialog):
             self.product_id, new_store_qty, new_warehouse_qty
         )
         
-        # Add product items with QR codes
+        # Add product items; their QR codes are rendered from the unique IDs when needed
         self.main_window.db_manager.add_product_items(
-            self.product_id, qty_to_move, qr_code_paths
+            self.product_id, qty_to_move, unique_ids=unique_ids
         )
         
         # Update product reference
@@ -1085,108 +1116,16 @@ class QuantityDialog(QDialog):
                             label.setText(f"Warehouse Quantity: {self.product['warehouse_quantity']}")
     
     def generate_qr_codes(self, quantity):
-        # Clear existing QR codes
-        self.clear_qr_layout()
-        
-        qr_code_paths = []
-        self.qr_images = []  # Store QR images to prevent garbage collection
-        
-        # Create directory for QR codes if it doesn't exist
-        qr_dir = os.path.join(os.getcwd(), 'assets', 'qr_codes')
-        os.makedirs(qr_dir, exist_ok=True)
-        
-        # Generate QR codes
-        for i in range(quantity):
-            # Generate a unique 12-character ID for the item
-            unique_id = f"P{self.product_id}I{i+1}-{uuid.uuid4().hex[:8]}"
-            
-            # Create a JSON object with product information
-            product_data = {
-                "item_id": unique_id,
-                "product_id": self.product_id,
-                "name": self.product['name'],
-                "price": self.product['selling_price'],
-                "category": self.product['category']
-            }
-            
-            # Convert to JSON string
-            qr_data = json.dumps(product_data)
-            
-            # Generate QR code
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_H,  # Higher error correction
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(qr_data)
-            qr.make(fit=True)
-            
-            qr_img = qr.make_image(fill_color="black", back_color="white")
-            
-            # Save QR code to file
-            qr_path = os.path.join(qr_dir, f"{unique_id}.png")
-            qr_img.save(qr_path)
-            qr_code_paths.append(qr_path)
-            
-            # Convert to QPixmap for display
-            buffer = QBuffer()
-            buffer.open(QIODevice.WriteOnly)
-            qr_img.save(buffer, format="PNG")
-            pixmap = QPixmap()
-            pixmap.loadFromData(buffer.data())
-            buffer.close()
-            
-            # Add to layout
-            self.add_qr_to_layout(pixmap, unique_id, i)
-            
-            # Store image to prevent garbage collection
-            self.qr_images.append(pixmap)
+        # Nothing is written to disk: the preview grid renders the codes it
+        # shows from their unique IDs
+        unique_ids = new_unique_ids(self.product_id, quantity)
+        self.qr_model.clear()
+        self.qr_model.append(unique_ids)
         
         # Show QR preview frame
         self.qr_preview_frame.setVisible(True)
         
-        return qr_code_paths
-    
-    def add_qr_to_layout(self, pixmap, unique_id, index):
-        # Calculate row and column
-        col = index % 3
-        row = index // 3
-        
-        # Create a group box for each QR code
-        group_box = QGroupBox()
-        group_box.setStyleSheet("""
-            QGroupBox {
-                border: 1px solid #bdc3c7;
-                border-radius: 5px;
-                margin-top: 10px;
-                padding: 10px;
-            }
-        """)
-        group_layout = QVBoxLayout(group_box)
-        
-        # QR code image
-        qr_label = QLabel()
-        qr_label.setPixmap(pixmap.scaled(150, 150, Qt.KeepAspectRatio))
-        qr_label.setAlignment(Qt.AlignCenter)
-        group_layout.addWidget(qr_label)
-        
-        # Unique ID label
-        id_label = QLabel(unique_id)
-        id_label.setAlignment(Qt.AlignCenter)
-        id_label.setStyleSheet("font-size: 10px; font-family: monospace;")
-        id_label.setWordWrap(True)
-        group_layout.addWidget(id_label)
-        
-        self.qr_layout.addWidget(group_box, row, col)
-    
-    def clear_qr_layout(self):
-        # Remove all widgets from QR layout
-        while self.qr_layout.count():
-            item = self.qr_layout.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
+        return unique_ids
     
     def save_qr_codes(self):
         # Ask for directory to save QR codes
@@ -1198,30 +1137,79 @@ class QuantityDialog(QDialog):
         if not directory:
             return
         
-        # Copy QR codes to selected directory
-        qr_dir = os.path.join(os.getcwd(), 'assets', 'qr_codes')
-        
-        # Get all QR codes for this product
+        # Get all items in store for this product
         product_items = self.main_window.db_manager.get_product_items(self.product_id, 'in_store')
         
         if not product_items:
             QMessageBox.warning(self, "No QR Codes", "No QR codes found for this product.")
             return
         
-        # Copy files
-        import shutil
-        copied_count = 0
+        # Render the images into the directory in worker processes
+        self.save_qr_btn.setEnabled(False)
+        self.qr_progress.setRange(0, len(product_items))
+        self.qr_progress.setValue(0)
+        self.qr_progress.setVisible(True)
+        
+        self.qr_job = QRBatchJob([item['unique_id'] for item in product_items], directory)
+        self.qr_job.progress.connect(lambda done, total, saved: self.qr_progress.setValue(done))
+        self.qr_job.finished.connect(lambda saved: self.on_qr_codes_saved(saved, directory))
+        self.qr_job.failed.connect(self.on_qr_codes_failed)
+        self.qr_job.start()
+    
+    def print_labels(self):
+        # Which items to print labels for
+        scopes = ["Items just moved to the store", "All items of this product in the store"]
+        scope, ok = QInputDialog.getItem(self, "Print Label Sheet", "Print labels for:", scopes, 0, False)
+        if not ok:
+            return
+        if scope == scopes[0] and not self.qr_model.items:
+            QMessageBox.warning(self, "No Items", "No items were just moved to the store.")
+            return
+        
+        template_names = [template['name'] for template in LABEL_TEMPLATES.values()]
+        template_name, ok = QInputDialog.getItem(self, "Print Label Sheet", "Label layout:",
+                                                 template_names, 0, False)
+        if not ok:
+            return
+        template = list(LABEL_TEMPLATES)[template_names.index(template_name)]
+        
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Save Label Sheet", f"labels_{self.product['name']}.pdf", "PDF Files (*.pdf)"
+        )
+        if not file_path:
+            return
         
-        for item in product_items:
-            if item['qr_code_path'] and os.path.exists(item['qr_code_path']):
-                dest_path = os.path.join(directory, os.path.basename(item['qr_code_path']))
-                shutil.copy2(item['qr_code_path'], dest_path)
-                copied_count += 1
+        if scope == scopes[0]:
+            filters = {'unique_ids': list(self.qr_model.items)}
+        else:
+            filters = {'product_id': self.product_id, 'status': 'in_store'}
         
+        self.label_job = start_label_sheet(self, self.main_window.db_manager, file_path, template, filters)
+    
+    def on_qr_codes_saved(self, saved, directory):
+        self.qr_job = None
+        self.qr_progress.setVisible(False)
+        self.save_qr_btn.setEnabled(True)
         QMessageBox.information(
             self, "QR Codes Saved", 
-            f"{copied_count} QR codes saved to {directory}"
+            f"{len(saved)} QR codes saved to {directory}"
         )
     
+    def on_qr_codes_failed(self, message):
+        self.qr_job = None
+        self.qr_progress.setVisible(False)
+        self.save_qr_btn.setEnabled(True)
+        QMessageBox.critical(self, "Error", f"Failed to save QR codes: {message}")
+    
     def accept(self):
-        super().accept()
\ No newline at end of file
+        super().accept()
+    
+    def reject(self):
+        # Stop a QR export that is still running; the images it wrote are removed
+        if self.qr_job is not None:
+            self.qr_job.progress.disconnect()
+            self.qr_job.finished.disconnect()
+            self.qr_job.failed.disconnect()
+            self.qr_job.cancel()
+            self.qr_job = None
+        super().reject()
\ No newline at end of file
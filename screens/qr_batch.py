@@ -0,0 +1,182 @@
+import multiprocessing
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from PyQt5.QtCore import Qt, QObject, QSize, QAbstractListModel, QModelIndex, pyqtSignal
+from PyQt5.QtGui import QPixmap
+from screens.qr_images import render_qr_png
+
+# Batches smaller than this are rendered on the job thread; starting worker
+# processes would cost more than it saves
+POOL_MIN_BATCH = 16
+# Codes handed to a worker process at a time, and reported as one progress step
+POOL_CHUNK_SIZE = 8
+# Preview thumbnails kept in memory by the preview model
+PREVIEW_CACHE_SIZE = 256
+PREVIEW_SIZE = 150
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def new_unique_ids(product_id, quantity):
+    """Unique IDs for a batch of new product items"""
+    # Upper case so the whole label payload fits QR alphanumeric mode
+    return [f"P{product_id}I{i+1}-{uuid.uuid4().hex[:8].upper()}" for i in range(quantity)]
+
+
+def render_qr_file(job):
+    """Render one QR code and write it as a PNG. job is (unique_id, path)"""
+    unique_id, path = job
+    with open(path, 'wb') as f:
+        f.write(render_qr_png(unique_id))
+    return unique_id, path
+
+
+def render_qr_files(jobs):
+    """Render a chunk of QR codes. Runs inside the worker processes, so it
+    must stay a module level function."""
+    return [render_qr_file(job) for job in jobs]
+
+
+def get_pool():
+    """Process pool shared by all QR batches, started on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn rather than fork, the parent process is running Qt
+            _pool = ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, 8),
+                                        mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+class QRBatchJob(QObject):
+    """Writes the QR code images for a batch of product items to a directory in the background"""
+
+    progress = pyqtSignal(int, int, list)  # done, total, [(unique_id, path)] finished since last report
+    finished = pyqtSignal(list)  # [(unique_id, path)] in the order of the unique IDs
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, unique_ids, directory, parent=None):
+        super().__init__(parent)
+        self.jobs = [(unique_id, os.path.join(directory, f"{unique_id}.png")) for unique_id in unique_ids]
+        self.cancel_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name='qr-batch', daemon=True)
+        self.thread.start()
+
+    def cancel(self):
+        """Stop after the current chunk and delete the images already written"""
+        self.cancel_event.set()
+
+    def run(self):
+        total = len(self.jobs)
+        chunks = [self.jobs[i:i + POOL_CHUNK_SIZE] for i in range(0, total, POOL_CHUNK_SIZE)]
+        done = []
+        futures = []
+        try:
+            if total < POOL_MIN_BATCH:
+                results = (render_qr_files(chunk) for chunk in chunks)
+            else:
+                pool = get_pool()
+                futures = [pool.submit(render_qr_files, chunk) for chunk in chunks]
+                results = (future.result() for future in futures)
+
+            for chunk_done in results:
+                if self.cancel_event.is_set():
+                    break
+                done.extend(chunk_done)
+                self.progress.emit(len(done), total, chunk_done)
+
+            if self.cancel_event.is_set():
+                self.stop_workers(futures)
+                self.cancelled.emit()
+            else:
+                self.finished.emit(done)
+        except Exception as e:
+            print(f"Error generating QR codes: {e}")
+            self.stop_workers(futures)
+            self.failed.emit(str(e))
+
+    def stop_workers(self, futures):
+        # Drop chunks not started yet and let running ones finish before
+        # deleting, so no image is written after the clean up
+        for future in futures:
+            future.cancel()
+        for future in futures:
+            if not future.cancelled():
+                try:
+                    future.result()
+                except Exception:
+                    pass
+        self.remove_files()
+
+    def remove_files(self):
+        for _, path in self.jobs:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class QRPreviewModel(QAbstractListModel):
+    """List model for a QListView grid of item QR previews.
+
+    Thumbnails are only rendered (through a QRImageCache) when the view asks
+    for a visible row, and a bounded number are kept, so the preview costs
+    the same for ten codes as for ten thousand.
+    """
+
+    def __init__(self, qr_images, parent=None):
+        super().__init__(parent)
+        self.qr_images = qr_images
+        self.items = []  # unique IDs
+        self.thumbnails = OrderedDict()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.items)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        unique_id = self.items[index.row()]
+        if role == Qt.DisplayRole:
+            return unique_id
+        if role == Qt.DecorationRole:
+            return self.thumbnail(unique_id)
+        if role == Qt.SizeHintRole:
+            return QSize(PREVIEW_SIZE + 30, PREVIEW_SIZE + 40)
+        return None
+
+    def thumbnail(self, unique_id):
+        pixmap = self.thumbnails.get(unique_id)
+        if pixmap is not None:
+            self.thumbnails.move_to_end(unique_id)
+            return pixmap
+
+        image = self.qr_images.image(unique_id)
+        if image.isNull():
+            return None
+        pixmap = QPixmap.fromImage(image.scaled(PREVIEW_SIZE, PREVIEW_SIZE, Qt.KeepAspectRatio))
+        self.thumbnails[unique_id] = pixmap
+        if len(self.thumbnails) > PREVIEW_CACHE_SIZE:
+            self.thumbnails.popitem(last=False)
+        return pixmap
+
+    def append(self, items):
+        if not items:
+            return
+        start = len(self.items)
+        self.beginInsertRows(QModelIndex(), start, start + len(items) - 1)
+        self.items.extend(items)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.items = []
+        self.thumbnails.clear()
+        self.endResetModel()
@@ -0,0 +1,141 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from PyQt5.QtGui import QImage
+from screens.qr_payload import encode_item_payload, make_qr
+
+
+def render_qr_png(unique_id, box_size=10, border=4):
+    """Render the label QR code of a product item as PNG bytes.
+
+    The image depends only on the unique ID, so it can be rebuilt at any time
+    instead of being stored.
+    """
+    qr = make_qr(encode_item_payload(unique_id), box_size=box_size, border=border)
+    buffer = io.BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def default_cache_dir():
+    """Directory used for the on-disk QR image cache"""
+    return os.path.join(os.getcwd(), 'assets', 'qr_cache')
+
+
+class QRImageCache:
+    """Item QR images rendered on demand from their unique IDs.
+
+    Recently used PNGs are kept in a bounded in-memory LRU. With a disk_dir,
+    rendered PNGs are also written there and the least recently used files
+    are deleted once the directory grows past disk_limit bytes. Safe to use
+    from any thread.
+    """
+
+    def __init__(self, memory_size=512, disk_dir=None, disk_limit=20 * 1024 * 1024):
+        self.memory_size = memory_size
+        self.memory = OrderedDict()
+        self.disk_dir = disk_dir
+        self.disk_limit = disk_limit
+        self.disk_files = None  # file name -> size, oldest use first; loaded on first use
+        self.disk_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = {'memory': 0, 'disk': 0, 'rendered': 0}
+
+    def png(self, unique_id):
+        """PNG bytes of an item's QR code"""
+        with self.lock:
+            data = self.memory.get(unique_id)
+            if data is not None:
+                self.memory.move_to_end(unique_id)
+                self.hits['memory'] += 1
+                return data
+
+        data = self.read_disk(unique_id)
+        if data is not None:
+            self.hits['disk'] += 1
+        else:
+            data = render_qr_png(unique_id)
+            self.hits['rendered'] += 1
+            self.write_disk(unique_id, data)
+
+        with self.lock:
+            self.memory[unique_id] = data
+            if len(self.memory) > self.memory_size:
+                self.memory.popitem(last=False)
+        return data
+
+    def image(self, unique_id):
+        """QImage of an item's QR code"""
+        return QImage.fromData(self.png(unique_id), "PNG")
+
+    def save(self, unique_id, path):
+        """Write an item's QR code to a PNG file"""
+        with open(path, 'wb') as f:
+            f.write(self.png(unique_id))
+
+    def file_name(self, unique_id):
+        return f"{unique_id}.png"
+
+    def load_disk_index(self):
+        # Called with the lock held
+        if self.disk_files is not None:
+            return
+        self.disk_files = OrderedDict()
+        self.disk_bytes = 0
+        os.makedirs(self.disk_dir, exist_ok=True)
+        entries = [entry for entry in os.scandir(self.disk_dir)
+                   if entry.is_file() and entry.name.endswith('.png')]
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+            size = entry.stat().st_size
+            self.disk_files[entry.name] = size
+            self.disk_bytes += size
+
+    def read_disk(self, unique_id):
+        if not self.disk_dir:
+            return None
+        name = self.file_name(unique_id)
+        with self.lock:
+            self.load_disk_index()
+            if name not in self.disk_files:
+                return None
+            self.disk_files.move_to_end(name)
+        try:
+            with open(os.path.join(self.disk_dir, name), 'rb') as f:
+                return f.read()
+        except OSError:
+            with self.lock:
+                self.disk_bytes -= self.disk_files.pop(name, 0)
+            return None
+
+    def write_disk(self, unique_id, data):
+        if not self.disk_dir:
+            return
+        name = self.file_name(unique_id)
+        path = os.path.join(self.disk_dir, name)
+        try:
+            with self.lock:
+                self.load_disk_index()
+                temp_path = f"{path}.{threading.get_ident()}.part"
+                with open(temp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+                self.disk_bytes += len(data) - self.disk_files.pop(name, 0)
+                self.disk_files[name] = len(data)
+
+                # Evict least recently used files past the size limit
+                while self.disk_bytes > self.disk_limit and len(self.disk_files) > 1:
+                    old_name, size = self.disk_files.popitem(last=False)
+                    self.disk_bytes -= size
+                    try:
+                        os.remove(os.path.join(self.disk_dir, old_name))
+                    except OSError:
+                        pass
+        except OSError as e:
+            # The disk cache is only an optimisation
+            print(f"Error writing QR cache file {path}: {e}")
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
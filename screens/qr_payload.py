@@ -0,0 +1,108 @@
+import json
+import re
+
+import qrcode
+from qrcode import util
+
+# Item labels encode "IT<version>:<unique id>[*<check character>]". Every
+# character is in the QR alphanumeric set, so the code packs 5.5 bits per
+# character instead of 8 and fits version 2-3 at error correction level H.
+PAYLOAD_PREFIX = "IT"
+PAYLOAD_VERSION = 2
+CHECK_SEPARATOR = "*"
+
+# Characters allowed in QR alphanumeric mode, in their mode value order
+ALPHANUMERIC = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:"
+# Check characters are computed over, and drawn from, the alphanumeric set
+# without space and colon: 43 symbols for a prime modulus of 43. No two
+# symbol values differ by a multiple of 43, so in text of up to 42 characters
+# a single changed character or two swapped neighbours always change the check.
+CHECK_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ$%*+-./"
+CHECK_MODULUS = 43
+# Version 1 labels carry a mod-31 check over the alphanumeric values, which
+# misses changes between values 31 apart (such as 0 and V)
+LEGACY_CHECK_MODULUS = 31
+
+# Scanners typing with caps lock on invert the case, so match either
+UNIQUE_ID_PATTERN = re.compile(r'^P\d+I\d+-[0-9A-F]{8}$', re.IGNORECASE)
+
+
+def check_character(text):
+    """Weighted mod-43 check character for a string of CHECK_ALPHABET characters"""
+    total = 0
+    for position, char in enumerate(text.upper(), start=1):
+        value = CHECK_ALPHABET.find(char)
+        if value < 0:
+            raise ValueError(f"{char!r} cannot be covered by a check character")
+        total += position * value
+    return CHECK_ALPHABET[total % CHECK_MODULUS]
+
+
+def legacy_check_character(text):
+    """Weighted mod-31 check character of version 1 payloads"""
+    total = 0
+    for position, char in enumerate(text.upper(), start=1):
+        value = ALPHANUMERIC.find(char)
+        if value < 0:
+            raise ValueError(f"{char!r} is not a QR alphanumeric character")
+        total += position * value
+    return ALPHANUMERIC[total % LEGACY_CHECK_MODULUS]
+
+
+def encode_item_payload(unique_id, check=True):
+    """Compact label payload for a product item"""
+    payload = f"{PAYLOAD_PREFIX}{PAYLOAD_VERSION}:{unique_id}"
+    if check:
+        payload += CHECK_SEPARATOR + check_character(unique_id)
+    return payload
+
+
+def parse_scanned_code(text):
+    """Work out what a scanned or typed code refers to.
+
+    Accepts the compact item payload, the JSON payload of older labels and a
+    bare item unique ID. Returns {'unique_id', 'product_id'} with whichever
+    are known, or None when the text is none of these (e.g. a product ID).
+    Raises ValueError for a compact payload that fails its check.
+    """
+    text = text.strip()
+
+    if text.startswith(PAYLOAD_PREFIX) and ':' in text:
+        header, body = text.split(':', 1)
+        version = header[len(PAYLOAD_PREFIX):]
+        if version in (str(PAYLOAD_VERSION), '1'):
+            unique_id, _, check = body.partition(CHECK_SEPARATOR)
+            expected = check_character if version == str(PAYLOAD_VERSION) else legacy_check_character
+            if check and check != expected(unique_id):
+                raise ValueError("The scanned code failed its check. Please scan it again.")
+            return {'unique_id': unique_id, 'product_id': None}
+
+    if text.startswith('{'):
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return None
+        if isinstance(data, dict) and 'item_id' in data:
+            return {'unique_id': data['item_id'], 'product_id': data.get('product_id')}
+        return None
+
+    if UNIQUE_ID_PATTERN.match(text):
+        return {'unique_id': text, 'product_id': None}
+
+    return None
+
+
+def make_qr(payload, error_correction=qrcode.constants.ERROR_CORRECT_H, box_size=10, border=4):
+    """A QRCode at the smallest version that fits the payload.
+
+    Payloads made only of alphanumeric characters are encoded in alphanumeric
+    mode; anything else (such as legacy lower case IDs) falls back to bytes.
+    """
+    qr = qrcode.QRCode(version=None, error_correction=error_correction,
+                       box_size=box_size, border=border)
+    if all(char in ALPHANUMERIC for char in payload):
+        qr.add_data(util.QRData(payload.encode('ascii'), mode=util.MODE_ALPHA_NUM))
+    else:
+        qr.add_data(payload)
+    qr.make(fit=True)
+    return qr
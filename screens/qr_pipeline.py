@@ -0,0 +1,273 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtGui import QImage
+
+try:
+    from pyzbar.pyzbar import decode as zbar_decode
+except ImportError:
+    # zbar shared library not installed; fall back to OpenCV's detector
+    zbar_decode = None
+
+# Frames are decoded downscaled so their longest side is at most this
+DECODE_MAX_SIDE = 480
+# A region around the last code found is searched first, grown by this
+# fraction of its size on every side
+ROI_MARGIN = 0.5
+# When the cheap passes find nothing, every Nth frame is decoded at full resolution
+FULL_RES_EVERY = 4
+# In continuous mode every Nth frame with a hit in the region pass is still
+# searched whole, so other labels in view are found too
+WHOLE_FRAME_EVERY = 3
+
+
+def decode_image(gray, detector=None, backend=None):
+    """Decode all QR codes in a grayscale image.
+
+    Returns a list of (data, (x, y, w, h)). backend is 'zbar' or 'opencv';
+    by default pyzbar is used when it is available, otherwise the given
+    cv2.QRCodeDetector.
+    """
+    results = []
+    if backend is None:
+        backend = 'zbar' if zbar_decode is not None else 'opencv'
+    if backend == 'zbar':
+        for code in zbar_decode(gray):
+            rect = code.rect
+            results.append((code.data.decode('utf-8'), (rect.left, rect.top, rect.width, rect.height)))
+        return results
+
+    if detector is None:
+        detector = cv2.QRCodeDetector()
+    ok, texts, points, _ = detector.detectAndDecodeMulti(gray)
+    if not ok:
+        return results
+    for text, corners in zip(texts, points):
+        if not text:
+            continue
+        x, y = corners.min(axis=0)
+        x2, y2 = corners.max(axis=0)
+        results.append((text, (int(x), int(y), int(x2 - x), int(y2 - y))))
+    return results
+
+
+class ScanMetrics:
+    """Rolling timings for the scanner pipeline, safe to record from any thread"""
+
+    def __init__(self, window=200):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.window = window
+
+    def record(self, name, milliseconds):
+        with self.lock:
+            self.samples.setdefault(name, deque(maxlen=self.window)).append(milliseconds)
+
+    def summary(self):
+        """{name: (median_ms, p95_ms, count)} over the recent window"""
+        with self.lock:
+            samples = {name: list(values) for name, values in self.samples.items()}
+        return {name: (float(np.percentile(values, 50)), float(np.percentile(values, 95)), len(values))
+                for name, values in samples.items() if values}
+
+    def format(self):
+        labels = [('decode_ms', 'decode'), ('gui_frame_ms', 'GUI frame'),
+                  ('scan_latency_ms', 'scan'), ('scan_to_cart_ms', 'scan to cart')]
+        summary = self.summary()
+        return "  ".join(f"{label} {summary[name][0]:.0f}/{summary[name][1]:.0f} ms"
+                         for name, label in labels if name in summary)
+
+
+class LatestFrame:
+    """Single-slot hand-off between the capture and decode threads.
+
+    Putting a frame replaces any frame the decoder has not picked up yet, so
+    the decoder always works on the newest frame and never builds a backlog.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.frame = None
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, frame, captured_at):
+        with self.condition:
+            if self.frame is not None:
+                self.dropped += 1
+            self.frame = (frame, captured_at)
+            self.condition.notify()
+
+    def take(self, timeout=0.1):
+        """Wait for the next frame; returns (frame, captured_at) or None"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.frame is not None or self.closed, timeout)
+            item, self.frame = self.frame, None
+            return item
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class CaptureThread(QThread):
+    """Reads camera frames, hands them to the decoder and produces preview images"""
+
+    preview_ready = pyqtSignal(QImage)
+    camera_error = pyqtSignal(str)
+
+    def __init__(self, camera_index, frame_slot, width=640, height=480, parent=None):
+        super().__init__(parent)
+        self.camera_index = camera_index
+        self.frame_slot = frame_slot
+        self.width = width
+        self.height = height
+        self.running = True
+        # Set while the GUI has a preview it has not drawn yet, so previews
+        # are skipped rather than queued when the GUI thread is busy
+        self.preview_pending = threading.Event()
+
+    def run(self):
+        camera = cv2.VideoCapture(self.camera_index)
+        if not camera.isOpened():
+            self.camera_error.emit(f"Failed to open camera {self.camera_index}. Please try another camera.")
+            return
+
+        camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+
+        try:
+            while self.running:
+                ret, frame = camera.read()
+                if not ret:
+                    self.camera_error.emit("Failed to read frame from camera. Please try another camera.")
+                    break
+
+                self.frame_slot.put(frame, time.perf_counter())
+
+                if not self.preview_pending.is_set():
+                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                    h, w, ch = frame_rgb.shape
+                    image = QImage(frame_rgb.data, w, h, ch * w, QImage.Format_RGB888).copy()
+                    self.preview_pending.set()
+                    self.preview_ready.emit(image)
+        finally:
+            camera.release()
+
+    def preview_shown(self):
+        """Called by the GUI once it has drawn the last preview"""
+        self.preview_pending.clear()
+
+    def stop(self):
+        self.running = False
+
+
+class DecodeWorker(QThread):
+    """Decodes the newest captured frame, skipping any frames it was too slow for.
+
+    Each frame is tried cheapest first: the region around the last code found,
+    then the whole frame downscaled, and every FULL_RES_EVERY frames without a
+    result the whole frame at full resolution. With continuous set, every
+    WHOLE_FRAME_EVERY region hits the whole frame is searched as well, so a
+    label that stays in view does not hide the others.
+    """
+
+    code_decoded = pyqtSignal(str, float)  # data, perf_counter time the frame was captured
+
+    def __init__(self, frame_slot, metrics, parent=None, max_side=DECODE_MAX_SIDE,
+                 roi_margin=ROI_MARGIN, full_res_every=FULL_RES_EVERY, backend=None, continuous=False):
+        super().__init__(parent)
+        self.frame_slot = frame_slot
+        self.metrics = metrics
+        self.running = True
+        self.max_side = max_side
+        self.roi_margin = roi_margin  # None turns the region pass off
+        self.full_res_every = full_res_every
+        self.backend = backend or ('zbar' if zbar_decode is not None else 'opencv')
+        self.continuous = continuous
+        self.last_rect = None
+        self.misses = 0
+        self.region_hits = 0
+
+    def make_detector(self):
+        return cv2.QRCodeDetector() if self.backend == 'opencv' else None
+
+    def run(self):
+        detector = self.make_detector()
+        while self.running:
+            item = self.frame_slot.take()
+            if item is None:
+                continue
+            frame, captured_at = item
+
+            started = time.perf_counter()
+            results = self.decode_frame(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), detector)
+            finished = time.perf_counter()
+            self.metrics.record('decode_ms', (finished - started) * 1000)
+
+            for data, rect in results:
+                self.metrics.record('scan_latency_ms', (finished - captured_at) * 1000)
+                self.code_decoded.emit(data, captured_at)
+
+    def decode_frame(self, gray, detector):
+        height, width = gray.shape
+
+        # 1. Region around the last code found, at full resolution
+        region_results = []
+        if self.last_rect is not None and self.roi_margin is not None:
+            x, y, w, h = self.last_rect
+            margin = self.roi_margin
+            x0, y0 = max(0, int(x - w * margin)), max(0, int(y - h * margin))
+            x1, y1 = min(width, int(x + w * (1 + margin))), min(height, int(y + h * (1 + margin)))
+            results = decode_image(gray[y0:y1, x0:x1], detector, self.backend)
+            if results:
+                region_results = [(data, (rx + x0, ry + y0, rw, rh)) for data, (rx, ry, rw, rh) in results]
+                self.region_hits += 1
+                if not self.continuous or self.region_hits % WHOLE_FRAME_EVERY:
+                    return self.found(region_results)
+
+        # 2. Whole frame, downscaled
+        scale = min(1.0, self.max_side / max(width, height))
+        if scale < 1.0:
+            small = cv2.resize(gray, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+            results = self.merge(region_results, [(data, tuple(int(v / scale) for v in rect))
+                                                  for data, rect in decode_image(small, detector, self.backend)])
+            if len(results) > len(region_results):
+                return self.found(results)
+
+        # 3. Whole frame at full resolution, for small or distant codes
+        if region_results:
+            return self.found(self.merge(region_results, decode_image(gray, detector, self.backend)))
+        self.misses += 1
+        if scale == 1.0 or self.misses % self.full_res_every == 0:
+            results = decode_image(gray, detector, self.backend)
+            if results:
+                return self.found(results)
+
+        self.last_rect = None
+        return []
+
+    def found(self, results):
+        self.last_rect = results[0][1]
+        self.misses = 0
+        return results
+
+    def merge(self, region_results, frame_results):
+        """Region results first, so the region stays on the same code, then the
+        codes only the whole-frame search found"""
+        seen = {data for data, _ in region_results}
+        return region_results + [(data, rect) for data, rect in frame_results if data not in seen]
+
+    def reset(self):
+        """Forget the last code found, as when a new scan starts"""
+        self.last_rect = None
+        self.misses = 0
+        self.region_hits = 0
+
+    def stop(self):
+        self.running = False
@@ -1,10 +1,27 @@
+import time
 import cv2
 import numpy as np
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                             QPushButton, QFrame, QMessageBox, QComboBox)
+                             QPushButton, QFrame, QMessageBox, QComboBox, QApplication)
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QSize
-from PyQt5.QtGui import QImage, QPixmap, QIcon
-from pyzbar.pyzbar import decode
+from PyQt5.QtGui import QPixmap, QIcon
+from screens.qr_pipeline import CaptureThread, DecodeWorker, LatestFrame, ScanMetrics
+
+# In continuous mode a code is ignored while it has been seen within this many
+# seconds, so a label held in front of the camera is only added once
+SESSION_DEDUP_SECONDS = 2.0
+# Codes decoded within this window are handed to the batch callback together
+BATCH_INTERVAL_MS = 250
+# How long the camera view border flashes after a batch is added
+FLASH_MS = 400
+
+CAMERA_VIEW_STYLE = """
+    QLabel {
+        background-color: black;
+        border-radius: 8px;
+        border: %s;
+    }
+"""
 
 class QRScannerScreen(QWidget):
     # Signal to emit when a QR code is successfully scanned
@@ -14,12 +31,20 @@ class QRScannerScreen(QWidget):
         super().__init__()
         self.main_window = main_window
         self.callback = callback  # Function to call when QR code is scanned
-        self.camera = None
-        self.timer = None
+        self.batch_callback = None  # Function taking a list of codes in continuous mode
+        self.return_to = None  # Screen to go back to when a continuous session is done
+        self.capture_thread = None
+        self.decode_worker = None
+        self.frame_slot = None
+        self.metrics = ScanMetrics()
         self.available_cameras = []
+        self.cameras_listed = False  # Cameras are probed the first time the screen is shown
         self.current_camera_index = 0
         self.last_scanned_code = None
         self.last_scan_time = 0
+        self.seen_codes = {}  # code -> time it was last seen in this session
+        self.pending_codes = []  # (code, captured_at) waiting for the next batch
+        self.session_count = 0
         self.init_ui()
     
     def init_ui(self):
@@ -117,13 +142,7 @@ class QRScannerScreen(QWidget):
         self.camera_view = QLabel()
         self.camera_view.setAlignment(Qt.AlignCenter)
         self.camera_view.setMinimumSize(640, 480)
-        self.camera_view.setStyleSheet("""
-            QLabel {
-                background-color: black;
-                border-radius: 8px;
-                border: 1px solid #e0e0e0;
-            }
-        """)
+        self.camera_view.setStyleSheet(CAMERA_VIEW_STYLE % "1px solid #e0e0e0")
         
         content_layout.addWidget(self.camera_view)
         
@@ -142,14 +161,69 @@ class QRScannerScreen(QWidget):
         self.status_label = QLabel("Ready to scan QR code...")
         self.status_label.setStyleSheet("font-size: 14px; color: #2c3e50;")
         
+        # Median/95th percentile pipeline timings
+        self.metrics_label = QLabel("")
+        self.metrics_label.setStyleSheet("font-size: 12px; color: #7f8c8d;")
+        
         status_layout.addWidget(self.status_label)
+        status_layout.addStretch()
+        status_layout.addWidget(self.metrics_label)
+        
+        # Continuous scanning controls, shown when the caller accepts batches
+        self.session_label = QLabel("")
+        self.session_label.setStyleSheet("font-size: 14px; font-weight: bold; color: #27ae60;")
+        
+        self.continuous_btn = QPushButton("Continuous")
+        self.continuous_btn.setCheckable(True)
+        self.continuous_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #95a5a6;
+                color: white;
+                border-radius: 4px;
+                padding: 8px 15px;
+                font-weight: bold;
+            }
+            QPushButton:checked {
+                background-color: #9b59b6;
+            }
+        """)
+        self.continuous_btn.toggled.connect(self.continuous_toggled)
+        
+        self.done_btn = QPushButton("Done")
+        self.done_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #2ecc71;
+                color: white;
+                border-radius: 4px;
+                padding: 8px 15px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #27ae60;
+            }
+        """)
+        self.done_btn.clicked.connect(self.finish_session)
+        
+        status_layout.addWidget(self.session_label)
+        status_layout.addWidget(self.continuous_btn)
+        status_layout.addWidget(self.done_btn)
+        self.set_continuous_controls_visible(False)
+        
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.timeout.connect(self.update_metrics_label)
+        
+        self.batch_timer = QTimer(self)
+        self.batch_timer.setSingleShot(True)
+        self.batch_timer.timeout.connect(self.flush_batch)
+        
+        self.flash_timer = QTimer(self)
+        self.flash_timer.setSingleShot(True)
+        self.flash_timer.timeout.connect(
+            lambda: self.camera_view.setStyleSheet(CAMERA_VIEW_STYLE % "1px solid #e0e0e0"))
         
         content_layout.addWidget(status_frame)
         
         main_layout.addWidget(content_widget)
-        
-        # Initialize camera
-        self.refresh_cameras()
     
     def go_back(self):
         # Stop camera before going back
@@ -168,6 +242,7 @@ class QRScannerScreen(QWidget):
         # Clear combo box
         self.camera_combo.clear()
         self.available_cameras = []
+        self.cameras_listed = True
         
         # Find available cameras
         max_cameras = 5  # Check up to 5 cameras
@@ -182,7 +257,7 @@ class QRScannerScreen(QWidget):
             self.status_label.setText("No cameras found. Please connect a camera and refresh.")
             self.status_label.setStyleSheet("font-size: 14px; color: #e74c3c;")
         else:
-            # Start the first available camera
+            # Start the first available camera (only runs while the screen is shown)
             self.current_camera_index = 0
             self.camera_combo.setCurrentIndex(0)
             self.start_camera()
@@ -201,114 +276,204 @@ class QRScannerScreen(QWidget):
         self.start_camera()
     
     def start_camera(self):
-        if not self.available_cameras:
+        if not self.available_cameras or not self.isVisible():
             return
         
-        # Initialize camera
-        camera_index = self.available_cameras[self.current_camera_index]
-        self.camera = cv2.VideoCapture(camera_index)
+        self.stop_camera()
         
-        if not self.camera.isOpened():
-            self.status_label.setText(f"Failed to open camera {camera_index}. Please try another camera.")
-            self.status_label.setStyleSheet("font-size: 14px; color: #e74c3c;")
-            return
+        # Capture and decoding run on their own threads; the GUI thread only
+        # draws previews and handles decoded codes
+        camera_index = self.available_cameras[self.current_camera_index]
+        self.frame_slot = LatestFrame()
+        self.capture_thread = CaptureThread(camera_index, self.frame_slot)
+        self.decode_worker = DecodeWorker(self.frame_slot, self.metrics, continuous=self.is_continuous())
         
-        # Set camera properties
-        self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        self.capture_thread.preview_ready.connect(self.show_preview)
+        self.capture_thread.camera_error.connect(self.on_camera_error)
+        self.decode_worker.code_decoded.connect(self.on_code_decoded)
         
-        # Start timer for frame updates
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
-        self.timer.start(30)  # Update every 30ms (approx. 33 fps)
+        self.capture_thread.start()
+        self.decode_worker.start()
+        self.metrics_timer.start(1000)
         
         self.status_label.setText("Camera started. Scanning for QR codes...")
         self.status_label.setStyleSheet("font-size: 14px; color: #2c3e50;")
     
     def stop_camera(self):
-        # Stop timer
-        if self.timer and self.timer.isActive():
-            self.timer.stop()
-        
-        # Release camera
-        if self.camera and self.camera.isOpened():
-            self.camera.release()
-            self.camera = None
-    
-    def update_frame(self):
-        if not self.camera or not self.camera.isOpened():
+        if self.capture_thread is None:
             return
         
-        # Read frame from camera
-        ret, frame = self.camera.read()
+        self.metrics_timer.stop()
+        self.capture_thread.stop()
+        self.decode_worker.stop()
+        self.frame_slot.close()
+        self.capture_thread.wait()
+        self.decode_worker.wait()
         
-        if not ret:
-            self.status_label.setText("Failed to read frame from camera. Please try another camera.")
-            self.status_label.setStyleSheet("font-size: 14px; color: #e74c3c;")
-            self.stop_camera()
-            return
-        
-        # Scan for QR codes
-        self.scan_qr_codes(frame)
-        
-        # Convert frame to QImage for display
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = frame_rgb.shape
-        bytes_per_line = ch * w
-        q_img = QImage(frame_rgb.data, w, h, bytes_per_line, QImage.Format_RGB888)
+        self.capture_thread = None
+        self.decode_worker = None
+        self.frame_slot = None
+    
+    def on_camera_error(self, message):
+        self.status_label.setText(message)
+        self.status_label.setStyleSheet("font-size: 14px; color: #e74c3c;")
+        self.stop_camera()
+    
+    def show_preview(self, image):
+        started = time.perf_counter()
         
         # Scale to fit the label while maintaining aspect ratio
-        pixmap = QPixmap.fromImage(q_img)
+        pixmap = QPixmap.fromImage(image)
         self.camera_view.setPixmap(pixmap.scaled(self.camera_view.size(), Qt.KeepAspectRatio))
+        
+        if self.capture_thread is not None:
+            self.capture_thread.preview_shown()
+        self.metrics.record('gui_frame_ms', (time.perf_counter() - started) * 1000)
+    
+    def update_metrics_label(self):
+        text = self.metrics.format()
+        if self.frame_slot is not None and self.frame_slot.dropped:
+            text += f"  skipped {self.frame_slot.dropped} frames"
+        self.metrics_label.setText(text)
     
-    def scan_qr_codes(self, frame):
-        import time
+    def on_code_decoded(self, qr_data, captured_at):
+        if self.is_continuous():
+            self.queue_code(qr_data, captured_at)
+            return
+        
         current_time = time.time()
         
         # Only process every 0.5 seconds to avoid multiple scans of the same code
         if current_time - self.last_scan_time < 0.5:
             return
         
-        # Convert to grayscale for better QR detection
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        # Check if this is a new code (to avoid multiple scans of the same code)
+        if qr_data == self.last_scanned_code:
+            return
+        
+        self.last_scanned_code = qr_data
+        self.last_scan_time = current_time
+        
+        # Update status
+        self.status_label.setText(f"QR Code detected: {qr_data}")
+        self.status_label.setStyleSheet("font-size: 14px; color: #27ae60;")
         
-        # Scan for QR codes
-        qr_codes = decode(gray)
+        # Emit signal
+        self.qr_scanned.emit(qr_data)
         
-        for qr_code in qr_codes:
-            # Get QR code data
-            qr_data = qr_code.data.decode('utf-8')
+        # Call callback if provided
+        if self.callback:
+            # Stop camera before calling callback
+            self.stop_camera()
+            
+            # Call callback with QR data
+            self.callback(qr_data)
+            self.metrics.record('scan_to_cart_ms', (time.perf_counter() - captured_at) * 1000)
             
-            # Check if this is a new code (to avoid multiple scans of the same code)
-            if qr_data != self.last_scanned_code:
-                self.last_scanned_code = qr_data
-                self.last_scan_time = current_time
-                
-                # Update status
-                self.status_label.setText(f"QR Code detected: {qr_data}")
-                self.status_label.setStyleSheet("font-size: 14px; color: #27ae60;")
-                
-                # Emit signal
-                self.qr_scanned.emit(qr_data)
-                
-                # Call callback if provided
-                if self.callback:
-                    # Stop camera before calling callback
-                    self.stop_camera()
-                    
-                    # Call callback with QR data
-                    self.callback(qr_data)
-                    
-                    # Go back to previous screen
-                    self.go_back()
-                    
-                    return
+            # Go back to previous screen
+            self.go_back()
+    
+    def queue_code(self, qr_data, captured_at):
+        # Codes seen recently in this session are ignored; seeing one again
+        # restarts its window, so a label left in view is only added once
+        now = time.time()
+        last_seen = self.seen_codes.get(qr_data)
+        self.seen_codes[qr_data] = now
+        if last_seen is not None and now - last_seen < SESSION_DEDUP_SECONDS:
+            return
+        
+        self.pending_codes.append((qr_data, captured_at))
+        if not self.batch_timer.isActive():
+            self.batch_timer.start(BATCH_INTERVAL_MS)
+    
+    def flush_batch(self):
+        self.batch_timer.stop()
+        pending, self.pending_codes = self.pending_codes, []
+        if not pending or not self.batch_callback:
+            return
+        
+        # The caller adds the whole batch and refreshes its cart once
+        results = self.batch_callback([code for code, _ in pending])
+        
+        finished = time.perf_counter()
+        for _, captured_at in pending:
+            self.metrics.record('scan_to_cart_ms', (finished - captured_at) * 1000)
+        
+        added = [code for code, error in results if error is None]
+        failed = [(code, error) for code, error in results if error is not None]
+        self.session_count += len(added)
+        self.confirm_batch(added, failed)
+    
+    def confirm_batch(self, added, failed):
+        # One beep per item added, and a green (or red) flash of the camera view
+        for _ in added:
+            QApplication.beep()
+        
+        color = "#27ae60" if added else "#e74c3c"
+        self.camera_view.setStyleSheet(CAMERA_VIEW_STYLE % f"4px solid {color}")
+        self.flash_timer.start(FLASH_MS)
+        
+        messages = []
+        if added:
+            messages.append("Added: " + ", ".join(added))
+        messages.extend(f"{code}: {error}" for code, error in failed)
+        self.status_label.setText("  ".join(messages))
+        self.status_label.setStyleSheet(f"font-size: 14px; color: {color};")
+        self.session_label.setText(f"{self.session_count} item(s) added")
+    
+    def start_session(self):
+        self.seen_codes = {}
+        self.pending_codes = []
+        self.session_count = 0
+        self.session_label.setText("")
+    
+    def finish_session(self):
+        # Add anything still waiting, then return to the screen that opened the scanner
+        self.flush_batch()
+        self.stop_camera()
+        if self.return_to is not None:
+            self.main_window.stacked_widget.setCurrentWidget(self.return_to)
+        else:
+            self.go_back()
+    
+    def is_continuous(self):
+        return bool(self.batch_callback) and self.continuous_btn.isChecked()
+    
+    def continuous_toggled(self, checked):
+        if self.decode_worker is not None:
+            self.decode_worker.continuous = self.is_continuous()
+    
+    def set_continuous_controls_visible(self, visible):
+        self.session_label.setVisible(visible)
+        self.continuous_btn.setVisible(visible)
+        self.done_btn.setVisible(visible)
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.start_session()
+        if self.cameras_listed:
+            self.start_camera()
+        else:
+            # Opening each camera index blocks, so it is left until the scanner is first used
+            self.refresh_cameras()
+    
+    def hideEvent(self, event):
+        # Release the camera whenever the scanner is not on screen
+        self.flush_batch()
+        self.stop_camera()
+        super().hideEvent(event)
     
     def closeEvent(self, event):
         # Stop camera when widget is closed
         self.stop_camera()
         super().closeEvent(event)
         
-    def set_callback(self, callback):
-        # Set the callback function to be called when a QR code is scanned
-        self.callback = callback
\ No newline at end of file
+    def set_callback(self, callback, batch_callback=None, return_to=None):
+        # Set the callback function to be called when a QR code is scanned.
+        # With a batch callback the scanner can stay open and add many items
+        self.callback = callback
+        self.batch_callback = batch_callback
+        self.return_to = return_to
+        self.continuous_btn.setChecked(batch_callback is not None)
+        self.continuous_toggled(self.continuous_btn.isChecked())
+        self.set_continuous_controls_visible(batch_callback is not None)
\ No newline at end of file
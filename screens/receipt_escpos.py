@@ -0,0 +1,178 @@
+import os
+import socket
+import textwrap
+
+from screens.invoice_templates import SHOP, amount_in_words, invoice_totals, money
+from screens.qr_payload import encode_item_payload, make_qr
+
+# Characters per line in font A on 80 mm paper (576 dots wide)
+RECEIPT_COLUMNS = 48
+# Item table columns: name, quantity, rate, amount
+ITEM_COLUMNS = (24, 5, 9, 10)
+# Dots per QR module; 6 gives a code about 2 cm wide for an item payload
+QR_MODULE_DOTS = 6
+# 'native' sends the payload and lets the printer draw the code (GS ( k);
+# 'raster' sends the code as a bit image for printers without QR support
+QR_MODE = 'native'
+
+# Where receipts are sent: a device or file path (/dev/usb/lp0, a Windows
+# printer share such as \\localhost\Receipt) or tcp://host:port for a
+# network printer. Without one, receipts are written to invoice/receipts/.
+RECEIPT_PRINTER = os.environ.get('RECEIPT_PRINTER')
+NETWORK_TIMEOUT = 5
+
+ESC = b'\x1b'
+GS = b'\x1d'
+
+
+class EscPosReceipt:
+    """Builds an ESC/POS byte stream one line at a time"""
+
+    def __init__(self, columns=RECEIPT_COLUMNS):
+        self.columns = columns
+        # Initialise, and select code page 437 (PC437) for the text
+        self.data = bytearray(ESC + b'@' + ESC + b't\x00')
+
+    def text(self, line=""):
+        self.data += line.encode('cp437', errors='replace') + b'\n'
+        return self
+
+    def wrapped(self, text, indent=""):
+        for line in textwrap.wrap(text, self.columns, subsequent_indent=indent) or [""]:
+            self.text(line)
+        return self
+
+    def align(self, where):
+        self.data += ESC + b'a' + {'left': b'\x00', 'center': b'\x01', 'right': b'\x02'}[where]
+        return self
+
+    def bold(self, on=True):
+        self.data += ESC + b'E' + (b'\x01' if on else b'\x00')
+        return self
+
+    def size(self, width=1, height=1):
+        self.data += GS + b'!' + bytes([(width - 1) << 4 | (height - 1)])
+        return self
+
+    def small(self, on=True):
+        # Font B, 64 characters per line
+        self.data += ESC + b'M' + (b'\x01' if on else b'\x00')
+        return self
+
+    def rule(self, char="-"):
+        return self.text(char * self.columns)
+
+    def pair(self, left, right, width=None):
+        """Text on the left and on the right of one line"""
+        width = width or self.columns
+        return self.text(left[:width - len(right) - 1].ljust(width - len(right)) + right)
+
+    def row(self, cells, widths):
+        """Table row; the first cell is left aligned and wraps, the others are right aligned"""
+        first = textwrap.wrap(cells[0], widths[0] - 1) or [""]
+        self.text(first[0].ljust(widths[0]) + "".join(str(cell).rjust(width)
+                                                      for cell, width in zip(cells[1:], widths[1:])))
+        for line in first[1:]:
+            self.text(line)
+        return self
+
+    def qr(self, payload, module_dots=QR_MODULE_DOTS, mode=QR_MODE):
+        if mode == 'native':
+            data = payload.encode('ascii')
+            store = len(data) + 3
+            self.data += (GS + b'(k\x04\x00\x31\x41\x32\x00'  # model 2
+                          + GS + b'(k\x03\x00\x31\x43' + bytes([module_dots])
+                          + GS + b'(k\x03\x00\x31\x45\x31'  # error correction M
+                          + GS + b'(k' + bytes([store & 0xff, store >> 8]) + b'\x31\x50\x30' + data
+                          + GS + b'(k\x03\x00\x31\x51\x30')  # print the stored code
+        else:
+            self.raster(make_qr(payload, box_size=1, border=2).get_matrix(), module_dots)
+        self.data += b'\n'
+        return self
+
+    def raster(self, matrix, scale):
+        """Print a matrix of booleans as a bit image (GS v 0), each cell scale dots square"""
+        width = len(matrix[0]) * scale
+        width_bytes = (width + 7) // 8
+        image = bytearray()
+        for cells in matrix:
+            row = bytearray(width_bytes)
+            for x, dark in enumerate(cells):
+                if dark:
+                    for dot in range(x * scale, (x + 1) * scale):
+                        row[dot >> 3] |= 0x80 >> (dot & 7)
+            image += bytes(row) * scale
+        height = len(matrix) * scale
+        self.data += (GS + b'v0\x00' + bytes([width_bytes & 0xff, width_bytes >> 8,
+                                              height & 0xff, height >> 8]) + image)
+
+    def cut(self, feed_lines=4):
+        # Feed the last line past the cutter, then cut leaving a small hinge
+        self.data += GS + b'V\x42' + bytes([feed_lines])
+        return self
+
+    def getvalue(self):
+        return bytes(self.data)
+
+
+def receipt_bytes(invoice, include_gst=None, invoice_number=None, invoice_date=None):
+    """ESC/POS receipt for an invoice view-model (see screens.invoice_templates),
+    with the QR code of every item sold as a product item"""
+    include_gst = invoice['include_gst'] if include_gst is None else include_gst
+    totals = invoice_totals(invoice, include_gst)
+    customer = invoice['customer']
+    receipt = EscPosReceipt()
+
+    receipt.align('center').bold().size(2, 2).text(SHOP['name']).size().bold(False)
+    receipt.wrapped(SHOP['address']).text(SHOP['location']).text(f"GSTIN: {SHOP['gstn']}")
+    receipt.bold().text(invoice['title']).bold(False).align('left')
+    receipt.pair(f"No: {invoice_number or invoice['invoice_number']}",
+                 f"Date: {invoice_date or invoice['invoice_date']}")
+    receipt.text(f"Customer: {customer['name']}")
+    if customer['phone'] != "-":
+        receipt.text(f"Phone: {customer['phone']}")
+    if invoice['device']:
+        receipt.wrapped(f"Device: {invoice['device']['device']} ({invoice['device']['serial_number']})")
+
+    receipt.rule().bold().row(["Item", "Qty", "Rate", "Amount"], ITEM_COLUMNS).bold(False).rule()
+    for item in invoice['items']:
+        receipt.row([item['name'], item['quantity'], money(item['price']), money(item['total'])], ITEM_COLUMNS)
+    receipt.rule()
+
+    if invoice['discount']:
+        receipt.pair("Subtotal", money(totals['subtotal']))
+        receipt.pair("Discount", f"-{money(invoice['discount'])}")
+    receipt.pair("Taxable amount", money(totals['taxable']))
+    if include_gst:
+        half_rate = f"{totals['rate'] / 2:g}"
+        receipt.pair(f"CGST {half_rate}%", money(totals['gst_amount'] / 2))
+        receipt.pair(f"SGST {half_rate}%", money(totals['gst_amount'] / 2))
+    if totals['round_off']:
+        receipt.pair("Round off", money(totals['round_off']))
+    # Double height only, so the line keeps its 48 columns
+    receipt.bold().size(1, 2).pair("TOTAL", f"Rs. {money(totals['rounded'])}").size().bold(False)
+    receipt.wrapped(f"Rupees {amount_in_words(totals['rounded'])} Only")
+    receipt.text(f"Payment: {invoice['payment_method']}")
+
+    for item in invoice['items']:
+        if item.get('unique_id'):
+            receipt.align('center').qr(encode_item_payload(item['unique_id']))
+            receipt.text(f"{item['name'][:RECEIPT_COLUMNS - 16]} {item['unique_id']}").align('left')
+
+    receipt.rule().small()
+    for term in invoice['terms']:
+        receipt.wrapped(term)
+    receipt.small(False).align('center').text(f"Thank you for shopping at {SHOP['name']}")
+    return receipt.cut().getvalue()
+
+
+def send_receipt(data, target):
+    """Send ESC/POS bytes to a printer or file. target is a device or file
+    path, or tcp://host:port for a network printer (raw port, usually 9100)"""
+    if target.startswith('tcp://'):
+        host, _, port = target[len('tcp://'):].partition(':')
+        with socket.create_connection((host, int(port or 9100)), timeout=NETWORK_TIMEOUT) as connection:
+            connection.sendall(data)
+        return
+    with open(target, 'wb') as f:
+        f.write(data)
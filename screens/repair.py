@@ -11,6 +11,7 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                              QCalendarWidget)
 from PyQt5.QtCore import Qt, QSize, pyqtSignal, QTimer, QDate
 from PyQt5.QtGui import QIcon, QPixmap, QFont, QColor, QStandardItemModel, QStandardItem
+from database.db_manager import InsufficientStock
 
 class RepairScreen(QWidget):
     def __init__(self, main_window):
@@ -1147,12 +1148,17 @@ class RepairDialog(QDialog):
                 'bicycle_frame_number': self.bicycle_frame_number_input.text().strip()
             })
         
-        if self.repair_id:
-            # Update existing repair
-            success = self.main_window.db_manager.update_repair(self.repair_id, repair_data)
-        else:
-            # Add new repair
-            success = self.main_window.db_manager.add_repair(repair_data)
+        # Saving reserves the parts' stock, which fails if there is not enough
+        try:
+            if self.repair_id:
+                # Update existing repair
+                success = self.main_window.db_manager.update_repair(self.repair_id, repair_data)
+            else:
+                # Add new repair
+                success = self.main_window.db_manager.add_repair(repair_data)
+        except InsufficientStock as e:
+            QMessageBox.warning(self, "Insufficient Stock", str(e))
+            return
         
         if not success:
             QMessageBox.critical(self, "Error", "Failed to save repair job. Please try again.")
@@ -1183,6 +1189,11 @@ class AddPartDialog(QDialog):
         self.load_products()
         form_layout.addRow("Select Product:", self.product_combo)
         
+        # Store stock not already reserved for other repairs
+        self.available_label = QLabel("")
+        self.available_label.setStyleSheet("color: #7f8c8d;")
+        form_layout.addRow("Available:", self.available_label)
+        
         # Quantity
         self.quantity_input = QSpinBox()
         self.quantity_input.setRange(1, 100)
@@ -1217,7 +1228,8 @@ class AddPartDialog(QDialog):
         main_layout.addSpacing(20)
         main_layout.addWidget(button_box)
         
-        # Initialize total
+        # Initialize cost, availability and total
+        self.update_product_cost()
         self.update_total()
     
     def load_products(self):
@@ -1238,7 +1250,9 @@ class AddPartDialog(QDialog):
             
             # Update cost input with product price
             if product:
-                self.cost_input.setValue(product['price'])
+                self.cost_input.setValue(product['selling_price'])
+                reserved = f" ({product['reserved_quantity']} reserved for repairs)" if product['reserved_quantity'] else ""
+                self.available_label.setText(f"{product['available_quantity']} in store{reserved}")
     
     def update_total(self):
         quantity = self.quantity_input.value()
@@ -1482,7 +1496,12 @@ class CompleteRepairDialog(QDialog):
             'completion_notes': self.notes_input.toPlainText().strip()
         }
         
-        success = self.main_window.db_manager.complete_repair(self.repair_id, completion_data)
+        # Completing takes the parts from stock, which fails if there is not enough
+        try:
+            success = self.main_window.db_manager.complete_repair(self.repair_id, completion_data)
+        except InsufficientStock as e:
+            QMessageBox.warning(self, "Insufficient Stock", str(e))
+            return
         
         if not success:
             QMessageBox.critical(self, "Error", "Failed to complete repair job. Please try again.")
@@ -1502,7 +1521,12 @@ class CompleteRepairDialog(QDialog):
             'completion_notes': self.notes_input.toPlainText().strip()
         }
         
-        success = self.main_window.db_manager.complete_repair(self.repair_id, completion_data)
+        # Completing takes the parts from stock, which fails if there is not enough
+        try:
+            success = self.main_window.db_manager.complete_repair(self.repair_id, completion_data)
+        except InsufficientStock as e:
+            QMessageBox.warning(self, "Insufficient Stock", str(e))
+            return
         
         if not success:
             QMessageBox.critical(self, "Error", "Failed to complete repair job. Please try again.")
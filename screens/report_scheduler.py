@@ -0,0 +1,71 @@
+import threading
+import time
+
+from PyQt5.QtCore import QEvent, QObject, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QApplication
+
+from database.db_manager import DatabaseManager
+from database.precomputed_reports import ReportStore
+
+# How often to look for reports to precompute, and how long the user must
+# have been inactive first, in seconds
+CHECK_INTERVAL = 60
+IDLE_SECONDS = 300
+
+INPUT_EVENTS = {QEvent.KeyPress, QEvent.MouseButtonPress, QEvent.Wheel}
+
+
+class ReportScheduler(QObject):
+    """Precomputes the scheduled reports (see database/precomputed_reports.py)
+    while the application is idle.
+
+    Once the user has not pressed a key or clicked for IDLE_SECONDS, the
+    reports for today's preset ranges that have no current snapshot are
+    computed on a worker thread with its own database connection. Changed data
+    or a new day makes reports stale, so they are computed again at the next
+    idle moment.
+    """
+
+    finished = pyqtSignal(int)  # number of reports computed
+
+    def __init__(self, db_path, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.last_input = time.monotonic()
+        self.thread = None
+        # Created on the worker thread; kept so its analytics engine refreshes incrementally
+        self.store = None
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.check)
+
+    def start(self):
+        QApplication.instance().installEventFilter(self)
+        self.timer.start(CHECK_INTERVAL * 1000)
+
+    def stop(self):
+        self.timer.stop()
+
+    def eventFilter(self, obj, event):
+        if event.type() in INPUT_EVENTS:
+            self.last_input = time.monotonic()
+        return False
+
+    def check(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        if time.monotonic() - self.last_input < IDLE_SECONDS:
+            return
+        self.thread = threading.Thread(target=self.run, name='report-scheduler', daemon=True)
+        self.thread.start()
+
+    def run(self):
+        try:
+            if self.store is None:
+                self.store = ReportStore(DatabaseManager(self.db_path))
+            results = self.store.run(self.store.scheduled())
+        except Exception as e:
+            print(f"Report scheduler: error precomputing reports: {e}")
+            return
+        computed = sum(1 for _, version, _ in results if version is not None)
+        if computed:
+            self.finished.emit(computed)
@@ -1,4 +1,5 @@
 import datetime
+import time
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                              QPushButton, QFrame, QGridLayout, QSpacerItem,
                              QSizePolicy, QTableWidget, QTableWidgetItem,
@@ -9,6 +10,8 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                              QButtonGroup, QDateEdit, QCompleter, QApplication)
 from PyQt5.QtCore import Qt, QSize, pyqtSignal, QTimer, QDate, QModelIndex
 from PyQt5.QtGui import QIcon, QPixmap, QFont, QColor, QStandardItemModel, QStandardItem
+from screens.qr_payload import parse_scanned_code
+from screens.scan_wedge import KeyboardWedgeFilter
 
 class SalesScreen(QWidget):
     def __init__(self, main_window):
@@ -16,8 +19,13 @@ class SalesScreen(QWidget):
         self.main_window = main_window
         self.cart_items = []  # List to store items in the cart
         self.customer = None  # Current customer
+        self.scan_batch = None  # Problems collected while adding a batch of scanned codes
         self.init_ui()
         
+        # Codes typed by a USB barcode scanner go straight to the cart
+        self.wedge = KeyboardWedgeFilter(self)
+        self.wedge.scanned.connect(self.on_wedge_scan)
+        
     def refresh_data(self):
         """Refresh the sales screen data"""
         print("DEBUG: Refreshing sales screen data")
@@ -42,6 +50,17 @@ class SalesScreen(QWidget):
         
         # Update cart summary
         self.update_cart_summary()
+        
+        # Load in-store items so scans are answered from memory
+        self.main_window.item_lookup.warm_in_background()
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.wedge.install()
+    
+    def hideEvent(self, event):
+        self.wedge.uninstall()
+        super().hideEvent(event)
     
     def init_ui(self):
         # Main layout
@@ -203,6 +222,11 @@ class SalesScreen(QWidget):
         
         scan_layout.addLayout(id_layout)
         
+        # Result of the last barcode scanner scan, shown without interrupting scanning
+        self.scan_status_label = QLabel("")
+        self.scan_status_label.setStyleSheet("color: #7f8c8d;")
+        scan_layout.addWidget(self.scan_status_label)
+        
         # Product search results
         results_label = QLabel("Search Results:")
         results_label.setStyleSheet("font-weight: bold;")
@@ -579,7 +603,8 @@ class SalesScreen(QWidget):
     
     def show_qr_scanner(self):
         # Show QR scanner screen
-        self.main_window.show_qr_scanner(callback=self.process_qr_code)
+        self.main_window.show_qr_scanner(callback=self.process_qr_code,
+                                         batch_callback=self.add_scanned_codes)
     
     def process_qr_code(self, qr_data):
         # Process QR code data
@@ -594,54 +619,120 @@ class SalesScreen(QWidget):
         if not product_id_text:
             return
         
-        # Check if it's a product item ID (with format P{product_id}I{item_id})
-        if 'I' in product_id_text and product_id_text.startswith('P'):
-            parts = product_id_text.split('I')
-            if len(parts) == 2 and parts[0].startswith('P'):
-                try:
-                    product_id = int(parts[0][1:])
-                    item_id = int(parts[1])
-                    
-                    # Get product and item details
-                    product = self.main_window.db_manager.get_product(product_id)
-                    product_item = self.main_window.db_manager.get_product_item(item_id)
-                    
-                    if not product or not product_item:
-                        QMessageBox.warning(self, "Product Not Found", "No product found with the given ID.")
-                        return
-                    
-                    if product_item['status'] == 'sold':
-                        QMessageBox.warning(self, "Item Already Sold", "This product item has already been sold.")
-                        return
-                    
-                    # Add to cart
-                    self.add_to_cart(product, quantity=1, product_item_id=item_id)
-                    
-                    # Clear input
-                    self.product_id_input.clear()
-                    return
-                except ValueError:
-                    pass
+        if self.add_product_by_code(product_id_text):
+            # Clear input
+            self.product_id_input.clear()
+    
+    def add_product_by_code(self, product_id_text):
+        """Add the product or product item identified by a typed or scanned code to the cart"""
+        # Item labels: the compact payload, the JSON of older labels or a bare unique ID
+        try:
+            scanned = parse_scanned_code(product_id_text)
+        except ValueError as e:
+            self.cart_warning("Invalid Code", str(e))
+            return False
+        
+        if scanned:
+            return self.add_scanned_item(scanned)
         
         # If not a product item ID, try as regular product ID
         try:
             product_id = int(product_id_text)
-            
-            # Get product details
-            product = self.main_window.db_manager.get_product(product_id)
-            
-            if not product:
-                QMessageBox.warning(self, "Product Not Found", "No product found with the given ID.")
-                return
-            
-            # Add to cart
-            self.add_to_cart(product)
-            
-            # Clear input
-            self.product_id_input.clear()
-            
         except ValueError:
-            QMessageBox.warning(self, "Invalid ID", "Please enter a valid product ID.")
+            self.cart_warning("Invalid ID", "Please enter a valid product ID.")
+            return False
+        
+        # Get product details
+        product = self.main_window.db_manager.get_product(product_id)
+        
+        if not product:
+            self.cart_warning("Product Not Found", "No product found with the given ID.")
+            return False
+        
+        # Add to cart
+        return self.add_to_cart(product)
+    
+    def add_scanned_item(self, scanned):
+        """Add the product item named by a parsed label to the cart"""
+        db_manager = self.main_window.db_manager
+        product_item = self.main_window.item_lookup.get(scanned['unique_id'])
+        
+        if product_item:
+            if product_item['status'] == 'sold':
+                self.cart_warning("Item Already Sold", "This product item has already been sold.")
+                return False
+            
+            # The lookup already carries the product fields the cart needs
+            product = {
+                'id': product_item['product_id'],
+                'name': product_item['product_name'],
+                'selling_price': product_item['selling_price'],
+                'store_quantity': product_item['store_quantity']
+            }
+            return self.add_to_cart(product, quantity=1, product_item_id=product_item['id'])
+        
+        # Some older labels carry an item ID that was never stored, but still
+        # name their product
+        elif scanned['product_id'] is not None:
+            product = db_manager.get_product(scanned['product_id'])
+            if product:
+                return self.add_to_cart(product)
+        
+        self.cart_warning("Product Not Found", "No product found with the given ID.")
+        return False
+    
+    def add_scanned_codes(self, codes):
+        """Add a batch of scanned codes to the cart with a single cart refresh.
+        
+        Problems are collected instead of shown as message boxes so scanning is
+        never interrupted. Returns a (code, error message or None) pair per code.
+        """
+        results = []
+        self.scan_batch = []
+        try:
+            for code in codes:
+                del self.scan_batch[:]
+                try:
+                    added = self.add_product_by_code(code)
+                except Exception as e:
+                    print(f"Error adding scanned code {code}: {e}")
+                    added = False
+                    self.scan_batch.append(str(e))
+                error = None if added else (self.scan_batch[-1] if self.scan_batch else "Not added to cart.")
+                results.append((code, error))
+        finally:
+            self.scan_batch = None
+        
+        self.update_cart_display()
+        return results
+    
+    def on_wedge_scan(self, code):
+        """Add a code typed by a keyboard wedge scanner to the cart"""
+        started = time.perf_counter()
+        _, error = self.add_scanned_codes([code])[0]
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        
+        if error:
+            QApplication.beep()
+            self.scan_status_label.setStyleSheet("color: #e74c3c;")
+            self.scan_status_label.setText(f"{code}: {error}")
+        else:
+            self.scan_status_label.setStyleSheet("color: #27ae60;")
+            self.scan_status_label.setText(f"Added {code} ({elapsed_ms:.0f} ms)")
+    
+    def cart_warning(self, title, message, information=False):
+        # During a scan batch problems are collected rather than shown
+        if self.scan_batch is not None:
+            self.scan_batch.append(message)
+        elif information:
+            QMessageBox.information(self, title, message)
+        else:
+            QMessageBox.warning(self, title, message)
+    
+    def refresh_cart(self):
+        # A scan batch refreshes the cart once when the whole batch is in
+        if self.scan_batch is None:
+            self.update_cart_display()
     
     def search_products(self):
         # Get search text
@@ -673,7 +764,7 @@ class SalesScreen(QWidget):
             self.product_results.setItem(i, 2, price_item)
             
             # Stock
-            stock_item = QTableWidgetItem(str(product['store_quantity']))
+            stock_item = QTableWidgetItem(str(product['available_quantity']))
             self.product_results.setItem(i, 3, stock_item)
             
             # Add to cart button
@@ -696,13 +787,14 @@ class SalesScreen(QWidget):
             self.product_results.setCellWidget(i, 4, add_btn)
     
     def add_to_cart(self, product, quantity=1, product_item_id=None):
-        # Check if we have enough in store
-        if not product_item_id and product['store_quantity'] < quantity:
-            QMessageBox.warning(
-                self, "Insufficient Stock", 
-                f"Only {product['store_quantity']} units available in store."
+        # Check if we have enough in store; stock reserved for repairs is not for sale
+        available = product.get('available_quantity', product['store_quantity'])
+        if not product_item_id and available < quantity:
+            self.cart_warning(
+                "Insufficient Stock", 
+                f"Only {available} units available in store."
             )
-            return
+            return False
         
         # If it's a serialized product, we need to add each item individually
         # Use get() with default value of False to handle missing 'is_serialized' key
@@ -711,8 +803,8 @@ class SalesScreen(QWidget):
             items = self.main_window.db_manager.get_available_product_items(product['id'])
             
             if not items:
-                QMessageBox.warning(self, "No Items Available", "No items available for this product.")
-                return
+                self.cart_warning("No Items Available", "No items available for this product.")
+                return False
             
             # Add first available item
             product_item_id = items[0]['id']
@@ -720,31 +812,32 @@ class SalesScreen(QWidget):
         # Check if product is already in cart
         for item in self.cart_items:
             if item['product_id'] == product['id']:
-                # For serialized products, we can't increase quantity
+                # For serialized products (or a specific item), we can't increase quantity
                 # Use get() with default value of False to handle missing 'is_serialized' key
-                if product.get('is_serialized', False):
+                if product.get('is_serialized', False) or product_item_id:
                     # Check if this specific item is already in cart
                     if product_item_id and item.get('product_item_id') == product_item_id:
-                        QMessageBox.information(
-                            self, "Item Already in Cart", 
-                            "This specific item is already in your cart."
+                        self.cart_warning(
+                            "Item Already in Cart", 
+                            "This specific item is already in your cart.",
+                            information=True
                         )
-                        return
-                else:
+                        return False
+                elif 'product_item_id' not in item:
                     # For non-serialized products, increase quantity
-                    if item['quantity'] + quantity > product['store_quantity']:
-                        QMessageBox.warning(
-                            self, "Quantity Limit", 
-                            f"Cannot add more. Only {product['store_quantity']} available in store."
+                    if item['quantity'] + quantity > available:
+                        self.cart_warning(
+                            "Quantity Limit", 
+                            f"Cannot add more. Only {available} available in store."
                         )
-                        return
+                        return False
                     
                     item['quantity'] += quantity
                     item['total'] = item['price'] * item['quantity']
                     
                     # Update cart display
-                    self.update_cart_display()
-                    return
+                    self.refresh_cart()
+                    return True
         
         # Add new item to cart
         cart_item = {
@@ -762,7 +855,8 @@ class SalesScreen(QWidget):
         self.cart_items.append(cart_item)
         
         # Update cart display
-        self.update_cart_display()
+        self.refresh_cart()
+        return True
     
     def update_cart_display(self):
         # Update cart table
@@ -886,10 +980,10 @@ class SalesScreen(QWidget):
         # Check if we have enough in store
         product = self.main_window.db_manager.get_product(cart_item['product_id'])
         
-        if cart_item['quantity'] >= product['store_quantity']:
+        if cart_item['quantity'] >= product['available_quantity']:
             QMessageBox.warning(
                 self, "Quantity Limit", 
-                f"Cannot add more. Only {product['store_quantity']} available in store."
+                f"Cannot add more. Only {product['available_quantity']} available in store."
             )
             return
         
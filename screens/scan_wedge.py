@@ -0,0 +1,111 @@
+import time
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import Qt, QObject, QEvent, QTimer, pyqtSignal
+from PyQt5.QtGui import QKeyEvent
+
+# USB barcode scanners in keyboard mode ("keyboard wedge") type a whole code
+# in a few milliseconds per character; people rarely manage better than 60 ms
+WEDGE_MAX_INTERVAL_MS = 30
+# Shortest code accepted as a scan; item unique IDs are 14 characters or more
+WEDGE_MIN_LENGTH = 6
+
+
+class KeyboardWedgeFilter(QObject):
+    """Recognise codes typed by a keyboard wedge scanner.
+
+    Installed as an application event filter while `screen` is visible. Each
+    printable keystroke is held back for a moment; when the next one arrives
+    within WEDGE_MAX_INTERVAL_MS it joins a burst, otherwise the held keys
+    are passed on to the widget they were meant for, so normal typing still
+    works. A burst of at least WEDGE_MIN_LENGTH characters ended by Enter,
+    or by the scanner simply stopping, is emitted as `scanned` instead of
+    being typed into whichever widget has focus.
+    """
+
+    scanned = pyqtSignal(str)
+
+    def __init__(self, screen, max_interval_ms=WEDGE_MAX_INTERVAL_MS, min_length=WEDGE_MIN_LENGTH):
+        super().__init__(screen)
+        self.screen = screen
+        self.max_interval = max_interval_ms / 1000
+        self.min_length = min_length
+        self.held = []  # (widget, key, modifiers, text) held back so far
+        self.last_key_time = 0
+        self.replaying = False
+        self.installed = False
+
+        # Fires when no further key follows within the burst interval
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.setInterval(max_interval_ms)
+        self.idle_timer.timeout.connect(self.end_burst)
+
+    def install(self):
+        if not self.installed:
+            QApplication.instance().installEventFilter(self)
+            self.installed = True
+
+    def uninstall(self):
+        if self.installed:
+            QApplication.instance().removeEventFilter(self)
+            self.installed = False
+        self.release()
+
+    def eventFilter(self, obj, event):
+        if event.type() != QEvent.KeyPress or self.replaying:
+            return False
+        # Key events are offered to each parent in turn; only look at the first
+        if obj is not QApplication.focusWidget() or not self.screen.isAncestorOf(obj):
+            return False
+
+        now = time.perf_counter()
+        fast = bool(self.held) and now - self.last_key_time <= self.max_interval
+        self.last_key_time = now
+
+        if event.key() in (Qt.Key_Return, Qt.Key_Enter):
+            if fast and len(self.held) >= self.min_length:
+                self.emit_burst()
+                return True
+            self.release()
+            return False
+
+        text = event.text()
+        if (not text or not text.isprintable() or event.isAutoRepeat()
+                or event.modifiers() & ~(Qt.ShiftModifier | Qt.KeypadModifier)):
+            self.release()
+            return False
+
+        if self.held and not fast:
+            self.release()
+        self.held.append((obj, event.key(), event.modifiers(), text))
+        self.idle_timer.start()
+        return True
+
+    def end_burst(self):
+        # Scanners set up without an Enter suffix just stop typing
+        if len(self.held) >= self.min_length:
+            self.emit_burst()
+        else:
+            self.release()
+
+    def emit_burst(self):
+        self.idle_timer.stop()
+        code = "".join(text for _, _, _, text in self.held)
+        self.held = []
+        self.scanned.emit(code)
+
+    def release(self):
+        """Pass held keys on to the widgets they were typed into"""
+        self.idle_timer.stop()
+        held, self.held = self.held, []
+        self.replaying = True
+        try:
+            for widget, key, modifiers, text in held:
+                try:
+                    QApplication.sendEvent(widget, QKeyEvent(QEvent.KeyPress, key, modifiers, text))
+                except RuntimeError:
+                    # The widget was deleted while its keys were held
+                    pass
+        finally:
+            self.replaying = False
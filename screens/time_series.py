@@ -0,0 +1,117 @@
+import datetime
+import math
+
+import numpy as np
+
+# Narrowest bar worth drawing and the spacing needed between x-axis labels,
+# in logical pixels (charts are laid out at 100 dpi)
+MIN_BAR_WIDTH_PX = 8
+MIN_LABEL_SPACING_PX = 60
+# Points kept per pixel of plot width when downsampling a line
+LINE_POINTS_PER_PX = 0.5
+# Share of the figure width taken up by the plot area
+PLOT_AREA_FRACTION = 0.8
+
+GRANULARITIES = ['day', 'week', 'month']
+
+
+def figure_width_px(figure):
+    """Width of a matplotlib figure in logical pixels"""
+    return figure.get_figwidth() * 100
+
+
+def bucket_count(start_date, end_date, granularity):
+    """Number of day/week/month buckets between two 'yyyy-MM-dd' dates"""
+    start = datetime.datetime.strptime(start_date, '%Y-%m-%d').date()
+    end = datetime.datetime.strptime(end_date, '%Y-%m-%d').date()
+    days = max((end - start).days + 1, 1)
+
+    if granularity == 'day':
+        return days
+    if granularity == 'week':
+        return math.ceil(days / 7)
+    return (end.year - start.year) * 12 + end.month - start.month + 1
+
+
+def max_bars(pixel_width):
+    """How many bars fit in a plot of the given width"""
+    return max(1, int(pixel_width * PLOT_AREA_FRACTION / MIN_BAR_WIDTH_PX))
+
+
+def granularity_for_bars(start_date, end_date, capacity, minimum='day'):
+    """Pick the finest granularity (no finer than minimum) with at most capacity buckets"""
+    for granularity in GRANULARITIES[GRANULARITIES.index(minimum):]:
+        if bucket_count(start_date, end_date, granularity) <= capacity:
+            return granularity
+    return 'month'
+
+
+def choose_granularity(start_date, end_date, pixel_width, minimum='day'):
+    """Pick the finest granularity (no finer than minimum) whose buckets fit as bars"""
+    return granularity_for_bars(start_date, end_date, max_bars(pixel_width), minimum)
+
+
+def possible_granularities(start_date, end_date, minimum='day'):
+    """Every granularity choose_granularity can pick for a date range, whatever the chart width"""
+    # The choice only changes where the capacity crosses a bucket count
+    capacities = {1} | {bucket_count(start_date, end_date, granularity) for granularity in GRANULARITIES}
+    chosen = {granularity_for_bars(start_date, end_date, capacity, minimum) for capacity in capacities}
+    return [granularity for granularity in GRANULARITIES if granularity in chosen]
+
+
+def lttb_indices(x, y, threshold):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last points are always kept; every bucket in between keeps the
+    point forming the largest triangle with the previously kept point and the
+    average of the next bucket, which preserves peaks and troughs.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # threshold - 2 buckets covering every point except the first and last
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    indices = np.empty(threshold, dtype=int)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) -
+                      (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+
+    return indices
+
+
+def downsample_line(values, pixel_width):
+    """Downsample a series plotted against its index to fit pixel_width.
+
+    Returns (x_positions, values) ready to pass to ax.plot.
+    """
+    threshold = max(3, int(pixel_width * PLOT_AREA_FRACTION * LINE_POINTS_PER_PX))
+    x = np.arange(len(values))
+    keep = lttb_indices(x, values, threshold)
+    return x[keep], np.asarray(values, dtype=float)[keep]
+
+
+def tick_indices(count, pixel_width):
+    """Evenly spaced label positions so x-axis labels never overlap"""
+    if count <= 0:
+        return []
+    max_labels = max(2, int(pixel_width * PLOT_AREA_FRACTION / MIN_LABEL_SPACING_PX))
+    step = max(1, math.ceil(count / max_labels))
+    return list(range(0, count, step))
@@ -0,0 +1,104 @@
+import os
+import sys
+import sqlite3
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database.analytics_engine import AnalyticsEngine
+from test_revenue_facts import END_DATE, START_DATE, add_completed_repair, add_sale, make_database
+
+# A range holding none of the sales, which all happen today
+PAST_START_DATE = '2000-01-01'
+PAST_END_DATE = '2000-12-31'
+
+
+def add_expenses(db_manager):
+    for category, amount, date in (('Rent', 5000, '2025-01-01'), ('Tea', 40, '2025-01-02'),
+                                   ('Tea', 35, '2025-02-03'), ('Rent', 5000, '2000-02-01')):
+        db_manager.add_expense({'category': category, 'description': 'Test expense',
+                                'amount': amount, 'date': date})
+
+
+def assert_same(engine, db_manager, start_date, end_date):
+    """Every group-by of the engine equals the matching SQL method"""
+    # get_sales_by_period always takes a date range
+    for period_type in ('day', 'week', 'month') if start_date else ():
+        assert engine.sales_by_period(period_type, start_date, end_date) == \
+            db_manager.get_sales_by_period(period_type, start_date, end_date), period_type
+    assert engine.sales_by_payment_method(start_date, end_date) == \
+        db_manager.get_sales_by_payment_method(start_date, end_date)
+    assert engine.sales_by_category(start_date, end_date) == db_manager.get_sales_by_category(start_date, end_date)
+    assert engine.top_selling_products(start_date, end_date) == \
+        db_manager.get_top_selling_products(start_date, end_date)
+    assert engine.expenses_by_category(start_date, end_date) == \
+        db_manager.get_expenses_by_category(start_date, end_date)
+    assert engine.total_expenses(start_date, end_date) == db_manager.get_total_expenses(start_date, end_date)
+
+    profit = db_manager.get_profit_analysis(start_date, end_date)
+    engine_profit = engine.profit_analysis(start_date, end_date)
+    for key, value in profit.items():
+        assert engine_profit[key] == (value or 0), key
+
+
+def test_matches_sql():
+    db_manager, customer_id, product_id = make_database()
+    add_sale(db_manager, customer_id, product_id)
+    add_sale(db_manager, customer_id, product_id)
+    add_completed_repair(db_manager, customer_id, product_id)
+    add_expenses(db_manager)
+
+    engine = AnalyticsEngine(db_manager)
+    engine.refresh()
+    assert engine.profit_analysis(START_DATE, END_DATE)['num_sales'] == 3
+    assert_same(engine, db_manager, START_DATE, END_DATE)
+    assert_same(engine, db_manager, PAST_START_DATE, PAST_END_DATE)
+    assert_same(engine, db_manager, '2025-01-01', '2025-01-31')
+    assert_same(engine, db_manager, None, None)
+
+
+def test_refresh_adds_new_rows():
+    db_manager, customer_id, product_id = make_database()
+    add_sale(db_manager, customer_id, product_id)
+    engine = AnalyticsEngine(db_manager)
+    engine.refresh()
+
+    add_sale(db_manager, customer_id, product_id)
+    add_completed_repair(db_manager, customer_id, product_id)
+    add_expenses(db_manager)
+    engine.refresh()
+    assert len(engine.fact_ids) == 4
+    assert len(engine.expense_ids) == 4
+    assert_same(engine, db_manager, START_DATE, END_DATE)
+
+    # Nothing new: nothing is loaded twice
+    engine.refresh()
+    assert len(engine.fact_ids) == 4
+    assert_same(engine, db_manager, START_DATE, END_DATE)
+
+
+def test_expense_edit_and_delete_reload():
+    db_manager, customer_id, product_id = make_database()
+    add_expenses(db_manager)
+    engine = AnalyticsEngine(db_manager)
+    engine.refresh()
+    assert engine.total_expenses(START_DATE, END_DATE) == 10075
+
+    # Edited and deleted with plain SQL; the triggers on expenses count the changes
+    conn = sqlite3.connect(db_manager.db_path)
+    conn.execute("UPDATE expenses SET amount = 60, category = 'Snacks' WHERE category = 'Tea' AND amount = 40")
+    conn.execute("DELETE FROM expenses WHERE date = '2000-02-01'")
+    conn.commit()
+    conn.close()
+
+    engine.refresh()
+    assert engine.total_expenses(START_DATE, END_DATE) == 5095
+    assert set(engine.expenses_by_category(START_DATE, END_DATE)) == {'Rent', 'Tea', 'Snacks'}
+    assert_same(engine, db_manager, START_DATE, END_DATE)
+    assert_same(engine, db_manager, PAST_START_DATE, PAST_END_DATE)
+
+
+if __name__ == "__main__":
+    for test in (test_matches_sql, test_refresh_adds_new_rows, test_expense_edit_and_delete_reload):
+        test()
+        print(f"{test.__name__}: ok")
@@ -0,0 +1,95 @@
+import os
+import sys
+import tempfile
+import zipfile
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import DatabaseManager
+from database.invoice_archive import InvoiceArchive
+
+
+def make_archive():
+    """An empty archive and database in a temporary directory"""
+    directory = tempfile.mkdtemp()
+    db_manager = DatabaseManager(os.path.join(directory, 'inventory.db'))
+    db_manager.setup_database()
+    return InvoiceArchive(db_manager, os.path.join(directory, 'archive'))
+
+
+def invoice(invoice_number='INV-1', customer='Asha Rao', phone='9876543210', date='2025-07-11'):
+    return {
+        'invoice_number': invoice_number,
+        'invoice_date': date,
+        'kind': 'sale',
+        'customer': {'name': customer, 'phone': phone},
+        'items': [{'name': 'Brake Cable', 'quantity': 1, 'unit_price': 80}],
+    }
+
+
+def test_same_content_is_stored_once():
+    archive = make_archive()
+
+    # Two renders of one invoice differ in their bytes (the creation date)
+    first = archive.store(invoice(), {'include_gst': True}, b'%PDF-1 first render', 94.4)
+    second = archive.store(invoice(), {'include_gst': True}, b'%PDF-1 second render', 94.4)
+
+    assert first['id'] == second['id']
+    assert first['content_hash'] == second['content_hash']
+    assert len(archive.find(latest_only=False)) == 1
+    objects = [name for _, _, files in os.walk(archive.objects_dir) for name in files]
+    assert len(objects) == 1
+    assert archive.get('INV-1') == b'%PDF-1 first render'
+
+
+def test_latest_version_after_saving_old_content_again():
+    archive = make_archive()
+
+    archive.store(invoice(), {'include_gst': True}, b'%PDF-1 with GST', 94.4)
+    archive.store(invoice(), {'include_gst': False}, b'%PDF-1 without GST', 80)
+    assert archive.get('INV-1') == b'%PDF-1 without GST'
+
+    # Saving the first version again makes it the latest one
+    archive.store(invoice(), {'include_gst': True}, b'%PDF-1 with GST again', 94.4)
+    assert archive.get('INV-1') == b'%PDF-1 with GST'
+    assert [entry['amount'] for entry in archive.find(invoice_number='INV-1')] == [94.4]
+    assert len(archive.find(invoice_number='INV-1', latest_only=False)) == 2
+
+
+def test_find_filters():
+    archive = make_archive()
+    archive.store(invoice('INV-1', 'Asha Rao', '9876543210', '2025-07-11'), {}, b'%PDF-1 a', 80)
+    archive.store(invoice('INV-2', 'Ravi Kumar', '9123456789', '2025-07-12'), {}, b'%PDF-1 b', 500)
+    archive.store(invoice('INV-3', 'asha menon', '9000000000', '2025-07-13'), {}, b'%PDF-1 c', 1200)
+
+    def numbers(**filters):
+        return [entry['invoice_number'] for entry in archive.find(**filters)]
+
+    assert numbers() == ['INV-1', 'INV-2', 'INV-3']
+    assert numbers(customer='asha') == ['INV-1', 'INV-3']
+    assert numbers(customer='9123') == ['INV-2']
+    assert numbers(start_date='2025-07-12') == ['INV-2', 'INV-3']
+    assert numbers(end_date='2025-07-12') == ['INV-1', 'INV-2']
+    assert numbers(min_amount=100, max_amount=1000) == ['INV-2']
+    assert archive.get('INV-4') is None
+
+
+def test_export_zip():
+    archive = make_archive()
+    archive.store(invoice('INV-1'), {}, b'%PDF-1 a', 80)
+    archive.store(invoice('INV/2'), {}, b'%PDF-1 b', 500)
+
+    zip_path = os.path.join(archive.directory, 'export.zip')
+    assert archive.export_zip(zip_path, archive.find()) == 2
+    with zipfile.ZipFile(zip_path) as exported:
+        assert sorted(exported.namelist()) == ['INV-1.pdf', 'INV_2.pdf']
+        assert exported.read('INV_2.pdf') == b'%PDF-1 b'
+    assert not os.path.exists(zip_path + '.part')
+
+
+if __name__ == "__main__":
+    for test in (test_same_content_is_stored_once, test_latest_version_after_saving_old_content_again,
+                 test_find_filters, test_export_zip):
+        test()
+        print(f"{test.__name__}: ok")
@@ -0,0 +1,105 @@
+import os
+import sys
+import tempfile
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from screens.invoice_cache import InvoiceCache, invoice_key
+
+
+class CountingRenderer:
+    """Stands in for InvoiceRenderer and counts its renders"""
+
+    def __init__(self, invoice):
+        self.invoice = invoice
+        self.renders = 0
+
+    def options(self, include_gst=None, invoice_number=None, invoice_date=None):
+        return {
+            'include_gst': bool(include_gst),
+            'invoice_number': invoice_number or self.invoice['invoice_number'],
+            'invoice_date': invoice_date or self.invoice['invoice_date'],
+        }
+
+    def render(self, include_gst, invoice_number, invoice_date):
+        self.renders += 1
+        return f"<p>{invoice_number} {invoice_date} gst={include_gst} total={self.invoice['total']}</p>"
+
+
+def invoice(total=80):
+    return {'invoice_number': 'INV-1', 'invoice_date': '2025-07-11', 'total': total}
+
+
+def test_memory_lru():
+    cache = InvoiceCache(memory_size=2)
+    cache.put('a.html', b'a')
+    cache.put('b.html', b'b')
+    assert cache.get('a.html') == b'a'
+
+    # b is now the least recently used, so it makes way for c
+    cache.put('c.html', b'c')
+    assert cache.get('b.html') is None
+    assert cache.get('a.html') == b'a'
+    assert cache.get('c.html') == b'c'
+    assert cache.hits['memory'] == 3
+
+
+def test_disk_eviction():
+    disk_dir = tempfile.mkdtemp()
+    cache = InvoiceCache(memory_size=1, disk_dir=disk_dir, disk_limit=250)
+    for name in ('a.pdf', 'b.pdf'):
+        cache.put(name, b'x' * 100)
+
+    # Reading a moves it to the end, so b is the one deleted
+    assert cache.get('a.pdf') == b'x' * 100
+    cache.put('c.pdf', b'x' * 100)
+    assert sorted(os.listdir(disk_dir)) == ['a.pdf', 'c.pdf']
+    assert cache.disk_bytes == 200
+
+    # A file larger than the limit on its own is still kept
+    cache.put('d.pdf', b'x' * 300)
+    assert os.listdir(disk_dir) == ['d.pdf']
+
+
+def test_disk_hit_from_new_instance():
+    disk_dir = tempfile.mkdtemp()
+    InvoiceCache(disk_dir=disk_dir).put('a.html', b'<p>a</p>')
+
+    cache = InvoiceCache(disk_dir=disk_dir)
+    assert cache.get('a.html') == b'<p>a</p>'
+    assert cache.hits == {'memory': 0, 'disk': 1, 'rendered': 0}
+    assert cache.get('a.html') == b'<p>a</p>'
+    assert cache.hits['memory'] == 1
+    assert not [name for name in os.listdir(disk_dir) if name.endswith('.part')]
+
+
+def test_html_renders_once_per_content():
+    cache = InvoiceCache()
+    renderer = CountingRenderer(invoice())
+
+    html = cache.html(renderer, include_gst=True)
+    assert cache.html(renderer, include_gst=True) == html
+    assert renderer.renders == 1
+
+    # Other options, or a changed invoice, are rendered afresh
+    assert 'gst=False' in cache.html(renderer, include_gst=False)
+    assert renderer.renders == 2
+    changed = CountingRenderer(invoice(total=95))
+    assert 'total=95' in cache.html(changed, include_gst=True)
+    assert changed.renders == 1
+    assert cache.hits['rendered'] == 3
+
+
+def test_invoice_key():
+    options = {'include_gst': True}
+    assert invoice_key(invoice(), options) == invoice_key(invoice(), dict(options))
+    assert invoice_key(invoice(), options) != invoice_key(invoice(total=95), options)
+    assert invoice_key(invoice(), options) != invoice_key(invoice(), {'include_gst': False})
+
+
+if __name__ == "__main__":
+    for test in (test_memory_lru, test_disk_eviction, test_disk_hit_from_new_instance,
+                 test_html_renders_once_per_content, test_invoice_key):
+        test()
+        print(f"{test.__name__}: ok")
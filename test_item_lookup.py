@@ -0,0 +1,98 @@
+import os
+import sys
+import tempfile
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import DatabaseManager
+from database.item_lookup import ItemLookupCache
+
+UNIQUE_IDS = ['P1I1-010A389F', 'P1I2-7C21B044']
+
+
+def make_database():
+    """A fresh database with one product and two of its items in the store"""
+    db_path = os.path.join(tempfile.mkdtemp(), 'inventory.db')
+    db_manager = DatabaseManager(db_path)
+    db_manager.setup_database()
+
+    product_id = db_manager.add_product({
+        'name': 'Brake Cable',
+        'description': 'Test part',
+        'category': 'Parts',
+        'cost_price': 50,
+        'selling_price': 80,
+        'max_discount': 0,
+        'warehouse_quantity': 0,
+        'min_stock_level': 1
+    })
+    db_manager.add_product_items(product_id, 2, unique_ids=UNIQUE_IDS)
+    return db_manager, product_id
+
+
+def test_warm_then_memory_hits():
+    db_manager, product_id = make_database()
+    cache = ItemLookupCache(db_manager)
+    cache.warm()
+
+    item = cache.get(UNIQUE_IDS[0])
+    assert item['product_id'] == product_id
+    assert item['product_name'] == 'Brake Cable'
+    assert item['selling_price'] == 80
+    assert cache.hits == {'memory': 1, 'database': 0}
+
+    # Scanned with caps lock on
+    assert cache.get(UNIQUE_IDS[1].lower())['unique_id'] == UNIQUE_IDS[1]
+    assert cache.hits == {'memory': 2, 'database': 0}
+
+    # Callers get their own copy
+    item['status'] = 'sold'
+    assert cache.get(UNIQUE_IDS[0])['status'] == 'in_store'
+
+
+def test_database_fallback():
+    db_manager, product_id = make_database()
+    cache = ItemLookupCache(db_manager)
+
+    # Not warmed: the first lookup reads the database, the second is kept
+    assert cache.get(UNIQUE_IDS[0].lower())['unique_id'] == UNIQUE_IDS[0]
+    assert cache.get(UNIQUE_IDS[0])['unique_id'] == UNIQUE_IDS[0]
+    assert cache.hits == {'memory': 1, 'database': 1}
+    assert cache.warm_thread is None
+
+    assert cache.get('P9I9-00000000') is None
+    assert cache.hits['database'] == 2
+
+
+def test_write_invalidates():
+    db_manager, product_id = make_database()
+    cache = ItemLookupCache(db_manager)
+    cache.warm()
+    item_id = cache.get(UNIQUE_IDS[0])['id']
+
+    # Sold elsewhere: the cached copy is dropped and read again
+    db_manager.update_product_item_status(item_id, 'sold')
+    assert cache.get(UNIQUE_IDS[0])['status'] == 'sold'
+    assert cache.hits['database'] == 1
+
+    # And the cache warms itself again in the background
+    cache.warm_thread.join()
+    assert cache.get(UNIQUE_IDS[1])['status'] == 'in_store'
+    assert cache.hits['memory'] == 2
+
+
+def test_clear():
+    db_manager, product_id = make_database()
+    cache = ItemLookupCache(db_manager)
+    cache.warm()
+    cache.clear()
+    assert cache.items == {}
+    assert cache.get(UNIQUE_IDS[0])['unique_id'] == UNIQUE_IDS[0]
+    assert cache.hits['database'] == 1
+
+
+if __name__ == "__main__":
+    for test in (test_warm_then_memory_hits, test_database_fallback, test_write_invalidates, test_clear):
+        test()
+        print(f"{test.__name__}: ok")
@@ -0,0 +1,134 @@
+import os
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import DatabaseManager
+from screens.print_spooler import MAX_ATTEMPTS, RETRY_DELAYS, PrintSpooler
+
+
+class FlakySpooler(PrintSpooler):
+    """A spooler with a job kind that fails a given number of times"""
+
+    def __init__(self, db_manager, failures):
+        super().__init__(db_manager, None, None, workers=0)
+        self.failures = failures
+        self.calls = 0
+        self.changes = []
+        self.job_changed.connect(self.changes.append)
+
+    def run_flaky(self, params, cancel_event, progress):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError(f"printer offline ({self.calls})")
+        return params['path']
+
+
+def make_spooler(failures):
+    db_path = os.path.join(tempfile.mkdtemp(), 'inventory.db')
+    db_manager = DatabaseManager(db_path)
+    db_manager.setup_database()
+    spooler = FlakySpooler(db_manager, failures)
+    job_id = spooler.submit('flaky', "Flaky job", {'path': 'out.pdf'})
+    return spooler, job_id
+
+
+def job(spooler, job_id):
+    return next(row for row in spooler.db_manager.get_print_jobs() if row['id'] == job_id)
+
+
+def run_due(spooler, now):
+    """Run the job that is due at now, as a worker would. Returns False if none was due"""
+    claimed = spooler.db_manager.claim_print_job(now)
+    if claimed is None:
+        return False
+    spooler.run_job(claimed)
+    return True
+
+
+def next_attempt_at(spooler, job_id):
+    spooler.db_manager.connect()
+    row = spooler.db_manager.cursor.execute(
+        "SELECT next_attempt_at FROM print_jobs WHERE id = ?", (job_id,)).fetchone()
+    spooler.db_manager.close()
+    return row[0]
+
+
+def test_retry_after_delays_then_fail():
+    spooler, job_id = make_spooler(failures=MAX_ATTEMPTS)
+    now = time.time()
+
+    for attempt, delay in enumerate(RETRY_DELAYS, start=1):
+        before = time.time()
+        assert run_due(spooler, now)
+        assert job(spooler, job_id)['status'] == 'queued'
+        assert job(spooler, job_id)['attempts'] == attempt
+        assert job(spooler, job_id)['error'] == f"printer offline ({attempt})"
+
+        # Not retried before its delay has passed
+        due = next_attempt_at(spooler, job_id)
+        assert before + delay <= due <= time.time() + delay
+        assert not run_due(spooler, due - 1)
+        now = due
+
+    # The last attempt fails for good
+    assert run_due(spooler, now)
+    assert job(spooler, job_id)['status'] == 'failed'
+    assert job(spooler, job_id)['attempts'] == MAX_ATTEMPTS
+    assert not run_due(spooler, now + 3600)
+    assert spooler.calls == MAX_ATTEMPTS
+    assert [change['status'] for change in spooler.changes if change['id'] == job_id][-1] == 'failed'
+
+
+def test_success_after_retry():
+    spooler, job_id = make_spooler(failures=1)
+    assert run_due(spooler, time.time())
+    assert run_due(spooler, time.time() + RETRY_DELAYS[0] + 1)
+
+    row = job(spooler, job_id)
+    assert row['status'] == 'done'
+    assert row['result'] == 'out.pdf'
+    assert row['attempts'] == 2
+
+
+def test_manual_retry_starts_over():
+    spooler, job_id = make_spooler(failures=MAX_ATTEMPTS)
+    now = time.time()
+    while run_due(spooler, now):
+        now += max(RETRY_DELAYS) + 1
+    assert job(spooler, job_id)['status'] == 'failed'
+
+    # Queued at once with a fresh set of attempts
+    assert spooler.retry(job_id)
+    assert job(spooler, job_id)['attempts'] == 0
+    assert run_due(spooler, time.time())
+    assert job(spooler, job_id)['status'] == 'done'
+    assert not spooler.retry(job_id)
+
+
+def test_cancel_queued():
+    spooler, job_id = make_spooler(failures=0)
+    assert spooler.cancel(job_id)
+    assert job(spooler, job_id)['status'] == 'cancelled'
+    assert not run_due(spooler, time.time())
+    assert spooler.changes[-1] == {'id': job_id, 'status': 'cancelled'}
+
+
+def test_interrupted_jobs_are_queued_again():
+    spooler, job_id = make_spooler(failures=0)
+    assert spooler.db_manager.claim_print_job(time.time())['id'] == job_id
+
+    # As if the application stopped while the job was running
+    assert spooler.db_manager.reset_running_print_jobs() == 1
+    assert run_due(spooler, time.time())
+    assert job(spooler, job_id)['status'] == 'done'
+
+
+if __name__ == "__main__":
+    for test in (test_retry_after_delays_then_fail, test_success_after_retry, test_manual_retry_starts_over,
+                 test_cancel_queued, test_interrupted_jobs_are_queued_again):
+        test()
+        print(f"{test.__name__}: ok")
@@ -0,0 +1,71 @@
+import os
+import sys
+import tempfile
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from screens.qr_images import QRImageCache, render_qr_png
+
+UNIQUE_IDS = ['P1I1-010A389F', 'P1I2-7C21B044', 'P2I1-9E3D5A10']
+
+
+def test_same_image_as_rendered():
+    cache = QRImageCache()
+    png = cache.png(UNIQUE_IDS[0])
+    assert png.startswith(b'\x89PNG')
+    assert png == render_qr_png(UNIQUE_IDS[0])
+    assert cache.png(UNIQUE_IDS[0]) is png
+    assert cache.hits == {'memory': 1, 'disk': 0, 'rendered': 1}
+
+
+def test_memory_lru():
+    cache = QRImageCache(memory_size=2)
+    for unique_id in UNIQUE_IDS:
+        cache.png(unique_id)
+    assert list(cache.memory) == UNIQUE_IDS[1:]
+
+    # The oldest one is rendered again
+    cache.png(UNIQUE_IDS[0])
+    assert cache.hits['rendered'] == 4
+    assert list(cache.memory) == [UNIQUE_IDS[2], UNIQUE_IDS[0]]
+
+
+def test_disk_eviction():
+    disk_dir = tempfile.mkdtemp()
+    # Room for any two of the images, not three
+    sizes = sorted(len(render_qr_png(unique_id)) for unique_id in UNIQUE_IDS)
+    limit = sizes[1] + sizes[2]
+    cache = QRImageCache(memory_size=1, disk_dir=disk_dir, disk_limit=limit)
+    cache.png(UNIQUE_IDS[0])
+    cache.png(UNIQUE_IDS[1])
+
+    # Reading the first one from disk makes the second the least recently used
+    cache.png(UNIQUE_IDS[0])
+    assert cache.hits['disk'] == 1
+    cache.png(UNIQUE_IDS[2])
+    assert sorted(os.listdir(disk_dir)) == sorted(f"{unique_id}.png" for unique_id in (UNIQUE_IDS[0], UNIQUE_IDS[2]))
+    assert cache.disk_bytes <= limit
+
+
+def test_disk_hit_from_new_instance():
+    disk_dir = tempfile.mkdtemp()
+    png = QRImageCache(disk_dir=disk_dir).png(UNIQUE_IDS[0])
+
+    cache = QRImageCache(disk_dir=disk_dir)
+    assert cache.png(UNIQUE_IDS[0]) == png
+    assert cache.hits == {'memory': 0, 'disk': 1, 'rendered': 0}
+
+
+def test_save():
+    path = os.path.join(tempfile.mkdtemp(), 'label.png')
+    QRImageCache().save(UNIQUE_IDS[0], path)
+    with open(path, 'rb') as f:
+        assert f.read() == render_qr_png(UNIQUE_IDS[0])
+
+
+if __name__ == "__main__":
+    for test in (test_same_image_as_rendered, test_memory_lru, test_disk_eviction,
+                 test_disk_hit_from_new_instance, test_save):
+        test()
+        print(f"{test.__name__}: ok")
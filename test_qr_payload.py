@@ -0,0 +1,91 @@
+import os
+import sys
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from screens.qr_payload import (CHECK_ALPHABET, check_character, encode_item_payload,
+                                legacy_check_character, make_qr, parse_scanned_code)
+
+UNIQUE_ID = 'P1I1-010A389F'
+
+
+def test_check_character_catches_single_errors():
+    check = check_character(UNIQUE_ID)
+
+    # Every other character in every position
+    for position, original in enumerate(UNIQUE_ID):
+        for char in CHECK_ALPHABET:
+            if char != original:
+                changed = UNIQUE_ID[:position] + char + UNIQUE_ID[position + 1:]
+                assert check_character(changed) != check, changed
+
+    # Every pair of different neighbours swapped
+    for position in range(len(UNIQUE_ID) - 1):
+        first, second = UNIQUE_ID[position], UNIQUE_ID[position + 1]
+        if first != second:
+            swapped = UNIQUE_ID[:position] + second + first + UNIQUE_ID[position + 2:]
+            assert check_character(swapped) != check, swapped
+
+    # Values 31 apart, which the version 1 check could not tell apart
+    assert len({check_character(text) for text in ('P1I1-010A389F', 'P1I1-V10A389F', 'P1I1-01VA389F')}) == 3
+
+
+def test_check_character_ignores_case():
+    assert check_character(UNIQUE_ID.lower()) == check_character(UNIQUE_ID)
+    try:
+        check_character('P1I1:010A389F')
+        assert False, "a colon cannot be covered by the check"
+    except ValueError:
+        pass
+
+
+def test_compact_payload_round_trip():
+    payload = encode_item_payload(UNIQUE_ID)
+    assert payload == f"IT2:{UNIQUE_ID}*{check_character(UNIQUE_ID)}"
+    assert parse_scanned_code(payload) == {'unique_id': UNIQUE_ID, 'product_id': None}
+    assert parse_scanned_code(f"  {payload}\n") == {'unique_id': UNIQUE_ID, 'product_id': None}
+
+    # Without a check character it is taken as it is
+    assert parse_scanned_code(encode_item_payload(UNIQUE_ID, check=False))['unique_id'] == UNIQUE_ID
+
+    # Small enough for a version 2 code at level H, in alphanumeric mode
+    assert make_qr(payload).version == 2
+
+
+def test_failed_check_is_an_error():
+    payload = encode_item_payload(UNIQUE_ID).replace('010A', '01OA')
+    try:
+        parse_scanned_code(payload)
+        assert False, "a misread payload should fail its check"
+    except ValueError:
+        pass
+
+
+def test_version_1_labels():
+    payload = f"IT1:{UNIQUE_ID}*{legacy_check_character(UNIQUE_ID)}"
+    assert parse_scanned_code(payload) == {'unique_id': UNIQUE_ID, 'product_id': None}
+
+
+def test_legacy_formats():
+    # JSON of older labels
+    assert parse_scanned_code('{"item_id": "p1i1-010a389f", "product_id": 1, "name": "Brake Cable"}') == \
+        {'unique_id': 'p1i1-010a389f', 'product_id': 1}
+    assert parse_scanned_code('{"name": "Brake Cable"}') is None
+    assert parse_scanned_code('{not json') is None
+
+    # Bare unique IDs, in either case
+    assert parse_scanned_code(UNIQUE_ID) == {'unique_id': UNIQUE_ID, 'product_id': None}
+    assert parse_scanned_code(UNIQUE_ID.lower()) == {'unique_id': UNIQUE_ID.lower(), 'product_id': None}
+
+    # Anything else, such as a product ID, is not an item
+    assert parse_scanned_code('42') is None
+    assert parse_scanned_code('IT9:SOMETHING') is None
+
+
+if __name__ == "__main__":
+    for test in (test_check_character_catches_single_errors, test_check_character_ignores_case,
+                 test_compact_payload_round_trip, test_failed_check_is_an_error, test_version_1_labels,
+                 test_legacy_formats):
+        test()
+        print(f"{test.__name__}: ok")
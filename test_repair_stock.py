@@ -0,0 +1,202 @@
+import os
+import sys
+import sqlite3
+import tempfile
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import DatabaseManager, InsufficientStock
+
+
+def make_database(store_quantity=5):
+    """A fresh database with one customer and one part in stock"""
+    db_path = os.path.join(tempfile.mkdtemp(), 'inventory.db')
+    db_manager = DatabaseManager(db_path)
+    db_manager.setup_database()
+
+    customer_id = db_manager.add_customer({'name': 'Stock Test Customer', 'phone': '9999999999'})
+    product_id = db_manager.add_product({
+        'name': 'Brake Cable',
+        'description': 'Test part',
+        'category': 'Parts',
+        'cost_price': 50,
+        'selling_price': 80,
+        'max_discount': 0,
+        'warehouse_quantity': 0,
+        'min_stock_level': 1
+    })
+    set_store_quantity(db_manager, product_id, store_quantity)
+    return db_manager, customer_id, product_id
+
+
+def set_store_quantity(db_manager, product_id, quantity):
+    conn = sqlite3.connect(db_manager.db_path)
+    conn.execute("UPDATE products SET store_quantity = ? WHERE id = ?", (quantity, product_id))
+    conn.commit()
+    conn.close()
+
+
+def repair_data(customer_id, parts, status='pending'):
+    return {
+        'customer_id': customer_id,
+        'product_description': 'Test Bicycle',
+        'issue_description': 'Brakes',
+        'status': status,
+        'parts': parts
+    }
+
+
+def part(product_id, quantity, part_id=None):
+    data = {'product_id': product_id, 'quantity': quantity, 'unit_price': 80}
+    if part_id is not None:
+        data['id'] = part_id
+    return data
+
+
+def stock(db_manager, product_id):
+    """(store quantity, reserved quantity) of a product"""
+    product = db_manager.get_product(product_id)
+    return product['store_quantity'], product['reserved_quantity']
+
+
+def create_repair(db_manager, customer_id, product_id, quantity):
+    repair_id = db_manager.create_repair_job(repair_data(customer_id, [part(product_id, quantity)]))
+    part_id = db_manager.get_repair_parts(repair_id)[0]['id']
+    return repair_id, part_id
+
+
+def test_reserve():
+    db_manager, customer_id, product_id = make_database()
+    create_repair(db_manager, customer_id, product_id, 2)
+
+    # Reserved, not taken from the store
+    assert stock(db_manager, product_id) == (5, 2)
+    assert db_manager.get_product(product_id)['available_quantity'] == 3
+
+
+def test_update_diff():
+    db_manager, customer_id, product_id = make_database()
+    repair_id, part_id = create_repair(db_manager, customer_id, product_id, 2)
+
+    assert db_manager.update_repair(repair_id, repair_data(customer_id, [part(product_id, 4, part_id)]))
+    assert stock(db_manager, product_id) == (5, 4)
+
+    assert db_manager.update_repair(repair_id, repair_data(customer_id, [part(product_id, 1, part_id)]))
+    assert stock(db_manager, product_id) == (5, 1)
+
+    assert db_manager.update_repair(repair_id, repair_data(customer_id, []))
+    assert stock(db_manager, product_id) == (5, 0)
+
+
+def test_overdraw():
+    db_manager, customer_id, product_id = make_database()
+    repair_id, part_id = create_repair(db_manager, customer_id, product_id, 2)
+
+    # A second job cannot reserve more than is left
+    try:
+        db_manager.add_repair(repair_data(customer_id, [part(product_id, 4)]))
+        assert False, "reserving more than is available should fail"
+    except InsufficientStock:
+        pass
+    assert len(db_manager.get_all_repairs()) == 1
+
+    # Nor can the first one grow past the store quantity; nothing is changed
+    try:
+        db_manager.update_repair(repair_id, repair_data(customer_id, [part(product_id, 6, part_id)]))
+        assert False, "reserving more than is available should fail"
+    except InsufficientStock:
+        pass
+    assert stock(db_manager, product_id) == (5, 2)
+    assert db_manager.get_repair_parts(repair_id)[0]['quantity'] == 2
+
+
+def test_complete():
+    db_manager, customer_id, product_id = make_database()
+    repair_id, part_id = create_repair(db_manager, customer_id, product_id, 2)
+
+    assert db_manager.complete_repair(repair_id, {'service_charge': 100, 'payment_method': 'Cash'})
+
+    # The reservation became a consumption
+    assert stock(db_manager, product_id) == (3, 0)
+    assert db_manager.get_repair(repair_id)['status'] == 'completed'
+
+    # Changing the parts of the closed job moves only the difference
+    assert db_manager.update_repair(repair_id, repair_data(customer_id, [part(product_id, 3, part_id)], 'completed'))
+    assert stock(db_manager, product_id) == (2, 0)
+
+
+def test_complete_without_stock():
+    db_manager, customer_id, product_id = make_database(store_quantity=1)
+
+    # A job whose parts were never reserved, as if saved by an older version
+    conn = sqlite3.connect(db_manager.db_path)
+    repair_id = conn.execute('''
+    INSERT INTO repair_jobs (customer_id, product_description, issue_description, status)
+    VALUES (?, 'Old Bicycle', 'Brakes', 'in_progress')
+    ''', (customer_id,)).lastrowid
+    conn.execute('''
+    INSERT INTO repair_parts (repair_job_id, product_id, quantity, unit_price, total_price)
+    VALUES (?, ?, 2, 80, 160)
+    ''', (repair_id, product_id))
+    conn.commit()
+    conn.close()
+
+    try:
+        db_manager.complete_repair(repair_id, {'service_charge': 100})
+        assert False, "completing without enough stock should fail"
+    except InsufficientStock:
+        pass
+    assert db_manager.get_repair(repair_id)['status'] == 'in_progress'
+    assert stock(db_manager, product_id) == (1, 0)
+
+
+def test_create_closed():
+    db_manager, customer_id, product_id = make_database()
+    repair_id = db_manager.create_repair_job(repair_data(customer_id, [part(product_id, 1)], 'completed'))
+
+    # Taken from the store at once, not reserved
+    assert stock(db_manager, product_id) == (4, 0)
+
+    # And given back when the job is reopened
+    assert db_manager.update_repair_status(repair_id, 'pending')
+    assert stock(db_manager, product_id) == (5, 1)
+
+
+def test_reopen():
+    db_manager, customer_id, product_id = make_database()
+    repair_id, part_id = create_repair(db_manager, customer_id, product_id, 2)
+    assert db_manager.complete_repair(repair_id, {'service_charge': 100})
+
+    # The parts go back to the store and are reserved again
+    assert db_manager.update_repair_status(repair_id, 'in_progress')
+    assert stock(db_manager, product_id) == (5, 2)
+
+
+def test_reopen_job_closed_before_reservations():
+    db_manager, customer_id, product_id = make_database()
+
+    # Completed by an older version, which never took its parts from stock
+    conn = sqlite3.connect(db_manager.db_path)
+    repair_id = conn.execute('''
+    INSERT INTO repair_jobs (customer_id, product_description, issue_description, status)
+    VALUES (?, 'Old Bicycle', 'Brakes', 'completed')
+    ''', (customer_id,)).lastrowid
+    conn.execute('''
+    INSERT INTO repair_parts (repair_job_id, product_id, quantity, unit_price, total_price)
+    VALUES (?, ?, 2, 80, 160)
+    ''', (repair_id, product_id))
+    conn.commit()
+    conn.close()
+    db_manager.setup_database()
+
+    # Reopening gives back nothing, so no stock appears from nowhere
+    assert db_manager.update_repair_status(repair_id, 'pending')
+    assert stock(db_manager, product_id) == (5, 2)
+
+
+if __name__ == "__main__":
+    for test in (test_reserve, test_update_diff, test_overdraw, test_complete,
+                 test_complete_without_stock, test_create_closed, test_reopen, test_reopen_job_closed_before_reservations):
+        test()
+        print(f"{test.__name__}: ok")
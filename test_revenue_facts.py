@@ -0,0 +1,231 @@
+import os
+import sys
+import sqlite3
+import tempfile
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import DatabaseManager, REPAIR_SERVICE_CATEGORY
+from database.analytics_engine import AnalyticsEngine
+
+# Wide enough to hold every fact, whatever the clock says
+START_DATE = '2000-01-01'
+END_DATE = '2100-01-01'
+
+
+def make_database():
+    """A fresh database with one customer and one part in stock"""
+    db_path = os.path.join(tempfile.mkdtemp(), 'inventory.db')
+    db_manager = DatabaseManager(db_path)
+    db_manager.setup_database()
+
+    customer_id = db_manager.add_customer({'name': 'Revenue Test Customer', 'phone': '9999999999'})
+    product_id = db_manager.add_product({
+        'name': 'Brake Cable',
+        'description': 'Test part',
+        'category': 'Parts',
+        'cost_price': 50,
+        'selling_price': 80,
+        'max_discount': 0,
+        'warehouse_quantity': 0,
+        'min_stock_level': 1
+    })
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE products SET store_quantity = 10 WHERE id = ?", (product_id,))
+    conn.commit()
+    conn.close()
+    return db_manager, customer_id, product_id
+
+
+def add_sale(db_manager, customer_id, product_id):
+    """A cash sale of one part at 80"""
+    sale_id, _ = db_manager.create_sale({
+        'customer_id': customer_id,
+        'total_amount': 80,
+        'discount_amount': 0,
+        'tax_amount': 0,
+        'final_amount': 80,
+        'payment_method': 'Cash',
+        'include_gst': 0,
+        'created_by': None
+    }, [{
+        'product_id': product_id,
+        'quantity': 1,
+        'unit_price': 80,
+        'discount_percentage': 0,
+        'total_price': 80
+    }])
+    return sale_id
+
+
+def add_completed_repair(db_manager, customer_id, product_id):
+    """A repair using two parts at 80, completed with a service charge of 100"""
+    repair_id = db_manager.create_repair_job({
+        'customer_id': customer_id,
+        'product_description': 'Test Bicycle',
+        'issue_description': 'Brakes',
+        'status': 'in_progress',
+        'parts': [{'product_id': product_id, 'quantity': 2, 'unit_price': 80}]
+    })
+    assert db_manager.complete_repair(repair_id, {'service_charge': 100, 'payment_method': 'UPI'})
+    return repair_id
+
+
+def repair_facts(db_manager, repair_id):
+    conn = sqlite3.connect(db_manager.db_path)
+    conn.row_factory = sqlite3.Row
+    rows = [dict(row) for row in conn.execute('''
+    SELECT line_type, product_id, category, quantity, amount, cost, payment_method
+    FROM revenue_facts WHERE source = 'repair' AND source_id = ? ORDER BY id
+    ''', (repair_id,))]
+    conn.close()
+    return rows
+
+
+def assert_engine_matches(db_manager):
+    """The in-memory engine and the dashboard snapshot agree with the SQL methods"""
+    engine = AnalyticsEngine(db_manager)
+    engine.refresh()
+    profit = db_manager.get_profit_analysis(START_DATE, END_DATE)
+    snapshot = db_manager.get_dashboard_snapshot(START_DATE, END_DATE, 'month')
+
+    for key in ('total_revenue', 'total_cost', 'num_sales', 'num_items_sold', 'repair_revenue'):
+        assert engine.profit_analysis(START_DATE, END_DATE)[key] == (profit[key] or 0), key
+        assert (snapshot['profit'][key] or 0) == (profit[key] or 0), key
+    assert engine.sales_by_category(START_DATE, END_DATE) == db_manager.get_sales_by_category(START_DATE, END_DATE)
+    assert engine.sales_by_period('month', START_DATE, END_DATE) == \
+        db_manager.get_sales_by_period('month', START_DATE, END_DATE)
+    assert engine.sales_by_payment_method(START_DATE, END_DATE) == \
+        db_manager.get_sales_by_payment_method(START_DATE, END_DATE)
+    return profit
+
+
+def test_fact_totals():
+    db_manager, customer_id, product_id = make_database()
+    add_sale(db_manager, customer_id, product_id)
+    repair_id = add_completed_repair(db_manager, customer_id, product_id)
+
+    # The repair's parts at their cost price, and its service charge
+    assert repair_facts(db_manager, repair_id) == [
+        {'line_type': 'part', 'product_id': product_id, 'category': 'Parts', 'quantity': 2,
+         'amount': 160, 'cost': 100, 'payment_method': 'UPI'},
+        {'line_type': 'service', 'product_id': None, 'category': REPAIR_SERVICE_CATEGORY, 'quantity': 1,
+         'amount': 100, 'cost': 0, 'payment_method': 'UPI'},
+    ]
+
+    profit = assert_engine_matches(db_manager)
+    assert profit['total_revenue'] == 80 + 160 + 100
+    assert profit['total_cost'] == 50 + 100
+    assert profit['repair_revenue'] == 260
+    assert profit['num_sales'] == 2
+    assert profit['num_items_sold'] == 3
+
+    categories = db_manager.get_sales_by_category(START_DATE, END_DATE)
+    assert categories['Parts']['num_sales'] == 2
+    assert categories[REPAIR_SERVICE_CATEGORY]['num_sales'] == 1
+
+
+def test_reopen_reverses_income():
+    db_manager, customer_id, product_id = make_database()
+    add_sale(db_manager, customer_id, product_id)
+    repair_id = add_completed_repair(db_manager, customer_id, product_id)
+
+    assert db_manager.update_repair_status(repair_id, 'in_progress')
+
+    # The original rows stay; reversals are appended at the recorded cost
+    facts = repair_facts(db_manager, repair_id)
+    assert len(facts) == 4
+    assert [(fact['line_type'], fact['quantity'], fact['amount'], fact['cost']) for fact in facts[2:]] == [
+        ('part', -2, -160, -100),
+        ('service', -1, -100, 0),
+    ]
+
+    # Only the sale is left, and the reopened repair is not counted
+    profit = assert_engine_matches(db_manager)
+    assert profit['total_revenue'] == 80
+    assert profit['total_cost'] == 50
+    assert profit['repair_revenue'] == 0
+    assert profit['num_sales'] == 1
+
+    categories = db_manager.get_sales_by_category(START_DATE, END_DATE)
+    assert categories['Parts']['num_sales'] == 1
+    assert categories[REPAIR_SERVICE_CATEGORY]['num_sales'] == 0
+    assert db_manager.get_sales_by_payment_method(START_DATE, END_DATE)['UPI']['num_sales'] == 0
+    assert [period['num_sales'] for period in db_manager.get_sales_by_period('month', START_DATE, END_DATE)] == [1]
+
+    # Closing it again records the income once more
+    assert db_manager.complete_repair(repair_id, {'service_charge': 100})
+    profit = assert_engine_matches(db_manager)
+    assert profit['total_revenue'] == 340
+    assert profit['num_sales'] == 2
+
+
+def test_job_created_closed():
+    db_manager, customer_id, product_id = make_database()
+    repair_id = db_manager.create_repair_job({
+        'customer_id': customer_id,
+        'product_description': 'Test Bicycle',
+        'issue_description': 'Brakes',
+        'status': 'completed',
+        'parts': [{'product_id': product_id, 'quantity': 1, 'unit_price': 80}]
+    })
+
+    # Its income is recorded straight away, not by the next setup_database
+    assert [(fact['line_type'], fact['quantity'], fact['amount'], fact['cost'])
+            for fact in repair_facts(db_manager, repair_id)] == [('part', 1, 80, 50)]
+    profit = assert_engine_matches(db_manager)
+    assert profit['repair_revenue'] == 80
+    assert profit['num_sales'] == 1
+
+
+def test_closed_job_change_appends_difference():
+    db_manager, customer_id, product_id = make_database()
+    repair_id = add_completed_repair(db_manager, customer_id, product_id)
+    part_id = db_manager.get_repair_parts(repair_id)[0]['id']
+
+    assert db_manager.update_repair(repair_id, {
+        'customer_id': customer_id,
+        'product_description': 'Test Bicycle',
+        'issue_description': 'Brakes',
+        'status': 'completed',
+        'parts': [{'id': part_id, 'product_id': product_id, 'quantity': 3, 'unit_price': 80}]
+    })
+
+    facts = repair_facts(db_manager, repair_id)
+    assert (facts[-1]['line_type'], facts[-1]['quantity'], facts[-1]['amount'], facts[-1]['cost']) == \
+        ('part', 1, 80, 50)
+    assert assert_engine_matches(db_manager)['num_sales'] == 1
+
+
+def test_backfill_of_jobs_closed_before_revenue_facts():
+    db_manager, customer_id, product_id = make_database()
+
+    # Closed by an older version, which recorded no revenue facts
+    conn = sqlite3.connect(db_manager.db_path)
+    repair_id = conn.execute('''
+    INSERT INTO repair_jobs (customer_id, product_description, issue_description, status,
+                             service_charge, completed_at)
+    VALUES (?, 'Old Bicycle', 'Brakes', 'completed', 100, '2024-03-01 10:00:00')
+    ''', (customer_id,)).lastrowid
+    conn.execute('''
+    INSERT INTO repair_jobs (customer_id, product_description, issue_description, status, service_charge)
+    VALUES (?, 'Open Bicycle', 'Brakes', 'pending', 100)
+    ''', (customer_id,))
+    conn.commit()
+    conn.close()
+    db_manager.setup_database()
+
+    # Only the closed job is backfilled, dated when it was completed
+    facts = db_manager.get_sales_by_period('day', START_DATE, END_DATE)
+    assert [(period['period'], period['num_sales'], period['final_sales']) for period in facts] == \
+        [('2024-03-01', 1, 100)]
+    assert len(repair_facts(db_manager, repair_id)) == 1
+
+
+if __name__ == "__main__":
+    for test in (test_fact_totals, test_reopen_reverses_income, test_job_created_closed,
+                 test_closed_job_change_appends_difference,
+                 test_backfill_of_jobs_closed_before_revenue_facts):
+        test()
+        print(f"{test.__name__}: ok")
@@ -0,0 +1,83 @@
+import os
+import sys
+
+import numpy as np
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from screens.time_series import (bucket_count, choose_granularity, downsample_line, lttb_indices,
+                                 max_bars, possible_granularities)
+
+
+def test_lttb_keeps_ends_and_peaks():
+    x = np.arange(1000)
+    y = np.zeros(1000)
+    y[137] = 50
+    y[612] = -40
+
+    indices = lttb_indices(x, y, 20)
+    assert len(indices) == 20
+    assert indices[0] == 0 and indices[-1] == 999
+    assert list(indices) == sorted(set(indices))
+
+    # A single spike and a single dip are never averaged away
+    assert 137 in indices
+    assert 612 in indices
+
+
+def test_lttb_short_series_pass_through():
+    x = np.arange(10)
+    y = np.arange(10) ** 2
+    assert list(lttb_indices(x, y, 10)) == list(range(10))
+    assert list(lttb_indices(x, y, 50)) == list(range(10))
+    assert list(lttb_indices(x, y, 2)) == list(range(10))
+    assert list(lttb_indices([], [], 5)) == []
+
+
+def test_downsample_line():
+    values = [float(i % 7) for i in range(5000)]
+    x, y = downsample_line(values, 500)
+
+    # Half a point per pixel of the plot area
+    assert len(x) == len(y) == 200
+    assert x[0] == 0 and x[-1] == 4999
+    assert all(y == np.asarray(values)[x])
+
+    x, y = downsample_line([1, 2, 3], 500)
+    assert list(x) == [0, 1, 2]
+
+
+def test_bucket_count():
+    assert bucket_count('2025-01-01', '2025-01-31', 'day') == 31
+    assert bucket_count('2025-01-01', '2025-01-31', 'week') == 5
+    assert bucket_count('2025-01-31', '2025-03-01', 'month') == 3
+    assert bucket_count('2025-01-01', '2025-01-01', 'day') == 1
+
+
+def test_choose_granularity():
+    # 800 px holds 80 bars
+    assert max_bars(800) == 80
+    assert choose_granularity('2025-01-01', '2025-03-01', 800) == 'day'
+    assert choose_granularity('2025-01-01', '2025-12-31', 800) == 'week'
+    assert choose_granularity('2020-01-01', '2025-12-31', 800) == 'month'
+    assert choose_granularity('2025-01-01', '2025-01-31', 800, minimum='week') == 'week'
+
+    # Far too many months for the width still gives months
+    assert choose_granularity('1900-01-01', '2025-12-31', 100) == 'month'
+
+
+def test_possible_granularities():
+    assert possible_granularities('2025-01-01', '2025-12-31') == ['day', 'week', 'month']
+    assert possible_granularities('2025-01-01', '2025-12-31', minimum='week') == ['week', 'month']
+    # Every choose_granularity result is among them
+    for width in (50, 200, 800, 3000, 20000):
+        assert choose_granularity('2025-01-01', '2025-12-31', width) in \
+            possible_granularities('2025-01-01', '2025-12-31')
+
+
+if __name__ == "__main__":
+    for test in (test_lttb_keeps_ends_and_peaks, test_lttb_short_series_pass_through, test_downsample_line,
+                 test_bucket_count, test_choose_granularity, test_possible_granularities):
+        test()
+        print(f"{test.__name__}: ok")